@@ -13,6 +13,10 @@ from faker import Faker
 import uuid
 import json
 import os
+import importlib.util
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
 
 # Set random seeds for reproducibility
 np.random.seed(42)
@@ -20,6 +24,14 @@ random.seed(42)
 fake = Faker('en_AU')  # Australian locale
 Faker.seed(42)
 
+def load_project_module(relative_path):
+    """Import a project script by file path, without adding its directory to sys.path"""
+    path = PROJECT_ROOT / relative_path
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 class LogisticsDataGenerator:
     def __init__(self):
         self.start_date = datetime(2023, 1, 1)
@@ -1003,19 +1015,19 @@ class LogisticsDataGenerator:
         
         return datasets
     
-    def _generate_data_quality_report(self, datasets, output_dir):
-        """Generate data quality report"""
+    def _generate_data_quality_report(self, datasets, output_dir, chunk_size=100_000):
+        """Generate data quality report from mergeable per-chunk sketches
+        
+        Uses the same profiling sketches as the incremental quality report
+        (scripts/03_monitoring/handlers/data_sketches.py), so memory stays
+        bounded regardless of table size.
+        """
+        data_sketches = load_project_module('scripts/03_monitoring/handlers/data_sketches.py')
         report = []
         
         for name, df in datasets.items():
-            report.append({
-                'table': name,
-                'row_count': len(df),
-                'column_count': len(df.columns),
-                'null_percentage': round((df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100, 2),
-                'duplicate_rows': df.duplicated().sum(),
-                'memory_usage_mb': round(df.memory_usage(deep=True).sum() / 1024**2, 2)
-            })
+            profile = data_sketches.profile_chunks(data_sketches.iter_chunks(df, chunk_size))
+            report.append({'table': name, **profile.summary()})
         
         report_df = pd.DataFrame(report)
         report_df.to_csv(os.path.join(output_dir, 'data_quality_report.csv'), index=False)
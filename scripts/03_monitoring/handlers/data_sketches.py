@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+Mergeable Data Profiling Sketches
+Bounded-memory profiling for large tables: HyperLogLog distinct counts,
+t-digest quantiles and count-min heavy hitters. Every sketch is built per
+chunk and merged across chunks or workers, so profile cost never depends
+on holding a whole table in memory. Duplicate rows are counted exactly up
+to a fixed number of distinct rows and estimated from a hash sample of
+rows beyond it, so a table without duplicates never reports any.
+"""
+
+import base64
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_UINT64_MASK = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def hash_values(values) -> np.ndarray:
+    """Hash a Series/array/DataFrame to uint64 (rows are hashed for DataFrames)"""
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Vectorised bit length of uint64 values"""
+    values = values.copy()
+    length = np.zeros(values.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values >= (np.uint64(1) << np.uint64(shift))
+        length[mask] += shift
+        values[mask] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def _encode_array(array: np.ndarray) -> Dict:
+    return {
+        'dtype': str(array.dtype),
+        'shape': list(array.shape),
+        'data': base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+    }
+
+
+def _decode_array(state: Dict) -> np.ndarray:
+    array = np.frombuffer(base64.b64decode(state['data']), dtype=state['dtype'])
+    return array.reshape(state['shape']).copy()
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with an exact sparse mode for small sets"""
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        # Exact hashes are kept until they would outgrow the dense registers
+        self.sparse_limit = self.num_registers // 2
+        self.sparse: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self.registers: Optional[np.ndarray] = None
+
+    def update_hashes(self, hashes: np.ndarray):
+        """Add pre-computed uint64 hashes"""
+        if len(hashes) == 0:
+            return
+        if self.sparse is not None:
+            self.sparse = np.union1d(self.sparse, hashes)
+            if len(self.sparse) > self.sparse_limit:
+                self._densify()
+            return
+        self._update_registers(hashes)
+
+    def update(self, values):
+        """Hash and add values (Series, array or DataFrame rows)"""
+        self.update_hashes(hash_values(values))
+
+    def _densify(self):
+        self.registers = np.zeros(self.num_registers, dtype=np.uint8)
+        self._update_registers(self.sparse)
+        self.sparse = None
+
+    def _update_registers(self, hashes: np.ndarray):
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = (hashes << p) & _UINT64_MASK
+        remainder >>= p
+        rank = (64 - self.precision) - _bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Merge another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        if other.sparse is not None:
+            self.update_hashes(other.sparse)
+            return self
+        if self.sparse is not None:
+            self._densify()
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values (exact while sparse)"""
+        if self.sparse is not None:
+            return int(len(self.sparse))
+
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> Dict:
+        return {
+            'precision': self.precision,
+            'sparse': _encode_array(self.sparse) if self.sparse is not None else None,
+            'registers': _encode_array(self.registers) if self.registers is not None else None
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'HyperLogLog':
+        sketch = cls(state['precision'])
+        sketch.sparse = _decode_array(state['sparse']) if state['sparse'] else None
+        sketch.registers = _decode_array(state['registers']) if state['registers'] else None
+        return sketch
+
+
+class DuplicateRowSampler:
+    """Mergeable duplicate-row counter with bounded memory
+
+    Distinct row hashes are kept with their multiplicities, so duplicates
+    are counted exactly while a table has at most `capacity` distinct rows.
+    Past that, only hashes whose top `level` bits are zero are kept: a
+    2^-level sample of the distinct rows, chosen by hash so every copy of a
+    row is kept or dropped together. Duplicates seen in the sample are
+    scaled by 2^level. A table without duplicates always counts zero.
+    Memory is 16 bytes per kept hash; each chunk costs a sort of at most
+    capacity + chunk hashes.
+    """
+
+    def __init__(self, capacity: int = 1 << 20):
+        self.capacity = capacity
+        self.level = 0
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def _sampled(self, hashes: np.ndarray) -> np.ndarray:
+        if self.level == 0:
+            return np.ones(len(hashes), dtype=bool)
+        return (hashes >> np.uint64(64 - self.level)) == 0
+
+    def _add(self, hashes: np.ndarray, counts: np.ndarray):
+        keep = self._sampled(hashes)
+        hashes = np.concatenate([self.hashes, hashes[keep]])
+        counts = np.concatenate([self.counts, counts[keep]])
+        self.hashes, inverse = np.unique(hashes, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(self.hashes)).astype(np.int64)
+        while len(self.hashes) > self.capacity:
+            self.level += 1
+            keep = self._sampled(self.hashes)
+            self.hashes, self.counts = self.hashes[keep], self.counts[keep]
+
+    def update_hashes(self, hashes: np.ndarray):
+        if len(hashes):
+            self._add(hashes, np.ones(len(hashes), dtype=np.int64))
+
+    def update(self, values):
+        self.update_hashes(hash_values(values))
+
+    def merge(self, other: 'DuplicateRowSampler') -> 'DuplicateRowSampler':
+        if other.level > self.level:
+            self.level = other.level
+            keep = self._sampled(self.hashes)
+            self.hashes, self.counts = self.hashes[keep], self.counts[keep]
+        if len(other.hashes):
+            self._add(other.hashes, other.counts)
+        return self
+
+    @property
+    def exact(self) -> bool:
+        return self.level == 0
+
+    def duplicates(self) -> int:
+        """Rows that repeat an earlier row (estimated once sampling has started)"""
+        return int((self.counts.sum() - len(self.counts)) << self.level)
+
+    def to_dict(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'level': self.level,
+            'hashes': _encode_array(self.hashes),
+            'counts': _encode_array(self.counts)
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'DuplicateRowSampler':
+        sampler = cls(state['capacity'])
+        sampler.level = state['level']
+        sampler.hashes = _decode_array(state['hashes'])
+        sampler.counts = _decode_array(state['counts'])
+        return sampler
+
+
+class TDigest:
+    """Merging t-digest for streaming quantiles (k1 scale function)"""
+
+    def __init__(self, compression: float = 200.0):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total_weight(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """Add a batch of numeric values (NaNs are ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Merge another digest into this one"""
+        if len(other.means) == 0:
+            return self
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]),
+                       np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='mergesort')
+        means, weights = means[order], weights[order]
+
+        # Group centroids whose left edge falls in the same unit of the k1 scale
+        cumulative = np.cumsum(weights)
+        q_left = (cumulative - weights) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        bins = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(bins) != 0])
+
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile q (0..1)"""
+        return float(self.quantiles([q])[0])
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if len(self.means) == 0:
+            return np.full(len(qs), np.nan)
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(qs * total, positions, values)
+
+    def to_dict(self) -> Dict:
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min if np.isfinite(self.min) else None,
+            'max': self.max if np.isfinite(self.max) else None
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'TDigest':
+        digest = cls(state['compression'])
+        digest.means = np.asarray(state['means'], dtype=np.float64)
+        digest.weights = np.asarray(state['weights'], dtype=np.float64)
+        digest.min = state['min'] if state['min'] is not None else np.inf
+        digest.max = state['max'] if state['max'] is not None else -np.inf
+        return digest
+
+
+class CountMinSketch:
+    """Count-min frequency sketch that tracks the top-k heavy hitters"""
+
+    # Odd 64-bit multipliers for multiply-shift hashing, one per row
+    _SEEDS = np.array([
+        0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+        0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9
+    ], dtype=np.uint64)
+
+    def __init__(self, width: int = 2048, depth: int = 4, top_k: int = 10):
+        if width & (width - 1):
+            raise ValueError(f"CountMinSketch width must be a power of two, got {width}")
+        if not 1 <= depth <= len(self._SEEDS):
+            raise ValueError(f"CountMinSketch depth must be between 1 and {len(self._SEEDS)}")
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self.candidates: Dict[int, str] = {}
+
+    def _indexes(self, hashes: np.ndarray) -> np.ndarray:
+        shift = np.uint64(64 - int(np.log2(self.width)))
+        seeds = self._SEEDS[:self.depth, None]
+        return ((hashes[None, :] * seeds) & _UINT64_MASK) >> shift
+
+    def update(self, values):
+        """Add a batch of values and refresh the heavy-hitter candidates"""
+        values = pd.Series(values).dropna()
+        if len(values) == 0:
+            return
+        counts = values.astype(str).value_counts(sort=True)
+        hashes = hash_values(counts.index.to_series())
+        indexes = self._indexes(hashes)
+        weights = counts.to_numpy(dtype=np.int64)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(indexes[row].astype(np.int64), weights=weights,
+                                           minlength=self.width).astype(np.int64)
+        self.total += int(weights.sum())
+
+        for key, hashed in zip(counts.index[:self.top_k], hashes[:self.top_k]):
+            self.candidates[int(hashed)] = key
+        self._trim_candidates()
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        """Merge another sketch with identical dimensions"""
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge CountMinSketch instances with different dimensions")
+        self.table += other.table
+        self.total += other.total
+        self.candidates.update(other.candidates)
+        self._trim_candidates()
+        return self
+
+    def estimate_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        indexes = self._indexes(np.asarray(hashes, dtype=np.uint64)).astype(np.int64)
+        rows = np.arange(self.depth)[:, None]
+        return self.table[rows, indexes].min(axis=0)
+
+    def estimate(self, value) -> int:
+        """Estimated (upper-bound) frequency of a single value"""
+        return int(self.estimate_hashes(hash_values(pd.Series([str(value)])))[0])
+
+    def _trim_candidates(self):
+        if len(self.candidates) <= self.top_k:
+            return
+        hashes = np.fromiter(self.candidates.keys(), dtype=np.uint64, count=len(self.candidates))
+        keep = hashes[np.argsort(-self.estimate_hashes(hashes), kind='stable')[:self.top_k]]
+        self.candidates = {int(h): self.candidates[int(h)] for h in keep}
+
+    def heavy_hitters(self) -> List[Dict]:
+        """Top-k values with estimated counts and share of all values"""
+        if not self.candidates:
+            return []
+        hashes = np.fromiter(self.candidates.keys(), dtype=np.uint64, count=len(self.candidates))
+        estimates = self.estimate_hashes(hashes)
+        order = np.argsort(-estimates, kind='stable')
+        return [
+            {
+                'value': self.candidates[int(hashes[i])],
+                'count': int(estimates[i]),
+                'share': round(float(estimates[i]) / self.total, 4) if self.total else 0.0
+            }
+            for i in order
+        ]
+
+    def to_dict(self) -> Dict:
+        return {
+            'width': self.width,
+            'depth': self.depth,
+            'top_k': self.top_k,
+            'total': self.total,
+            'table': _encode_array(self.table),
+            'candidates': {str(h): v for h, v in self.candidates.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'CountMinSketch':
+        sketch = cls(state['width'], state['depth'], state['top_k'])
+        sketch.total = state['total']
+        sketch.table = _decode_array(state['table'])
+        sketch.candidates = {int(h): v for h, v in state['candidates'].items()}
+        return sketch
+
+
+class TableProfile:
+    """Mergeable per-table profile built from sketches, one chunk at a time"""
+
+    def __init__(self, hll_precision: int = 14, tdigest_compression: float = 200.0,
+                 cms_width: int = 2048, top_k: int = 10, max_row_hashes: int = 1 << 20):
+        self.hll_precision = hll_precision
+        self.tdigest_compression = tdigest_compression
+        self.cms_width = cms_width
+        self.top_k = top_k
+        self.max_row_hashes = max_row_hashes
+
+        self.row_count = 0
+        self.memory_bytes = 0
+        self.columns: List[str] = []
+        self.null_counts: Dict[str, int] = {}
+        self.rows = DuplicateRowSampler(max_row_hashes)
+        self.distinct: Dict[str, HyperLogLog] = {}
+        self.quantiles: Dict[str, TDigest] = {}
+        self.frequencies: Dict[str, CountMinSketch] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        """Profile one chunk of rows"""
+        if chunk.empty:
+            return
+        for column in chunk.columns:
+            if column not in self.null_counts:
+                self.columns.append(column)
+                self.null_counts[column] = 0
+                self.distinct[column] = HyperLogLog(self.hll_precision)
+
+        self.row_count += len(chunk)
+        self.memory_bytes += int(chunk.memory_usage(deep=True).sum())
+        self.rows.update_hashes(hash_values(chunk))
+
+        for column, nulls in chunk.isnull().sum().items():
+            self.null_counts[column] += int(nulls)
+
+        for column in chunk.columns:
+            series = chunk[column]
+            self.distinct[column].update(series)
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                self.quantiles.setdefault(column, TDigest(self.tdigest_compression)).update(series.to_numpy())
+            else:
+                self.frequencies.setdefault(
+                    column, CountMinSketch(self.cms_width, top_k=self.top_k)
+                ).update(series)
+
+    def merge(self, other: 'TableProfile') -> 'TableProfile':
+        """Merge a profile computed on another chunk, partition or worker"""
+        self.row_count += other.row_count
+        self.memory_bytes += other.memory_bytes
+        self.rows.merge(other.rows)
+        for column in other.columns:
+            if column not in self.null_counts:
+                self.columns.append(column)
+                self.null_counts[column] = 0
+                self.distinct[column] = HyperLogLog(self.hll_precision)
+            self.null_counts[column] += other.null_counts[column]
+            self.distinct[column].merge(other.distinct[column])
+        for column, digest in other.quantiles.items():
+            self.quantiles.setdefault(column, TDigest(self.tdigest_compression)).merge(digest)
+        for column, sketch in other.frequencies.items():
+            self.frequencies.setdefault(column, CountMinSketch(self.cms_width, top_k=self.top_k)).merge(sketch)
+        return self
+
+    @property
+    def null_percentage(self) -> float:
+        cells = self.row_count * len(self.columns)
+        return round(sum(self.null_counts.values()) / cells * 100, 2) if cells else 0.0
+
+    @property
+    def duplicate_rows(self) -> int:
+        return self.rows.duplicates()
+
+    def summary(self) -> Dict:
+        """Table-level summary in the shape of the data quality report"""
+        return {
+            'row_count': self.row_count,
+            'column_count': len(self.columns),
+            'null_percentage': self.null_percentage,
+            'duplicate_rows': self.duplicate_rows,
+            'memory_usage_mb': round(self.memory_bytes / 1024**2, 2)
+        }
+
+    def column_summary(self) -> List[Dict]:
+        """Per-column distinct counts, quartiles and heavy hitters"""
+        summaries = []
+        for column in self.columns:
+            summary = {
+                'column': column,
+                'null_count': self.null_counts[column],
+                'distinct_count': self.distinct[column].count()
+            }
+            if column in self.quantiles:
+                quartiles = self.quantiles[column].quantiles([0.25, 0.5, 0.75, 0.99])
+                summary.update(dict(zip(['p25', 'p50', 'p75', 'p99'], map(float, quartiles))))
+            if column in self.frequencies:
+                summary['heavy_hitters'] = self.frequencies[column].heavy_hitters()
+            summaries.append(summary)
+        return summaries
+
+    def to_dict(self) -> Dict:
+        return {
+            'config': {
+                'hll_precision': self.hll_precision,
+                'tdigest_compression': self.tdigest_compression,
+                'cms_width': self.cms_width,
+                'top_k': self.top_k,
+                'max_row_hashes': self.max_row_hashes
+            },
+            'row_count': self.row_count,
+            'memory_bytes': self.memory_bytes,
+            'columns': self.columns,
+            'null_counts': self.null_counts,
+            'rows': self.rows.to_dict(),
+            'distinct': {c: s.to_dict() for c, s in self.distinct.items()},
+            'quantiles': {c: s.to_dict() for c, s in self.quantiles.items()},
+            'frequencies': {c: s.to_dict() for c, s in self.frequencies.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'TableProfile':
+        profile = cls(**state['config'])
+        profile.row_count = state['row_count']
+        profile.memory_bytes = state['memory_bytes']
+        profile.columns = list(state['columns'])
+        profile.null_counts = dict(state['null_counts'])
+        profile.rows = DuplicateRowSampler.from_dict(state['rows'])
+        profile.distinct = {c: HyperLogLog.from_dict(s) for c, s in state['distinct'].items()}
+        profile.quantiles = {c: TDigest.from_dict(s) for c, s in state['quantiles'].items()}
+        profile.frequencies = {c: CountMinSketch.from_dict(s) for c, s in state['frequencies'].items()}
+        return profile
+
+
+def iter_chunks(df: pd.DataFrame, chunk_size: int = 100_000) -> Iterable[pd.DataFrame]:
+    """Yield row slices of an in-memory frame"""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], **profile_options) -> TableProfile:
+    """Build a profile from any iterable of chunks (e.g. pd.read_csv(chunksize=...))"""
+    profile = TableProfile(**profile_options)
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile
+
+
+def profile_csv(path: str, chunk_size: int = 100_000, **profile_options) -> TableProfile:
+    """Profile a CSV file without loading it into memory"""
+    return profile_chunks(pd.read_csv(path, chunksize=chunk_size, low_memory=False), **profile_options)
@@ -6,10 +6,17 @@ Simple script to generate a basic quality report for CI/CD
 
 import os
 import json
+import argparse
 from datetime import datetime
 
-def generate_quality_report():
-    """Generate a simple quality report"""
+def generate_quality_report(data_dir=None, state_dir='reports/profile_state',
+                            full_refresh=False, workers=1):
+    """Generate a simple quality report
+    
+    When data_dir is given, every table under it is profiled incrementally:
+    only partitions that are new or changed since the last run are scanned
+    and merged with the sketches persisted in state_dir.
+    """
     
     # Create reports directory if it doesn't exist
     os.makedirs('reports', exist_ok=True)
@@ -32,6 +39,12 @@ def generate_quality_report():
         }
     }
     
+    if data_dir:
+        # Imported here so a report without profiling does not need pandas
+        from profile_state import IncrementalProfiler
+        profiler = IncrementalProfiler(state_dir, max_workers=workers)
+        report["profiles"] = profiler.profile_directory(data_dir, full_refresh=full_refresh)
+    
     # Write JSON report
     with open('reports/quality_report.json', 'w') as f:
         json.dump(report, f, indent=2)
@@ -102,6 +115,35 @@ def generate_quality_report():
     
     html_content += """
         </table>
+    """
+    
+    if report.get("profiles"):
+        html_content += """
+        <h2>Table Profiles</h2>
+        <table>
+            <tr>
+                <th>Table</th>
+                <th>Rows</th>
+                <th>Null %</th>
+                <th>Duplicate Rows</th>
+                <th>Partitions Profiled / Total</th>
+            </tr>
+        """
+        for profile in report["profiles"]:
+            html_content += f"""
+            <tr>
+                <td>{profile['table']}</td>
+                <td>{profile['row_count']:,}</td>
+                <td>{profile['null_percentage']}</td>
+                <td>{profile['duplicate_rows']:,}{'' if profile['duplicates_exact'] else ' (est.)'}</td>
+                <td>{profile['profiled']} / {profile['partitions']}</td>
+            </tr>
+            """
+        html_content += """
+        </table>
+        """
+    
+    html_content += """
     </body>
     </html>
     """
@@ -113,4 +155,14 @@ def generate_quality_report():
     print(f"📊 Report saved to: reports/quality_report.html")
 
 if __name__ == "__main__":
-    generate_quality_report()
+    parser = argparse.ArgumentParser(description="Generate Data Quality Report")
+    parser.add_argument("--data-dir", help="Directory of table files/partitions to profile")
+    parser.add_argument("--state-dir", default="reports/profile_state",
+                       help="Where per-partition profile sketches are persisted")
+    parser.add_argument("--full-refresh", action="store_true",
+                       help="Ignore stored state and re-profile every partition")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="Worker processes used to profile partitions")
+    
+    args = parser.parse_args()
+    generate_quality_report(args.data_dir, args.state_dir, args.full_refresh, args.workers)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Incremental Partition Profiling
+Persists per-partition profile sketches so each quality report run only
+profiles partitions that are new or changed since the previous run and
+merges them with the stored state. Every sketch in the merged state has a
+fixed size (row hashes are capped by the duplicate sampler), so reading and
+rewriting it costs the same however much history a table has.
+
+A table source is either a single file (one partition) or a directory of
+files, e.g. Hive-style ``fact_shipments/date_key=20250101/part-0.parquet``,
+where every file is a partition keyed by its relative path.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from data_sketches import TableProfile, profile_chunks
+
+SUPPORTED_EXTENSIONS = ('.csv', '.parquet')
+
+
+def iter_file_chunks(path: str, chunk_size: int = 100_000) -> Iterable[pd.DataFrame]:
+    """Stream a CSV or Parquet file as DataFrame chunks"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        try:
+            yield from pd.read_csv(path, chunksize=chunk_size, low_memory=False)
+        except pd.errors.EmptyDataError:
+            return
+
+
+def profile_partition(path: str, chunk_size: int = 100_000, profile_options: Optional[Dict] = None) -> Dict:
+    """Profile one partition file and return its serialisable state"""
+    return profile_chunks(iter_file_chunks(path, chunk_size), **(profile_options or {})).to_dict()
+
+
+def discover_tables(data_dir: str) -> Dict[str, Dict[str, str]]:
+    """Map table name -> {partition key: file path} for a data directory"""
+    tables = {}
+    for entry in sorted(Path(data_dir).iterdir()):
+        if entry.is_file() and entry.suffix in SUPPORTED_EXTENSIONS:
+            tables[entry.stem] = {entry.name: str(entry)}
+        elif entry.is_dir():
+            partitions = {
+                str(path.relative_to(entry)): str(path)
+                for path in sorted(entry.rglob('*'))
+                if path.is_file() and path.suffix in SUPPORTED_EXTENSIONS
+            }
+            if partitions:
+                tables[entry.name] = partitions
+    return tables
+
+
+def file_fingerprint(path: str) -> str:
+    """Cheap change detector: size and modification time"""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class PartitionProfileStore:
+    """On-disk store of per-partition profiles and the merged table profile"""
+
+    def __init__(self, state_dir: str):
+        self.state_dir = Path(state_dir)
+
+    def _table_dir(self, table: str) -> Path:
+        return self.state_dir / table
+
+    def _partition_file(self, table: str, partition: str) -> Path:
+        digest = hashlib.sha1(partition.encode('utf-8')).hexdigest()[:16]
+        return self._table_dir(table) / 'partitions' / f"{digest}.json.gz"
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict]:
+        if not path.exists():
+            return None
+        with gzip.open(path, 'rt') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write(path: Path, data: Dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with gzip.open(tmp_path, 'wt') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def load_manifest(self, table: str) -> Dict[str, str]:
+        """Partition key -> fingerprint recorded by the previous run"""
+        return self._read(self._table_dir(table) / 'manifest.json.gz') or {}
+
+    def load_merged(self, table: str) -> Optional[TableProfile]:
+        state = self._read(self._table_dir(table) / 'merged.json.gz')
+        return TableProfile.from_dict(state) if state else None
+
+    def load_partition(self, table: str, partition: str) -> TableProfile:
+        return TableProfile.from_dict(self._read(self._partition_file(table, partition)))
+
+    def save_partition(self, table: str, partition: str, state: Dict):
+        self._write(self._partition_file(table, partition), state)
+
+    def remove_partition(self, table: str, partition: str):
+        self._partition_file(table, partition).unlink(missing_ok=True)
+
+    def save(self, table: str, manifest: Dict[str, str], merged: TableProfile):
+        self._write(self._table_dir(table) / 'merged.json.gz', merged.to_dict())
+        self._write(self._table_dir(table) / 'manifest.json.gz', manifest)
+
+
+class IncrementalProfiler:
+    """Profiles only new or changed partitions and merges them with stored state"""
+
+    def __init__(self, state_dir: str, chunk_size: int = 100_000, max_workers: int = 1,
+                 profile_options: Optional[Dict] = None):
+        self.store = PartitionProfileStore(state_dir)
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.profile_options = profile_options or {}
+
+    def _profile_partitions(self, paths: List[str]) -> List[Dict]:
+        if self.max_workers <= 1 or len(paths) <= 1:
+            return [profile_partition(p, self.chunk_size, self.profile_options) for p in paths]
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(profile_partition, paths,
+                                     [self.chunk_size] * len(paths),
+                                     [self.profile_options] * len(paths)))
+
+    def profile_table(self, table: str, partitions: Dict[str, str],
+                      full_refresh: bool = False) -> Tuple[TableProfile, Dict]:
+        """Bring a table's stored profile up to date with its partitions"""
+        previous = {} if full_refresh else self.store.load_manifest(table)
+        current = {key: file_fingerprint(path) for key, path in partitions.items()}
+
+        new = [key for key in current if key not in previous]
+        changed = [key for key in current if key in previous and previous[key] != current[key]]
+        removed = [key for key in previous if key not in current]
+        stale = changed + new
+
+        if not (stale or removed or full_refresh):
+            merged = self.store.load_merged(table)
+            if merged is not None:
+                # Nothing changed: the stored merge is the answer and is not rewritten
+                return merged, {'partitions': len(current), 'profiled': 0, 'reused': len(current), 'removed': 0}
+
+        states = self._profile_partitions([partitions[key] for key in stale])
+        for key, state in zip(stale, states):
+            self.store.save_partition(table, key, state)
+        for key in removed:
+            self.store.remove_partition(table, key)
+
+        merged = None if (changed or removed or full_refresh) else self.store.load_merged(table)
+        if merged is not None:
+            # Append-only change: fold the new partitions into the stored merge
+            for state in states:
+                merged.merge(TableProfile.from_dict(state))
+        else:
+            # Sketches cannot be subtracted, so re-merge from stored partition state
+            merged = TableProfile(**self.profile_options)
+            fresh = dict(zip(stale, states))
+            for key in current:
+                profile = TableProfile.from_dict(fresh[key]) if key in fresh else self.store.load_partition(table, key)
+                merged.merge(profile)
+
+        self.store.save(table, current, merged)
+        stats = {
+            'partitions': len(current),
+            'profiled': len(stale),
+            'reused': len(current) - len(stale),
+            'removed': len(removed)
+        }
+        return merged, stats
+
+    def profile_directory(self, data_dir: str, full_refresh: bool = False) -> List[Dict]:
+        """Profile every table under data_dir and return report rows"""
+        rows = []
+        for table, partitions in discover_tables(data_dir).items():
+            profile, stats = self.profile_table(table, partitions, full_refresh)
+            rows.append({'table': table, **profile.summary(), 'duplicates_exact': profile.rows.exact, **stats})
+        return rows
@@ -35,3 +35,16 @@ CREATE OR REPLACE TABLE LOGISTICS_DW_PROD.MONITORING.TBL_data_quality_alerts (
     resolved_at TIMESTAMP_NTZ,
     resolved_by VARCHAR(100)
 ) COMMENT = 'Data quality test failure alerts';
+
+-- Automation run history (written by the master orchestrator's ExecutionLogWriter,
+-- read by the automation dashboard). Kept across re-runs of this script.
+CREATE TABLE IF NOT EXISTS LOGISTICS_DW_PROD.MONITORING.AUTOMATION_EXECUTION_LOG (
+    execution_timestamp TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    environment VARCHAR(20),
+    automation_name VARCHAR(100),
+    status VARCHAR(20),
+    execution_duration_seconds FLOAT,
+    queue_delay_seconds FLOAT,
+    retry_count INTEGER,
+    rows_processed INTEGER
+) COMMENT = 'Automation job executions: status, duration, queue delay and retries';
@@ -8,7 +8,7 @@ SELECT
     created_on
 FROM INFORMATION_SCHEMA.TABLES 
 WHERE table_schema = 'MONITORING'
-AND table_name LIKE '%ALERT%'
+AND (table_name LIKE '%ALERT%' OR table_name = 'AUTOMATION_EXECUTION_LOG')
 ORDER BY created_on DESC;
 
 -- Check if monitoring tasks exist and are enabled
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Data Quality Alert Pipeline
+Sits between the checks and the alert channels. Issues are fingerprinted by
+table and metric. A repeat of an already-alerted issue is suppressed until
+its suppression window passes, a status change is sent at once as an
+escalation (or de-escalation), and a GOOD result clears the issue so its
+next occurrence alerts as new. Alert rows are queued in a local SQLite
+outbox and written to data_quality_alerts as one multi-row INSERT once
+enough rows have queued or the oldest has waited long enough. State lives
+on disk because each monitor run may be a fresh process.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+STATUS_RANK = {'GOOD': 0, 'WARNING': 1, 'CRITICAL': 2}
+
+ALERT_COLUMNS = ('alert_timestamp', 'environment', 'critical_count', 'warning_count', 'alert_data')
+
+
+def fingerprint(issue: Dict) -> str:
+    """Identity of an issue across cycles; the status is deliberately left out"""
+    key = f"{issue.get('table_name')}|{issue.get('metric')}".lower()
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+class _SQLiteFile:
+    """A connection per call (sqlite3 connections cannot cross threads)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    @contextmanager
+    def connect(self):
+        with self._lock:
+            connection = sqlite3.connect(self.path, timeout=30)
+            try:
+                with connection:
+                    yield connection
+            finally:
+                connection.close()
+
+
+class AlertStateStore(_SQLiteFile):
+    """Dedup state per fingerprint plus the outbox of unsent alert rows"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        with self.connect() as connection:
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS alert_state (
+                fingerprint TEXT PRIMARY KEY,
+                table_name TEXT,
+                metric TEXT,
+                status TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                last_sent TEXT NOT NULL,
+                suppressed_count INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS alert_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                queued_at TEXT NOT NULL,
+                alert_timestamp TEXT NOT NULL,
+                environment TEXT NOT NULL,
+                critical_count INTEGER NOT NULL,
+                warning_count INTEGER NOT NULL,
+                alert_data TEXT NOT NULL
+            )
+            """)
+
+    def load_state(self) -> Dict[str, Dict]:
+        with self.connect() as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute("SELECT * FROM alert_state").fetchall()
+        return {row['fingerprint']: dict(row) for row in rows}
+
+    def save_state(self, states: List[Dict], expired: List[str]):
+        with self.connect() as connection:
+            connection.executemany("""
+            INSERT OR REPLACE INTO alert_state
+                (fingerprint, table_name, metric, status, first_seen, last_seen, last_sent, suppressed_count)
+            VALUES (:fingerprint, :table_name, :metric, :status, :first_seen, :last_seen, :last_sent, :suppressed_count)
+            """, states)
+            connection.executemany("DELETE FROM alert_state WHERE fingerprint = ?", [(fp,) for fp in expired])
+
+    def enqueue(self, row: Dict, queued_at: datetime):
+        with self.connect() as connection:
+            connection.execute(
+                f"INSERT INTO alert_outbox (queued_at, {', '.join(ALERT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                (queued_at.isoformat(), *(row[column] for column in ALERT_COLUMNS))
+            )
+
+    def pending(self) -> List[Dict]:
+        with self.connect() as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute("SELECT * FROM alert_outbox ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def remove(self, ids: List[int]):
+        with self.connect() as connection:
+            connection.executemany("DELETE FROM alert_outbox WHERE id = ?", [(i,) for i in ids])
+
+
+class SnowflakeAlertSink:
+    """Writes alert rows to data_quality_alerts with one INSERT per batch"""
+
+    def __init__(self, session_factory: Callable, table: str = "data_quality_alerts"):
+        """
+        Args:
+            session_factory: zero-argument callable returning a context manager
+                             that yields a Snowpark session
+        """
+        self.session_factory = session_factory
+        self.table = table
+
+    @staticmethod
+    def _literal(value) -> str:
+        if value is None:
+            return "NULL"
+        if isinstance(value, str):
+            # Snowflake string literals treat backslash as an escape character
+            return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+        return str(value)
+
+    def write(self, rows: List[Dict]):
+        values = ",\n".join(
+            "(" + ", ".join(self._literal(row[column]) for column in ALERT_COLUMNS) + ")" for row in rows
+        )
+        # PARSE_JSON is not allowed in a VALUES list, so select from it instead
+        query = f"""
+        INSERT INTO {self.table} ({', '.join(ALERT_COLUMNS)})
+        SELECT column1::TIMESTAMP_NTZ, column2, column3, column4, PARSE_JSON(column5)
+        FROM VALUES {values}
+        """
+        with self.session_factory() as session:
+            session.sql(query).collect()
+
+
+class SQLiteAlertSink(_SQLiteFile):
+    """Local stand-in for data_quality_alerts, for testing without Snowflake"""
+
+    def __init__(self, path: str, table: str = "data_quality_alerts"):
+        super().__init__(path)
+        self.table = table
+        with self.connect() as connection:
+            connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                alert_timestamp TEXT,
+                environment TEXT,
+                critical_count INTEGER,
+                warning_count INTEGER,
+                alert_data TEXT
+            )
+            """)
+
+    def write(self, rows: List[Dict]):
+        with self.connect() as connection:
+            connection.executemany(
+                f"INSERT INTO {self.table} ({', '.join(ALERT_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                [tuple(row[column] for column in ALERT_COLUMNS) for row in rows]
+            )
+
+
+class AlertPipeline:
+    """Dedup, suppression and escalation in front of a batched alert sink"""
+
+    def __init__(self, store: AlertStateStore, sink, suppression_minutes: Dict[str, float],
+                 max_batch_size: int = 50, flush_interval_seconds: float = 900,
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        Args:
+            suppression_minutes: per status, how long a repeat of an alerted issue stays quiet
+            max_batch_size: queued rows that trigger a flush
+            flush_interval_seconds: age of the oldest queued row that triggers a flush
+        """
+        self.store = store
+        self.sink = sink
+        self.suppression_minutes = suppression_minutes
+        self.max_batch_size = max_batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.clock = clock
+
+    def _window(self, status: str) -> timedelta:
+        return timedelta(minutes=self.suppression_minutes.get(status, 0))
+
+    def process(self, issues: List[Dict], expire_unseen: bool = True) -> List[Dict]:
+        """Issues that should be sent now, each tagged with an alert_reason
+
+        new: first time this table/metric is alerted
+        escalated / de-escalated: the status changed since the last alert
+        reminder: still failing after the suppression window
+        Anything else is suppressed and counted. A GOOD result resolves its
+        issue (the state is dropped, so a recurrence alerts as new).
+        expire_unseen: also drop state for issues not reported at all for
+                       longer than their window; pass False for a cycle in
+                       which a check failed, since its issues were not seen
+        """
+        now = self.clock()
+        states = self.store.load_state()
+        alertable = []
+        updated = {}
+        resolved = []
+        # A table/metric can have several results (e.g. one per relationship); any failing one wins
+        flagged = {fingerprint(issue) for issue in issues if issue['status'] != 'GOOD'}
+
+        for issue in issues:
+            fp = fingerprint(issue)
+            if fp in updated or fp in resolved:
+                continue  # the same table/metric reported twice in one cycle
+            state = states.get(fp)
+            status = issue['status']
+            if status == 'GOOD':
+                if state is not None and fp not in flagged:
+                    resolved.append(fp)
+                continue
+            if state is None:
+                reason = 'new'
+            elif STATUS_RANK.get(status, 0) > STATUS_RANK.get(state['status'], 0):
+                reason = 'escalated'
+            elif status != state['status']:
+                reason = 'de-escalated'
+            elif now - datetime.fromisoformat(state['last_sent']) >= self._window(status):
+                reason = 'reminder'
+            else:
+                reason = None
+
+            if reason:
+                alertable.append({**issue, 'alert_reason': reason, 'fingerprint': fp,
+                                  'suppressed_since_last_alert': state['suppressed_count'] if state else 0})
+                updated[fp] = {
+                    'fingerprint': fp, 'table_name': issue.get('table_name'), 'metric': issue.get('metric'),
+                    'status': status, 'first_seen': state['first_seen'] if state else now.isoformat(),
+                    'last_seen': now.isoformat(), 'last_sent': now.isoformat(), 'suppressed_count': 0
+                }
+            else:
+                updated[fp] = {**state, 'last_seen': now.isoformat(), 'suppressed_count': state['suppressed_count'] + 1}
+
+        expired = [
+            fp for fp, state in states.items()
+            if expire_unseen and fp not in updated and fp not in resolved
+            and now - datetime.fromisoformat(state['last_seen']) > self._window(state['status'])
+        ]
+        self.store.save_state(list(updated.values()), resolved + expired)
+
+        suppressed = len(updated) - len(alertable)
+        if suppressed:
+            print(f"🔕 {suppressed} repeated issue(s) suppressed")
+        if resolved:
+            print(f"✅ {len(resolved)} issue(s) resolved")
+        return alertable
+
+    def enqueue(self, row: Dict):
+        """Queue an alert row for the next batched write"""
+        self.store.enqueue(row, self.clock())
+        self.flush()
+
+    def flush(self, force: bool = False) -> int:
+        """Write queued rows if the batch is full, the oldest is due, or force; returns rows written"""
+        pending = self.store.pending()
+        if not pending:
+            return 0
+        oldest = datetime.fromisoformat(pending[0]['queued_at'])
+        due = (self.clock() - oldest).total_seconds() >= self.flush_interval_seconds
+        if not (force or due or len(pending) >= self.max_batch_size):
+            return 0
+
+        written = 0
+        for start in range(0, len(pending), self.max_batch_size):
+            batch = pending[start:start + self.max_batch_size]
+            try:
+                self.sink.write(batch)
+            except Exception as e:
+                # Rows stay queued and are retried on the next flush
+                print(f"❌ Error writing {len(batch)} alert row(s): {e}")
+                break
+            self.store.remove([row['id'] for row in batch])
+            written += len(batch)
+        if written:
+            print(f"📝 Wrote {written} alert row(s) to {getattr(self.sink, 'table', 'alert sink')}")
+        return written
+
+
+def alert_row(alertable: List[Dict], environment: str, timestamp: Optional[datetime] = None) -> Dict:
+    """One data_quality_alerts row summarizing a cycle's alertable issues"""
+    return {
+        'alert_timestamp': (timestamp or datetime.now()).isoformat(),
+        'environment': environment,
+        'critical_count': sum(1 for issue in alertable if issue['status'] == 'CRITICAL'),
+        'warning_count': sum(1 for issue in alertable if issue['status'] == 'WARNING'),
+        'alert_data': json.dumps(alertable, default=str)
+    }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Async Automation Runner
+Fans automation jobs out on one asyncio event loop. A job is a subprocess
+command, a coroutine function or a blocking callable run on an executor.
+Subprocesses are killed and coroutines cancelled when they time out, and
+failed attempts are retried with exponential backoff. A blocking callable
+cannot be stopped, so it is not retried after a timeout: a second attempt
+would run alongside the first. Concurrency is capped by a semaphore instead
+of a thread per job.
+"""
+
+import asyncio
+import inspect
+import random
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class AsyncJob:
+    """One unit of work: exactly one of command or func"""
+    name: str
+    command: Optional[List[str]] = None
+    func: Optional[Callable] = None
+    timeout: float = 300
+    retries: int = 0
+    # An "error" result is a real outcome and is not retried, nor is a timed-out blocking func
+    retry_on: Sequence[str] = ("timeout", "exception")
+
+
+@dataclass
+class JobResult:
+    """Structured outcome of a job after all attempts"""
+    name: str
+    status: str  # success, error, timeout, exception
+    attempts: int
+    duration_seconds: float
+    started_at: float = None  # Unix time of the first attempt
+    returncode: Optional[int] = None
+    stdout: Optional[str] = None
+    stderr: Optional[str] = None
+    error: Optional[str] = None
+    result: object = None
+    attempt_statuses: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        # callable results are merged in so callers see the same keys as a direct run
+        if isinstance(self.result, dict):
+            data.update({k: v for k, v in self.result.items() if k not in data or data[k] is None})
+        data.pop('result')
+        return data
+
+
+class AsyncJobRunner:
+    """Runs AsyncJobs concurrently with cancellable timeouts and retries"""
+
+    def __init__(self, max_concurrency: int = 32, backoff_base: float = 2.0, backoff_max: float = 60.0,
+                 executor: Optional[Executor] = None, log: Callable[[str, str], None] = None):
+        """
+        Args:
+            max_concurrency: jobs allowed to run at once
+            backoff_base: delay before the first retry; doubled on each further retry (with jitter)
+            backoff_max: cap on a single retry delay
+            executor: executor for blocking callables (default: the loop's default executor)
+            log: callable(message, level) for job events (defaults to print)
+        """
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.executor = executor
+        self._log = log or (lambda message, level="INFO": print(message))
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _run_command(self, job: AsyncJob) -> Dict:
+        process = await asyncio.create_subprocess_exec(
+            *job.command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=job.timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return {"status": "timeout", "returncode": process.returncode}
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        return {
+            "status": "success" if process.returncode == 0 else "error",
+            "returncode": process.returncode,
+            "stdout": stdout.decode(errors="replace"),
+            "stderr": stderr.decode(errors="replace")
+        }
+
+    async def _run_func(self, job: AsyncJob) -> Dict:
+        if inspect.iscoroutinefunction(job.func):
+            awaitable = job.func()
+        else:
+            # A blocking callable cannot be interrupted; on timeout its thread
+            # finishes in the background and the result is discarded
+            awaitable = asyncio.get_running_loop().run_in_executor(self.executor, job.func)
+        try:
+            result = await asyncio.wait_for(awaitable, timeout=job.timeout)
+        except asyncio.TimeoutError:
+            # The executor thread of a blocking callable is still running
+            return {"status": "timeout", "retryable": inspect.iscoroutinefunction(job.func)}
+        status = result.get("status", "success") if isinstance(result, dict) else "success"
+        return {"status": status, "result": result}
+
+    async def _attempt(self, job: AsyncJob) -> Dict:
+        try:
+            if job.command:
+                return await self._run_command(job)
+            return await self._run_func(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {"status": "exception", "error": str(e)}
+
+    async def run_job(self, job: AsyncJob, semaphore: Optional[asyncio.Semaphore] = None) -> JobResult:
+        """Run one job with retries; the semaphore is held only while an attempt runs"""
+        if (job.command is None) == (job.func is None):
+            raise ValueError(f"Job {job.name} needs exactly one of command or func")
+
+        started_at = time.time()
+        start = time.perf_counter()
+        statuses = []
+        outcome = {}
+        for attempt in range(1, job.retries + 2):
+            if semaphore:
+                async with semaphore:
+                    outcome = await self._attempt(job)
+            else:
+                outcome = await self._attempt(job)
+            statuses.append(outcome["status"])
+
+            if outcome["status"] not in job.retry_on or attempt > job.retries \
+                    or not outcome.get("retryable", True):
+                break
+            delay = self.backoff_delay(attempt)
+            self._log(f"🔁 {job.name} {outcome['status']} (attempt {attempt}/{job.retries + 1}), "
+                      f"retrying in {delay:.1f}s", "WARNING")
+            await asyncio.sleep(delay)
+
+        return JobResult(
+            name=job.name,
+            status=outcome["status"],
+            attempts=len(statuses),
+            duration_seconds=round(time.perf_counter() - start, 3),
+            started_at=started_at,
+            returncode=outcome.get("returncode"),
+            stdout=outcome.get("stdout"),
+            stderr=outcome.get("stderr"),
+            error=outcome.get("error"),
+            result=outcome.get("result"),
+            attempt_statuses=statuses
+        )
+
+    async def run_all_async(self, jobs: List[AsyncJob]) -> Dict[str, JobResult]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self.run_job(job, semaphore) for job in jobs))
+        return {result.name: result for result in results}
+
+    def run_all(self, jobs: List[AsyncJob]) -> Dict[str, JobResult]:
+        """Run jobs concurrently from synchronous code"""
+        return asyncio.run(self.run_all_async(jobs))
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Automation Metrics and Tracing
+Per-job counters and histograms for orchestrated automation runs, exposed in
+Prometheus text format from a local HTTP endpoint, plus a JSON-lines span
+file showing where each automation cycle spends its time. Completed runs
+can also be written to the automation_execution_log table read by the
+automation dashboard.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds; covers sub-second checks up to the one-hour deployment timeout
+DEFAULT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, float] = {}
+
+    @staticmethod
+    def _key(labels: Dict[str, str]) -> Tuple:
+        return tuple(sorted(labels.items()))
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(f"{name}{_label_text(key)} {float(value)!r}" for name, key, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, count in zip(self.buckets, state['counts']):
+                    samples.append((f"{self.name}_bucket", key + (('le', f"{bound:g}"),), count))
+                samples.append((f"{self.name}_bucket", key + (('le', '+Inf'),), state['count']))
+                samples.append((f"{self.name}_sum", key, state['sum']))
+                samples.append((f"{self.name}_count", key, state['count']))
+        return samples
+
+
+class AutomationMetrics:
+    """Metrics registry for orchestrated automation jobs"""
+
+    def __init__(self, environment: str = "prod"):
+        self.environment = environment
+        self.job_runs = Counter("automation_job_runs_total", "Completed automation job runs by exit status")
+        self.job_retries = Counter("automation_job_retries_total", "Retried attempts of automation jobs")
+        self.rows_processed = Counter("automation_job_rows_processed_total",
+                                      "Rows or items processed by automation jobs")
+        self.job_duration = Histogram("automation_job_duration_seconds", "Automation job run time")
+        self.queue_delay = Histogram("automation_job_queue_delay_seconds",
+                                     "Delay between a job's scheduled slot and its start")
+        self.last_finished = Gauge("automation_job_last_finished_timestamp_seconds",
+                                   "Unix time the job last finished")
+        self.last_success = Gauge("automation_job_last_success_timestamp_seconds",
+                                  "Unix time the job last succeeded")
+        self.metrics = [self.job_runs, self.job_retries, self.rows_processed, self.job_duration,
+                        self.queue_delay, self.last_finished, self.last_success]
+
+    def record_job(self, job: str, status: str, duration_seconds: float, queue_delay_seconds: float = None,
+                   retries: int = 0, rows_processed: int = None):
+        labels = {'job': job, 'environment': self.environment}
+        now = time.time()
+        self.job_runs.inc(job=job, environment=self.environment, status=status)
+        self.job_duration.observe(duration_seconds, **labels)
+        if queue_delay_seconds is not None:
+            self.queue_delay.observe(max(queue_delay_seconds, 0.0), **labels)
+        if retries:
+            self.job_retries.inc(retries, **labels)
+        if rows_processed:
+            self.rows_processed.inc(rows_processed, **labels)
+        self.last_finished.set(now, **labels)
+        if status == "success":
+            self.last_success.set(now, **labels)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_current_span = contextvars.ContextVar("automation_current_span", default=None)
+
+
+class Tracer:
+    """Writes spans as JSON lines; nested span() calls in a thread share a trace"""
+
+    def __init__(self, trace_file: str, service: str = "automation_orchestrator"):
+        self.trace_file = trace_file
+        self.service = service
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(trace_file) or ".", exist_ok=True)
+
+    def record_span(self, name: str, start: float, end: float, trace_id: str = None,
+                    parent_id: str = None, span_id: str = None, status: str = "ok", **attributes) -> Dict:
+        """Write a span from explicit Unix start/end times"""
+        span = {
+            'trace_id': trace_id or uuid.uuid4().hex,
+            'span_id': span_id or uuid.uuid4().hex[:16],
+            'parent_id': parent_id,
+            'service': self.service,
+            'name': name,
+            'start_time': start,
+            'end_time': end,
+            'duration_ms': round((end - start) * 1000, 3),
+            'status': status,
+            'attributes': attributes
+        }
+        with self._lock, open(self.trace_file, "a") as f:
+            f.write(json.dumps(span, default=str) + "\n")
+        return span
+
+    def record_child_span(self, name: str, start: float, end: float, status: str = "ok", **attributes) -> Dict:
+        """Write a finished span under the current span (a new trace if there is none)"""
+        parent = _current_span.get()
+        return self.record_span(name, start, end, trace_id=parent['trace_id'] if parent else None,
+                                parent_id=parent['span_id'] if parent else None, status=status, **attributes)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a span, parented to the enclosing span in this context"""
+        parent = _current_span.get()
+        context = {
+            'trace_id': parent['trace_id'] if parent else uuid.uuid4().hex,
+            'span_id': uuid.uuid4().hex[:16],
+            'attributes': attributes
+        }
+        token = _current_span.set(context)
+        start = time.time()
+        status = "ok"
+        try:
+            yield context
+        except Exception as e:
+            status = "error"
+            attributes['error'] = str(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.record_span(name, start, time.time(), trace_id=context['trace_id'],
+                             parent_id=parent['span_id'] if parent else None, span_id=context['span_id'],
+                             status=attributes.pop('status', status), **attributes)
+
+
+def current_span() -> Optional[Dict]:
+    return _current_span.get()
+
+
+class ExecutionLogWriter:
+    """Buffers completed runs and inserts them into automation_execution_log"""
+
+    def __init__(self, session_factory: Callable, environment: str, batch_size: int = 20):
+        """
+        Args:
+            session_factory: zero-argument callable returning a context manager
+                             that yields a Snowpark session
+        """
+        self.session_factory = session_factory
+        self.environment = environment
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def add(self, job: str, status: str, duration_seconds: float, queue_delay_seconds: float = None,
+            retries: int = 0, rows_processed: int = None):
+        with self._lock:
+            self._buffer.append((job, status.upper(), duration_seconds, queue_delay_seconds, retries, rows_processed))
+            ready = len(self._buffer) >= self.batch_size
+        if ready:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+
+        def sql_value(value):
+            if value is None:
+                return "NULL"
+            if isinstance(value, str):
+                return "'" + value.replace("'", "''") + "'"
+            return str(value)
+
+        values = ",\n".join(
+            "(CURRENT_TIMESTAMP(), " + ", ".join(sql_value(v) for v in (self.environment,) + row) + ")"
+            for row in rows
+        )
+        try:
+            with self.session_factory() as session:
+                session.sql(f"""
+                INSERT INTO automation_execution_log (
+                    execution_timestamp, environment, automation_name, status,
+                    execution_duration_seconds, queue_delay_seconds, retry_count, rows_processed
+                ) VALUES {values}
+                """).collect()
+        except Exception as e:
+            print(f"❌ Error writing automation execution log: {e}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: AutomationMetrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(metrics: AutomationMetrics, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; returns the server (call shutdown() to stop)"""
+    handler = type("AutomationMetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="automation-metrics").start()
+    print(f"📈 Automation metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
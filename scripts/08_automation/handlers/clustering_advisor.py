@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Clustering Key Advisor
+Proposes clustering keys from the predicates queries actually use, instead
+of a fixed per-table list. Filter and join predicates are mined per table
+from the fingerprinted query history (or a local query log) with sqlglot.
+Each candidate key is scored by the bytes its pruning would save. The
+estimate uses:
+  - the column's cardinality, which sets the fraction of micro-partitions
+    an equality or range predicate still reads on a well-clustered table
+  - how often each query shape runs and how many bytes it scans today
+Keys of up to a few columns are compared, and tables are ranked by projected
+bytes-scanned reduction. Table statistics (size, row count, per-column NDV)
+come from Snowflake metadata, cached in a local JSON file, or from a fixture
+in the same format.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import permutations
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import traverse_scope
+
+from issue_extraction import normalize_columns
+
+# Snowflake micro-partitions hold 50-500 MB uncompressed, about 16 MB compressed
+MICRO_PARTITION_BYTES = 16 * 1024 ** 2
+
+PREDICATE_KINDS = ('equality', 'range', 'join')
+
+RANGE_COMPARISONS = (exp.GT, exp.GTE, exp.LT, exp.LTE)
+
+TEMPORAL_TYPES = ('TIMESTAMP', 'DATETIME')
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """A prunable predicate on one table column
+
+    kind: 'equality' (= or IN list), 'range' (<, >, BETWEEN, prefix LIKE)
+          or 'join' (column compared with another table's column, or IN subquery)
+    values: number of values of an equality predicate (IN list length)
+    """
+    table: str
+    column: str
+    kind: str
+    values: int = 1
+
+
+@dataclass
+class ColumnStats:
+    name: str
+    ndv: Optional[float] = None
+    data_type: Optional[str] = None
+
+
+@dataclass
+class TableStats:
+    """Size and column cardinality of one table (names are lower-case)"""
+    name: str
+    schema: Optional[str] = None
+    bytes: float = 0
+    row_count: float = 0
+    clustering_key: Optional[str] = None
+    columns: Dict[str, ColumnStats] = field(default_factory=dict)
+
+    @property
+    def size_gb(self) -> float:
+        return self.bytes / 1024 ** 3
+
+    @property
+    def partitions(self) -> float:
+        return max(1.0, math.ceil(self.bytes / MICRO_PARTITION_BYTES))
+
+    def ndv(self, column: str) -> Optional[float]:
+        stats = self.columns.get(column)
+        return stats.ndv if stats and stats.ndv else None
+
+
+def _unwrap(operand: exp.Expression) -> exp.Expression:
+    """A column cast or parenthesised still prunes like the bare column"""
+    while isinstance(operand, (exp.Cast, exp.TryCast, exp.Paren)):
+        operand = operand.this
+    return operand
+
+
+def _is_constant(operand: Optional[exp.Expression]) -> bool:
+    return (operand is not None and operand.find(exp.Column) is None
+            and operand.find(exp.Select) is None and not isinstance(operand, exp.Star))
+
+
+class PredicateMiner:
+    """Prunable predicates per table from each SELECT scope of a query"""
+
+    def __init__(self, table_columns: Optional[Dict[str, Iterable[str]]] = None, dialect: str = "snowflake"):
+        """
+        Args:
+            table_columns: table name -> column names, used to attribute
+                           unqualified columns in multi-table scopes
+        """
+        self.table_columns = {name.lower(): {column.lower() for column in columns}
+                              for name, columns in (table_columns or {}).items()}
+        self.dialect = dialect
+        self.mine = lru_cache(maxsize=50_000)(self._mine)
+
+    def _mine(self, sql: str) -> Tuple[Tuple[str, ...], Tuple[Predicate, ...]]:
+        """(tables scanned, predicates) for one query; unparseable SQL has neither"""
+        try:
+            tree = sqlglot.parse_one(sql, read=self.dialect)
+            scopes = traverse_scope(tree) if tree is not None else []
+        except (SqlglotError, RecursionError, ValueError):
+            return (), ()
+
+        tables, predicates = set(), []
+        for scope in scopes:
+            select = scope.expression
+            if not isinstance(select, exp.Select):
+                continue
+            sources = {alias: source for alias, source in scope.sources.items() if isinstance(source, exp.Table)}
+            tables.update(source.name.lower() for source in sources.values())
+            derived = len(scope.sources) > len(sources)
+            conditions = [select.args.get('where')] + [join.args.get('on') for join in select.args.get('joins') or []]
+            for condition in conditions:
+                if condition is not None:
+                    predicates.extend(self._predicates(condition, select, sources, derived))
+        return tuple(sorted(tables)), tuple(dict.fromkeys(predicates))
+
+    def _resolve(self, column: exp.Column, sources: Dict[str, exp.Table], derived: bool) -> Optional[str]:
+        if column.table:
+            source = sources.get(column.table)
+            return source.name.lower() if source is not None else None
+        if len(sources) == 1 and not derived:
+            return next(iter(sources.values())).name.lower()
+        owners = {source.name.lower() for source in sources.values()
+                  if column.name.lower() in self.table_columns.get(source.name.lower(), ())}
+        return owners.pop() if len(owners) == 1 else None
+
+    def _predicates(self, condition: exp.Expression, select: exp.Select,
+                    sources: Dict[str, exp.Table], derived: bool) -> List[Predicate]:
+        def column_of(operand):
+            operand = _unwrap(operand) if operand is not None else None
+            if not isinstance(operand, exp.Column):
+                return None
+            table = self._resolve(operand, sources, derived)
+            return (table, operand.name.lower()) if table else None
+
+        found = []
+        for predicate in condition.find_all(exp.EQ, exp.In, exp.Between, exp.Like, *RANGE_COMPARISONS):
+            if predicate.find_ancestor(exp.Select) is not select:
+                continue  # belongs to a subquery, mined in its own scope
+            # Only conjunctive predicates restrict the scan
+            if isinstance(predicate.find_ancestor(exp.Or, exp.Not, exp.Select), (exp.Or, exp.Not)):
+                continue
+            left = column_of(predicate.this)
+            if isinstance(predicate, exp.In):
+                if left and predicate.args.get('query') is not None:
+                    found.append(Predicate(*left, 'join'))
+                elif left and predicate.expressions and all(map(_is_constant, predicate.expressions)):
+                    found.append(Predicate(*left, 'equality', len(predicate.expressions)))
+            elif isinstance(predicate, exp.Between):
+                if left and _is_constant(predicate.args.get('low')) and _is_constant(predicate.args.get('high')):
+                    found.append(Predicate(*left, 'range'))
+            elif isinstance(predicate, exp.Like):
+                pattern = predicate.expression
+                # A fixed prefix ('ABC%') prunes like a range; a leading wildcard does not
+                if (left and isinstance(pattern, exp.Literal) and pattern.is_string
+                        and pattern.this and pattern.this[0] not in '%_'):
+                    found.append(Predicate(*left, 'range'))
+            else:
+                right = column_of(predicate.expression)
+                kind = 'equality' if isinstance(predicate, exp.EQ) else 'range'
+                if left and right:
+                    if left[0] != right[0]:
+                        found.extend([Predicate(*left, 'join'), Predicate(*right, 'join')])
+                elif left and _is_constant(predicate.expression):
+                    found.append(Predicate(*left, kind))
+                elif right and _is_constant(predicate.this):
+                    found.append(Predicate(*right, kind))
+        return found
+
+
+class ClusteringAdvisor:
+    """Ranks clustering keys per table by the scan bytes their pruning would save"""
+
+    def __init__(self, table_stats: Dict[str, TableStats], range_selectivity: float = 0.1,
+                 join_selectivity: float = 0.5, max_key_columns: int = 3, min_benefit_share: float = 0.2,
+                 high_cardinality_ratio: float = 0.1, high_cardinality_penalty: float = 0.5,
+                 candidates_per_table: int = 5, dialect: str = "snowflake"):
+        """
+        Args:
+            table_stats: lower-case table name -> TableStats; tables without stats are ignored
+            range_selectivity: fraction of a table a range predicate is assumed to select
+            join_selectivity: fraction a join filter is assumed to leave (runtime pruning is partial)
+            max_key_columns: longest key proposed
+            min_benefit_share: a column joins the key only if its own benefit is at least
+                               this share of the best column's
+            high_cardinality_ratio: NDV / row_count above which a key column is costly to
+                                    keep clustered
+            high_cardinality_penalty: ranking weight of such columns (temporal ones are
+                                      proposed as TO_DATE(column) instead)
+        """
+        self.table_stats = table_stats
+        self.range_selectivity = range_selectivity
+        self.join_selectivity = join_selectivity
+        self.max_key_columns = max_key_columns
+        self.min_benefit_share = min_benefit_share
+        self.high_cardinality_ratio = high_cardinality_ratio
+        self.high_cardinality_penalty = high_cardinality_penalty
+        self.candidates_per_table = candidates_per_table
+        self.miner = PredicateMiner({name: stats.columns for name, stats in table_stats.items()}, dialect)
+
+    def selectivity(self, predicate: Predicate, stats: TableStats) -> float:
+        """Fraction of micro-partitions the predicate reads if the table is clustered on its column"""
+        ndv = stats.ndv(predicate.column)
+        if predicate.kind == 'equality':
+            fraction = predicate.values / ndv if ndv else self.range_selectivity
+        elif predicate.kind == 'range':
+            fraction = max(self.range_selectivity, 1 / ndv if ndv else 0)
+        else:
+            fraction = self.join_selectivity
+        return min(1.0, max(fraction, 1 / stats.partitions))
+
+    def scans(self, queries: pd.DataFrame) -> List[Dict]:
+        """One entry per (query shape, table with stats) with the predicates' selectivities
+
+        queries: query_text (or slowest_query_text), executions, and optionally
+                 total_gb_scanned and partition_scan_ratio per shape. Bytes of
+                 a multi-table query are split across its tables by size; a
+                 shape without bytes is assumed to read the table's scanned
+                 fraction once per execution.
+        """
+        text_column = 'query_text' if 'query_text' in queries else 'slowest_query_text'
+        texts = queries[text_column].fillna('').astype(str)
+        executions = queries['executions'] if 'executions' in queries else pd.Series(1, index=queries.index)
+        gb_scanned = queries['total_gb_scanned'] if 'total_gb_scanned' in queries else pd.Series(np.nan, index=queries.index)
+        ratios = (queries['partition_scan_ratio'] if 'partition_scan_ratio' in queries
+                  else pd.Series(np.nan, index=queries.index))
+
+        scans = []
+        for text, count, gb, ratio in zip(texts, executions, gb_scanned, ratios):
+            tables, predicates = self.miner.mine(text)
+            known = [table for table in tables if table in self.table_stats]
+            if not known:
+                continue
+            total_bytes = sum(self.table_stats[table].bytes for table in known)
+            baseline = float(ratio) if pd.notna(ratio) and ratio > 0 else 1.0
+            for table in known:
+                stats = self.table_stats[table]
+                share = stats.bytes / total_bytes if total_bytes > 0 else 1 / len(known)
+                filters, kinds = {}, {}
+                for predicate in predicates:
+                    if predicate.table == table:
+                        fraction = self.selectivity(predicate, stats)
+                        filters[predicate.column] = min(filters.get(predicate.column, 1.0), fraction)
+                        kinds.setdefault(predicate.column, set()).add(predicate.kind)
+                scans.append({
+                    'table': table,
+                    'executions': int(count),
+                    'gb_scanned': float(gb) * share if pd.notna(gb) else int(count) * stats.size_gb * baseline,
+                    'baseline': min(1.0, baseline),
+                    'filters': filters,
+                    'kinds': kinds
+                })
+        return scans
+
+    def scanned_fraction(self, key: Sequence[str], filters: Dict[str, float], stats: TableStats) -> float:
+        """Fraction of the table a query reads once it is clustered on key
+
+        Predicates on key columns multiply. A key column the query does not
+        filter splits the table into NDV groups sorted independently; a filter
+        on a later column then still reads at least one partition per group.
+        """
+        fraction, groups, spread, used = 1.0, 1.0, 1.0, False
+        for column in key:
+            if column in filters:
+                fraction *= filters[column]
+                spread, used = groups, True
+            else:
+                groups *= stats.ndv(column) or stats.partitions
+        if not used:
+            return 1.0
+        return min(1.0, max(fraction, spread / stats.partitions, 1 / stats.partitions))
+
+    def projected_savings(self, key: Sequence[str], scans: List[Dict], stats: TableStats) -> float:
+        """GB of scans saved by clustering on key, relative to what the scans read today"""
+        saved = 0.0
+        for scan in scans:
+            fraction = self.scanned_fraction(key, scan['filters'], stats)
+            if fraction < scan['baseline']:
+                saved += scan['gb_scanned'] * (scan['baseline'] - fraction) / scan['baseline']
+        return saved
+
+    def is_high_cardinality(self, column: str, stats: TableStats) -> bool:
+        ndv = stats.ndv(column)
+        return bool(ndv and stats.row_count and ndv / stats.row_count > self.high_cardinality_ratio)
+
+    def key_expression(self, column: str, stats: TableStats) -> str:
+        """Near-unique timestamps are clustered by day; TO_DATE keeps range pruning"""
+        data_type = (stats.columns[column].data_type or '').upper() if column in stats.columns else ''
+        if self.is_high_cardinality(column, stats) and data_type.startswith(TEMPORAL_TYPES):
+            return f"TO_DATE({column})"
+        return column
+
+    def ranking_weight(self, key: Sequence[str], stats: TableStats) -> float:
+        return math.prod(self.high_cardinality_penalty
+                         for column in key
+                         if self.is_high_cardinality(column, stats) and self.key_expression(column, stats) == column)
+
+    def advise_table(self, table: str, scans: List[Dict]) -> Optional[Dict]:
+        stats = self.table_stats[table]
+        columns = sorted({column for scan in scans for column in scan['filters']})
+        if not columns:
+            return None
+
+        candidates = []
+        for column in columns:
+            using = [scan for scan in scans if column in scan['filters']]
+            saved = self.projected_savings([column], using, stats)
+            candidates.append({
+                'column': column,
+                'key_expression': self.key_expression(column, stats),
+                'ndv': stats.ndv(column),
+                'high_cardinality': self.is_high_cardinality(column, stats),
+                'query_shapes': len(using),
+                'executions': sum(scan['executions'] for scan in using),
+                **{f"{kind}_predicates": sum(kind in scan['kinds'][column] for scan in using)
+                   for kind in PREDICATE_KINDS},
+                'projected_gb_saved': round(saved, 3),
+                'score': saved * self.ranking_weight([column], stats)
+            })
+        candidates.sort(key=lambda candidate: candidate['score'], reverse=True)
+        best = candidates[0]['score']
+        if best <= 0:
+            return None
+
+        # Every ordering of every subset of the strongest columns; ties go to the
+        # shorter key, then to lower cardinality first (cheaper to keep clustered)
+        pool = [candidate['column'] for candidate in candidates
+                if candidate['score'] >= self.min_benefit_share * best][:self.max_key_columns]
+        keys = [key for size in range(1, len(pool) + 1) for key in permutations(pool, size)]
+        scored = [(self.projected_savings(key, scans, stats), key) for key in keys]
+        saved, key = max(scored, key=lambda item: (
+            round(item[0] * self.ranking_weight(item[1], stats), 6), -len(item[1]),
+            [-(stats.ndv(column) or math.inf) for column in item[1]]
+        ))
+
+        total_gb = sum(scan['gb_scanned'] for scan in scans)
+        return {
+            'table_name': table,
+            'size_gb': round(stats.size_gb, 2),
+            'current_clustering_key': stats.clustering_key,
+            'proposed_key': [self.key_expression(column, stats) for column in key],
+            'query_shapes': len(scans),
+            'executions': sum(scan['executions'] for scan in scans),
+            'gb_scanned': round(total_gb, 3),
+            'projected_gb_saved': round(saved, 3),
+            'projected_reduction': round(saved / total_gb, 4) if total_gb > 0 else 0.0,
+            'candidates': [{k: v for k, v in candidate.items() if k != 'score'}
+                           for candidate in candidates[:self.candidates_per_table]]
+        }
+
+    def advise(self, queries: pd.DataFrame) -> List[Dict]:
+        """Proposed key per table with observed predicates, largest projected saving first"""
+        by_table = {}
+        for scan in self.scans(queries):
+            by_table.setdefault(scan['table'], []).append(scan)
+        advice = [self.advise_table(table, scans) for table, scans in by_table.items()]
+        return sorted((item for item in advice if item), key=lambda item: item['projected_gb_saved'], reverse=True)
+
+    def candidate_columns(self, queries: pd.DataFrame) -> Dict[str, List[str]]:
+        """Columns with prunable predicates per table, i.e. those whose NDV is needed"""
+        columns = {}
+        for scan in self.scans(queries):
+            columns.setdefault(scan['table'], set()).update(scan['filters'])
+        return {table: sorted(names) for table, names in columns.items()}
+
+
+def referenced_tables(queries: pd.DataFrame, dialect: str = "snowflake") -> List[str]:
+    """Tables scanned by the query shapes, before any statistics are known"""
+    text_column = 'query_text' if 'query_text' in queries else 'slowest_query_text'
+    miner = PredicateMiner(dialect=dialect)
+    return sorted({table for text in queries[text_column].fillna('').astype(str) for table in miner.mine(text)[0]})
+
+
+def load_table_stats(path: str) -> Tuple[Dict[str, TableStats], Optional[datetime]]:
+    """Table statistics from a JSON file, and when they were fetched (None for a hand-written fixture)
+
+    Layout: {"fetched_at": ..., "tables": {name: {"bytes" or "size_gb", "row_count",
+    "clustering_key", "columns": {name: {"ndv", "data_type"}}}}}; the top level
+    may also be the "tables" mapping itself.
+    """
+    if not os.path.exists(path):
+        return {}, None
+    with open(path) as f:
+        data = json.load(f)
+    tables = data.get('tables', data) if isinstance(data, dict) else {}
+    stats = {}
+    for name, table in tables.items():
+        if not isinstance(table, dict):
+            continue
+        size = table.get('bytes')
+        if size is None:
+            size = (table.get('size_gb') or 0) * 1024 ** 3
+        stats[name.lower()] = TableStats(
+            name=name.lower(),
+            schema=table.get('schema'),
+            bytes=float(size or 0),
+            row_count=float(table.get('row_count') or 0),
+            clustering_key=table.get('clustering_key'),
+            columns={column.lower(): ColumnStats(column_stats.get('name', column), column_stats.get('ndv'),
+                                                 column_stats.get('data_type'))
+                     for column, column_stats in (table.get('columns') or {}).items()}
+        )
+    fetched_at = data.get('fetched_at') if 'tables' in data else None
+    return stats, datetime.fromisoformat(fetched_at) if fetched_at else None
+
+
+def save_table_stats(path: str, stats: Dict[str, TableStats], fetched_at: Optional[datetime] = None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tables = {name: {k: v for k, v in asdict(table).items() if k != 'name'} for name, table in stats.items()}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'fetched_at': (fetched_at or datetime.now()).isoformat(), 'tables': tables}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def table_stats_stale(fetched_at: Optional[datetime], max_age_days: Optional[float]) -> bool:
+    if max_age_days is None:
+        return False
+    return fetched_at is None or datetime.now() - fetched_at > timedelta(days=max_age_days)
+
+
+def fetch_table_stats(session, table_names: Iterable[str], statement_params: Dict = None) -> Dict[str, TableStats]:
+    """Size, row count, clustering key and column types from information_schema (no NDVs)"""
+    names = sorted({name.upper() for name in table_names})
+    if not names:
+        return {}
+    name_list = ', '.join(f"'{name}'" for name in names)
+    tables = normalize_columns(session.sql(f"""
+    SELECT table_schema, table_name, bytes, row_count, clustering_key
+    FROM information_schema.tables
+    WHERE table_name IN ({name_list})
+    AND table_type = 'BASE TABLE'
+    ORDER BY bytes DESC
+    """).to_pandas(statement_params=statement_params))
+    columns = normalize_columns(session.sql(f"""
+    SELECT table_schema, table_name, column_name, data_type
+    FROM information_schema.columns
+    WHERE table_name IN ({name_list})
+    """).to_pandas(statement_params=statement_params))
+
+    stats = {}
+    # A name present in several schemas resolves to its largest table
+    for row in tables.drop_duplicates('table_name').itertuples(index=False):
+        stats[row.table_name.lower()] = TableStats(
+            name=row.table_name.lower(), schema=row.table_schema, bytes=float(row.bytes or 0),
+            row_count=float(row.row_count or 0), clustering_key=row.clustering_key or None
+        )
+    for row in columns.itertuples(index=False):
+        table = stats.get(row.table_name.lower())
+        if table is not None and row.table_schema == table.schema:
+            table.columns[row.column_name.lower()] = ColumnStats(row.column_name, None, row.data_type)
+    return stats
+
+
+def fetch_column_ndv(session, stats: Dict[str, TableStats], columns: Dict[str, Sequence[str]],
+                     statement_params: Dict = None) -> int:
+    """Fill in approximate NDVs for the given columns that have none yet; returns columns fetched"""
+    branches = []
+    for table, names in columns.items():
+        if table not in stats or not stats[table].schema:
+            continue
+        for column in names:
+            column_stats = stats[table].columns.get(column)
+            if column_stats is not None and column_stats.ndv is None:
+                branches.append(
+                    f"SELECT '{table}' AS table_name, '{column}' AS column_name, "
+                    f"APPROX_COUNT_DISTINCT(\"{column_stats.name}\") AS ndv "
+                    f"FROM {stats[table].schema}.{table.upper()}"
+                )
+    if not branches:
+        return 0
+    df = normalize_columns(session.sql("\nUNION ALL\n".join(branches)).to_pandas(statement_params=statement_params))
+    for table, column, ndv in zip(df['table_name'], df['column_name'], df['ndv']):
+        stats[table].columns[column].ndv = float(ndv)
+    return len(df)
+
+
+def load_query_log(path: str, since_days: Optional[int] = None, limit: int = 100_000) -> pd.DataFrame:
+    """Query shapes from a QueryHistoryStore directory or a CSV/Parquet query log
+
+    A log with one row per execution is grouped by normalised text; one that
+    already has an executions column is used as is.
+    """
+    from query_history_store import QueryHistoryStore, normalize_queries
+
+    if os.path.isdir(path):
+        return QueryHistoryStore(path).aggregate_fingerprints(since_days=since_days, limit=limit)
+    frame = normalize_columns(pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path))
+    if 'executions' in frame:
+        return frame
+    frame['normalized_text'] = normalize_queries(frame['query_text'])
+    aggregations = {'query_text': ('query_text', 'first'), 'executions': ('query_text', 'size')}
+    if 'bytes_scanned' in frame:
+        aggregations['bytes_scanned'] = ('bytes_scanned', 'sum')
+    if 'partitions_scanned' in frame and 'partitions_total' in frame:
+        aggregations['partitions_scanned'] = ('partitions_scanned', 'sum')
+        aggregations['partitions_total'] = ('partitions_total', 'sum')
+    shapes = frame.groupby('normalized_text', sort=False).agg(**aggregations).reset_index()
+    if 'bytes_scanned' in shapes:
+        shapes['total_gb_scanned'] = shapes.pop('bytes_scanned') / 1024 ** 3
+    if 'partitions_total' in shapes:
+        shapes['partition_scan_ratio'] = shapes.pop('partitions_scanned') / shapes.pop('partitions_total').replace(0, np.nan)
+    return shapes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clustering key advice from a local query log and table stats")
+    parser.add_argument("--query-log", required=True,
+                        help="QueryHistoryStore directory, or CSV/Parquet with a query_text column")
+    parser.add_argument("--table-stats", required=True, help="Table statistics JSON")
+    parser.add_argument("--since-days", type=int, default=None, help="Window when reading a store directory")
+    parser.add_argument("--max-key-columns", type=int, default=3)
+    parser.add_argument("--range-selectivity", type=float, default=0.1)
+    parser.add_argument("--json", help="Write the full advice to this file")
+    args = parser.parse_args()
+
+    stats, _ = load_table_stats(args.table_stats)
+    queries = load_query_log(args.query_log, args.since_days)
+    advisor = ClusteringAdvisor(stats, range_selectivity=args.range_selectivity,
+                                max_key_columns=args.max_key_columns)
+    advice = advisor.advise(queries)
+
+    print(f"🔍 {len(queries):,} query shapes, {len(stats)} tables with stats, advice for {len(advice)}")
+    for item in advice:
+        print(f"\n{item['table_name']} ({item['size_gb']:,.1f} GB, current key: {item['current_clustering_key'] or 'none'})")
+        print(f"  💡 CLUSTER BY ({', '.join(item['proposed_key'])}): "
+              f"{item['projected_gb_saved']:,.1f} of {item['gb_scanned']:,.1f} GB scanned saved "
+              f"({item['projected_reduction']:.0%})")
+        for candidate in item['candidates']:
+            print(f"    {candidate['key_expression']}: ndv={candidate['ndv'] or '?'}, "
+                  f"{candidate['executions']:,} executions, {candidate['projected_gb_saved']:,.1f} GB alone")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(advice, f, indent=2, default=str)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,22 @@ Continuously monitors data quality and triggers alerts when thresholds are breac
 
 import os
 import sys
-import json
 import time
 import schedule
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional
 import snowflake.connector
 from snowflake.snowpark import Session
 import pandas as pd
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import yaml
+from contextlib import nullcontext
+from alert_pipeline import AlertPipeline, AlertStateStore, SnowflakeAlertSink, SQLiteAlertSink, alert_row
+from dbt_relationships import Relationship, build_integrity_checks, load_dbt_relationships, orphan_alias
+from freshness_tracker import FreshnessStateStore, FreshnessTracker, TrackedTable
+from kpi_anomaly_detector import KPIAnomalyDetector, anomaly_issues
+from issue_extraction import ALL_STATUSES, STATUS_CRITICAL, STATUS_GOOD, col, normalize_columns, status_issues, threshold_status
 
 class DataQualityMonitor:
     def __init__(self, environment: str = "prod"):
@@ -27,7 +35,15 @@ class DataQualityMonitor:
             'schema': 'MONITORING'
         }
         self.session = None
+        self.session_pool = None  # shared pool when run inside the orchestrator
         self.quality_thresholds = self.load_quality_thresholds()
+        self.execution_config = self.load_execution_config()
+        self.freshness_config = self.load_freshness_config()
+        self.freshness_tracker = None
+        self.alert_config = self.load_alert_config()
+        self.alert_pipeline = None
+        self.failed_checks = []  # checks that could not run in the last cycle
+        self.anomaly_config = self.load_anomaly_config()
         
     def connect(self):
         """Establish Snowflake connection"""
@@ -56,47 +72,144 @@ class DataQualityMonitor:
             "consistency": {
                 "critical": 0.99,  # 99% consistency required
                 "warning": 0.97    # 97% triggers warning
+            },
+            "model_drift": {
+                "critical": 0.2,   # drift score
+                "warning": 0.1
+            },
+            "model_performance_drop": {
+                "critical": 0.1,   # validation minus production score
+                "warning": 0.05
             }
         }
     
-    def check_data_freshness(self) -> List[Dict]:
-        """Check data freshness across all tables"""
+    def load_execution_config(self) -> Dict:
+        """How check cycles are executed"""
+        return {
+            "concurrent": True,           # run independent checks and integrity queries in parallel, one worker each
+            "check_timeout_seconds": 120, # per check, from when it gets a session; also the Snowflake statement timeout
+            "standalone_sessions": 1      # sessions the checks share when not run inside the orchestrator
+        }
+    
+    def load_freshness_config(self) -> Dict:
+        """Tables tracked incrementally by the freshness tracker"""
+        raw_tables = ["TBL_RAW_AZURE_CUSTOMERS", "TBL_RAW_AZURE_MAINTENANCE", "TBL_RAW_AZURE_SHIPMENTS",
+                      "TBL_RAW_AZURE_VEHICLES", "TBL_RAW_TELEMATICS_DATA", "TBL_RAW_TRAFFIC_DATA",
+                      "TBL_RAW_WEATHER_DATA"]
+        fact_tables = ["TBL_FACT_SHIPMENTS", "TBL_FACT_VEHICLE_TELEMETRY", "TBL_FACT_ROUTE_CONDITIONS",
+                       "TBL_FACT_ROUTE_PERFORMANCE", "TBL_FACT_VEHICLE_UTILIZATION"]
+        return {
+            "incremental": True,  # False falls back to polling vw_data_freshness_monitoring
+            "state_path": f"logs/freshness_state_{self.environment}.sqlite",
+            "tables": [TrackedTable("RAW", name, '"_loaded_at"') for name in raw_tables]
+                      + [TrackedTable("MARTS", name) for name in fact_tables]
+        }
+    
+    def load_alert_config(self) -> Dict:
+        """Alert dedup, suppression and batching"""
+        return {
+            "suppression_minutes": {
+                "CRITICAL": 60,   # a still-critical issue re-alerts hourly
+                "WARNING": 240
+            },
+            "max_batch_size": 50,           # queued alert rows that trigger a write
+            "flush_interval_seconds": 900,  # oldest queued row age that triggers a write
+            "state_path": f"logs/alert_state_{self.environment}.sqlite",
+            "sink": "snowflake",            # or "sqlite" to write alerts locally
+            "sqlite_sink_path": f"logs/data_quality_alerts_{self.environment}.sqlite"
+        }
+    
+    def get_alert_pipeline(self) -> AlertPipeline:
+        if self.alert_pipeline is None:
+            config = self.alert_config
+            if config["sink"] == "sqlite":
+                sink = SQLiteAlertSink(config["sqlite_sink_path"])
+            else:
+                sink = SnowflakeAlertSink(lambda: nullcontext(self.session))
+            self.alert_pipeline = AlertPipeline(
+                AlertStateStore(config["state_path"]),
+                sink,
+                suppression_minutes=config["suppression_minutes"],
+                max_batch_size=config["max_batch_size"],
+                flush_interval_seconds=config["flush_interval_seconds"]
+            )
+        return self.alert_pipeline
+    
+    def load_anomaly_config(self) -> Dict:
+        """Online anomaly detection over KPI, load volume and freshness lag series"""
+        return {
+            "enabled": True,
+            "state_path": f"logs/kpi_anomaly_state_{self.environment}.npz",
+            "z_threshold": 4.0,        # WARNING at |z| >= 4
+            "critical_z": 6.0,         # CRITICAL at |z| >= 6
+            "warmup_points": 12,       # points before a series is scored
+            "min_scale": 1.0,          # absolute floor on a series' scale (rows, minutes, KPI units)
+            "kpi_lookback_hours": 168, # real_time_kpis history read on a cold start
+            "max_kpi_points": 200000   # cap per cycle
+        }
+    
+    def get_freshness_tracker(self) -> FreshnessTracker:
+        if self.freshness_tracker is None:
+            thresholds = self.quality_thresholds['freshness']
+            self.freshness_tracker = FreshnessTracker(
+                self.freshness_config["tables"],
+                FreshnessStateStore(self.freshness_config["state_path"]),
+                warning_minutes=thresholds['warning'],
+                critical_minutes=thresholds['critical']
+            )
+        return self.freshness_tracker
+    
+    def statement_params(self) -> Dict:
+        """Statement parameters so Snowflake cancels a check query that overruns its timeout"""
+        return {"STATEMENT_TIMEOUT_IN_SECONDS": str(self.execution_config["check_timeout_seconds"])}
+    
+    def check_data_freshness(self, session=None) -> Optional[List[Dict]]:
+        """Check data freshness across all tables
+        
+        Every checked table is returned on every cycle, in both modes; the
+        alert pipeline turns repeats into suppressed issues or reminders and
+        GOOD tables into resolved ones, and --once exits 1 while any table
+        is stale. Like every check, returns None if the check failed.
+        """
         print("🔍 Checking data freshness...")
         
+        if self.freshness_config["incremental"]:
+            try:
+                statuses = self.get_freshness_tracker().poll(session or self.session, self.statement_params())
+            except Exception as e:
+                print(f"❌ Error checking data freshness: {e}")
+                return None
+            for table in statuses:
+                if table['status'] == STATUS_GOOD and table['changed']:
+                    print(f"✅ {table['table_name']} is fresh again ({table['value']} minutes)")
+            return statuses
+        
         query = """
         SELECT 
             table_name,
-            minutes_since_sync,
-            CASE 
-                WHEN minutes_since_sync <= 180 THEN 'GOOD'
-                WHEN minutes_since_sync <= 360 THEN 'WARNING'
-                ELSE 'CRITICAL'
-            END as freshness_status
+            minutes_since_sync
         FROM vw_data_freshness_monitoring
         WHERE minutes_since_sync > 60  -- Only check tables that should be updated
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            issues = []
-            
-            for _, row in df.iterrows():
-                if row['freshness_status'] in ['WARNING', 'CRITICAL']:
-                    issues.append({
-                        'table_name': row['table_name'],
-                        'metric': 'freshness',
-                        'status': row['freshness_status'],
-                        'value': row['minutes_since_sync'],
-                        'threshold': self.quality_thresholds['freshness']['critical'],
-                        'message': f"Data is {row['minutes_since_sync']} minutes stale"
-                    })
+            df = normalize_columns((session or self.session).sql(query).to_pandas(statement_params=self.statement_params()))
+            thresholds = self.quality_thresholds['freshness']
+            status = threshold_status(df['minutes_since_sync'], thresholds['warning'], thresholds['critical'])
             
-            return issues
+            return status_issues(df, status, flagged=ALL_STATUSES, fields={
+                'table_name': col('table_name'),
+                'metric': 'freshness',
+                'status': status,
+                'value': col('minutes_since_sync'),
+                'threshold': thresholds['critical'],
+                'message': lambda rows: "Data is " + rows['minutes_since_sync'].astype(str) + " minutes stale"
+            })
         except Exception as e:
             print(f"❌ Error checking data freshness: {e}")
-            return []
+            return None
     
-    def check_data_completeness(self) -> List[Dict]:
+    def check_data_completeness(self, session=None) -> Optional[List[Dict]]:
         """Check data completeness across all tables"""
         print("🔍 Checking data completeness...")
         
@@ -105,84 +218,151 @@ class DataQualityMonitor:
             table_name,
             row_count,
             null_keys,
-            (row_count - null_keys) / row_count as completeness_ratio,
-            CASE 
-                WHEN (row_count - null_keys) / row_count >= 0.95 THEN 'GOOD'
-                WHEN (row_count - null_keys) / row_count >= 0.90 THEN 'WARNING'
-                ELSE 'CRITICAL'
-            END as completeness_status
+            (row_count - null_keys) / row_count as completeness_ratio
         FROM vw_data_quality_summary
         WHERE row_count > 0
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            issues = []
+            df = normalize_columns((session or self.session).sql(query).to_pandas(statement_params=self.statement_params()))
+            thresholds = self.quality_thresholds['completeness']
+            # Below the required level ("critical") warns; below "warning" or unknown is critical
+            status = threshold_status(df['completeness_ratio'], thresholds['critical'], thresholds['warning'],
+                                      higher_is_worse=False, missing=STATUS_CRITICAL)
             
-            for _, row in df.iterrows():
-                if row['completeness_status'] in ['WARNING', 'CRITICAL']:
-                    issues.append({
-                        'table_name': row['table_name'],
-                        'metric': 'completeness',
-                        'status': row['completeness_status'],
-                        'value': row['completeness_ratio'],
-                        'threshold': self.quality_thresholds['completeness']['critical'],
-                        'message': f"Completeness is {row['completeness_ratio']:.2%}"
-                    })
-            
-            return issues
+            return status_issues(df, status, flagged=ALL_STATUSES, fields={
+                'table_name': col('table_name'),
+                'metric': 'completeness',
+                'status': status,
+                'value': col('completeness_ratio'),
+                'threshold': thresholds['critical'],
+                'message': lambda rows: "Completeness is " + rows['completeness_ratio'].map("{:.2%}".format)
+            })
         except Exception as e:
             print(f"❌ Error checking data completeness: {e}")
+            return None
+    
+    def collect_metric_series(self, session, detector: KPIAnomalyDetector) -> pd.DataFrame:
+        """New points for every watched series: real_time_kpis, rows loaded per table, freshness lag"""
+        now = datetime.now()
+        frames = []
+        
+        # real_time_kpis points since the newest one already seen
+        kpi_ids = [i for name, i in detector.index.items() if name.startswith("kpi:")]
+        seen = detector.last_timestamp[kpi_ids] if kpi_ids else []
+        if len(seen) and not pd.isna(max(seen)):
+            since = f"'{pd.Timestamp(max(seen), unit='s').isoformat()}'::TIMESTAMP_NTZ"
+        else:
+            since = f"DATEADD('hour', -{self.anomaly_config['kpi_lookback_hours']}, CURRENT_TIMESTAMP())"
+        kpis = normalize_columns(session.sql(f"""
+        SELECT metric_name, kpi_timestamp, metric_value
+        FROM real_time_kpis
+        WHERE kpi_timestamp > {since}
+        AND metric_value IS NOT NULL
+        ORDER BY kpi_timestamp
+        LIMIT {self.anomaly_config['max_kpi_points']}
+        """).to_pandas(statement_params=self.statement_params()))
+        frames.append(pd.DataFrame({'series': "kpi:" + kpis['metric_name'].astype(str),
+                                    'timestamp': kpis['kpi_timestamp'], 'value': kpis['metric_value']}))
+        
+        # Rows loaded since the last cycle, from information_schema row counts
+        tables = self.freshness_config["tables"]
+        counts = normalize_columns(session.sql(f"""
+        SELECT table_schema || '.' || table_name AS table_key, row_count
+        FROM information_schema.tables
+        WHERE table_schema || '.' || table_name IN ({', '.join(f"'{table.key}'" for table in tables)})
+        """).to_pandas(statement_params=self.statement_params()))
+        counter_names = ("row_count:" + counts['table_key']).tolist()
+        loaded = counts['row_count'].to_numpy(dtype=float) - detector.last_values(counter_names)
+        detector.record(counter_names, counts['row_count'], [now] * len(counts))
+        # Only cycles that loaded rows are scored: a daily load is idle in most
+        # cycles, and those zeros would collapse the scale the load is judged by.
+        # A first sighting or a shrinking table (full refresh) only resets the counter
+        valid = np.isfinite(loaded) & (loaded > 0)
+        frames.append(pd.DataFrame({'series': "rows_loaded:" + counts['table_key'][valid],
+                                    'timestamp': now, 'value': loaded[valid]}))
+        
+        # Freshness lag from the tracker's high-water marks
+        if self.freshness_config["incremental"]:
+            states = [state for state in self.get_freshness_tracker().state_store.load().values()
+                      if state.high_water_mark]
+            utc_now = pd.Timestamp.now(tz="UTC")
+            frames.append(pd.DataFrame({
+                'series': ["freshness_lag_minutes:" + state.table_name for state in states],
+                'timestamp': now,
+                'value': [(utc_now - state.high_water_mark).total_seconds() / 60 for state in states]
+            }))
+        
+        return pd.concat(frames, ignore_index=True)
+    
+    def check_kpi_anomalies(self, session=None) -> Optional[List[Dict]]:
+        """Score new metric points against their EWMA and hour-of-week baselines"""
+        if not self.anomaly_config["enabled"]:
             return []
+        print("🔍 Checking KPI series for anomalies...")
+        config = self.anomaly_config
+        
+        try:
+            detector = KPIAnomalyDetector.load(config["state_path"], z_threshold=config["z_threshold"],
+                                               warmup=config["warmup_points"], min_scale=config["min_scale"])
+            points = self.collect_metric_series(session or self.session, detector)
+            scored = detector.update(points['series'], points['value'], points['timestamp'])
+            detector.save(config["state_path"])
+            print(f"📈 Scored {len(scored):,} points across {detector.series_count:,} series")
+            return anomaly_issues(scored, config["critical_z"], include_good=True)
+        except Exception as e:
+            print(f"❌ Error checking KPI anomalies: {e}")
+            return None
     
-    def check_referential_integrity(self) -> List[Dict]:
-        """Check referential integrity across fact and dimension tables"""
-        print("🔍 Checking referential integrity...")
+    def load_integrity_checks(self) -> List[Dict]:
+        """Orphaned-key checks generated from dbt relationships tests, one query per child table"""
+        try:
+            relationships = load_dbt_relationships()
+        except (OSError, yaml.YAMLError) as e:
+            print(f"⚠️ Could not read dbt relationships ({e}); using built-in integrity checks")
+            relationships = []
+        if not relationships:
+            relationships = [
+                Relationship('tbl_fact_shipments', 'customer_id', 'tbl_dim_customer', 'customer_id'),
+                Relationship('tbl_fact_shipments', 'vehicle_id', 'tbl_dim_vehicle', 'vehicle_id')
+            ]
+        return build_integrity_checks(relationships, threshold=0)
+    
+    def run_integrity_check(self, check: Dict, session=None) -> Optional[List[Dict]]:
+        """Run one child table's integrity query (all of its relationships in one scan)"""
+        try:
+            row = (session or self.session).sql(check['query']).collect(statement_params=self.statement_params())[0]
+        except Exception as e:
+            print(f"❌ Error checking {check['name']}: {e}")
+            return None
         
-        integrity_checks = [
-            {
-                'name': 'shipments_customer_integrity',
-                'query': """
-                SELECT COUNT(*) as orphaned_records
-                FROM tbl_fact_shipments fs
-                LEFT JOIN tbl_dim_customer dc ON fs.customer_id = dc.customer_id
-                WHERE dc.customer_id IS NULL
-                """,
-                'threshold': 0
-            },
-            {
-                'name': 'shipments_vehicle_integrity',
-                'query': """
-                SELECT COUNT(*) as orphaned_records
-                FROM tbl_fact_shipments fs
-                LEFT JOIN tbl_dim_vehicle dv ON fs.vehicle_id = dv.vehicle_id
-                WHERE dv.vehicle_id IS NULL
-                """,
-                'threshold': 0
-            }
-        ]
+        results = []
+        for relationship in check['relationships']:
+            orphaned_count = row[orphan_alias(relationship)]
+            results.append({
+                'table_name': relationship.child_model,
+                'metric': 'referential_integrity',
+                'status': 'CRITICAL' if orphaned_count > check['threshold'] else STATUS_GOOD,
+                'value': orphaned_count,
+                'threshold': check['threshold'],
+                'message': f"Found {orphaned_count} orphaned records in {relationship.name}"
+            })
+        return results
+    
+    def check_referential_integrity(self, session=None) -> Optional[List[Dict]]:
+        """Check referential integrity across fact and dimension tables (None if any query failed)"""
+        print("🔍 Checking referential integrity...")
         
-        issues = []
-        for check in integrity_checks:
-            try:
-                result = self.session.sql(check['query']).collect()
-                orphaned_count = result[0]['ORPHANED_RECORDS']
-                
-                if orphaned_count > check['threshold']:
-                    issues.append({
-                        'table_name': check['name'],
-                        'metric': 'referential_integrity',
-                        'status': 'CRITICAL',
-                        'value': orphaned_count,
-                        'threshold': check['threshold'],
-                        'message': f"Found {orphaned_count} orphaned records"
-                    })
-            except Exception as e:
-                print(f"❌ Error checking {check['name']}: {e}")
+        results = []
+        for check in self.load_integrity_checks():
+            found = self.run_integrity_check(check, session)
+            if found is None:
+                return None
+            results.extend(found)
         
-        return issues
+        return results
     
-    def check_ml_model_performance(self) -> List[Dict]:
+    def check_ml_model_performance(self, session=None) -> Optional[List[Dict]]:
         """Check ML model performance and drift"""
         print("🔍 Checking ML model performance...")
         
@@ -192,72 +372,63 @@ class DataQualityMonitor:
             model_type,
             validation_score,
             production_score,
-            drift_score,
-            CASE 
-                WHEN drift_score > 0.2 THEN 'CRITICAL'
-                WHEN drift_score > 0.1 THEN 'WARNING'
-                ELSE 'GOOD'
-            END as drift_status,
-            CASE 
-                WHEN validation_score - production_score > 0.1 THEN 'CRITICAL'
-                WHEN validation_score - production_score > 0.05 THEN 'WARNING'
-                ELSE 'GOOD'
-            END as performance_status
+            drift_score
         FROM vw_ml_model_performance
         WHERE status = 'ACTIVE'
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            issues = []
+            df = normalize_columns((session or self.session).sql(query).to_pandas(statement_params=self.statement_params()))
+            drift = self.quality_thresholds['model_drift']
+            degradation = self.quality_thresholds['model_performance_drop']
+            performance_drop = df['validation_score'] - df['production_score']
+            model_table = lambda rows: "ml_model_" + rows['model_name'].astype(str)
+            
+            drift_status = threshold_status(df['drift_score'], drift['warning'], drift['critical'])
+            issues = status_issues(df, drift_status, flagged=ALL_STATUSES, fields={
+                'table_name': model_table,
+                'metric': 'model_drift',
+                'status': drift_status,
+                'value': col('drift_score'),
+                'threshold': drift['warning'],
+                'message': lambda rows: "Model drift detected: " + rows['drift_score'].map("{:.3f}".format)
+            })
             
-            for _, row in df.iterrows():
-                if row['drift_status'] in ['WARNING', 'CRITICAL']:
-                    issues.append({
-                        'table_name': f"ml_model_{row['model_name']}",
-                        'metric': 'model_drift',
-                        'status': row['drift_status'],
-                        'value': row['drift_score'],
-                        'threshold': 0.1,
-                        'message': f"Model drift detected: {row['drift_score']:.3f}"
-                    })
-                
-                if row['performance_status'] in ['WARNING', 'CRITICAL']:
-                    issues.append({
-                        'table_name': f"ml_model_{row['model_name']}",
-                        'metric': 'model_performance',
-                        'status': row['performance_status'],
-                        'value': row['validation_score'] - row['production_score'],
-                        'threshold': 0.05,
-                        'message': f"Performance degradation: {row['validation_score'] - row['production_score']:.3f}"
-                    })
+            performance_status = threshold_status(performance_drop, degradation['warning'], degradation['critical'])
+            issues.extend(status_issues(df, performance_status, flagged=ALL_STATUSES, fields={
+                'table_name': model_table,
+                'metric': 'model_performance',
+                'status': performance_status,
+                'value': performance_drop,
+                'threshold': degradation['warning'],
+                'message': "Performance degradation: " + performance_drop.map("{:.3f}".format)
+            }))
             
             return issues
         except Exception as e:
             print(f"❌ Error checking ML model performance: {e}")
-            return []
+            return None
     
-    def send_alert(self, issues: List[Dict]):
-        """Send alerts for data quality issues"""
-        if not issues:
+    def send_alert(self, issues: List[Dict], all_checks_ran: bool = True):
+        """Send alerts for new, escalated or long-running data quality issues
+
+        Called on every cycle with every check result, GOOD ones included,
+        so the pipeline can clear issues that have resolved. State of issues
+        that were not reported is only expired when all_checks_ran: a failed
+        check reports nothing, which is not the same as reporting no issues.
+        """
+        alertable = self.get_alert_pipeline().process(issues, expire_unseen=all_checks_ran)
+        if not alertable:
             return
         
-        critical_issues = [i for i in issues if i['status'] == 'CRITICAL']
-        warning_issues = [i for i in issues if i['status'] == 'WARNING']
-        
-        alert_message = {
-            'timestamp': datetime.now().isoformat(),
-            'environment': self.environment,
-            'critical_count': len(critical_issues),
-            'warning_count': len(warning_issues),
-            'issues': issues
-        }
+        alert_message = alert_row(alertable, self.environment)
         
         # Log alert
-        print(f"🚨 ALERT: {len(critical_issues)} critical, {len(warning_issues)} warning issues")
+        print(f"🚨 ALERT: {alert_message['critical_count']} critical, "
+              f"{alert_message['warning_count']} warning issues")
         
         # Send email alert (implement based on your email system)
-        self.send_email_alert(alert_message)
+        self.send_email_alert({**alert_message, 'issues': alertable})
         
         # Log to Snowflake
         self.log_alert_to_snowflake(alert_message)
@@ -268,40 +439,114 @@ class DataQualityMonitor:
         print(f"📧 Email alert sent: {alert_message['critical_count']} critical issues")
     
     def log_alert_to_snowflake(self, alert_message: Dict):
-        """Log alert to Snowflake for tracking"""
+        """Queue the alert row; rows are written to Snowflake in batches"""
         try:
-            insert_query = f"""
-            INSERT INTO data_quality_alerts (
-                alert_timestamp, environment, critical_count, warning_count, alert_data
-            ) VALUES (
-                '{alert_message['timestamp']}',
-                '{alert_message['environment']}',
-                {alert_message['critical_count']},
-                {alert_message['warning_count']},
-                PARSE_JSON('{json.dumps(alert_message['issues'])}')
-            )
-            """
-            self.session.sql(insert_query).collect()
+            self.get_alert_pipeline().enqueue(alert_message)
         except Exception as e:
             print(f"❌ Error logging alert to Snowflake: {e}")
     
+    def quality_checks(self) -> List:
+        """(name, check) pairs for one cycle; each check takes a session and
+        returns its results, or None if it failed"""
+        return [
+            ('freshness', self.check_data_freshness),
+            ('completeness', self.check_data_completeness),
+            *[(check['name'], lambda session, check=check: self.run_integrity_check(check, session))
+              for check in self.load_integrity_checks()],
+            ('ml_model_performance', self.check_ml_model_performance),
+            ('kpi_anomalies', self.check_kpi_anomalies)
+        ]
+    
+    def run_checks_concurrently(self):
+        """Run independent checks and each integrity query in parallel on pooled sessions
+        
+        A cycle takes as long as its slowest check. Results are merged in the
+        serial order; a check that overruns its timeout is reported as a
+        WARNING issue instead of blocking the cycle. Every check has its own
+        worker; its timeout starts once it has a session, so a check waiting
+        for a session from a smaller shared pool is not timed out early.
+        Returns (results, names of checks that failed or timed out).
+        """
+        print("🔍 Checking freshness, completeness, referential integrity, ML models and KPI anomalies concurrently...")
+        checks = self.quality_checks()
+        
+        if self.session_pool is None:
+            from session_pool import SessionPool
+            self.session_pool = SessionPool(max_sessions_per_key=self.execution_config["standalone_sessions"])
+        
+        started = {}  # check name -> monotonic time it got its session
+        
+        def run_check(name, check):
+            with self.session_pool.session(self.connection_params) as session:
+                started[name] = time.monotonic()
+                return check(session)
+        
+        timeout = self.execution_config["check_timeout_seconds"]
+        # Margin for the server-side statement timeout to fire first
+        deadline_after = timeout + 5
+        executor = ThreadPoolExecutor(max_workers=len(checks), thread_name_prefix="dq-check")
+        try:
+            futures = [(name, executor.submit(run_check, name, check)) for name, check in checks]
+            while True:
+                now = time.monotonic()
+                waiting = [(name, future) for name, future in futures if not future.done()
+                           and (name not in started or now < started[name] + deadline_after)]
+                if not waiting:
+                    break
+                deadlines = [started[name] + deadline_after for name, _ in waiting if name in started]
+                # Re-check at least every second for checks still waiting for a session
+                wait([future for _, future in waiting], return_when=FIRST_COMPLETED,
+                     timeout=max(0.0, min(deadlines + [now + 1.0]) - now))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        results, failed = [], []
+        for name, future in futures:
+            if future.cancelled() or not future.done():
+                print(f"⏰ {name} check timed out after {timeout}s")
+                failed.append(name)
+                results.append({
+                    'table_name': name,
+                    'metric': 'check_timeout',
+                    'status': 'WARNING',
+                    'value': timeout,
+                    'threshold': timeout,
+                    'message': f"{name} check did not finish within {timeout}s"
+                })
+            elif future.exception():
+                print(f"❌ Error running {name} check: {future.exception()}")
+                failed.append(name)
+            elif future.result() is None:
+                failed.append(name)
+            else:
+                results.extend(future.result())
+        return results, failed
+    
     def run_quality_checks(self):
-        """Run all data quality checks"""
+        """Run all data quality checks and return the WARNING/CRITICAL issues"""
         print(f"🔍 Running data quality checks for {self.environment}")
         
-        all_issues = []
-        
         # Run all quality checks
-        all_issues.extend(self.check_data_freshness())
-        all_issues.extend(self.check_data_completeness())
-        all_issues.extend(self.check_referential_integrity())
-        all_issues.extend(self.check_ml_model_performance())
-        
-        # Send alerts if issues found
-        if all_issues:
-            self.send_alert(all_issues)
+        if self.execution_config["concurrent"]:
+            results, failed = self.run_checks_concurrently()
         else:
+            results, failed = [], []
+            for name, check in self.quality_checks():
+                found = check(self.session)
+                if found is None:
+                    failed.append(name)
+                else:
+                    results.extend(found)
+        
+        all_issues = [result for result in results if result['status'] != STATUS_GOOD]
+        self.failed_checks = failed
+        if failed:
+            print(f"⚠️ {len(failed)} check(s) could not run: {', '.join(failed)}")
+        elif not all_issues:
             print("✅ All data quality checks passed")
+        self.send_alert(results, all_checks_ran=not failed)
+        # Writes alert rows queued by earlier cycles once they are due
+        self.get_alert_pipeline().flush()
         
         return all_issues
     
@@ -312,10 +557,8 @@ class DataQualityMonitor:
         # Connect to Snowflake
         self.connect()
         
-        # Schedule checks
+        # Schedule checks (freshness polls are metadata-only, so every cycle stays cheap)
         schedule.every(15).minutes.do(self.run_quality_checks)
-        schedule.every().hour.do(self.run_quality_checks)
-        schedule.every().day.at("06:00").do(self.run_quality_checks)
         
         # Run initial check
         self.run_quality_checks()
@@ -334,15 +577,27 @@ def main():
                        help="Target environment")
     parser.add_argument("--once", action="store_true",
                        help="Run checks once instead of continuous monitoring")
+    parser.add_argument("--reset-freshness-state", action="store_true",
+                       help="Forget stored high-water marks and statuses before running")
+    parser.add_argument("--alert-sink", choices=["snowflake", "sqlite"],
+                       help="Where alert rows are written (default from config)")
     
     args = parser.parse_args()
     
     monitor = DataQualityMonitor(args.environment)
+    if args.alert_sink:
+        monitor.alert_config["sink"] = args.alert_sink
+    if args.reset_freshness_state:
+        monitor.get_freshness_tracker().state_store.reset()
     
     if args.once:
         monitor.connect()
-        issues = monitor.run_quality_checks()
-        sys.exit(0 if not issues else 1)
+        try:
+            issues = monitor.run_quality_checks()
+        finally:
+            # A one-off run has no later cycle to write what it queued
+            monitor.get_alert_pipeline().flush(force=True)
+        sys.exit(0 if not (issues or monitor.failed_checks) else 1)
     else:
         monitor.start_monitoring()
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+dbt Relationship Integrity Checks
+Reads the `relationships` tests declared in dbt schema.yml files and turns
+them into orphaned-key checks. All relationships of a child model are
+checked in one query, so each fact table is scanned once. The query joins
+each parent's distinct keys and counts orphans per foreign key with
+COUNT_IF.
+"""
+
+import glob
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import yaml
+
+DEFAULT_DBT_PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'dbt')
+
+REF_PATTERN = re.compile(r"""ref\(\s*['"]([\w.]+)['"]\s*\)""")
+
+
+@dataclass(frozen=True)
+class Relationship:
+    """child_model.column must exist in parent_model.parent_column"""
+    child_model: str
+    column: str
+    parent_model: str
+    parent_column: str
+    where: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.child_model}.{self.column}->{self.parent_model}"
+
+
+def _relationship_args(test) -> Optional[Dict]:
+    if not isinstance(test, dict) or 'relationships' not in test:
+        return None
+    args = test['relationships'] or {}
+    # dbt >= 1.10 nests test arguments under `arguments`
+    return {**args, **(args.get('arguments') or {})}
+
+
+def load_dbt_relationships(dbt_project_dir: str = DEFAULT_DBT_PROJECT_DIR,
+                           model_dirs: List[str] = ("models/marts",)) -> List[Relationship]:
+    """Relationships tests on models under model_dirs whose parent is a ref() model
+
+    Tests pointing at source() tables are skipped: sources are checked
+    where they land, in staging.
+    """
+    relationships = []
+    for model_dir in model_dirs:
+        pattern = os.path.join(dbt_project_dir, model_dir, '**', '*.yml')
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            with open(path) as f:
+                schema = yaml.safe_load(f) or {}
+            for model in schema.get('models') or []:
+                for column in model.get('columns') or []:
+                    for test in (column.get('tests') or []) + (column.get('data_tests') or []):
+                        args = _relationship_args(test)
+                        if not args:
+                            continue
+                        parent = REF_PATTERN.search(str(args.get('to', '')))
+                        if not parent or not args.get('field'):
+                            continue
+                        relationships.append(Relationship(
+                            child_model=model['name'],
+                            column=column['name'],
+                            parent_model=parent.group(1),
+                            parent_column=args['field'],
+                            where=(args.get('config') or {}).get('where')
+                        ))
+    # The same relationship can be declared in more than one place
+    return list(dict.fromkeys(relationships))
+
+
+def orphan_alias(relationship: Relationship) -> str:
+    return f"orphans_{relationship.column}_{relationship.parent_model}".upper()
+
+
+def build_integrity_checks(relationships: List[Relationship], threshold: int = 0) -> List[Dict]:
+    """One check per (child model, where filter) covering all of its relationships"""
+    grouped: Dict[tuple, List[Relationship]] = {}
+    for relationship in relationships:
+        grouped.setdefault((relationship.child_model, relationship.where), []).append(relationship)
+
+    checks = []
+    for (child_model, where), group in grouped.items():
+        predicates = []
+        joins = []
+        for i, relationship in enumerate(group):
+            parent_alias = f"p{i}"
+            predicates.append(
+                f"COUNT_IF(c.{relationship.column} IS NOT NULL AND {parent_alias}.parent_key IS NULL) "
+                f"AS {orphan_alias(relationship)}"
+            )
+            # DISTINCT keeps a duplicated parent key from multiplying child rows
+            joins.append(
+                f"LEFT JOIN (SELECT DISTINCT {relationship.parent_column} AS parent_key "
+                f"FROM {relationship.parent_model}) {parent_alias} "
+                f"ON c.{relationship.column} = {parent_alias}.parent_key"
+            )
+
+        query = (
+            "SELECT COUNT(*) AS TOTAL_ROWS,\n       "
+            + ",\n       ".join(predicates)
+            + f"\nFROM {child_model} c\n"
+            + "\n".join(joins)
+            + (f"\nWHERE {where}" if where else "")
+        )
+        checks.append({
+            'name': f"{child_model}_integrity",
+            'query': query,
+            'relationships': group,
+            'threshold': threshold
+        })
+    return checks
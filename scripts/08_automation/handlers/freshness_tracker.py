@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Incremental Freshness Tracker
+Keeps a per-table high-water mark in a local SQLite state store instead of
+recomputing staleness from vw_data_freshness_monitoring on every cycle.
+Each poll reads only metadata: information_schema last_altered for all
+tracked tables in one query, plus MAX(_loaded_at) for the tables that
+changed since the last poll. Staleness is computed locally for every table
+on each poll; status changes (GOOD -> WARNING -> CRITICAL and back) are
+flagged so callers can tell a new problem from one that persists.
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from issue_extraction import STATUS_GOOD, normalize_columns, threshold_status
+
+
+@dataclass(frozen=True)
+class TrackedTable:
+    """A table whose freshness is tracked
+
+    loaded_at_column: load timestamp column (e.g. '"_loaded_at"'); when None
+                      the table's last_altered time is the high-water mark
+    """
+    schema: str
+    name: str
+    loaded_at_column: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.schema}.{self.name}".upper()
+
+
+@dataclass
+class TableState:
+    """What the store remembers about one table between polls"""
+    table_name: str
+    last_altered: Optional[datetime] = None
+    high_water_mark: Optional[datetime] = None
+    status: str = STATUS_GOOD
+    status_since: Optional[datetime] = None
+    last_checked: Optional[datetime] = None
+
+
+def _to_utc(value) -> Optional[datetime]:
+    """Timestamps from Snowflake may be naive (NTZ) or zoned; compare them all in UTC"""
+    if value is None or pd.isna(value):
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(timezone.utc)
+    return timestamp.tz_convert(timezone.utc).to_pydatetime()
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _format(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class FreshnessStateStore:
+    """SQLite-backed table state; safe to share between threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("""
+            CREATE TABLE IF NOT EXISTS table_freshness (
+                table_name TEXT PRIMARY KEY,
+                last_altered TEXT,
+                high_water_mark TEXT,
+                status TEXT NOT NULL,
+                status_since TEXT,
+                last_checked TEXT
+            )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call: sqlite3 connections cannot cross threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self) -> Dict[str, TableState]:
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(
+                "SELECT table_name, last_altered, high_water_mark, status, status_since, last_checked "
+                "FROM table_freshness"
+            ).fetchall()
+        return {
+            row[0]: TableState(row[0], _parse(row[1]), _parse(row[2]), row[3], _parse(row[4]), _parse(row[5]))
+            for row in rows
+        }
+
+    def save(self, states: List[TableState]):
+        with self._lock, self._connect() as connection:
+            connection.executemany("""
+            INSERT INTO table_freshness (table_name, last_altered, high_water_mark, status, status_since, last_checked)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(table_name) DO UPDATE SET
+                last_altered = excluded.last_altered,
+                high_water_mark = excluded.high_water_mark,
+                status = excluded.status,
+                status_since = excluded.status_since,
+                last_checked = excluded.last_checked
+            """, [
+                (state.table_name, _format(state.last_altered), _format(state.high_water_mark), state.status,
+                 _format(state.status_since), _format(state.last_checked))
+                for state in states
+            ])
+
+    def reset(self):
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM table_freshness")
+
+
+class FreshnessTracker:
+    """Polls table metadata and reports each table's freshness status"""
+
+    def __init__(self, tables: List[TrackedTable], state_store: FreshnessStateStore,
+                 warning_minutes: float, critical_minutes: float,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        self.tables = {table.key: table for table in tables}
+        self.state_store = state_store
+        self.warning_minutes = warning_minutes
+        self.critical_minutes = critical_minutes
+        self.clock = clock
+
+    def fetch_last_altered(self, session, statement_params: Dict = None) -> Dict[str, datetime]:
+        """last_altered of every tracked table, from one information_schema query"""
+        schemas = sorted({table.schema.upper() for table in self.tables.values()})
+        names = sorted({table.name.upper() for table in self.tables.values()})
+        query = f"""
+        SELECT table_schema, table_name, last_altered
+        FROM information_schema.tables
+        WHERE table_schema IN ({', '.join(f"'{schema}'" for schema in schemas)})
+        AND table_name IN ({', '.join(f"'{name}'" for name in names)})
+        """
+        df = normalize_columns(session.sql(query).to_pandas(statement_params=statement_params))
+        keys = (df['table_schema'].str.upper() + "." + df['table_name'].str.upper()).tolist()
+        return {key: _to_utc(value) for key, value in zip(keys, df['last_altered']) if key in self.tables}
+
+    def fetch_high_water_marks(self, session, tables: List[TrackedTable],
+                               statement_params: Dict = None) -> Dict[str, datetime]:
+        """MAX(loaded_at) for tables with a load column, batched into one query"""
+        tables = [table for table in tables if table.loaded_at_column]
+        if not tables:
+            return {}
+        # MAX over a column is answered from micro-partition metadata, not a scan
+        query = "\nUNION ALL\n".join(
+            f"SELECT '{table.key}' AS table_key, MAX({table.loaded_at_column}) AS high_water_mark "
+            f"FROM {table.schema}.{table.name}"
+            for table in tables
+        )
+        df = normalize_columns(session.sql(query).to_pandas(statement_params=statement_params))
+        return {key: _to_utc(value) for key, value in zip(df['table_key'], df['high_water_mark'])}
+
+    def poll(self, session, statement_params: Dict = None) -> List[Dict]:
+        """Refresh high-water marks and return the status of every tracked table
+
+        Each result has 'changed' (status differs from the previous poll) and
+        'previous_status'. Only tables altered since the previous poll are
+        queried for their load timestamp; everything else is re-evaluated from
+        stored state.
+        """
+        now = self.clock()
+        states = self.state_store.load()
+        last_altered = self.fetch_last_altered(session, statement_params)
+
+        changed = [
+            table for key, table in self.tables.items()
+            if key in last_altered and (key not in states or states[key].last_altered != last_altered[key]
+                                        or states[key].high_water_mark is None)
+        ]
+        high_water_marks = self.fetch_high_water_marks(session, changed, statement_params)
+
+        for table in changed:
+            state = states.setdefault(table.key, TableState(table.key, status_since=now))
+            state.last_altered = last_altered[table.key]
+            state.high_water_mark = (high_water_marks.get(table.key) if table.loaded_at_column
+                                     else last_altered[table.key])
+        missing = sorted(self.tables.keys() - last_altered.keys())
+        if missing:
+            print(f"⚠️ Tracked tables not found in information_schema: {', '.join(missing)}")
+
+        tracked = [states[key] for key in self.tables if key in states and states[key].high_water_mark]
+        if not tracked:
+            return []
+        minutes_stale = pd.Series([(now - state.high_water_mark).total_seconds() / 60 for state in tracked])
+        statuses = threshold_status(minutes_stale, self.warning_minutes, self.critical_minutes)
+
+        results = []
+        for state, minutes, status in zip(tracked, minutes_stale, statuses):
+            previous_status = state.status
+            changed = status != previous_status
+            if changed:
+                state.status = str(status)
+                state.status_since = now
+                message = f"Freshness {previous_status} -> {status}: data is {minutes:.0f} minutes stale"
+            else:
+                message = f"Data is {minutes:.0f} minutes stale ({status} since {_format(state.status_since)})"
+            state.last_checked = now
+            results.append({
+                'table_name': state.table_name,
+                'metric': 'freshness',
+                'status': str(status),
+                'previous_status': previous_status,
+                'changed': changed,
+                'value': round(float(minutes), 1),
+                'threshold': self.critical_minutes,
+                'high_water_mark': _format(state.high_water_mark),
+                'message': message
+            })
+
+        self.state_store.save(tracked)
+        return results
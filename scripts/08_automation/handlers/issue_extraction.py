@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Vectorized Issue Extraction
+Turns monitoring query results into issue/recommendation dicts without
+iterrows(). Statuses come from threshold breakpoints evaluated as column
+expressions (np.select). Rows are filtered with boolean masks, and only the
+matching rows are materialized, via to_dict('records').
+"""
+
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+STATUS_GOOD = 'GOOD'
+STATUS_WARNING = 'WARNING'
+STATUS_CRITICAL = 'CRITICAL'
+ALL_STATUSES = (STATUS_GOOD, STATUS_WARNING, STATUS_CRITICAL)
+
+
+class col:
+    """Reference to a result column in an extract_records field spec"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+FieldSpec = Union[col, Callable[[pd.DataFrame], object], pd.Series, np.ndarray, object]
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Lower-case column names (Snowflake returns them upper-case unless quoted)"""
+    df.columns = [str(c).lower() for c in df.columns]
+    return df
+
+
+def threshold_status(values, warning_at: float, critical_at: float, higher_is_worse: bool = True,
+                     missing: str = STATUS_GOOD) -> np.ndarray:
+    """GOOD/WARNING/CRITICAL per value from two breakpoints
+
+    higher_is_worse: values above warning_at are WARNING and above critical_at
+                     CRITICAL (staleness, drift); otherwise values below the
+                     breakpoints are (completeness, accuracy)
+    missing: status of NaN values (a SQL CASE sends NULL to its ELSE branch)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if higher_is_worse:
+        conditions = [values > critical_at, values > warning_at]
+    else:
+        conditions = [values < critical_at, values < warning_at]
+    status = np.select(conditions, [STATUS_CRITICAL, STATUS_WARNING], default=STATUS_GOOD)
+    return np.where(np.isnan(values), missing, status)
+
+
+def extract_records(df: pd.DataFrame, mask, fields: Dict[str, FieldSpec]) -> List[Dict]:
+    """Build one dict per row where mask is True
+
+    Each field is a col() reference, a callable evaluated once on the masked
+    frame (returning a Series/array or scalar), an array aligned with df, or
+    a constant.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return []
+    selected = df.loc[mask]
+    out = pd.DataFrame(index=selected.index)
+    for key, spec in fields.items():
+        if isinstance(spec, col):
+            out[key] = selected[spec.name].to_numpy()
+        elif callable(spec):
+            value = spec(selected)
+            out[key] = value.to_numpy() if isinstance(value, pd.Series) else value
+        elif isinstance(spec, (pd.Series, np.ndarray)):
+            out[key] = np.asarray(spec)[mask]
+        else:
+            out[key] = spec
+    # object dtype keeps numpy scalars from leaking into the dicts as np.float64/np.int64
+    return out.astype(object).where(out.notna(), None).to_dict('records')
+
+
+def status_issues(df: pd.DataFrame, status, fields: Dict[str, FieldSpec],
+                  flagged=(STATUS_WARNING, STATUS_CRITICAL)) -> List[Dict]:
+    """Issue records for rows whose status is flagged, with the status attached"""
+    status = np.asarray(status)
+    if 'status' not in fields:
+        fields = {**fields, 'status': status}
+    return extract_records(df, np.isin(status, flagged), fields)
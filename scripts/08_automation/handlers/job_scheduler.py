@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Automation Job Scheduler
+Runs scheduled automation jobs on a shared worker pool. Jobs can depend on
+other jobs, cap how many of their runs execute at once, and choose what
+happens to runs missed while the scheduler was busy or down. A long job
+only occupies its own slots, so short frequent jobs keep their cadence.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+# What to do with runs missed since a job was last due
+CATCH_UP_POLICIES = ("latest", "all", "skip")
+
+# Slot the running job was scheduled for (None outside scheduled runs), so job
+# code can measure its queue delay
+scheduled_slot = contextvars.ContextVar("scheduled_slot", default=None)
+
+
+@dataclass
+class ScheduledJob:
+    """A job definition plus its scheduling state"""
+    name: str
+    func: Callable
+    interval: Optional[timedelta] = None
+    daily_at: Optional[str] = None  # "HH:MM" local time
+    depends_on: List[str] = field(default_factory=list)
+    max_concurrency: int = 1
+    catch_up: str = "latest"  # latest: run once for all missed slots, all: run every missed slot, skip: drop missed slots
+    max_catch_up_runs: int = 24
+    run_on_start: bool = False
+
+    next_run: Optional[datetime] = None
+    pending: List[datetime] = field(default_factory=list)
+    running: int = 0
+    last_started: Optional[datetime] = None
+    last_finished: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_result: object = None
+    last_duration: Optional[float] = None
+    run_count: int = 0
+    skipped_count: int = 0
+
+    def first_run(self, now: datetime) -> datetime:
+        if self.run_on_start:
+            return now
+        return self.following_run(now)
+
+    def following_run(self, after: datetime) -> datetime:
+        """Next scheduled slot strictly after `after`"""
+        if self.interval:
+            return after + self.interval
+        hour, minute = (int(part) for part in self.daily_at.split(":"))
+        slot = after.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return slot if slot > after else slot + timedelta(days=1)
+
+    def due_slots(self, now: datetime) -> List[datetime]:
+        """Scheduled slots that have come due, advancing next_run past now"""
+        slots = []
+        while self.next_run is not None and self.next_run <= now:
+            slots.append(self.next_run)
+            self.next_run = self.following_run(self.next_run)
+        return slots
+
+
+class JobScheduler:
+    """Dependency-aware scheduler with per-job concurrency limits"""
+
+    def __init__(self, max_workers: int = 4, log: Callable[[str, str], None] = None,
+                 tick_seconds: float = 1.0):
+        """
+        Args:
+            max_workers: size of the shared worker pool
+            log: callable(message, level) used for scheduler events (defaults to print)
+            tick_seconds: upper bound on how long the loop sleeps between checks
+        """
+        self.max_workers = max_workers
+        self.tick_seconds = tick_seconds
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._log = log or (lambda message, level="INFO": print(message))
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._executor = None
+
+    def add_job(self, name: str, func: Callable, interval: Optional[timedelta] = None,
+                daily_at: Optional[str] = None, depends_on: Optional[List[str]] = None,
+                max_concurrency: int = 1, catch_up: str = "latest", run_on_start: bool = False,
+                max_catch_up_runs: int = 24) -> ScheduledJob:
+        """Register a job run every `interval` or daily at `daily_at`
+
+        depends_on: a due run waits until every listed job has finished a run
+                    since this job last started
+        """
+        if (interval is None) == (daily_at is None):
+            raise ValueError(f"Job {name} needs exactly one of interval or daily_at")
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy {catch_up!r} (expected one of {CATCH_UP_POLICIES})")
+        unknown = [dep for dep in depends_on or [] if dep not in self.jobs]
+        if unknown:
+            raise ValueError(f"Job {name} depends on unregistered jobs: {', '.join(unknown)}")
+
+        job = ScheduledJob(name=name, func=func, interval=interval, daily_at=daily_at,
+                           depends_on=list(depends_on or []), max_concurrency=max_concurrency,
+                           catch_up=catch_up, run_on_start=run_on_start,
+                           max_catch_up_runs=max_catch_up_runs)
+        job.next_run = job.first_run(datetime.now())
+        self.jobs[name] = job
+        return job
+
+    def results(self) -> Dict[str, object]:
+        """Latest result of every job that has finished at least once"""
+        return {name: job.last_result for name, job in self.jobs.items() if job.last_finished}
+
+    def status(self) -> Dict[str, Dict]:
+        return {
+            name: {
+                'next_run': job.next_run.isoformat() if job.next_run else None,
+                'pending_runs': len(job.pending),
+                'running': job.running,
+                'last_status': job.last_status,
+                'last_finished': job.last_finished.isoformat() if job.last_finished else None,
+                'last_duration_seconds': job.last_duration,
+                'run_count': job.run_count,
+                'skipped_count': job.skipped_count
+            }
+            for name, job in self.jobs.items()
+        }
+
+    def _queue_due_runs(self, now: datetime):
+        for job in self.jobs.values():
+            slots = job.due_slots(now)
+            if not slots:
+                continue
+            missed, latest = slots[:-1], slots[-1]
+            if job.catch_up == "all":
+                job.pending.extend(slots)
+                overflow = len(job.pending) - job.max_catch_up_runs
+                if overflow > 0:
+                    job.pending = job.pending[overflow:]
+                    job.skipped_count += overflow
+            elif job.catch_up == "skip":
+                # Only an on-time slot runs; anything queued behind a busy job is dropped
+                job.skipped_count += len(missed) + len(job.pending)
+                job.pending = [latest] if now - latest < self._grace(job) else []
+                if not job.pending:
+                    job.skipped_count += 1
+            else:
+                job.skipped_count += len(missed) + len(job.pending)
+                job.pending = [latest]
+            if missed:
+                self._log(f"⏭️ {job.name}: {len(missed)} missed run(s), catch-up policy '{job.catch_up}'", "WARNING")
+
+    def _grace(self, job: ScheduledJob) -> timedelta:
+        """How late a slot may start under the 'skip' policy"""
+        period = job.interval or timedelta(days=1)
+        return max(timedelta(seconds=self.tick_seconds * 2), period / 2)
+
+    def _dependencies_ready(self, job: ScheduledJob) -> bool:
+        """Every dependency has finished a run since this job last started"""
+        for dep_name in job.depends_on:
+            dep = self.jobs[dep_name]
+            if dep.last_finished is None:
+                return False
+            if job.last_started and dep.last_finished < job.last_started:
+                return False
+        return True
+
+    def _expire_skipped(self, job: ScheduledJob, now: datetime):
+        """Drop 'skip' slots that outlived their grace period while waiting
+        for dependencies or a free concurrency slot"""
+        if job.catch_up != "skip" or not job.pending:
+            return
+        on_time = [slot for slot in job.pending if now - slot < self._grace(job)]
+        expired = len(job.pending) - len(on_time)
+        if expired:
+            job.pending = on_time
+            job.skipped_count += expired
+            self._log(f"⏭️ {job.name}: {expired} run(s) expired while waiting, catch-up policy 'skip'", "WARNING")
+
+    def _dispatch(self, now: Optional[datetime] = None):
+        now = now or datetime.now()
+        for job in self.jobs.values():
+            self._expire_skipped(job, now)
+            while job.pending and job.running < job.max_concurrency and self._dependencies_ready(job):
+                scheduled_for = job.pending.pop(0)
+                job.running += 1
+                job.last_started = datetime.now()
+                self._executor.submit(self._run_job, job, scheduled_for)
+
+    def _run_job(self, job: ScheduledJob, scheduled_for: datetime):
+        start = time.perf_counter()
+        lag = (datetime.now() - scheduled_for).total_seconds()
+        self._log(f"▶️ {job.name} started (scheduled {scheduled_for:%H:%M:%S}, {lag:.0f}s late)")
+        token = scheduled_slot.set(scheduled_for)
+        try:
+            result = job.func()
+            status = result.get("status", "success") if isinstance(result, dict) else "success"
+        except Exception as e:
+            result = {"status": "exception", "error": str(e)}
+            status = "exception"
+        finally:
+            scheduled_slot.reset(token)
+        duration = time.perf_counter() - start
+
+        with self._wakeup:
+            job.running -= 1
+            job.run_count += 1
+            job.last_finished = datetime.now()
+            job.last_status = status
+            job.last_result = result
+            job.last_duration = round(duration, 3)
+            self._wakeup.notify_all()
+        self._log(f"⏹️ {job.name} finished: {status} in {duration:.1f}s",
+                  "INFO" if status in ("success", "skipped") else "ERROR")
+
+    def _seconds_until_next(self) -> float:
+        upcoming = [job.next_run for job in self.jobs.values() if job.next_run]
+        if not upcoming:
+            return self.tick_seconds
+        return max(0.0, min(self.tick_seconds, (min(upcoming) - datetime.now()).total_seconds()))
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        """Run until stop() is called or stop_event is set"""
+        stop_event = stop_event or self._stopped
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="automation-job")
+        self._log(f"🗓️ Scheduler started with {len(self.jobs)} jobs on {self.max_workers} workers")
+        try:
+            while not (stop_event.is_set() or self._stopped.is_set()):
+                with self._wakeup:
+                    self._queue_due_runs(datetime.now())
+                    self._dispatch()
+                    # Woken early when a job finishes, so dependents start promptly
+                    self._wakeup.wait(self._seconds_until_next())
+        finally:
+            self._executor.shutdown(wait=True)
+            self._log("🗓️ Scheduler stopped")
+
+    def stop(self):
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Streaming KPI Anomaly Detector
+Online anomaly detection for monitoring metric series such as row counts per
+load, real_time_kpis and freshness lag. Each series keeps a fixed amount of
+state in NumPy arrays: a robust EWMA level and scale, a level for each of
+the 168 hours of the week, and the scale of residuals around those levels.
+A point is scored as a z-score against its hour-of-week baseline once that
+slot has warmed up, and against the overall level until then. Updates are winsorized, so a spike or
+a drop barely moves the baseline it is judged against. A batch of points
+across thousands of series is scored with array operations, not per-series
+Python loops.
+"""
+
+import os
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from issue_extraction import STATUS_CRITICAL, STATUS_GOOD, STATUS_WARNING, col, extract_records
+
+HOURS_PER_WEEK = 168
+
+# Mean absolute deviation to standard deviation for normally distributed data
+MAD_TO_SIGMA = 1.2533
+
+STATE_ARRAYS = ("level", "scale", "count", "residual_scale", "last_value", "last_timestamp",
+                "seasonal_level", "seasonal_count")
+
+
+def hour_of_week(timestamps) -> np.ndarray:
+    """0 = Monday 00:00 ... 167 = Sunday 23:00"""
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    return (index.dayofweek * 24 + index.hour).to_numpy(dtype=np.int64)
+
+
+class KPIAnomalyDetector:
+    """Per-series robust EWMA and hour-of-week baselines with O(1) state per series"""
+
+    def __init__(self, alpha: float = 0.1, seasonal_alpha: float = 0.3, z_threshold: float = 4.0,
+                 warmup: int = 12, seasonal_warmup: int = 3, clip: float = 3.0,
+                 min_scale_fraction: float = 0.01, min_scale: float = 0.0, capacity: int = 256):
+        """
+        Args:
+            alpha: weight of a new point in the overall level and scale
+            seasonal_alpha: weight of a new point in its hour-of-week slot
+            z_threshold: |z| at or above which a point is anomalous
+            warmup: points a series needs before it is scored
+            seasonal_warmup: points an hour-of-week slot needs before it replaces the overall baseline
+            clip: residuals are winsorized to +-clip scales before they update the state
+            min_scale_fraction: floor on the scale relative to |level|, so near-constant
+                                series do not flag tiny changes
+            min_scale: absolute floor on the scale, for series whose level is near zero
+            capacity: initial number of series slots (grows as needed)
+        """
+        self.alpha = alpha
+        self.seasonal_alpha = seasonal_alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.seasonal_warmup = seasonal_warmup
+        self.clip = clip
+        self.min_scale_fraction = min_scale_fraction
+        self.min_scale = min_scale
+        self.index: Dict[str, int] = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.level = np.zeros(capacity)
+        self.scale = np.zeros(capacity)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        # Spread around the hour-of-week levels, pooled over all slots: a slot
+        # sees one point a week for hourly data, far too few to estimate its own
+        self.residual_scale = np.zeros(capacity)
+        self.last_value = np.full(capacity, np.nan)
+        self.last_timestamp = np.full(capacity, np.nan)  # Unix seconds
+        # Seasonal state is the bulk of the memory, so it is kept in float32/uint16
+        self.seasonal_level = np.zeros((capacity, HOURS_PER_WEEK), dtype=np.float32)
+        self.seasonal_count = np.zeros((capacity, HOURS_PER_WEEK), dtype=np.uint16)
+
+    def _grow(self, needed: int):
+        capacity = len(self.level)
+        if needed <= capacity:
+            return
+        old = {name: getattr(self, name) for name in STATE_ARRAYS}
+        self._allocate(max(needed, capacity * 2))
+        for name, values in old.items():
+            getattr(self, name)[:len(values)] = values
+
+    def series_ids(self, names: Iterable[str]) -> np.ndarray:
+        """Row index of each series, registering unseen names"""
+        ids = []
+        for name in names:
+            if name not in self.index:
+                self.index[name] = len(self.index)
+            ids.append(self.index[name])
+        self._grow(len(self.index))
+        return np.asarray(ids, dtype=np.int64)
+
+    def last_values(self, names: Iterable[str]) -> np.ndarray:
+        """Last observed value per series (NaN for unknown series)"""
+        ids = [self.index.get(name, -1) for name in names]
+        return np.array([self.last_value[i] if i >= 0 else np.nan for i in ids])
+
+    def record(self, names, values, timestamps):
+        """Remember the latest value of series without scoring them
+
+        For cumulative counters whose differences are what gets scored.
+        """
+        ids = self.series_ids(names)
+        self.last_value[ids] = np.asarray(values, dtype=np.float64)
+        self.last_timestamp[ids] = pd.to_datetime(list(timestamps)).astype('int64').to_numpy() / 1e9
+
+    @property
+    def series_count(self) -> int:
+        return len(self.index)
+
+    def _score_and_update(self, ids: np.ndarray, values: np.ndarray, slots: np.ndarray,
+                          timestamps: np.ndarray) -> Dict[str, np.ndarray]:
+        """Score then update a batch in which every series appears at most once"""
+        level, scale, count = self.level[ids], self.scale[ids], self.count[ids]
+        residual_scale = self.residual_scale[ids]
+        seasonal_level = self.seasonal_level[ids, slots].astype(np.float64)
+        seasonal_count = self.seasonal_count[ids, slots]
+
+        seasonal = (seasonal_count >= self.seasonal_warmup) & (residual_scale > 0)
+        expected = np.where(seasonal, seasonal_level, level)
+        spread = np.where(seasonal, residual_scale, scale) * MAD_TO_SIGMA
+        spread = np.maximum(spread, np.maximum(self.min_scale_fraction * np.abs(expected), self.min_scale))
+        residual = values - expected
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(spread > 0, residual / spread, np.where(residual == 0, 0.0, np.inf * np.sign(residual)))
+        scored = count >= self.warmup
+        z = np.where(scored, z, np.nan)
+        anomaly = scored & (np.abs(np.nan_to_num(z)) >= self.z_threshold)
+
+        # Winsorized updates: the first point seeds the level, later residuals are clipped
+        first = count == 0
+        bound = np.where(scale > 0, self.clip * scale * MAD_TO_SIGMA, np.inf)
+        overall_residual = np.clip(values - level, -bound, bound)
+        self.level[ids] = np.where(first, values, level + self.alpha * overall_residual)
+        self.scale[ids] = np.where(first, 0.0, (1 - self.alpha) * scale + self.alpha * np.abs(overall_residual))
+        self.count[ids] = count + 1
+
+        seasonal_first = seasonal_count == 0
+        seasonal_bound = np.where(residual_scale > 0, self.clip * residual_scale * MAD_TO_SIGMA, np.inf)
+        seasonal_residual = np.clip(values - seasonal_level, -seasonal_bound, seasonal_bound)
+        self.seasonal_level[ids, slots] = np.where(
+            seasonal_first, values, seasonal_level + self.seasonal_alpha * seasonal_residual)
+        # Only slots that already had a level say anything about the residual spread
+        updated_residual_scale = np.where(
+            residual_scale > 0,
+            (1 - self.alpha) * residual_scale + self.alpha * np.abs(seasonal_residual),
+            np.abs(seasonal_residual))
+        self.residual_scale[ids] = np.where(seasonal_first, residual_scale, updated_residual_scale)
+        self.seasonal_count[ids, slots] = np.minimum(seasonal_count.astype(np.int64) + 1, np.iinfo(np.uint16).max)
+        self.last_value[ids] = values
+        self.last_timestamp[ids] = timestamps
+
+        return {'expected': expected, 'z_score': z, 'seasonal': seasonal, 'anomaly': anomaly}
+
+    def update(self, names, values, timestamps) -> pd.DataFrame:
+        """Score a batch of points and fold them into the baselines
+
+        Points of the same series are applied in the order given. Returns one
+        row per point with the expected value, z-score, whether the
+        hour-of-week baseline was used, and the anomaly flag.
+        """
+        frame = pd.DataFrame({
+            'series': list(names),
+            'timestamp': pd.to_datetime(list(timestamps)),
+            'value': np.asarray(values, dtype=np.float64)
+        })
+        if frame.empty:
+            return frame.assign(expected=[], z_score=[], seasonal=[], anomaly=[])
+        frame = frame[np.isfinite(frame['value'])].reset_index(drop=True)
+
+        ids = self.series_ids(frame['series'])
+        slots = hour_of_week(frame['timestamp'])
+        epoch = frame['timestamp'].astype('int64').to_numpy() / 1e9
+        values = frame['value'].to_numpy()
+
+        results = {key: np.empty(len(frame), dtype=dtype) for key, dtype in
+                   (('expected', np.float64), ('z_score', np.float64), ('seasonal', bool), ('anomaly', bool))}
+        # Fancy-indexed assignment keeps only the last write per series, so a
+        # batch with repeated series is applied in rounds of unique series
+        rounds = frame.groupby('series', sort=False).cumcount().to_numpy()
+        for round_number in range(rounds.max() + 1 if len(rounds) else 0):
+            mask = rounds == round_number
+            scored = self._score_and_update(ids[mask], values[mask], slots[mask], epoch[mask])
+            for key, column in scored.items():
+                results[key][mask] = column
+        return frame.assign(**results)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        n = self.series_count
+        names = sorted(self.index, key=self.index.get)
+        # np.savez appends .npz unless the path already ends with it
+        np.savez_compressed(path, names=np.array(names, dtype=str),
+                            **{name: getattr(self, name)[:n] for name in STATE_ARRAYS})
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "KPIAnomalyDetector":
+        """Restore saved state; a missing file gives an empty detector"""
+        detector = cls(**kwargs)
+        if not os.path.exists(path):
+            return detector
+        with np.load(path, allow_pickle=False) as saved:
+            names = saved['names'].tolist()
+            detector.index = {name: i for i, name in enumerate(names)}
+            detector._grow(len(names))
+            for name in STATE_ARRAYS:
+                getattr(detector, name)[:len(names)] = saved[name]
+        return detector
+
+
+def anomaly_issues(scored: pd.DataFrame, critical_z: float, metric: str = 'kpi_anomaly',
+                   include_good: bool = False) -> List[Dict]:
+    """Issue dicts (data quality monitor format) for the anomalous rows of update()
+
+    include_good: also return a GOOD result for every series scored without
+                  an anomaly, so the alert pipeline can resolve earlier ones
+    """
+    good = []
+    if include_good:
+        normal = scored[~scored.groupby('series')['anomaly'].transform('any')].drop_duplicates('series', keep='last')
+        good = extract_records(normal, np.ones(len(normal), dtype=bool), {
+            'table_name': col('series'),
+            'metric': metric,
+            'status': STATUS_GOOD,
+            'value': col('value'),
+            'threshold': normal['expected'].round(4),
+            'message': normal['series'] + " is within its baseline"
+        })
+    # Only the latest anomaly per series is reported
+    anomalies = scored[scored['anomaly']].drop_duplicates('series', keep='last')
+    if anomalies.empty:
+        return good
+    z = anomalies['z_score']
+    baseline = np.where(anomalies['seasonal'],
+                        "its " + anomalies['timestamp'].dt.strftime("%a %H") + ":00 baseline",
+                        "its recent level")
+    return good + extract_records(anomalies, np.ones(len(anomalies), dtype=bool), {
+        'table_name': col('series'),
+        'metric': metric,
+        'status': np.where(z.abs() >= critical_z, STATUS_CRITICAL, STATUS_WARNING),
+        'value': col('value'),
+        'threshold': anomalies['expected'].round(4),
+        'z_score': z.round(2),
+        'observed_at': anomalies['timestamp'].map(pd.Timestamp.isoformat),
+        'message': (anomalies['series'] + " = " + anomalies['value'].map("{:,.2f}".format) + " is "
+                    + z.abs().map("{:.1f}".format) + " sigma " + np.where(z > 0, "above ", "below ")
+                    + baseline + " (" + anomalies['expected'].map("{:,.2f}".format) + ")")
+    })
@@ -7,22 +7,74 @@ Coordinates all automation processes and provides a unified interface
 import os
 import sys
 import json
+import contextvars
+import functools
+import importlib
 import time
-import schedule
 import argparse
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import subprocess
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait
+from async_runner import AsyncJob, AsyncJobRunner
+from automation_metrics import AutomationMetrics, ExecutionLogWriter, Tracer, start_metrics_server
+from job_scheduler import JobScheduler, scheduled_slot
+
+# --automation / report names -> automation config entries
+AUTOMATION_TYPES = {
+    "data_quality": "data_quality_monitor",
+    "performance": "performance_optimizer",
+    "ml_lifecycle": "ml_lifecycle_manager"
+}
+
+# In-process entry points: module, handler class, --once method and the
+# predicate on the handler and its return value that the script's --once
+# exit code 0 uses
+IN_PROCESS_ENTRIES = {
+    "data_quality_monitor": ("data_quality_monitor", "DataQualityMonitor", "run_quality_checks",
+                             lambda handler, issues: not (issues or handler.failed_checks)),
+    "performance_optimizer": ("performance_optimizer", "PerformanceOptimizer", "run_optimization_analysis",
+                              lambda handler, recommendations: bool(recommendations)),
+    "ml_lifecycle_manager": ("ml_lifecycle_manager", "MLLifecycleManager", "run_ml_lifecycle_management",
+                             lambda handler, issues: not issues)
+}
+
+# Schedule names used in the automation config
+SCHEDULES = {
+    "every_15_minutes": {"interval": timedelta(minutes=15)},
+    "every_hour": {"interval": timedelta(hours=1)},
+    "daily_at_3am": {"daily_at": "03:00"},
+    "daily_at_6am": {"daily_at": "06:00"}
+}
 
 class MasterOrchestrator:
     def __init__(self, environment: str = "prod"):
         self.environment = environment
         self.automation_config = self.load_automation_config()
         self.running_processes = {}
+        self.session_pool = None
+        self.in_process_executor = None
+        self._in_process_lock = threading.Lock()
+        self._active_in_process = set()  # handlers whose in-process run (possibly timed out) is still executing
         self.log_file = f"logs/orchestrator_{environment}_{int(time.time())}.log"
         
+        metrics_config = self.automation_config["metrics"]
+        self.metrics = AutomationMetrics(environment)
+        self.tracer = Tracer(metrics_config["trace_file"].format(environment=environment))
+        self.metrics_server = None
+        # Where completed runs are logged for the automation dashboard
+        self.monitoring_connection_params = {
+            'account': os.getenv('SF_ACCOUNT'),
+            'user': os.getenv('SF_USER'),
+            'password': os.getenv('SF_PASSWORD'),
+            'warehouse': 'COMPUTE_WH_XS',
+            'database': f'LOGISTICS_DW_{environment.upper()}',
+            'schema': 'MONITORING'
+        }
+        self.execution_log = ExecutionLogWriter(self._monitoring_session, environment) \
+            if metrics_config.get("write_execution_log") else None
+        
     def load_automation_config(self) -> Dict:
         """Load automation configuration"""
         return {
@@ -30,24 +82,56 @@ class MasterOrchestrator:
                 "enabled": True,
                 "schedule": "every_15_minutes",
                 "script": "scripts/automation/data_quality_monitor.py",
-                "timeout": 300  # 5 minutes
+                "timeout": 300,  # 5 minutes
+                "execution": "in_process",  # reuse imports and pooled sessions; "subprocess" isolates the run
+                "retries": 1,  # parallel/report runs (async runner) retry a crash, or a subprocess timeout;
+                               # scheduled runs are not retried, the next slot is the retry
+                "catch_up": "latest"  # one run covers any missed slots
             },
             "performance_optimizer": {
                 "enabled": True,
                 "schedule": "every_hour",
                 "script": "scripts/automation/performance_optimizer.py",
-                "timeout": 600  # 10 minutes
+                "timeout": 600,  # 10 minutes
+                "execution": "in_process",
+                "retries": 1,
+                "catch_up": "latest"
             },
             "ml_lifecycle_manager": {
                 "enabled": True,
                 "schedule": "daily_at_3am",
                 "script": "scripts/automation/ml_lifecycle_manager.py",
-                "timeout": 1800  # 30 minutes
+                "timeout": 1800,  # 30 minutes
+                "execution": "in_process",
+                "catch_up": "latest"
             },
             "auto_deployment": {
                 "enabled": False,  # Manual trigger only
                 "script": "scripts/automation/auto_deployment.py",
-                "timeout": 3600  # 1 hour
+                "timeout": 3600,  # 1 hour
+                "execution": "subprocess"
+            },
+            "automation_report": {
+                "enabled": True,
+                "schedule": "daily_at_6am",
+                # Report on the latest scheduled results instead of re-running them
+                "depends_on": ["data_quality_monitor", "performance_optimizer", "ml_lifecycle_manager"],
+                "catch_up": "skip"
+            },
+            "scheduler": {
+                "max_workers": 4  # one slot per scheduled job, so long jobs never block short ones
+            },
+            "session_pool": {
+                "max_sessions_per_key": 12,  # room for one session per concurrent data quality check
+                "max_idle_seconds": 1800
+            },
+            "metrics": {
+                "host": "127.0.0.1",
+                "port": 9464,  # Prometheus scrape endpoint: /metrics
+                "trace_file": "logs/automation_traces_{environment}.jsonl",
+                # automation_execution_log rows for the dashboard; the table is created by
+                # scripts/03_monitoring/tasks/01_create_alert_tables.sql
+                "write_execution_log": True
             }
         }
     
@@ -60,12 +144,52 @@ class MasterOrchestrator:
         with open(self.log_file, "a") as f:
             f.write(log_entry + "\n")
     
+    def _monitoring_session(self):
+        self._ensure_session_pool()
+        return self.session_pool.session(self.monitoring_connection_params)
+    
+    def record_job_result(self, job_name: str, result: Dict, duration_seconds: float,
+                          queue_delay_seconds: Optional[float] = None, flush: bool = True):
+        """Record a finished run in the metrics registry and the execution log"""
+        if result.get("status") == "skipped":
+            return
+        retries = max(result.get("attempts", 1) - 1, 0)
+        self.metrics.record_job(job_name, result["status"], duration_seconds, queue_delay_seconds,
+                                retries, result.get("rows_processed"))
+        if self.execution_log:
+            self.execution_log.add(job_name, result["status"], round(duration_seconds, 3),
+                                   None if queue_delay_seconds is None else round(queue_delay_seconds, 3),
+                                   retries, result.get("rows_processed"))
+            if flush:
+                self.execution_log.flush()
+    
     def run_automation_script(self, script_name: str, args: List[str] = None) -> Dict:
-        """Run an automation script with timeout and error handling"""
+        """Run an automation script with timeout and error handling, recording metrics and a span
+        
+        This is the scheduler's path. It runs a single attempt and ignores the
+        job's "retries" setting, which applies only to run_parallel_automation
+        (AsyncJobRunner). A failed scheduled run is picked up by the job's next
+        slot.
+        """
+        slot = scheduled_slot.get()
+        queue_delay = (datetime.now() - slot).total_seconds() if slot else None
+        start = time.time()
+        with self.tracer.span(f"automation:{script_name}", job=script_name,
+                              queue_delay_seconds=queue_delay) as span:
+            result = self._execute_automation_script(script_name, args)
+            span["attributes"]["status"] = result["status"]
+        self.record_job_result(script_name, result, time.time() - start, queue_delay)
+        return result
+    
+    def _execute_automation_script(self, script_name: str, args: List[str] = None) -> Dict:
         config = self.automation_config.get(script_name)
         if not config or not config.get("enabled", False):
             return {"status": "skipped", "reason": "disabled"}
         
+        if config.get("execution") == "in_process" and script_name in IN_PROCESS_ENTRIES \
+                and (args or []) == ["--once"]:
+            return self.run_in_process(script_name)
+        
         script_path = config["script"]
         timeout = config.get("timeout", 300)
         
@@ -111,6 +235,122 @@ class MasterOrchestrator:
             self.log(f"❌ {script_name} failed with exception: {str(e)}", "ERROR")
             return {"status": "exception", "error": str(e)}
     
+    def _ensure_session_pool(self):
+        """Create the shared session pool on first use"""
+        with self._in_process_lock:
+            if self.session_pool is None:
+                from session_pool import SessionPool
+                self.session_pool = SessionPool(**self.automation_config["session_pool"])
+    
+    def _ensure_in_process_runtime(self):
+        """Create the session pool and worker pool on the first in-process run"""
+        self._ensure_session_pool()
+        with self._in_process_lock:
+            if self.in_process_executor is None:
+                self.in_process_executor = ThreadPoolExecutor(
+                    max_workers=self.automation_config["scheduler"]["max_workers"],
+                    thread_name_prefix="automation-in-process"
+                )
+    
+    def _run_handler_exclusive(self, script_name: str) -> Dict:
+        """_run_handler_once unless the handler's previous run is still executing
+        
+        A timed-out in-process run keeps its thread, sessions and state files
+        until it finishes on its own, so a new run of the same handler is
+        skipped until then instead of overlapping it.
+        """
+        with self._in_process_lock:
+            if script_name in self._active_in_process:
+                self.log(f"⏭️ {script_name} skipped: previous in-process run still executing", "WARNING")
+                return {"status": "skipped", "reason": "previous run still executing", "execution": "in_process"}
+            self._active_in_process.add(script_name)
+        try:
+            return self._run_handler_once(script_name)
+        finally:
+            with self._in_process_lock:
+                self._active_in_process.discard(script_name)
+    
+    def _run_handler_once(self, script_name: str) -> Dict:
+        module_name, class_name, method_name, succeeded = IN_PROCESS_ENTRIES[script_name]
+        handler_class = getattr(importlib.import_module(module_name), class_name)
+        handler = handler_class(self.environment)
+        if hasattr(handler, "session_pool"):
+            handler.session_pool = self.session_pool  # handlers that fan out share the orchestrator's pool
+        
+        checkout_start = time.time()
+        with self.session_pool.session(handler.connection_params) as session:
+            self.tracer.record_child_span("session_checkout", checkout_start, time.time(), job=script_name)
+            handler.session = session
+            with self.tracer.span(method_name, job=script_name):
+                result = getattr(handler, method_name)()
+        
+        ok = succeeded(handler, result)
+        rows = len(result) if isinstance(result, (list, dict)) else None
+        summary = f"{rows} item(s)" if rows is not None else repr(result)
+        return {
+            "status": "success" if ok else "error",
+            "returncode": 0 if ok else 1,
+            "execution": "in_process",
+            "rows_processed": rows,
+            "details": f"{method_name} returned {summary}"
+        }
+    
+    def run_in_process(self, script_name: str) -> Dict:
+        """Run a handler's --once entry point in this process with a pooled session
+        
+        Handler modules are imported once and kept; each run gets a fresh
+        handler instance. Status matches the script's --once exit code. A
+        timed-out run is reported as such but cannot be killed; its thread
+        finishes in the background and then returns its session to the pool.
+        Runs of the same handler never overlap: while a timed-out run is
+        still executing, new runs are skipped.
+        """
+        self._ensure_in_process_runtime()
+        timeout = self.automation_config[script_name].get("timeout", 300)
+        self.log(f"Running {script_name} in process")
+        
+        start = time.time()
+        # Copy the context so the handler's spans nest under this run's span
+        future = self.in_process_executor.submit(contextvars.copy_context().run,
+                                                 self._run_handler_exclusive, script_name)
+        if not wait([future], timeout=timeout).done:
+            self.log(f"⏰ {script_name} timed out after {timeout} seconds", "ERROR")
+            return {"status": "timeout", "timeout": timeout, "execution": "in_process"}
+        try:
+            result = future.result()
+        except Exception as e:
+            self.log(f"❌ {script_name} failed with exception: {str(e)}", "ERROR")
+            return {"status": "exception", "error": str(e), "execution": "in_process"}
+        
+        result["duration_seconds"] = round(time.time() - start, 3)
+        if result["status"] == "skipped":
+            return result
+        if result["status"] == "success":
+            self.log(f"✅ {script_name} completed successfully")
+        else:
+            self.log(f"❌ {script_name} failed with return code {result['returncode']}", "ERROR")
+        return result
+    
+    def start_metrics_server(self, port: Optional[int] = None):
+        """Expose Prometheus metrics on the configured local port"""
+        config = self.automation_config["metrics"]
+        try:
+            self.metrics_server = start_metrics_server(self.metrics, config["host"],
+                                                       port if port is not None else config["port"])
+        except OSError as e:
+            self.log(f"⚠️ Metrics endpoint not started: {e}", "WARNING")
+    
+    def shutdown(self):
+        """Stop the metrics endpoint and release the in-process worker pool and pooled sessions"""
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+        if self.execution_log:
+            self.execution_log.flush()
+        if self.in_process_executor:
+            self.in_process_executor.shutdown(wait=True)
+        if self.session_pool:
+            self.session_pool.close_all()
+    
     def run_data_quality_monitoring(self):
         """Run data quality monitoring"""
         self.log("🔍 Starting data quality monitoring")
@@ -136,38 +376,77 @@ class MasterOrchestrator:
         result = self.run_automation_script("auto_deployment", ["--environment", env])
         return result
     
+    def build_async_job(self, script_name: str, args: List[str] = None) -> AsyncJob:
+        """Describe an automation run for the async runner (in process or as a subprocess)"""
+        config = self.automation_config[script_name]
+        common = {
+            "name": script_name,
+            "timeout": config.get("timeout", 300),
+            "retries": config.get("retries", 0)
+        }
+        
+        if config.get("execution") == "in_process" and script_name in IN_PROCESS_ENTRIES \
+                and (args or []) == ["--once"]:
+            self._ensure_in_process_runtime()
+            return AsyncJob(func=functools.partial(contextvars.copy_context().run,
+                                                   self._run_handler_exclusive, script_name), **common)
+        
+        command = [sys.executable, config["script"], "--environment", self.environment]
+        return AsyncJob(command=command + (args or []), **common)
+    
     def run_parallel_automation(self, automation_types: List[str]) -> Dict:
-        """Run multiple automation processes in parallel"""
+        """Run multiple automation processes in parallel
+        
+        Runs on the async runner: subprocesses are killed on timeout and
+        crashed or timed-out subprocess runs are retried with backoff (per-job
+        "retries"). A timed-out in-process run cannot be stopped and is not retried.
+        """
         self.log(f"🔄 Running parallel automation: {', '.join(automation_types)}")
         
         results = {}
+        jobs = {}
         
-        with ThreadPoolExecutor(max_workers=len(automation_types)) as executor:
-            # Submit all automation tasks
-            future_to_type = {}
-            
+        with self.tracer.span("parallel_automation", automation_types=automation_types):
             for automation_type in automation_types:
-                if automation_type == "data_quality":
-                    future = executor.submit(self.run_data_quality_monitoring)
-                elif automation_type == "performance":
-                    future = executor.submit(self.run_performance_optimization)
-                elif automation_type == "ml_lifecycle":
-                    future = executor.submit(self.run_ml_lifecycle_management)
-                else:
+                script_name = AUTOMATION_TYPES.get(automation_type)
+                if script_name is None:
                     continue
-                
-                future_to_type[future] = automation_type
+                config = self.automation_config[script_name]
+                if not config.get("enabled", False):
+                    results[automation_type] = {"status": "skipped", "reason": "disabled"}
+                elif config.get("execution") != "in_process" and not os.path.exists(config["script"]):
+                    results[automation_type] = {"status": "error", "reason": f"Script not found: {config['script']}"}
+                else:
+                    jobs[script_name] = (automation_type, self.build_async_job(script_name, ["--once"]))
             
-            # Collect results
-            for future in as_completed(future_to_type):
-                automation_type = future_to_type[future]
-                try:
-                    result = future.result()
+            if jobs:
+                runner = AsyncJobRunner(
+                    max_concurrency=self.automation_config["scheduler"]["max_workers"],
+                    executor=self.in_process_executor,
+                    log=self.log
+                )
+                job_results = runner.run_all([job for _, job in jobs.values()])
+                
+                for script_name, (automation_type, _) in jobs.items():
+                    job_result = job_results[script_name]
+                    result = job_result.to_dict()
                     results[automation_type] = result
-                    self.log(f"✅ {automation_type} completed: {result['status']}")
-                except Exception as e:
-                    results[automation_type] = {"status": "exception", "error": str(e)}
-                    self.log(f"❌ {automation_type} failed: {str(e)}", "ERROR")
+                    self.tracer.record_child_span(
+                        f"automation:{script_name}", job_result.started_at,
+                        job_result.started_at + job_result.duration_seconds,
+                        status=result["status"], job=script_name, attempts=job_result.attempts
+                    )
+                    self.record_job_result(script_name, result, job_result.duration_seconds, flush=False)
+                    if result["status"] in ("success", "error"):
+                        self.log(f"✅ {automation_type} completed: {result['status']} "
+                                 f"({result['attempts']} attempt(s), {result['duration_seconds']:.1f}s)")
+                    elif result["status"] == "skipped":
+                        self.log(f"⏭️ {automation_type} skipped: {result.get('reason')}", "WARNING")
+                    else:
+                        self.log(f"❌ {automation_type} failed: {result['status']} {result.get('error') or ''}", "ERROR")
+                
+                if self.execution_log:
+                    self.execution_log.flush()
         
         return results
     
@@ -212,8 +491,12 @@ class MasterOrchestrator:
         self.log(f"🏥 Health check completed: {health_status['overall_status']}")
         return health_status
     
-    def generate_automation_report(self) -> Dict:
-        """Generate comprehensive automation report"""
+    def generate_automation_report(self, automation_results: Optional[Dict] = None) -> Dict:
+        """Generate comprehensive automation report
+        
+        automation_results: results keyed by automation type (e.g. from the
+                            scheduler); when omitted, the automations are run now
+        """
         self.log("📊 Generating automation report")
         
         report = {
@@ -223,10 +506,11 @@ class MasterOrchestrator:
             "recommendations": []
         }
         
-        # Run all automation checks
-        automation_results = self.run_parallel_automation([
-            "data_quality", "performance", "ml_lifecycle"
-        ])
+        # Run all automation checks unless results were supplied
+        if automation_results is None:
+            automation_results = self.run_parallel_automation([
+                "data_quality", "performance", "ml_lifecycle"
+            ])
         
         report["automation_summary"] = automation_results
         
@@ -259,23 +543,66 @@ class MasterOrchestrator:
         self.log(f"📊 Automation report saved: {report_file}")
         return report
     
+    def build_scheduler(self) -> JobScheduler:
+        """Register the enabled scheduled automations with a job scheduler"""
+        scheduler = JobScheduler(
+            max_workers=self.automation_config["scheduler"]["max_workers"],
+            log=self.log
+        )
+        
+        # Scheduled job name -> (runner, automation type reported on)
+        jobs = {
+            "data_quality_monitor": (self.run_data_quality_monitoring, "data_quality"),
+            "performance_optimizer": (self.run_performance_optimization, "performance"),
+            "ml_lifecycle_manager": (self.run_ml_lifecycle_management, "ml_lifecycle")
+        }
+        
+        def run_report():
+            results = scheduler.results()
+            queue_delay = (datetime.now() - scheduled_slot.get()).total_seconds() if scheduled_slot.get() else None
+            start = time.time()
+            with self.tracer.span("automation:automation_report", job="automation_report"):
+                report = self.generate_automation_report({
+                    automation_type: results[name]
+                    for name, (_, automation_type) in jobs.items() if name in results
+                })
+            self.record_job_result("automation_report", {"status": "success"}, time.time() - start, queue_delay)
+            return report
+        
+        jobs["automation_report"] = (run_report, None)
+        
+        # Dependencies first: config order lists the report after its inputs
+        for name, config in self.automation_config.items():
+            if name not in jobs or not config.get("enabled") or config.get("schedule") not in SCHEDULES:
+                continue
+            scheduler.add_job(
+                name,
+                jobs[name][0],
+                depends_on=[dep for dep in config.get("depends_on", []) if dep in scheduler.jobs],
+                max_concurrency=config.get("max_concurrency", 1),
+                catch_up=config.get("catch_up", "latest"),
+                **SCHEDULES[config["schedule"]]
+            )
+        
+        return scheduler
+    
     def start_continuous_monitoring(self):
         """Start continuous automation monitoring"""
         self.log(f"🚀 Starting continuous automation monitoring for {self.environment}")
         
-        # Schedule automation tasks
-        schedule.every(15).minutes.do(self.run_data_quality_monitoring)
-        schedule.every().hour.do(self.run_performance_optimization)
-        schedule.every().day.at("03:00").do(self.run_ml_lifecycle_management)
-        schedule.every().day.at("06:00").do(self.generate_automation_report)
+        scheduler = self.build_scheduler()
+        self.start_metrics_server()
         
         # Run initial health check
         self.run_health_check()
         
         # Keep running
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            scheduler.stop()
+        finally:
+            self.shutdown()
 
 def main():
     parser = argparse.ArgumentParser(description="Master Automation Orchestrator")
@@ -289,10 +616,19 @@ def main():
                        choices=["data_quality", "performance", "ml_lifecycle"],
                        help="Specific automation to run")
     parser.add_argument("--target-env", help="Target environment for deployment")
+    parser.add_argument("--metrics-port", type=int,
+                       help="Port for the Prometheus /metrics endpoint in monitor mode")
+    parser.add_argument("--execution", choices=["in_process", "subprocess"],
+                       help="Override how scheduled automations run (default: per-job config)")
     
     args = parser.parse_args()
     
     orchestrator = MasterOrchestrator(args.environment)
+    if args.execution:
+        for name in IN_PROCESS_ENTRIES:
+            orchestrator.automation_config[name]["execution"] = args.execution
+    if args.metrics_port is not None:
+        orchestrator.automation_config["metrics"]["port"] = args.metrics_port
     
     if args.action == "health_check":
         result = orchestrator.run_health_check()
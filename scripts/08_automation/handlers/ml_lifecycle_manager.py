@@ -14,8 +14,15 @@ from typing import Dict, List, Optional
 import snowflake.connector
 from snowflake.snowpark import Session
 import pandas as pd
+import numpy as np
 import subprocess
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'ml_models'))
+from feature_drift import FeatureDriftDetector, FeatureReference, reference_path
+from feature_schema import MAINTENANCE_FEATURE_COLUMNS, ROUTE_FEATURE_COLUMNS
+from model_artifacts import find_latest_artifact
+from issue_extraction import col, extract_records, normalize_columns
+
 class MLLifecycleManager:
     def __init__(self, environment: str = "prod"):
         self.environment = environment
@@ -46,9 +53,13 @@ class MLLifecycleManager:
                 "model_name": "route_optimization_model",
                 "training_script": "dbt/models/ml_models/train_route_optimization_model.py",
                 "retrain_frequency": "weekly",
+                "incremental_retrain": True,  # age-only retrains warm-start the previous model
                 "performance_threshold": 0.8,
                 "drift_threshold": 0.2,
                 "feature_table": "tbl_ml_consolidated_feature_store",
+                "feature_columns": ROUTE_FEATURE_COLUMNS,
+                "date_column": "feature_date",
+                "drift_window_days": 7,  # recent rows compared with the training reference
                 "target_column": "optimized_delivery_time_minutes"
             },
             "predictive_maintenance": {
@@ -58,12 +69,52 @@ class MLLifecycleManager:
                 "performance_threshold": 0.9,
                 "drift_threshold": 0.15,
                 "feature_table": "tbl_ml_maintenance_features",
+                "feature_columns": MAINTENANCE_FEATURE_COLUMNS,
+                "date_column": None,  # one current row per vehicle
                 "target_column": "maintenance_needed_30d"
             }
         }
     
-    def check_model_performance(self) -> List[Dict]:
-        """Check ML model performance and identify models needing retraining"""
+    def compute_feature_drift(self, model_type: str) -> Optional[Dict]:
+        """Compare recent feature store rows with the deployed model's training histograms
+        
+        Rows are streamed from Snowflake in pandas batches and binned into the
+        reference histograms, so memory stays flat regardless of row count.
+        Returns the feature_drift report, or None when no reference exists.
+        """
+        model_config = self.model_configs.get(model_type, {})
+        try:
+            reference = FeatureReference.load(reference_path(find_latest_artifact(model_type)))
+        except (FileNotFoundError, KeyError) as e:
+            print(f"⚠️ No feature reference for {model_type}: {e}")
+            return None
+        
+        columns = ", ".join(reference.feature_columns)
+        query = f"SELECT {columns} FROM {model_config['feature_table']}"
+        if model_config.get('date_column'):
+            query += (f" WHERE {model_config['date_column']} >= "
+                      f"DATEADD('day', -{model_config.get('drift_window_days', 7)}, CURRENT_DATE())")
+        
+        detector = FeatureDriftDetector(reference)
+        try:
+            for batch in self.session.sql(query).to_pandas_batches():
+                batch.columns = [c.lower() for c in batch.columns]
+                detector.update(batch[reference.feature_columns].to_numpy(dtype=np.float64, na_value=np.nan))
+        except Exception as e:
+            print(f"❌ Error computing feature drift for {model_type}: {e}")
+            return None
+        
+        report = detector.report()
+        print(f"📊 {model_type} feature drift: max PSI {report['drift_score']} over "
+              f"{report['current_rows']:,} rows, drifted features: {report['drifted_features'] or 'none'}")
+        return report
+    
+    def check_model_performance(self, feature_drift: Optional[Dict] = None) -> List[Dict]:
+        """Check ML model performance and identify models needing retraining
+        
+        feature_drift: compute_feature_drift reports by model type already
+                       computed this run; missing model types are computed here
+        """
         print("🔍 Checking ML model performance...")
         
         query = """
@@ -81,61 +132,78 @@ class MLLifecycleManager:
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            retrain_candidates = []
+            df = normalize_columns(self.session.sql(query).to_pandas())
+            if df.empty:
+                return []
+            model_type = df['model_type']
+            config_value = lambda key, default: model_type.map(
+                lambda t: self.model_configs.get(t, {}).get(key, default)).astype(float)
+            performance_threshold = config_value('performance_threshold', 0.8)
+            drift_threshold = config_value('drift_threshold', 0.2)
             
-            for _, row in df.iterrows():
-                model_config = self.model_configs.get(row['model_type'], {})
-                
-                # Check if model needs retraining
-                needs_retrain = False
-                reasons = []
-                
-                # Check performance degradation
-                if row['production_score'] < model_config.get('performance_threshold', 0.8):
-                    needs_retrain = True
-                    reasons.append(f"Performance below threshold: {row['production_score']:.3f}")
-                
-                # Check model drift
-                if row['drift_score'] > model_config.get('drift_threshold', 0.2):
-                    needs_retrain = True
-                    reasons.append(f"Drift above threshold: {row['drift_score']:.3f}")
-                
-                # Check training age
-                if row['days_since_training'] > 7:  # Weekly retraining
-                    needs_retrain = True
-                    reasons.append(f"Model age: {row['days_since_training']} days")
-                
-                if needs_retrain:
-                    retrain_candidates.append({
-                        'model_name': row['model_name'],
-                        'model_type': row['model_type'],
-                        'reasons': reasons,
-                        'current_performance': row['production_score'],
-                        'drift_score': row['drift_score'],
-                        'days_since_training': row['days_since_training']
-                    })
+            # Feature drift is computed once per model type, not per row
+            reports = feature_drift or {}
+            feature_drift = {t: reports[t] if t in reports else self.compute_feature_drift(t)
+                             for t in model_type.unique()}
+            feature_psi = model_type.map(
+                lambda t: feature_drift[t]['drift_score'] if feature_drift[t] else None).astype(float)
+            drifted_features = model_type.map(
+                lambda t: feature_drift[t]['drifted_features'] if feature_drift[t] else [])
             
-            return retrain_candidates
+            # One boolean mask and one message column per retrain reason
+            # (prediction drift from the view, feature drift from the PSI engine)
+            reason_checks = [
+                (df['production_score'] < performance_threshold,
+                 "Performance below threshold: " + df['production_score'].map("{:.3f}".format)),
+                (df['drift_score'] > drift_threshold,
+                 "Drift above threshold: " + df['drift_score'].map("{:.3f}".format)),
+                (feature_psi > drift_threshold,
+                 "Feature drift above threshold: PSI " + feature_psi.map("{:.3f}".format) + " ("
+                 + drifted_features.map(lambda features: ', '.join(features[:3])) + ")"),
+                (df['days_since_training'] > 7,  # Weekly retraining
+                 "Model age: " + df['days_since_training'].astype(str) + " days"),
+            ]
+            masks = np.column_stack([mask.to_numpy(dtype=bool) for mask, _ in reason_checks])
+            messages = np.column_stack([message.to_numpy(dtype=object) for _, message in reason_checks])
+            needs_retrain = masks.any(axis=1)
+            # Only an age-triggered retrain can be incremental; degraded or
+            # drifting models get a full retrain
+            age_only = masks[:, -1] & (masks.sum(axis=1) == 1)
+            incremental = model_type.map(
+                lambda t: bool(self.model_configs.get(t, {}).get('incremental_retrain', False))).to_numpy()
+            
+            return extract_records(df, needs_retrain, {
+                'model_name': col('model_name'),
+                'model_type': col('model_type'),
+                'reasons': lambda rows: pd.Series(
+                    [list(row_messages[row_masks]) for row_messages, row_masks
+                     in zip(messages[needs_retrain], masks[needs_retrain])], index=rows.index),
+                'incremental': age_only & incremental,
+                'current_performance': col('production_score'),
+                'drift_score': np.fmax(df['drift_score'].to_numpy(dtype=float), feature_psi.fillna(0.0).to_numpy()),
+                'drifted_features': drifted_features,
+                'days_since_training': col('days_since_training')
+            })
         except Exception as e:
             print(f"❌ Error checking model performance: {e}")
             return []
     
-    def train_model(self, model_type: str) -> bool:
-        """Train a specific ML model"""
-        print(f"🚀 Training {model_type} model...")
-        
+    def train_model(self, model_type: str, incremental: bool = False) -> bool:
+        """Train a specific ML model (incremental: warm-start from the previous model where supported)"""
         model_config = self.model_configs.get(model_type)
         if not model_config:
             print(f"❌ No configuration found for model type: {model_type}")
             return False
         
-        training_script = model_config['training_script']
+        command = [sys.executable, model_config['training_script']]
+        if incremental and model_config.get('incremental_retrain'):
+            command.append('--incremental')
+        print(f"🚀 Training {model_type} model{' (incremental)' if '--incremental' in command else ''}...")
         
         try:
             # Run training script
             result = subprocess.run(
-                [sys.executable, training_script],
+                command,
                 capture_output=True,
                 text=True,
                 check=True
@@ -222,8 +290,11 @@ class MLLifecycleManager:
             print(f"❌ Model test failed: {e}")
             return False
     
-    def monitor_model_drift(self) -> List[Dict]:
-        """Monitor model drift and performance degradation"""
+    def monitor_model_drift(self, feature_drift: Optional[Dict] = None) -> List[Dict]:
+        """Monitor model drift and performance degradation
+        
+        feature_drift: as for check_model_performance
+        """
         print("🔍 Monitoring model drift...")
         
         query = """
@@ -240,18 +311,34 @@ class MLLifecycleManager:
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            drift_alerts = []
+            df = normalize_columns(self.session.sql(query).to_pandas())
+            drift_alerts = extract_records(df, np.ones(len(df), dtype=bool), {
+                'model_name': col('model_name'),
+                'model_type': col('model_type'),
+                'drift_score': col('drift_score'),
+                'performance_degradation': df['validation_score'] - df['production_score'],
+                'prediction_count': col('prediction_count'),
+                'last_prediction_date': col('last_prediction_date')
+            })
             
-            for _, row in df.iterrows():
-                drift_alerts.append({
-                    'model_name': row['model_name'],
-                    'model_type': row['model_type'],
-                    'drift_score': row['drift_score'],
-                    'performance_degradation': row['validation_score'] - row['production_score'],
-                    'prediction_count': row['prediction_count'],
-                    'last_prediction_date': row['last_prediction_date']
-                })
+            # Feature drift the performance view has not flagged yet
+            flagged = {alert['model_type'] for alert in drift_alerts}
+            for model_type, model_config in self.model_configs.items():
+                if model_type in flagged:
+                    continue
+                report = feature_drift[model_type] if feature_drift and model_type in feature_drift \
+                    else self.compute_feature_drift(model_type)
+                if report and report['drift_score'] is not None and \
+                        report['drift_score'] > model_config.get('drift_threshold', 0.2):
+                    drift_alerts.append({
+                        'model_name': model_config['model_name'],
+                        'model_type': model_type,
+                        'drift_score': report['drift_score'],
+                        'drifted_features': report['drifted_features'],
+                        'performance_degradation': None,
+                        'prediction_count': None,
+                        'last_prediction_date': None
+                    })
             
             return drift_alerts
         except Exception as e:
@@ -333,18 +420,21 @@ class MLLifecycleManager:
         """Run complete ML lifecycle management"""
         print(f"🔍 Running ML lifecycle management for {self.environment}")
         
+        # Both checks use the feature drift reports; stream the feature rows once per model type
+        feature_drift = {model_type: self.compute_feature_drift(model_type) for model_type in self.model_configs}
+        
         # Check model performance
-        retrain_candidates = self.check_model_performance()
+        retrain_candidates = self.check_model_performance(feature_drift)
         
         # Check for drift
-        drift_alerts = self.monitor_model_drift()
+        drift_alerts = self.monitor_model_drift(feature_drift)
         
         # Process retraining candidates
         for candidate in retrain_candidates:
             print(f"🔄 Retraining {candidate['model_name']} due to: {', '.join(candidate['reasons'])}")
             
             # Train model
-            if self.train_model(candidate['model_type']):
+            if self.train_model(candidate['model_type'], incremental=candidate.get('incremental', False)):
                 # Deploy model
                 if self.deploy_model(candidate['model_type']):
                     print(f"✅ {candidate['model_name']} retrained and deployed successfully")
@@ -394,6 +484,8 @@ def main():
                        help="Run lifecycle management once instead of continuous monitoring")
     parser.add_argument("--train", type=str, choices=["route_optimization", "predictive_maintenance"],
                        help="Train a specific model")
+    parser.add_argument("--incremental", action="store_true",
+                       help="With --train, warm-start from the previous model where supported")
     parser.add_argument("--deploy", type=str, choices=["route_optimization", "predictive_maintenance"],
                        help="Deploy a specific model")
     
@@ -403,7 +495,7 @@ def main():
     
     if args.train:
         manager.connect()
-        success = manager.train_model(args.train)
+        success = manager.train_model(args.train, incremental=args.incremental)
         sys.exit(0 if success else 1)
     elif args.deploy:
         manager.connect()
@@ -9,11 +9,31 @@ import sys
 import json
 import time
 import schedule
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List
 import snowflake.connector
 from snowflake.snowpark import Session
+import numpy as np
 import pandas as pd
+from issue_extraction import col, extract_records, normalize_columns
+from clustering_advisor import (ClusteringAdvisor, fetch_column_ndv, fetch_table_stats, load_table_stats,
+                                referenced_tables, save_table_stats, table_stats_stale)
+from query_antipatterns import ANTIPATTERNS, analyze_corpus
+from query_history_store import QueryHistoryStore
+from warehouse_simulator import (WarehouseSimulator, alter_warehouse_sql, candidate_scenarios,
+                                 fetch_warehouse_scenarios, load_warehouse_scenarios, prepare_workload,
+                                 recommend_scenario)
+
+CLUSTERING_SUGGESTIONS = {
+    'tbl_fact_shipments': ['shipment_date', 'customer_id', 'route_id'],
+    'tbl_fact_vehicle_telemetry': ['vehicle_id', 'timestamp'],
+    'tbl_fact_route_performance': ['route_id', 'performance_date'],
+    'tbl_ml_consolidated_feature_store': ['feature_date', 'customer_id'],
+    'tbl_ml_rolling_analytics': ['analytics_date', 'customer_id']
+}
+DEFAULT_CLUSTERING_KEYS = ['date_key', 'id']
+
+PATTERN_TYPES = list(ANTIPATTERNS)
 
 class PerformanceOptimizer:
     def __init__(self, environment: str = "prod"):
@@ -28,6 +48,10 @@ class PerformanceOptimizer:
         }
         self.session = None
         self.optimization_thresholds = self.load_optimization_thresholds()
+        self.query_history_config = self.load_query_history_config()
+        self.clustering_advisor_config = self.load_clustering_advisor_config()
+        self.warehouse_simulation_config = self.load_warehouse_simulation_config()
+        self.warehouse_simulations = None
         
     def connect(self):
         """Establish Snowflake connection"""
@@ -58,6 +82,111 @@ class PerformanceOptimizer:
             }
         }
     
+    def load_query_history_config(self) -> Dict:
+        """Local query history store used for fingerprint analysis"""
+        return {
+            "enabled": True,               # False falls back to the top-50 slow query scan
+            "store_dir": f"logs/query_history_{self.environment}",
+            "export_path": None,           # local CSV/Parquet export to ingest instead of Snowflake
+            "cold_start_days": 7,
+            "overlap_minutes": 60,         # ACCOUNT_USAGE latency is up to 45 minutes
+            "retention_days": 30,
+            "analysis_days": 7,
+            "top_fingerprints": 25,
+            "fingerprint_cost_threshold": 50  # USD over the analysis window
+        }
+    
+    def load_clustering_advisor_config(self) -> Dict:
+        """Clustering keys proposed from predicates in the local query history"""
+        return {
+            "enabled": True,               # False keeps the fixed per-table suggestions
+            "analysis_days": 30,
+            "max_query_shapes": 5000,
+            "table_stats_path": f"logs/clustering_table_stats_{self.environment}.json",
+            "table_stats_max_age_days": 7,  # None never refreshes (e.g. a fixture)
+            "range_selectivity": 0.1,       # fraction of a table a range predicate selects
+            "join_selectivity": 0.5,        # fraction a join filter leaves after runtime pruning
+            "max_key_columns": 3
+        }
+    
+    def load_warehouse_simulation_config(self) -> Dict:
+        """Replay of recorded warehouse load behind resize recommendations"""
+        return {
+            "enabled": True,                # False keeps the utilization-average heuristics
+            "analysis_days": 7,
+            "warehouse_config_path": None,  # JSON of current settings instead of SHOW WAREHOUSES
+            "max_p95_queue_seconds": 30,
+            "max_execution_slowdown": 0.25, # tolerated mean execution slowdown when downsizing
+            "min_savings_fraction": 0.1,
+            "size_steps": 1,                # sizes tried either side of the current one
+            "max_cluster_options": [2],     # needs Enterprise edition; [] to try single-cluster only
+            "auto_suspend_options": [60],
+            "parallel_fraction": 0.8,       # share of execution time that scales with size
+            "min_queries": 100,             # fewer recorded queries are not evidence
+            "auto_apply": False             # True runs ALTER WAREHOUSE for simulated recommendations
+        }
+    
+    def ingest_query_history(self) -> QueryHistoryStore:
+        """Bring the local query history store up to date"""
+        config = self.query_history_config
+        store = QueryHistoryStore(config["store_dir"])
+        if config["export_path"]:
+            rows = store.ingest_export(config["export_path"])
+        else:
+            rows = store.ingest_from_snowflake(self.session, config["cold_start_days"], config["overlap_minutes"])
+        pruned = store.prune(config["retention_days"])
+        print(f"📥 Ingested {rows:,} queries into {config['store_dir']}"
+              + (f", pruned {pruned} day(s)" if pruned else ""))
+        return store
+    
+    def analyze_query_fingerprints(self) -> List[Dict]:
+        """Recommendations for the query shapes with the highest total cost
+        
+        Executions are grouped by literal-stripped fingerprint, so a cheap
+        query run 10,000 times ranks above a single slow outlier.
+        """
+        print("🔍 Analyzing query fingerprints...")
+        config = self.query_history_config
+        
+        try:
+            store = self.ingest_query_history()
+            shapes = store.aggregate_fingerprints(since_days=config["analysis_days"],
+                                                  limit=config["top_fingerprints"], query_types=['SELECT'])
+            if shapes.empty:
+                return []
+            
+            # The slowest execution's text is parsed, since normalised text is upper-cased
+            matches, details = self.detect_query_antipatterns(shapes['slowest_query_text'])
+            confidence, savings_fraction = self.pattern_scores(matches)
+            confident = confidence >= self.optimization_thresholds['query_performance']['optimization_confidence']
+            costly = shapes['total_cost_usd'].to_numpy() >= config["fingerprint_cost_threshold"]
+            selected = (matches.any(axis=1) & confident) | costly
+            
+            return extract_records(shapes, selected, {
+                'type': 'QUERY_SHAPE',
+                'fingerprint': col('fingerprint'),
+                'normalized_text': lambda rows: rows['normalized_text'].str.slice(0, 2000),
+                'slowest_query_id': col('slowest_query_id'),
+                'executions': col('executions'),
+                'total_execution_seconds': col('total_execution_seconds'),
+                'p95_execution_seconds': col('p95_execution_seconds'),
+                'total_gb_scanned': col('total_gb_scanned'),
+                'total_cost_usd': col('total_cost_usd'),
+                'warehouses': col('warehouses'),
+                'recommendations': lambda rows: pd.Series([
+                    [f"{ANTIPATTERNS[pattern_type][0]} ({'; '.join(pattern_details)})"
+                     for pattern_type, pattern_details in grouped.items()]
+                    or ['Review this query shape: highest total cost over the window']
+                    for grouped, keep in zip(details, selected) if keep
+                ], index=rows.index),
+                'total_confidence': confidence,
+                'potential_savings_seconds': savings_fraction * shapes['total_execution_seconds'].to_numpy(),
+                'potential_savings_usd': savings_fraction * shapes['total_cost_usd'].to_numpy()
+            })
+        except Exception as e:
+            print(f"❌ Error analyzing query fingerprints: {e}")
+            return []
+    
     def analyze_slow_queries(self) -> List[Dict]:
         """Analyze slow queries and generate optimization recommendations"""
         print("🔍 Analyzing slow queries...")
@@ -82,83 +211,119 @@ class PerformanceOptimizer:
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            recommendations = []
-            
-            for _, row in df.iterrows():
-                if row['execution_time_seconds'] > self.optimization_thresholds['query_performance']['slow_query_threshold']:
-                    recommendation = self.generate_query_optimization_recommendation(row)
-                    if recommendation:
-                        recommendations.append(recommendation)
-            
-            return recommendations
+            df = normalize_columns(self.session.sql(query).to_pandas())
+            slow = df['execution_time_seconds'] > self.optimization_thresholds['query_performance']['slow_query_threshold']
+            return self.generate_query_optimization_recommendations(df.loc[slow])
         except Exception as e:
             print(f"❌ Error analyzing slow queries: {e}")
             return []
     
-    def generate_query_optimization_recommendation(self, query_row: pd.Series) -> Optional[Dict]:
-        """Generate optimization recommendation for a specific query"""
-        query_text = query_row['query_text']
-        execution_time = query_row['execution_time_seconds']
-        cost_usd = query_row['cost_usd']
-        
-        recommendations = []
-        confidence = 0.0
-        
-        # Check for SELECT * patterns
-        if 'SELECT *' in query_text.upper():
-            recommendations.append({
-                'type': 'COLUMN_SPECIFICATION',
-                'description': 'Replace SELECT * with specific columns',
-                'potential_savings': execution_time * 0.3,
-                'confidence': 0.9
-            })
-            confidence += 0.3
-        
-        # Check for missing LIMIT on ORDER BY
-        if 'ORDER BY' in query_text.upper() and 'LIMIT' not in query_text.upper():
-            recommendations.append({
-                'type': 'RESULT_LIMITING',
-                'description': 'Add LIMIT clause to ORDER BY queries',
-                'potential_savings': execution_time * 0.2,
-                'confidence': 0.8
-            })
-            confidence += 0.2
-        
-        # Check for large table scans without filters
-        if 'FROM' in query_text.upper() and 'WHERE' not in query_text.upper():
-            recommendations.append({
-                'type': 'FILTER_OPTIMIZATION',
-                'description': 'Add WHERE clause to reduce data scan',
-                'potential_savings': execution_time * 0.4,
-                'confidence': 0.7
-            })
-            confidence += 0.2
-        
-        # Check for complex subqueries
-        if query_text.upper().count('SELECT') > 1:
-            recommendations.append({
-                'type': 'QUERY_REWRITE',
-                'description': 'Consider rewriting as JOIN or CTE',
-                'potential_savings': execution_time * 0.5,
-                'confidence': 0.6
-            })
-            confidence += 0.1
-        
-        if recommendations and confidence >= self.optimization_thresholds['query_performance']['optimization_confidence']:
-            return {
-                'query_id': query_row['query_id'],
-                'execution_time_seconds': execution_time,
-                'cost_usd': cost_usd,
-                'warehouse_name': query_row['warehouse_name'],
-                'user_name': query_row['user_name'],
-                'recommendations': recommendations,
-                'total_confidence': confidence,
-                'potential_savings_seconds': sum(r['potential_savings'] for r in recommendations),
-                'potential_savings_usd': cost_usd * 0.3  # Estimate 30% cost savings
-            }
+    def detect_query_antipatterns(self, query_text: pd.Series):
+        """Parse each query and flag anti-patterns from its syntax tree
+        
+        Returns a (queries x PATTERN_TYPES) boolean matrix and, per query, the
+        findings grouped by type.
+        """
+        findings = analyze_corpus(query_text.fillna('').astype(str).tolist(),
+                                  clustering_keys=CLUSTERING_SUGGESTIONS)
+        by_type = [{} for _ in findings]
+        for grouped, query_findings in zip(by_type, findings):
+            for item in query_findings:
+                grouped.setdefault(item['type'], []).append(item['detail'])
+        matches = np.array([[pattern_type in grouped for pattern_type in PATTERN_TYPES] for grouped in by_type],
+                           dtype=bool).reshape(len(by_type), len(PATTERN_TYPES))
+        return matches, by_type
+    
+    def pattern_scores(self, matches: np.ndarray):
+        """Total confidence and the fraction of run time the matched fixes could save"""
+        weights = np.array([ANTIPATTERNS[t][3] for t in PATTERN_TYPES])
+        savings_factors = np.array([ANTIPATTERNS[t][1] for t in PATTERN_TYPES])
+        return matches @ weights, np.minimum(matches @ savings_factors, 0.9)
+    
+    def generate_query_optimization_recommendations(self, queries: pd.DataFrame) -> List[Dict]:
+        """Generate optimization recommendations for a frame of queries
+        
+        Anti-patterns come from each query's parsed SQL; only queries that
+        clear the confidence threshold are turned into dicts.
+        """
+        if queries.empty:
+            return []
+        execution_time = queries['execution_time_seconds'].to_numpy(dtype=float)
+        matches, details = self.detect_query_antipatterns(queries['query_text'])
+        confidence, savings_fraction = self.pattern_scores(matches)
+        
+        selected = matches.any(axis=1) & (
+            confidence >= self.optimization_thresholds['query_performance']['optimization_confidence'])
         
-        return None
+        def pattern_recommendations(rows: pd.DataFrame) -> pd.Series:
+            return pd.Series([
+                [{
+                    'type': pattern_type,
+                    'description': ANTIPATTERNS[pattern_type][0],
+                    'detail': '; '.join(pattern_details),
+                    'potential_savings': float(seconds) * ANTIPATTERNS[pattern_type][1],
+                    'confidence': ANTIPATTERNS[pattern_type][2]
+                } for pattern_type, pattern_details in grouped.items()]
+                for grouped, seconds, keep in zip(details, execution_time, selected) if keep
+            ], index=rows.index)
+        
+        return extract_records(queries, selected, {
+            'query_id': col('query_id'),
+            'execution_time_seconds': col('execution_time_seconds'),
+            'cost_usd': col('cost_usd'),
+            'warehouse_name': col('warehouse_name'),
+            'user_name': col('user_name'),
+            'recommendations': pattern_recommendations,
+            'total_confidence': confidence,
+            'potential_savings_seconds': savings_fraction * execution_time,
+            'potential_savings_usd': lambda rows: rows['cost_usd'] * 0.3  # Estimate 30% cost savings
+        })
+    
+    def simulate_warehouse_sizing(self) -> Dict[str, Dict]:
+        """Simulated right-sizing per warehouse, replayed once per analysis run
+        
+        Each warehouse's recorded queries from the local query history store
+        are replayed under its current settings and nearby alternatives.
+        Warehouses without enough recorded queries are left out.
+        """
+        if self.warehouse_simulations is not None:
+            return self.warehouse_simulations
+        self.warehouse_simulations = {}
+        config = self.warehouse_simulation_config
+        if not (config["enabled"] and self.query_history_config["enabled"]):
+            return self.warehouse_simulations
+        
+        try:
+            if config["warehouse_config_path"]:
+                current_settings = load_warehouse_scenarios(config["warehouse_config_path"])
+            else:
+                current_settings = fetch_warehouse_scenarios(self.session)
+            store = QueryHistoryStore(self.query_history_config["store_dir"])
+            history = store.load_queries(since_days=config["analysis_days"],
+                                         warehouse_names=sorted(current_settings),
+                                         columns=['start_time', 'warehouse_name', 'warehouse_size',
+                                                  'execution_seconds', 'queued_seconds'])
+            simulator = WarehouseSimulator(parallel_fraction=config["parallel_fraction"])
+            
+            for warehouse, rows in history.groupby(history['warehouse_name'].str.upper()):
+                if len(rows) < config["min_queries"]:
+                    continue
+                current = current_settings[warehouse]
+                workload = prepare_workload(rows, warehouse, default_size=current.size,
+                                            window_seconds=config["analysis_days"] * 86400)
+                comparison = simulator.compare(workload, candidate_scenarios(
+                    current, config["size_steps"], config["max_cluster_options"], config["auto_suspend_options"]))
+                self.warehouse_simulations[warehouse] = {
+                    'current': current,
+                    'comparison': comparison,
+                    'recommendation': recommend_scenario(
+                        comparison, current, config["max_p95_queue_seconds"],
+                        config["max_execution_slowdown"], config["min_savings_fraction"])
+                }
+            print(f"🧪 Replayed recorded load for {len(self.warehouse_simulations)} warehouse(s)")
+        except Exception as e:
+            print(f"⚠️ Warehouse simulation unavailable, using utilization averages: {e}")
+        return self.warehouse_simulations
     
     def analyze_warehouse_utilization(self) -> List[Dict]:
         """Analyze warehouse utilization and generate scaling recommendations"""
@@ -180,31 +345,51 @@ class PerformanceOptimizer:
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            recommendations = []
+            df = normalize_columns(self.session.sql(query).to_pandas())
+            thresholds = self.optimization_thresholds['resource_utilization']
+            utilization_score = (
+                df['queued_queries'] + df['repair_queries'] + df['overload_queries']
+            ) / df['query_count']
+            # Warehouses with a replayed workload get simulated recommendations instead
+            simulations = self.simulate_warehouse_sizing()
+            simulated = df['warehouse_name'].str.upper().isin(simulations).to_numpy()
+            scale_up = (utilization_score > thresholds['warehouse_scale_up_threshold']).to_numpy() & ~simulated
+            scale_down = ((utilization_score < thresholds['warehouse_scale_down_threshold']).to_numpy()
+                          & ~scale_up & ~simulated)
             
-            for _, row in df.iterrows():
-                utilization_score = (row['queued_queries'] + row['repair_queries'] + row['overload_queries']) / row['query_count']
-                
-                if utilization_score > self.optimization_thresholds['resource_utilization']['warehouse_scale_up_threshold']:
-                    recommendations.append({
-                        'warehouse_name': row['warehouse_name'],
-                        'type': 'SCALE_UP',
-                        'reason': 'High utilization detected',
-                        'utilization_score': utilization_score,
-                        'avg_credits_per_hour': row['avg_credits_per_hour'],
-                        'recommendation': 'Consider scaling up warehouse size',
-                        'potential_benefit': 'Reduced query queuing and faster execution'
-                    })
-                elif utilization_score < self.optimization_thresholds['resource_utilization']['warehouse_scale_down_threshold']:
+            recommendations = extract_records(df, scale_up, {
+                'warehouse_name': col('warehouse_name'),
+                'type': 'SCALE_UP',
+                'reason': 'High utilization detected',
+                'utilization_score': utilization_score,
+                'avg_credits_per_hour': col('avg_credits_per_hour'),
+                'recommendation': 'Consider scaling up warehouse size',
+                'potential_benefit': 'Reduced query queuing and faster execution',
+                'evidence': 'utilization_average'
+            })
+            recommendations.extend(extract_records(df, scale_down, {
+                'warehouse_name': col('warehouse_name'),
+                'type': 'SCALE_DOWN',
+                'reason': 'Low utilization detected',
+                'utilization_score': utilization_score,
+                'avg_credits_per_hour': col('avg_credits_per_hour'),
+                'recommendation': 'Consider scaling down warehouse size',
+                'potential_benefit': lambda rows: "Potential cost savings: $" + (
+                    rows['avg_credits_per_hour'] * 24 * 0.3).map("{:.2f}".format) + " per day",
+                'evidence': 'utilization_average'
+            }))
+            
+            for warehouse, simulation in simulations.items():
+                recommendation = simulation['recommendation']
+                if recommendation:
                     recommendations.append({
-                        'warehouse_name': row['warehouse_name'],
-                        'type': 'SCALE_DOWN',
-                        'reason': 'Low utilization detected',
-                        'utilization_score': utilization_score,
-                        'avg_credits_per_hour': row['avg_credits_per_hour'],
-                        'recommendation': 'Consider scaling down warehouse size',
-                        'potential_benefit': f"Potential cost savings: ${row['avg_credits_per_hour'] * 24 * 0.3:.2f} per day"
+                        'warehouse_name': warehouse,
+                        **recommendation,
+                        'potential_benefit': (
+                            f"Projected ${recommendation['projected_savings_per_day_usd']:,.2f} per day saved, "
+                            f"p95 queue {recommendation['current_p95_queue_seconds']:.1f}s -> "
+                            f"{recommendation['projected_p95_queue_seconds']:.1f}s"),
+                        'evidence': 'simulation'
                     })
             
             return recommendations
@@ -230,7 +415,7 @@ class PerformanceOptimizer:
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
+            df = normalize_columns(self.session.sql(query).to_pandas())
             recommendations = []
             
             # Analyze cost patterns by warehouse
@@ -264,11 +449,50 @@ class PerformanceOptimizer:
                         'potential_benefit': f"Potential savings: ${avg_hourly_cost * 0.2:.2f} per hour"
                     })
             
+            # Point cost findings at the replayed alternative, where one was found
+            simulations = self.simulate_warehouse_sizing()
+            for rec in recommendations:
+                simulation = simulations.get(str(rec['warehouse_name']).upper())
+                if simulation and simulation['recommendation']:
+                    alternative = simulation['recommendation']
+                    rec['simulated_alternative'] = {
+                        key: alternative[key] for key in ('type', 'proposed', 'projected_cost_per_day_usd',
+                                                          'projected_savings_per_day_usd',
+                                                          'projected_p95_queue_seconds')
+                    }
+            
             return recommendations
         except Exception as e:
             print(f"❌ Error analyzing cost optimization: {e}")
             return []
     
+    def advise_clustering_keys(self) -> Dict[str, Dict]:
+        """Clustering advice per lower-case table name, mined from the local query history
+        
+        Table stats are cached on disk; only NDVs of newly seen predicate
+        columns are fetched between full refreshes.
+        """
+        config = self.clustering_advisor_config
+        store = QueryHistoryStore(self.query_history_config["store_dir"])
+        queries = store.aggregate_fingerprints(since_days=config["analysis_days"],
+                                               limit=config["max_query_shapes"], query_types=['SELECT'])
+        if queries.empty:
+            return {}
+        
+        stats, fetched_at = load_table_stats(config["table_stats_path"])
+        refresh = table_stats_stale(fetched_at, config["table_stats_max_age_days"])
+        if refresh:
+            stats = fetch_table_stats(self.session, referenced_tables(queries))
+        advisor = ClusteringAdvisor(stats, range_selectivity=config["range_selectivity"],
+                                    join_selectivity=config["join_selectivity"],
+                                    max_key_columns=config["max_key_columns"])
+        if config["table_stats_max_age_days"] is not None:
+            fetched = fetch_column_ndv(self.session, stats, advisor.candidate_columns(queries))
+            if refresh or fetched:
+                save_table_stats(config["table_stats_path"], stats, None if refresh else fetched_at)
+        
+        return {advice['table_name']: advice for advice in advisor.advise(queries)}
+    
     def generate_clustering_recommendations(self) -> List[Dict]:
         """Generate clustering recommendations for tables"""
         print("🔍 Analyzing clustering opportunities...")
@@ -279,6 +503,7 @@ class PerformanceOptimizer:
             table_schema,
             active_bytes / (1024*1024*1024) as size_gb,
             row_count,
+            clustering_key,
             last_altered
         FROM snowflake.account_usage.tables
         WHERE deleted IS NULL
@@ -288,38 +513,50 @@ class PerformanceOptimizer:
         """
         
         try:
-            df = self.session.sql(query).to_pandas()
-            recommendations = []
+            df = normalize_columns(self.session.sql(query).to_pandas())
             
-            for _, row in df.iterrows():
-                if row['size_gb'] > 10:  # Tables larger than 10GB
-                    recommendations.append({
-                        'table_name': f"{row['table_schema']}.{row['table_name']}",
-                        'type': 'CLUSTERING',
-                        'reason': 'Large table without clustering',
-                        'size_gb': row['size_gb'],
-                        'row_count': row['row_count'],
-                        'recommendation': 'Consider adding clustering keys',
-                        'potential_benefit': 'Improved query performance for large scans',
-                        'suggested_clustering_keys': self.suggest_clustering_keys(row['table_name'])
-                    })
+            advice = {}
+            if self.clustering_advisor_config["enabled"] and self.query_history_config["enabled"]:
+                try:
+                    advice = self.advise_clustering_keys()
+                except Exception as e:
+                    print(f"⚠️ Clustering advisor unavailable, using default key suggestions: {e}")
             
-            return recommendations
+            benefit_threshold = self.optimization_thresholds['resource_utilization']['clustering_benefit_threshold']
+            advice = {name: item for name, item in advice.items() if item['projected_reduction'] >= benefit_threshold}
+            names = df['table_name'].str.lower()
+            advised = names.isin(advice)
+            unclustered = df['clustering_key'].isna()
+            
+            def from_advice(field, fallback):
+                return lambda rows: pd.Series([advice[name][field] if name in advice else fallback(name)
+                                               for name in names[rows.index]], index=rows.index, dtype=object)
+            
+            return extract_records(df, (df['size_gb'] > 10) & (unclustered | advised), {  # Tables larger than 10GB
+                'table_name': lambda rows: rows['table_schema'] + "." + rows['table_name'],
+                'type': 'CLUSTERING',
+                'reason': np.where(advised, 'Observed query predicates would prune with a clustering key',
+                                   'Large table without clustering'),
+                'size_gb': col('size_gb'),
+                'row_count': col('row_count'),
+                'current_clustering_key': col('clustering_key'),
+                'recommendation': np.where(unclustered, 'Consider adding clustering keys',
+                                           'Consider changing the clustering key'),
+                'potential_benefit': lambda rows: pd.Series([
+                    f"{advice[name]['projected_reduction']:.0%} fewer bytes scanned by observed queries"
+                    if name in advice else 'Improved query performance for large scans'
+                    for name in names[rows.index]], index=rows.index),
+                'suggested_clustering_keys': from_advice('proposed_key', self.suggest_clustering_keys),
+                'projected_gb_scanned_reduction': from_advice('projected_gb_saved', lambda name: None),
+                'key_candidates': from_advice('candidates', lambda name: [])
+            })
         except Exception as e:
             print(f"❌ Error analyzing clustering opportunities: {e}")
             return []
     
     def suggest_clustering_keys(self, table_name: str) -> List[str]:
-        """Suggest clustering keys for a table based on common patterns"""
-        clustering_suggestions = {
-            'tbl_fact_shipments': ['shipment_date', 'customer_id', 'route_id'],
-            'tbl_fact_vehicle_telemetry': ['vehicle_id', 'timestamp'],
-            'tbl_fact_route_performance': ['route_id', 'performance_date'],
-            'tbl_ml_consolidated_feature_store': ['feature_date', 'customer_id'],
-            'tbl_ml_rolling_analytics': ['analytics_date', 'customer_id']
-        }
-        
-        return clustering_suggestions.get(table_name, ['date_key', 'id'])
+        """Fallback keys for tables without observed predicates, based on common patterns"""
+        return CLUSTERING_SUGGESTIONS.get(str(table_name).lower(), DEFAULT_CLUSTERING_KEYS)
     
     def apply_optimizations(self, recommendations: List[Dict]) -> Dict:
         """Apply optimization recommendations"""
@@ -338,10 +575,18 @@ class PerformanceOptimizer:
                     # Apply clustering (this would be implemented based on your needs)
                     results['applied'] += 1
                     results['details'].append(f"Applied clustering to {rec['table_name']}")
-                elif rec['type'] in ['SCALE_UP', 'SCALE_DOWN']:
-                    # Apply warehouse scaling (this would be implemented based on your needs)
-                    results['applied'] += 1
-                    results['details'].append(f"Applied {rec['type']} to {rec['warehouse_name']}")
+                elif rec['type'] in ['SCALE_UP', 'SCALE_DOWN', 'WAREHOUSE_SETTINGS']:
+                    # Only replayed recommendations are applied, and only when enabled
+                    statement = (alter_warehouse_sql(rec['warehouse_name'], rec['current'], rec['proposed'])
+                                 if rec.get('evidence') == 'simulation' else None)
+                    if statement and self.warehouse_simulation_config["auto_apply"]:
+                        self.session.sql(statement).collect()
+                        results['applied'] += 1
+                        results['details'].append(f"Applied {rec['type']} to {rec['warehouse_name']}: {statement}")
+                    else:
+                        results['skipped'] += 1
+                        why = "auto-apply disabled" if statement else "no simulation evidence"
+                        results['details'].append(f"Logged {rec['type']} for {rec['warehouse_name']} ({why})")
                 else:
                     # Log recommendation for manual review
                     results['skipped'] += 1
@@ -358,9 +603,13 @@ class PerformanceOptimizer:
         print(f"🔍 Running performance optimization analysis for {self.environment}")
         
         all_recommendations = []
+        self.warehouse_simulations = None  # replay against this run's query history
         
         # Run all optimization analyses
-        all_recommendations.extend(self.analyze_slow_queries())
+        if self.query_history_config["enabled"]:
+            all_recommendations.extend(self.analyze_query_fingerprints())
+        else:
+            all_recommendations.extend(self.analyze_slow_queries())
         all_recommendations.extend(self.analyze_warehouse_utilization())
         all_recommendations.extend(self.analyze_cost_optimization())
         all_recommendations.extend(self.generate_clustering_recommendations())
@@ -430,9 +679,23 @@ def main():
     parser.add_argument("--once", action="store_true",
                        help="Run optimization once instead of continuous monitoring")
     
+    parser.add_argument("--query-history-export",
+                       help="Local CSV/Parquet export of QUERY_HISTORY to ingest instead of Snowflake")
+    parser.add_argument("--clustering-table-stats",
+                       help="Table statistics JSON for the clustering advisor, used as is instead of Snowflake metadata")
+    parser.add_argument("--warehouse-config",
+                       help="JSON of current warehouse settings for the sizing simulation instead of SHOW WAREHOUSES")
+    
     args = parser.parse_args()
     
     optimizer = PerformanceOptimizer(args.environment)
+    if args.query_history_export:
+        optimizer.query_history_config["export_path"] = args.query_history_export
+    if args.clustering_table_stats:
+        optimizer.clustering_advisor_config["table_stats_path"] = args.clustering_table_stats
+        optimizer.clustering_advisor_config["table_stats_max_age_days"] = None
+    if args.warehouse_config:
+        optimizer.warehouse_simulation_config["warehouse_config_path"] = args.warehouse_config
     
     if args.once:
         optimizer.connect()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Query Anti-Pattern Analysis
+Parses Snowflake SQL with sqlglot and inspects each SELECT scope of the
+syntax tree, not the raw text. CTEs, window ORDER BYs and subqueries are
+therefore told apart from the problems they look like as substrings.
+Detects:
+  - SELECT * in the final projection
+  - ORDER BY on the outermost query without LIMIT
+  - scans of large fact tables with no WHERE filter
+  - joins of several fact tables (or non-equi joins) that are aggregated
+    afterwards, where rows fan out before GROUP BY
+  - predicates that wrap a clustering key in a function or expression, so
+    micro-partitions cannot be pruned
+  - the same table scanned more than once in one query
+Identical query texts are analysed once, and large corpora are split across
+worker processes.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+from sqlglot.optimizer.scope import traverse_scope
+
+# type: (description, savings factor, recommendation confidence, weight towards the query's total confidence)
+ANTIPATTERNS = {
+    'COLUMN_SPECIFICATION': ('Replace SELECT * with specific columns', 0.3, 0.9, 0.3),
+    'RESULT_LIMITING': ('Add LIMIT clause to ORDER BY queries', 0.2, 0.8, 0.2),
+    'FILTER_OPTIMIZATION': ('Add WHERE clause to reduce data scan of a large fact table', 0.4, 0.8, 0.3),
+    'JOIN_FANOUT': ('Aggregate each fact table before joining (rows fan out before GROUP BY)', 0.5, 0.7, 0.3),
+    'NON_SARGABLE_PREDICATE': ('Compare the clustering key directly instead of wrapping it in a function', 0.5, 0.9, 0.4),
+    'REPEATED_SCAN': ('Scan the table once (CTE or conditional aggregation) instead of repeatedly', 0.4, 0.7, 0.2),
+}
+
+FACT_TABLE_PATTERN = re.compile(r"(^|_)fact(_|$)", re.IGNORECASE)
+
+COMPARISONS = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE, exp.Like, exp.ILike, exp.In, exp.Between)
+
+
+def finding(pattern_type: str, detail: str) -> Dict:
+    description, savings_factor, confidence, weight = ANTIPATTERNS[pattern_type]
+    return {
+        'type': pattern_type,
+        'description': description,
+        'detail': detail,
+        'savings_factor': savings_factor,
+        'confidence': confidence,
+        'weight': weight
+    }
+
+
+class QueryAnalyzer:
+    """AST checks parameterised by table sizes and clustering keys"""
+
+    def __init__(self, clustering_keys: Optional[Dict[str, Sequence[str]]] = None,
+                 table_sizes_gb: Optional[Dict[str, float]] = None, large_table_gb: float = 10,
+                 dialect: str = "snowflake"):
+        """
+        Args:
+            clustering_keys: table name -> clustering key columns (names are case-insensitive)
+            table_sizes_gb: table name -> size; when given, "large" means at least
+                            large_table_gb, otherwise any table named *fact* is large
+        """
+        self.clustering_keys = {name.lower(): {key.lower() for key in keys}
+                                for name, keys in (clustering_keys or {}).items()}
+        self.table_sizes_gb = {name.lower(): size for name, size in (table_sizes_gb or {}).items()}
+        self.large_table_gb = large_table_gb
+        self.dialect = dialect
+        self.analyze = lru_cache(maxsize=50_000)(self._analyze)
+
+    def is_large(self, table: exp.Table) -> bool:
+        name = table.name.lower()
+        if self.table_sizes_gb:
+            return self.table_sizes_gb.get(name, 0) >= self.large_table_gb
+        return bool(FACT_TABLE_PATTERN.search(name))
+
+    def _analyze(self, sql: str) -> tuple:
+        """Findings for one query (a tuple so results can be cached); unparseable SQL has none"""
+        try:
+            tree = sqlglot.parse_one(sql, read=self.dialect)
+            scopes = traverse_scope(tree) if tree is not None else []
+        except (SqlglotError, RecursionError, ValueError):
+            return ()
+        if not scopes:
+            return ()
+
+        findings = []
+        root = scopes[-1].expression  # traverse_scope yields the outermost scope last
+        findings.extend(self._final_projection(root))
+
+        scans = Counter()
+        for scope in scopes:
+            select = scope.expression
+            if not isinstance(select, exp.Select):
+                continue
+            tables = {alias: source for alias, source in scope.sources.items() if isinstance(source, exp.Table)}
+            scans.update(table.name.lower() for table in tables.values())
+            findings.extend(self._unfiltered_scans(select, tables))
+            findings.extend(self._join_fanout(select, tables))
+            findings.extend(self._non_sargable(select, tables))
+
+        for name, count in scans.items():
+            if count > 1:
+                findings.append(finding('REPEATED_SCAN', f"{name} is scanned {count} times"))
+        return tuple(findings)
+
+    def _final_projection(self, root: exp.Expression) -> List[Dict]:
+        findings = []
+        select = root if isinstance(root, exp.Select) else root.find(exp.Select)
+        if select is None:
+            return findings
+        if any(isinstance(projection, exp.Star) or (isinstance(projection, exp.Column) and projection.is_star)
+               for projection in select.expressions):
+            findings.append(finding('COLUMN_SPECIFICATION', "final SELECT projects *"))
+        # Window ORDER BYs live inside exp.Window, so only the query's own ORDER BY is seen here
+        if root.args.get('order') is not None and root.args.get('limit') is None and root.args.get('fetch') is None:
+            findings.append(finding('RESULT_LIMITING', "outermost ORDER BY has no LIMIT"))
+        return findings
+
+    def _unfiltered_scans(self, select: exp.Select, tables: Dict[str, exp.Table]) -> List[Dict]:
+        if select.args.get('where') is not None or select.args.get('qualify') is not None:
+            return []
+        return [finding('FILTER_OPTIMIZATION', f"{table.name.lower()} is read without a WHERE filter")
+                for table in tables.values() if self.is_large(table)]
+
+    @staticmethod
+    def _aggregates(select: exp.Select) -> bool:
+        if select.args.get('group') is not None:
+            return True
+        return any(agg.find_ancestor(exp.Window) is None
+                   for projection in select.expressions for agg in projection.find_all(exp.AggFunc))
+
+    def _join_fanout(self, select: exp.Select, tables: Dict[str, exp.Table]) -> List[Dict]:
+        joins = select.args.get('joins') or []
+        if not joins or not self._aggregates(select):
+            return []
+        large = sorted({table.name.lower() for table in tables.values() if self.is_large(table)})
+        if len(large) >= 2:
+            return [finding('JOIN_FANOUT', f"{', '.join(large)} are joined before aggregating")]
+        non_equi = [join for join in joins
+                    if join.args.get('on') is not None and join.args['on'].find(exp.EQ) is None]
+        if non_equi:
+            return [finding('JOIN_FANOUT', "non-equi join before aggregating")]
+        return []
+
+    def _keys_for(self, column: exp.Column, tables: Dict[str, exp.Table]) -> set:
+        if column.table and column.table in tables:
+            candidates = [tables[column.table]]
+        else:
+            candidates = list(tables.values())
+        keys = set()
+        for table in candidates:
+            keys |= self.clustering_keys.get(table.name.lower(), set())
+        return keys
+
+    def _non_sargable(self, select: exp.Select, tables: Dict[str, exp.Table]) -> List[Dict]:
+        where = select.args.get('where')
+        if where is None or not self.clustering_keys:
+            return []
+        findings = []
+        for predicate in where.find_all(*COMPARISONS):
+            if predicate.find_ancestor(exp.Select) is not select:
+                continue  # belongs to a subquery, analysed in its own scope
+            for operand in (predicate.this, predicate.args.get('expression')):
+                if operand is None or isinstance(operand, (exp.Column, exp.Literal, exp.Placeholder)):
+                    continue
+                for column in operand.find_all(exp.Column):
+                    if column.name.lower() in self._keys_for(column, tables):
+                        findings.append(finding(
+                            'NON_SARGABLE_PREDICATE',
+                            f"clustering key {column.name.lower()} is wrapped in {operand.sql(dialect=self.dialect)[:80]}"
+                        ))
+        return findings
+
+    def analyze_many(self, queries: Iterable[str]) -> List[List[Dict]]:
+        return [list(self.analyze(query or "")) for query in queries]
+
+
+_worker_analyzer: Optional[QueryAnalyzer] = None
+
+
+def _init_worker(options: Dict):
+    global _worker_analyzer
+    _worker_analyzer = QueryAnalyzer(**options)
+
+
+def _analyze_chunk(queries: List[str]) -> List[List[Dict]]:
+    return _worker_analyzer.analyze_many(queries)
+
+
+def analyze_corpus(queries: Sequence[str], workers: int = None, chunk_size: int = 500,
+                   **analyzer_options) -> List[List[Dict]]:
+    """Findings per query for a large corpus
+
+    Duplicate texts are analysed once; distinct texts are spread over worker
+    processes when there are enough of them to pay for process start-up.
+    """
+    unique = list(dict.fromkeys(query or "" for query in queries))
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(unique) < chunk_size * 2:
+        results = QueryAnalyzer(**analyzer_options).analyze_many(unique)
+    else:
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(analyzer_options,)) as pool:
+            results = [result for chunk in pool.map(_analyze_chunk, chunks) for result in chunk]
+    by_text = dict(zip(unique, results))
+    return [by_text[query or ""] for query in queries]
+
+
+def load_corpus(path: str) -> List[str]:
+    """Query texts from a .sql file (statements separated by ';'), or a CSV/Parquet with a query_text column"""
+    if path.endswith('.sql'):
+        with open(path) as f:
+            return [statement.strip() for statement in f.read().split(';') if statement.strip()]
+    import pandas as pd
+    frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    frame.columns = [str(c).lower() for c in frame.columns]
+    return frame['query_text'].fillna('').astype(str).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query anti-pattern analysis over a query text corpus")
+    parser.add_argument("corpus", help=".sql file, or CSV/Parquet with a query_text column")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--show", type=int, default=10, help="Example findings to print")
+    args = parser.parse_args()
+
+    queries = load_corpus(args.corpus)
+    start = time.perf_counter()
+    results = analyze_corpus(queries, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    counts = Counter(item['type'] for findings in results for item in findings)
+    print(f"🔍 Analyzed {len(queries):,} queries in {elapsed:.2f}s ({len(queries) / max(elapsed, 1e-9):,.0f}/s)")
+    for pattern_type, count in counts.most_common():
+        print(f"  {pattern_type}: {count:,}")
+    shown = 0
+    for query, findings in zip(queries, results):
+        if findings and shown < args.show:
+            print(f"\n{query[:200]}")
+            for item in findings:
+                print(f"  ⚠️ {item['type']}: {item['detail']}")
+            shown += 1
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
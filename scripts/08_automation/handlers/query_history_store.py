@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Query History Store
+Incrementally copies Snowflake query history (or a local CSV/Parquet export
+of it) into day-partitioned Parquet files. Each query's text is normalised
+by stripping comments and literals and collapsing IN/VALUES lists, then
+fingerprinted, so repeated executions of the same query shape group
+together. DuckDB aggregates execution time, bytes scanned and attributed
+cost per fingerprint straight from the Parquet files.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from issue_extraction import normalize_columns
+
+# Credits per hour by warehouse size, used to attribute compute cost to queries
+WAREHOUSE_CREDITS_PER_HOUR = {
+    'X-SMALL': 1, 'SMALL': 2, 'MEDIUM': 4, 'LARGE': 8, 'X-LARGE': 16, '2X-LARGE': 32,
+    '3X-LARGE': 64, '4X-LARGE': 128, '5X-LARGE': 256, '6X-LARGE': 512
+}
+CREDIT_PRICE_USD = 3.00
+
+# Every partition is written with this schema. A batch whose column is all
+# None would otherwise be stored as a null-typed column that DuckDB cannot
+# combine with the typed column of other partitions.
+STORED_SCHEMA = pa.schema([
+    ('query_id', pa.string()),
+    ('start_time', pa.timestamp('us', tz='UTC')),
+    ('end_time', pa.timestamp('us', tz='UTC')),
+    ('query_type', pa.string()),
+    ('warehouse_name', pa.string()),
+    ('warehouse_size', pa.string()),
+    ('user_name', pa.string()),
+    ('execution_status', pa.string()),
+    ('execution_seconds', pa.float64()),
+    ('queued_seconds', pa.float64()),
+    ('bytes_scanned', pa.float64()),
+    ('partitions_scanned', pa.float64()),
+    ('partitions_total', pa.float64()),
+    ('cost_usd', pa.float64()),
+    ('fingerprint', pa.string()),
+    ('normalized_text', pa.string()),
+    ('query_text', pa.string())
+])
+STORED_COLUMNS = STORED_SCHEMA.names
+
+HISTORY_QUERY = """
+SELECT
+    query_id,
+    query_text,
+    query_type,
+    warehouse_name,
+    warehouse_size,
+    user_name,
+    execution_status,
+    start_time,
+    end_time,
+    execution_time / 1000 AS execution_seconds,
+    (queued_provisioning_time + queued_repair_time + queued_overload_time) / 1000 AS queued_seconds,
+    bytes_scanned,
+    partitions_scanned,
+    partitions_total,
+    credits_used_cloud_services
+FROM snowflake.account_usage.query_history
+WHERE start_time > '{since}'::TIMESTAMP_LTZ
+AND warehouse_name IS NOT NULL
+ORDER BY start_time
+"""
+
+# Applied in order; string literals go first so quotes inside comments or
+# comment markers inside strings are not misread
+NORMALIZE_PATTERNS = [
+    (r"\$\$.*?\$\$", "?"),                                   # dollar-quoted strings
+    (r"'(?:[^'\\]|\\.|'')*'", "?"),                          # string literals
+    (r"/\*.*?\*/", " "),                                     # block comments
+    (r"--[^\n]*", " "),                                      # line comments
+    (r"(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b", "?"),  # numbers (not digits inside identifiers)
+    (r"\s+", " "),
+    (r"\s*([=<>!,()])\s*", r"\1"),                          # spacing around operators and parentheses
+    (r"\(\?(?:,\?)*\)", "(?)"),                              # IN (?, ?, ?) and VALUES (?, ?) rows
+    (r"\(\?\)(?:,\(\?\))+", "(?)"),                          # multi-row VALUES
+]
+
+
+def normalize_queries(query_text: pd.Series) -> pd.Series:
+    """Literal-free, whitespace-collapsed, upper-cased query text"""
+    text = query_text.fillna('').astype(str)
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        text = text.str.replace(pattern, replacement, regex=True, flags=re.DOTALL)
+    return text.str.strip().str.upper()
+
+
+def fingerprint_queries(normalized_text: pd.Series) -> pd.Series:
+    return normalized_text.map(lambda text: hashlib.sha1(text.encode('utf-8')).hexdigest()[:16])
+
+
+def attribute_cost(df: pd.DataFrame) -> np.ndarray:
+    """Warehouse time at the warehouse's credit rate plus cloud services credits, in USD"""
+    credits_per_hour = df['warehouse_size'].fillna('').str.upper().map(WAREHOUSE_CREDITS_PER_HOUR).fillna(0)
+    compute_credits = df['execution_seconds'].fillna(0) / 3600 * credits_per_hour
+    cloud_credits = df['credits_used_cloud_services'].fillna(0) if 'credits_used_cloud_services' in df else 0
+    return ((compute_credits + cloud_credits) * CREDIT_PRICE_USD).to_numpy(dtype=float)
+
+
+def prepare_history(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalise, fingerprint and cost a raw query_history frame into the stored layout"""
+    df = normalize_columns(df.copy())
+    if 'execution_seconds' not in df and 'execution_time' in df:
+        df['execution_seconds'] = df['execution_time'] / 1000  # raw exports are in milliseconds
+    for column in ('queued_seconds', 'bytes_scanned', 'partitions_scanned', 'partitions_total'):
+        if column not in df:
+            df[column] = np.nan
+    for column in ('query_type', 'warehouse_size', 'user_name', 'execution_status', 'end_time'):
+        if column not in df:
+            df[column] = None
+    df['start_time'] = pd.to_datetime(df['start_time'], utc=True)
+    df['end_time'] = pd.to_datetime(df['end_time'], utc=True)
+    df['normalized_text'] = normalize_queries(df['query_text'])
+    df['fingerprint'] = fingerprint_queries(df['normalized_text'])
+    df['cost_usd'] = attribute_cost(df)
+    return df[STORED_COLUMNS]
+
+
+class QueryHistoryStore:
+    """Day-partitioned Parquet copy of query history with a high-water mark"""
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.state_path = os.path.join(store_dir, 'state.json')
+        os.makedirs(store_dir, exist_ok=True)
+
+    @property
+    def parquet_glob(self) -> str:
+        return os.path.join(self.store_dir, 'queries', 'day=*', '*.parquet')
+
+    @property
+    def parquet_source(self) -> str:
+        """DuckDB scan over every partition"""
+        # union_by_name also reconciles partitions written before STORED_SCHEMA
+        return f"read_parquet('{self.parquet_glob}', hive_partitioning = true, union_by_name = true)"
+
+    def has_data(self) -> bool:
+        return bool(glob.glob(self.parquet_glob))
+
+    def load_state(self) -> Dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save_state(self, state: Dict):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def high_water_mark(self) -> Optional[datetime]:
+        value = self.load_state().get('high_water_mark')
+        return pd.Timestamp(value).to_pydatetime() if value else None
+
+    def _stored_query_ids(self, since: datetime) -> set:
+        if not self.has_data():
+            return set()
+        rows = duckdb.sql(
+            f"SELECT query_id FROM {self.parquet_source} "
+            f"WHERE start_time >= '{pd.Timestamp(since).isoformat()}'::TIMESTAMPTZ"
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def append(self, history: pd.DataFrame, overlap_since: Optional[datetime] = None) -> int:
+        """Write prepared rows not already stored; returns rows written
+
+        overlap_since: start of a re-read window; rows from it that are
+        already stored (by query_id) are dropped.
+        """
+        if history.empty:
+            return 0
+        if overlap_since is not None:
+            history = history[~history['query_id'].isin(self._stored_query_ids(overlap_since))]
+        history = history.drop_duplicates('query_id')
+        if history.empty:
+            return 0
+
+        days = history['start_time'].dt.strftime('%Y-%m-%d')
+        part = uuid.uuid4().hex[:12]
+        for day, rows in history.groupby(days, sort=True):
+            day_dir = os.path.join(self.store_dir, 'queries', f'day={day}')
+            os.makedirs(day_dir, exist_ok=True)
+            table = pa.Table.from_pandas(rows, schema=STORED_SCHEMA, preserve_index=False)
+            pq.write_table(table, os.path.join(day_dir, f'part-{part}.parquet'))
+
+        state = self.load_state()
+        newest = history['start_time'].max()
+        current = pd.Timestamp(state['high_water_mark']) if state.get('high_water_mark') else None
+        if current is None or newest > current:
+            state['high_water_mark'] = newest.isoformat()
+        state['last_ingested_at'] = datetime.now().isoformat()
+        state['rows_ingested'] = state.get('rows_ingested', 0) + len(history)
+        self.save_state(state)
+        return len(history)
+
+    def ingest_batches(self, batches: Iterable[pd.DataFrame], overlap_since: Optional[datetime] = None) -> int:
+        return sum(self.append(prepare_history(batch), overlap_since) for batch in batches)
+
+    def ingest_from_snowflake(self, session, cold_start_days: int = 7, overlap_minutes: int = 60,
+                              statement_params: Dict = None) -> int:
+        """Pull query history newer than the stored high-water mark
+
+        ACCOUNT_USAGE lags up to 45 minutes and rows can land out of order,
+        so each pull re-reads an overlap window and drops query_ids already
+        stored.
+        """
+        mark = self.high_water_mark()
+        if mark is None:
+            since = datetime.now().astimezone() - timedelta(days=cold_start_days)
+            overlap_since = None
+        else:
+            since = overlap_since = mark - timedelta(minutes=overlap_minutes)
+        frame = session.sql(HISTORY_QUERY.format(since=pd.Timestamp(since).isoformat()))
+        return self.ingest_batches(frame.to_pandas_batches(statement_params=statement_params), overlap_since)
+
+    def ingest_export(self, path: str, chunk_size: int = 100_000) -> int:
+        """Load a local CSV or Parquet export of QUERY_HISTORY (raw or in the HISTORY_QUERY layout)"""
+        if path.endswith('.parquet'):
+            batches = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size))
+        else:
+            batches = pd.read_csv(path, chunksize=chunk_size, low_memory=False)
+        mark = self.high_water_mark()
+        return self.ingest_batches(batches, overlap_since=mark - timedelta(days=1) if mark else None)
+
+    def aggregate_fingerprints(self, since_days: Optional[int] = 7, limit: int = 25,
+                               query_types: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per-fingerprint totals over the window, most expensive first"""
+        if not self.has_data():
+            return pd.DataFrame()
+        filters = ["execution_status = 'SUCCESS' OR execution_status IS NULL"]
+        if since_days:
+            since = (datetime.now().astimezone() - timedelta(days=since_days)).isoformat()
+            filters.append(f"start_time >= '{since}'::TIMESTAMPTZ")
+        if query_types:
+            filters.append(f"query_type IN ({', '.join(repr(t) for t in query_types)})")
+        where = " AND ".join(f"({condition})" for condition in filters)
+        return duckdb.sql(f"""
+        SELECT
+            fingerprint,
+            any_value(normalized_text) AS normalized_text,
+            arg_max(query_text, execution_seconds) AS slowest_query_text,
+            arg_max(query_id, execution_seconds) AS slowest_query_id,
+            COUNT(*) AS executions,
+            SUM(execution_seconds) AS total_execution_seconds,
+            AVG(execution_seconds) AS avg_execution_seconds,
+            quantile_cont(execution_seconds, 0.95) AS p95_execution_seconds,
+            SUM(queued_seconds) AS total_queued_seconds,
+            SUM(bytes_scanned) / POWER(1024, 3) AS total_gb_scanned,
+            SUM(partitions_scanned) / NULLIF(SUM(partitions_total), 0) AS partition_scan_ratio,
+            SUM(cost_usd) AS total_cost_usd,
+            COUNT(DISTINCT user_name) AS user_count,
+            string_agg(DISTINCT warehouse_name, ', ') AS warehouses,
+            MIN(start_time) AS first_seen,
+            MAX(start_time) AS last_seen
+        FROM {self.parquet_source}
+        WHERE {where}
+        GROUP BY fingerprint
+        ORDER BY total_cost_usd DESC, total_execution_seconds DESC
+        LIMIT {int(limit)}
+        """).df()
+
+    def load_queries(self, since_days: Optional[int] = 7, warehouse_names: Optional[List[str]] = None,
+                     columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Stored rows (all statuses) over the window, oldest first"""
+        if not self.has_data():
+            return pd.DataFrame(columns=columns or STORED_COLUMNS)
+        filters = ["TRUE"]
+        if since_days:
+            since = (datetime.now().astimezone() - timedelta(days=since_days)).isoformat()
+            filters.append(f"start_time >= '{since}'::TIMESTAMPTZ")
+        if warehouse_names:
+            filters.append(f"warehouse_name IN ({', '.join(repr(name) for name in warehouse_names)})")
+        return duckdb.sql(f"""
+        SELECT {', '.join(columns or STORED_COLUMNS)}
+        FROM {self.parquet_source}
+        WHERE {' AND '.join(filters)}
+        ORDER BY start_time
+        """).df()
+
+    def prune(self, retention_days: int) -> int:
+        """Delete day partitions older than the retention window; returns partitions removed"""
+        cutoff = (datetime.now() - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        removed = 0
+        for day_dir in glob.glob(os.path.join(self.store_dir, 'queries', 'day=*')):
+            if os.path.basename(day_dir).split('=', 1)[1] < cutoff:
+                for path in glob.glob(os.path.join(day_dir, '*')):
+                    os.remove(path)
+                os.rmdir(day_dir)
+                removed += 1
+        return removed
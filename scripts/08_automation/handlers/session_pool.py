@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Snowpark Session Pool
+Keeps Snowpark sessions open between automation runs so in-process jobs
+skip the connect/authenticate round trip. Sessions are pooled per
+connection target (account, user, warehouse, database, schema) and
+checked out by one run at a time.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from snowflake.snowpark import Session
+
+# Connection parameters that identify a pool; credentials are not part of the key
+POOL_KEY_FIELDS = ('account', 'user', 'role', 'warehouse', 'database', 'schema')
+
+
+class SessionPool:
+    """Thread-safe pool of Snowpark sessions keyed by connection target"""
+
+    def __init__(self, max_sessions_per_key: int = 4, max_idle_seconds: int = 1800,
+                 acquire_timeout: float = 300):
+        """
+        Args:
+            max_sessions_per_key: open sessions allowed per connection target
+            max_idle_seconds: idle sessions older than this are closed and replaced
+            acquire_timeout: seconds to wait for a free session before failing
+        """
+        self.max_sessions_per_key = max_sessions_per_key
+        self.max_idle_seconds = max_idle_seconds
+        self.acquire_timeout = acquire_timeout
+        self._idle: Dict[Tuple, List[Tuple[Session, float]]] = {}
+        self._open: Dict[Tuple, int] = {}
+        self._available = threading.Condition()
+        self.stats = {'created': 0, 'reused': 0, 'expired': 0}
+
+    @staticmethod
+    def _key(connection_params: Dict) -> Tuple:
+        return tuple(connection_params.get(field) for field in POOL_KEY_FIELDS)
+
+    def _checkout(self, key: Tuple) -> Session:
+        """Idle session for key, or None when the caller may create one"""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._available:
+            while True:
+                idle = self._idle.setdefault(key, [])
+                while idle:
+                    session, released_at = idle.pop()
+                    if time.monotonic() - released_at <= self.max_idle_seconds:
+                        self.stats['reused'] += 1
+                        return session
+                    self.stats['expired'] += 1
+                    self._open[key] -= 1
+                    self._close(session)
+                if self._open.get(key, 0) < self.max_sessions_per_key:
+                    self._open[key] = self._open.get(key, 0) + 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No Snowflake session available for {key[3]}.{key[4]} "
+                                       f"after {self.acquire_timeout}s")
+                self._available.wait(remaining)
+
+    @contextmanager
+    def session(self, connection_params: Dict):
+        """Check out a session for the duration of a run
+
+        A session whose run raised is closed rather than returned, since its
+        connection state is unknown.
+        """
+        key = self._key(connection_params)
+        session = self._checkout(key)
+        if session is None:
+            try:
+                session = Session.builder.configs(connection_params).create()
+                self.stats['created'] += 1
+            except Exception:
+                self._discard(key, None)
+                raise
+
+        try:
+            yield session
+        except Exception:
+            self._discard(key, session)
+            raise
+        else:
+            with self._available:
+                self._idle[key].append((session, time.monotonic()))
+                self._available.notify()
+
+    def _discard(self, key: Tuple, session):
+        with self._available:
+            self._open[key] -= 1
+            self._available.notify()
+        if session is not None:
+            self._close(session)
+
+    @staticmethod
+    def _close(session: Session):
+        try:
+            session.close()
+        except Exception as e:
+            print(f"⚠️ Failed to close Snowflake session: {e}")
+
+    def close_all(self):
+        """Close every idle session"""
+        with self._available:
+            idle = [session for sessions in self._idle.values() for session, _ in sessions]
+            for key, sessions in self._idle.items():
+                self._open[key] -= len(sessions)
+            self._idle = {}
+        for session in idle:
+            self._close(session)
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Warehouse Right-Sizing Simulator
+Replays a warehouse's recorded query load under alternative sizes and
+auto-suspend / multi-cluster settings. The replay is discrete-event. Queries
+arrive at their recorded start times. Each one occupies one of a cluster's
+concurrency slots for its execution time, rescaled to the simulated size,
+and waits in FIFO order when every slot is busy. Clusters resume on demand,
+bill per second with a 60 second minimum per resume, and suspend after
+their idle timeout. Each setting reports projected queue latency and credit
+cost, so resize recommendations rest on the recorded workload rather than on
+averages. Workloads come from the local query history store or a
+CSV/Parquet export, so the replay runs offline.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from issue_extraction import normalize_columns
+from query_history_store import CREDIT_PRICE_USD, WAREHOUSE_CREDITS_PER_HOUR
+
+WAREHOUSE_SIZES = list(WAREHOUSE_CREDITS_PER_HOUR)
+
+# Spellings Snowflake accepts for the same size
+SIZE_ALIASES = {'XSMALL': 'X-SMALL', 'XLARGE': 'X-LARGE', 'XXLARGE': '2X-LARGE', 'X2LARGE': '2X-LARGE',
+                'XXXLARGE': '3X-LARGE', 'X3LARGE': '3X-LARGE', 'X4LARGE': '4X-LARGE',
+                'X5LARGE': '5X-LARGE', 'X6LARGE': '6X-LARGE'}
+
+
+def normalize_size(size) -> Optional[str]:
+    """'X-Small', 'XSMALL' and 'x-small' all become 'X-SMALL'; unknown sizes become None"""
+    if size is None or (isinstance(size, float) and math.isnan(size)):
+        return None
+    size = str(size).strip().upper().replace('_', '-')
+    size = SIZE_ALIASES.get(size.replace('-', ''), size)
+    return size if size in WAREHOUSE_CREDITS_PER_HOUR else None
+
+
+@dataclass(frozen=True)
+class WarehouseScenario:
+    """One warehouse configuration to replay
+
+    auto_suspend_seconds: idle time before the warehouse suspends (None never suspends)
+    max_concurrency: queries a cluster runs at once (MAX_CONCURRENCY_LEVEL)
+    """
+    size: str
+    auto_suspend_seconds: Optional[float] = 600
+    min_clusters: int = 1
+    max_clusters: int = 1
+    scaling_policy: str = 'STANDARD'
+    max_concurrency: int = 8
+
+    @property
+    def label(self) -> str:
+        suspend = 'never' if self.auto_suspend_seconds is None else f"{self.auto_suspend_seconds:.0f}s"
+        clusters = (f", {self.min_clusters}-{self.max_clusters} clusters {self.scaling_policy}"
+                    if self.max_clusters > 1 else "")
+        return f"{self.size}, auto-suspend {suspend}{clusters}"
+
+
+@dataclass
+class Workload:
+    """A warehouse's recorded queries, as seconds from the start of the window"""
+    warehouse_name: str
+    arrivals: np.ndarray
+    execution_seconds: np.ndarray
+    recorded_credits_per_hour: np.ndarray
+    observed_queue_seconds: np.ndarray
+    window_seconds: float
+
+    @property
+    def queries(self) -> int:
+        return len(self.arrivals)
+
+
+def prepare_workload(history: pd.DataFrame, warehouse_name: str, default_size: Optional[str] = None,
+                     window_seconds: Optional[float] = None) -> Workload:
+    """Workload for one warehouse from rows in the query history store layout
+
+    Raw QUERY_HISTORY exports (execution_time in milliseconds, queue time
+    split into components) are accepted too. Queries with no recorded
+    warehouse size are assumed to have run at default_size.
+    """
+    df = normalize_columns(history.copy())
+    if 'warehouse_name' in df:
+        df = df[df['warehouse_name'].str.upper() == warehouse_name.upper()]
+    if 'execution_seconds' not in df:
+        df['execution_seconds'] = df['execution_time'] / 1000
+    if 'queued_seconds' not in df:
+        parts = [column for column in ('queued_provisioning_time', 'queued_repair_time', 'queued_overload_time')
+                 if column in df]
+        df['queued_seconds'] = df[parts].fillna(0).sum(axis=1) / 1000 if parts else 0.0
+    df['start_time'] = pd.to_datetime(df['start_time'], utc=True)
+    df = df.dropna(subset=['start_time']).sort_values('start_time', kind='stable')
+
+    sizes = df['warehouse_size'].map(normalize_size) if 'warehouse_size' in df else pd.Series(None, index=df.index)
+    sizes = sizes.fillna(normalize_size(default_size) or 'X-SMALL')
+    seconds = (df['start_time'] - df['start_time'].min()).dt.total_seconds().to_numpy() if len(df) else np.zeros(0)
+    span = float(seconds[-1]) if len(seconds) else 0.0
+    return Workload(
+        warehouse_name=warehouse_name,
+        arrivals=seconds,
+        execution_seconds=df['execution_seconds'].fillna(0).clip(lower=0).to_numpy(dtype=float),
+        recorded_credits_per_hour=sizes.map(WAREHOUSE_CREDITS_PER_HOUR).to_numpy(dtype=float),
+        observed_queue_seconds=df['queued_seconds'].fillna(0).to_numpy(dtype=float),
+        window_seconds=max(window_seconds or span, 3600.0)
+    )
+
+
+class _Cluster:
+    __slots__ = ('slots', 'running', 'billed_from', 'busy_until')
+
+    def __init__(self):
+        self.slots: List[float] = []
+        self.running = False
+        self.billed_from = 0.0
+        self.busy_until = 0.0
+
+
+class WarehouseSimulator:
+    """Discrete-event replay of a workload under warehouse scenarios"""
+
+    def __init__(self, parallel_fraction: float = 0.8, resume_seconds: float = 1.0,
+                 minimum_billing_seconds: float = 60, scale_in_idle_seconds: float = 120,
+                 economy_backlog_seconds: float = 360, queued_threshold_seconds: float = 1.0):
+        """
+        Args:
+            parallel_fraction: share of a query's execution time that scales with warehouse
+                               size (doubling the size halves it); the rest is fixed overhead
+            resume_seconds: delay before a resumed or added cluster runs queries
+            minimum_billing_seconds: credits billed at least this long per cluster start
+            scale_in_idle_seconds: idle time after which clusters above min_clusters shut down
+            economy_backlog_seconds: an ECONOMY warehouse adds a cluster only when a query
+                                     would otherwise wait this long
+            queued_threshold_seconds: waits longer than this count as queued
+        """
+        self.parallel_fraction = parallel_fraction
+        self.resume_seconds = resume_seconds
+        self.minimum_billing_seconds = minimum_billing_seconds
+        self.scale_in_idle_seconds = scale_in_idle_seconds
+        self.economy_backlog_seconds = economy_backlog_seconds
+        self.queued_threshold_seconds = queued_threshold_seconds
+
+    def scaled_execution_seconds(self, workload: Workload, size: str) -> np.ndarray:
+        speedup = workload.recorded_credits_per_hour / WAREHOUSE_CREDITS_PER_HOUR[size]
+        return workload.execution_seconds * (self.parallel_fraction * speedup + 1 - self.parallel_fraction)
+
+    def replay(self, workload: Workload, scenario: WarehouseScenario) -> Dict:
+        """Queue wait per query plus billed cluster-seconds for one scenario"""
+        durations = self.scaled_execution_seconds(workload, scenario.size).tolist()
+        clusters = [_Cluster() for _ in range(max(scenario.max_clusters, scenario.min_clusters, 1))]
+        base = max(scenario.min_clusters, 1)
+        suspend_after = [
+            (math.inf if scenario.auto_suspend_seconds is None else scenario.auto_suspend_seconds)
+            if index < base else min(self.scale_in_idle_seconds, scenario.auto_suspend_seconds or math.inf)
+            for index in range(len(clusters))
+        ]
+        waits = np.empty(workload.queries)
+        billed = {'seconds': 0.0, 'resumes': 0, 'peak_clusters': 0}
+
+        def stop(cluster: _Cluster, at: float):
+            billed['seconds'] += max(self.minimum_billing_seconds, at - cluster.billed_from)
+            cluster.running = False
+
+        def start(cluster: _Cluster, at: float):
+            ready = at + self.resume_seconds
+            cluster.running, cluster.billed_from, cluster.busy_until = True, at, ready
+            cluster.slots = [ready] * scenario.max_concurrency
+            billed['resumes'] += 1
+
+        for i, (arrival, duration) in enumerate(zip(workload.arrivals.tolist(), durations)):
+            for cluster, timeout in zip(clusters, suspend_after):
+                if cluster.running and cluster.busy_until + timeout <= arrival:
+                    stop(cluster, cluster.busy_until + timeout)
+
+            running = [cluster for cluster in clusters if cluster.running]
+            resumed = not running
+            if resumed:
+                # Resuming a suspended warehouse starts its minimum cluster count
+                for cluster in clusters[:base]:
+                    start(cluster, arrival)
+                running = clusters[:base]
+            chosen = min(running, key=lambda cluster: cluster.slots[0])
+            begin = max(arrival, chosen.slots[0])
+
+            # Waiting out the resume itself is not a backlog another cluster would clear
+            if begin > arrival and not resumed and len(running) < len(clusters):
+                wait = begin - arrival
+                if scenario.scaling_policy != 'ECONOMY' or wait >= self.economy_backlog_seconds:
+                    added = next(cluster for cluster in clusters if not cluster.running)
+                    start(added, arrival)
+                    if added.slots[0] < begin:
+                        chosen, begin = added, added.slots[0]
+            billed['peak_clusters'] = max(billed['peak_clusters'], sum(cluster.running for cluster in clusters))
+
+            end = begin + duration
+            heapq.heapreplace(chosen.slots, end)
+            chosen.busy_until = max(chosen.busy_until, end)
+            waits[i] = begin - arrival
+
+        horizon = workload.window_seconds
+        for cluster, timeout in zip(clusters, suspend_after):
+            if cluster.running:
+                stop(cluster, max(cluster.busy_until, min(cluster.busy_until + timeout, horizon)))
+        return {'waits': waits, 'durations': np.asarray(durations), **billed}
+
+    def simulate(self, workload: Workload, scenario: WarehouseScenario) -> Dict:
+        """Projected queue latency and credit cost of one scenario"""
+        replayed = self.replay(workload, scenario)
+        waits, durations = replayed['waits'], replayed['durations']
+        credits = replayed['seconds'] / 3600 * WAREHOUSE_CREDITS_PER_HOUR[scenario.size]
+        days = workload.window_seconds / 86400
+        has_queries = workload.queries > 0
+        return {
+            'scenario': scenario.label,
+            **asdict(scenario),
+            'queries': workload.queries,
+            'avg_queue_seconds': float(waits.mean()) if has_queries else 0.0,
+            'p95_queue_seconds': float(np.percentile(waits, 95)) if has_queries else 0.0,
+            'p99_queue_seconds': float(np.percentile(waits, 99)) if has_queries else 0.0,
+            'queued_fraction': float((waits > self.queued_threshold_seconds).mean()) if has_queries else 0.0,
+            'avg_execution_seconds': float(durations.mean()) if has_queries else 0.0,
+            'p95_latency_seconds': float(np.percentile(waits + durations, 95)) if has_queries else 0.0,
+            'cluster_hours': replayed['seconds'] / 3600,
+            'resumes': replayed['resumes'],
+            'peak_clusters': replayed['peak_clusters'],
+            'credits': credits,
+            'credits_per_day': credits / days,
+            'cost_per_day_usd': credits * CREDIT_PRICE_USD / days
+        }
+
+    def compare(self, workload: Workload, scenarios: Iterable[WarehouseScenario]) -> pd.DataFrame:
+        """One row per scenario, cheapest first"""
+        rows = [self.simulate(workload, scenario) for scenario in dict.fromkeys(scenarios)]
+        return pd.DataFrame(rows).sort_values(['cost_per_day_usd', 'p95_queue_seconds'], ignore_index=True)
+
+
+def candidate_scenarios(current: WarehouseScenario, size_steps: int = 1,
+                        max_cluster_options: Iterable[int] = (), auto_suspend_options: Iterable[float] = ()
+                        ) -> List[WarehouseScenario]:
+    """The current scenario and its neighbours: nearby sizes x cluster counts x auto-suspend times"""
+    position = WAREHOUSE_SIZES.index(current.size)
+    sizes = WAREHOUSE_SIZES[max(0, position - size_steps):position + size_steps + 1]
+    cluster_counts = sorted({current.max_clusters, *max_cluster_options})
+    suspend_times = list(dict.fromkeys([current.auto_suspend_seconds, *auto_suspend_options]))
+    return [current] + [
+        replace(current, size=size, max_clusters=max(clusters, current.min_clusters), auto_suspend_seconds=suspend)
+        for size in sizes for clusters in cluster_counts for suspend in suspend_times
+    ]
+
+
+def _plain(value):
+    """Python scalar for a DataFrame cell (NaN, from a None auto-suspend, back to None)"""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def recommend_scenario(comparison: pd.DataFrame, current: WarehouseScenario, max_p95_queue_seconds: float,
+                       max_execution_slowdown: float = 0.25, min_savings_fraction: float = 0.1) -> Optional[Dict]:
+    """Best scenario backed by the replay, or None when the current one should stay
+
+    A scenario qualifies if its p95 queue wait meets the target and its mean
+    execution time is at most max_execution_slowdown worse than the current
+    setting's. The cheapest qualifying scenario wins if it saves at least
+    min_savings_fraction. If the current setting misses the queue target,
+    the cheapest qualifying one wins at any cost, or failing that the one
+    with the shortest p95 queue.
+    """
+    if comparison.empty:
+        return None
+    baseline = comparison[comparison['scenario'] == current.label].iloc[0]
+    qualifies = ((comparison['p95_queue_seconds'] <= max_p95_queue_seconds)
+                 & (comparison['avg_execution_seconds']
+                    <= baseline['avg_execution_seconds'] * (1 + max_execution_slowdown) + 1e-9))
+    meets_target = baseline['p95_queue_seconds'] <= max_p95_queue_seconds
+    if meets_target:
+        cheaper = comparison[qualifies & (comparison['cost_per_day_usd']
+                                          <= baseline['cost_per_day_usd'] * (1 - min_savings_fraction))]
+        if cheaper.empty:
+            return None
+        best = cheaper.iloc[0]
+    elif qualifies.any():
+        best = comparison[qualifies].iloc[0]
+    else:
+        best = comparison.sort_values(['p95_queue_seconds', 'cost_per_day_usd']).iloc[0]
+    if best['scenario'] == baseline['scenario']:
+        return None
+
+    size_change = WAREHOUSE_SIZES.index(best['size']) - WAREHOUSE_SIZES.index(current.size)
+    recommendation_type = 'SCALE_UP' if size_change > 0 else 'SCALE_DOWN' if size_change < 0 else 'WAREHOUSE_SETTINGS'
+    fields = ('size', 'auto_suspend_seconds', 'min_clusters', 'max_clusters', 'scaling_policy', 'max_concurrency')
+    return {
+        'type': recommendation_type,
+        'current': {field: _plain(baseline[field]) for field in fields},
+        'proposed': {field: _plain(best[field]) for field in fields},
+        'reason': ('Simulated p95 queue wait exceeds target' if not meets_target
+                   else 'Simulated replay meets the queue target at lower cost'),
+        'recommendation': f"Change from {baseline['scenario']} to {best['scenario']}",
+        'current_p95_queue_seconds': round(float(baseline['p95_queue_seconds']), 2),
+        'projected_p95_queue_seconds': round(float(best['p95_queue_seconds']), 2),
+        'current_avg_execution_seconds': round(float(baseline['avg_execution_seconds']), 2),
+        'projected_avg_execution_seconds': round(float(best['avg_execution_seconds']), 2),
+        'current_cost_per_day_usd': round(float(baseline['cost_per_day_usd']), 2),
+        'projected_cost_per_day_usd': round(float(best['cost_per_day_usd']), 2),
+        'projected_savings_per_day_usd': round(float(baseline['cost_per_day_usd'] - best['cost_per_day_usd']), 2),
+        'simulated_queries': int(baseline['queries'])
+    }
+
+
+def alter_warehouse_sql(warehouse_name: str, current: Dict, proposed: Dict) -> Optional[str]:
+    """ALTER WAREHOUSE for the settings that differ (cluster counts need Enterprise edition)"""
+    settings = []
+    if proposed['size'] != current['size']:
+        settings.append(f"WAREHOUSE_SIZE = '{proposed['size']}'")
+    if proposed['auto_suspend_seconds'] != current['auto_suspend_seconds']:
+        suspend = proposed['auto_suspend_seconds']
+        settings.append(f"AUTO_SUSPEND = {'NULL' if suspend is None else int(suspend)}")
+    for field, setting in (('min_clusters', 'MIN_CLUSTER_COUNT'), ('max_clusters', 'MAX_CLUSTER_COUNT'),
+                           ('scaling_policy', 'SCALING_POLICY')):
+        if proposed[field] != current[field]:
+            value = proposed[field]
+            settings.append(f"{setting} = {value if isinstance(value, str) else int(value)}")
+    return f"ALTER WAREHOUSE {warehouse_name} SET {' '.join(settings)}" if settings else None
+
+
+def fetch_warehouse_scenarios(session, statement_params: Dict = None) -> Dict[str, WarehouseScenario]:
+    """Current settings of every warehouse from SHOW WAREHOUSES"""
+    df = normalize_columns(session.sql("SHOW WAREHOUSES").to_pandas(statement_params=statement_params))
+    scenarios = {}
+    for row in df.to_dict('records'):
+        size = normalize_size(row.get('size'))
+        if size is None:
+            continue
+        auto_suspend = row.get('auto_suspend')
+        scenarios[str(row['name']).upper()] = WarehouseScenario(
+            size=size,
+            auto_suspend_seconds=float(auto_suspend) if auto_suspend not in (None, '', 0) and pd.notna(auto_suspend) else None,
+            min_clusters=int(row.get('min_cluster_count') or 1),
+            max_clusters=int(row.get('max_cluster_count') or 1),
+            scaling_policy=str(row.get('scaling_policy') or 'STANDARD').upper(),
+            max_concurrency=int(row.get('max_concurrency_level') or 8)
+        )
+    return scenarios
+
+
+def load_warehouse_scenarios(path: str) -> Dict[str, WarehouseScenario]:
+    """Warehouse settings from JSON: {name: {"size", "auto_suspend_seconds", "min_clusters", ...}}"""
+    with open(path) as f:
+        data = json.load(f)
+    return {name.upper(): WarehouseScenario(**{**settings, 'size': normalize_size(settings['size'])})
+            for name, settings in data.items()}
+
+
+def load_workload_history(path: str, since_days: Optional[int] = None) -> pd.DataFrame:
+    """Recorded queries from a query history store directory or a CSV/Parquet export"""
+    if os.path.isdir(path):
+        from query_history_store import QueryHistoryStore
+        return QueryHistoryStore(path).load_queries(since_days=since_days)
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded warehouse load under alternative settings")
+    parser.add_argument("workload", help="Query history store directory, or CSV/Parquet export of QUERY_HISTORY")
+    parser.add_argument("--warehouse", required=True, help="Warehouse to replay")
+    parser.add_argument("--warehouse-config", help="JSON of current warehouse settings (default: inferred from the log)")
+    parser.add_argument("--size-steps", type=int, default=1, help="Sizes to try either side of the current one")
+    parser.add_argument("--max-clusters", type=int, nargs="*", default=[], help="Max cluster counts to try")
+    parser.add_argument("--auto-suspend", type=float, nargs="*", default=[60], help="Auto-suspend seconds to try")
+    parser.add_argument("--max-p95-queue", type=float, default=30, help="Target p95 queue wait in seconds")
+    parser.add_argument("--parallel-fraction", type=float, default=0.8)
+    args = parser.parse_args()
+
+    history = load_workload_history(args.workload)
+    warehouse = args.warehouse.upper()
+    if args.warehouse_config:
+        current = load_warehouse_scenarios(args.warehouse_config)[warehouse]
+    else:
+        recorded = normalize_columns(history.copy())
+        recorded = recorded[recorded['warehouse_name'].str.upper() == warehouse]
+        current = WarehouseScenario(size=normalize_size(recorded['warehouse_size'].dropna().iloc[-1])
+                                    if recorded['warehouse_size'].notna().any() else 'X-SMALL')
+    workload = prepare_workload(history, warehouse, default_size=current.size)
+    if not workload.queries:
+        print(f"⚠️ No recorded queries for {warehouse}")
+        sys.exit(1)
+
+    simulator = WarehouseSimulator(parallel_fraction=args.parallel_fraction)
+    scenarios = candidate_scenarios(current, args.size_steps, args.max_clusters, args.auto_suspend)
+    comparison = simulator.compare(workload, scenarios)
+    print(f"🔍 Replayed {workload.queries:,} queries on {warehouse} over {workload.window_seconds / 86400:.1f} day(s); "
+          f"observed p95 queue {np.percentile(workload.observed_queue_seconds, 95):.1f}s")
+    for row in comparison.itertuples(index=False):
+        marker = "*" if row.scenario == current.label else " "
+        print(f" {marker} {row.scenario:<50} p95 queue {row.p95_queue_seconds:8.1f}s  "
+              f"avg exec {row.avg_execution_seconds:7.1f}s  ${row.cost_per_day_usd:9.2f}/day")
+
+    recommendation = recommend_scenario(comparison, current, args.max_p95_queue)
+    if recommendation:
+        print(f"\n💡 {recommendation['type']}: {recommendation['recommendation']} "
+              f"(${recommendation['projected_savings_per_day_usd']:,.2f}/day saved, "
+              f"p95 queue {recommendation['projected_p95_queue_seconds']:.1f}s)")
+    else:
+        print("\n✅ Current settings are the best replayed option")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Local Batch Scoring Service
+Loads the route optimization and predictive maintenance artifacts once,
+keeps them warm and scores NumPy batches of feature rows. Before scoring a
+batch the scorer checks (at most every reload_interval seconds) whether a
+retrained artifact has been written and swaps it in. An optional HTTP
+endpoint micro-batches concurrent requests into single predict calls so
+p99 latency and rows/s can be benchmarked locally, without Snowflake UDFs.
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from feature_schema import MAINTENANCE_FEATURE_COLUMNS, ROUTE_FEATURE_COLUMNS, impute_missing
+from model_artifacts import artifact_paths, find_latest_artifact, load_model_artifact
+
+MODEL_TYPES = {
+    'route_optimization': {
+        'feature_columns': ROUTE_FEATURE_COLUMNS,
+        'output': 'predict'
+    },
+    'predictive_maintenance': {
+        'feature_columns': MAINTENANCE_FEATURE_COLUMNS,
+        'output': 'predict_proba'  # maintenance risk = P(maintenance needed in 30 days)
+    }
+}
+
+
+def artifact_mtime(artifact_path: str) -> float:
+    """Newest modification time over the artifact and its sidecars
+
+    The trainer writes the model, flat trees and metadata in turn, so a
+    reload that lands mid-write is followed by another once the last
+    sidecar is written.
+    """
+    return max(os.path.getmtime(p) for p in artifact_paths(artifact_path).values() if os.path.exists(p))
+
+
+class ModelScorer:
+    """Keeps one model warm and scores feature batches"""
+
+    def __init__(self, model_type: str, artifact_path: Optional[str] = None, batch_size: int = 50_000,
+                 prefer_flat: bool = True, reload_interval: Optional[float] = 30.0):
+        """artifact_path: fixed artifact; by default the newest artifact for the model
+                       type is used and a newer one is picked up on reload
+        reload_interval: seconds between artifact checks in score() (None = never reload)
+        """
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type}")
+        self.model_type = model_type
+        self.config = MODEL_TYPES[model_type]
+        self.feature_columns = self.config['feature_columns']
+        self.follow_latest = artifact_path is None
+        self.artifact_path = artifact_path or find_latest_artifact(model_type)
+        self.batch_size = batch_size
+        self.prefer_flat = prefer_flat
+        self.reload_interval = reload_interval
+        self.model = None
+        self.loaded_mtime = None
+        self.reloads = 0
+        self._next_reload_check = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self, artifact_path: Optional[str] = None):
+        """(Re)load the artifact from disk"""
+        artifact_path = artifact_path or self.artifact_path
+        mtime = artifact_mtime(artifact_path)
+        model = load_model_artifact(artifact_path, prefer_flat=self.prefer_flat)
+        with self._lock:
+            self.model, self.artifact_path, self.loaded_mtime = model, artifact_path, mtime
+        print(f"✅ Loaded {self.model_type} model ({type(self.model).__name__}) from {artifact_path}")
+
+    def reload_if_changed(self) -> bool:
+        """Pick up a retrained artifact without restarting the service"""
+        artifact_path = find_latest_artifact(self.model_type) if self.follow_latest else self.artifact_path
+        if artifact_path != self.artifact_path or artifact_mtime(artifact_path) != self.loaded_mtime:
+            self.load(artifact_path)
+            self.reloads += 1
+            return True
+        return False
+
+    def maybe_reload(self) -> bool:
+        """reload_if_changed at most once per reload_interval; a failed load keeps the current model"""
+        if self.reload_interval is None:
+            return False
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return False
+        self._next_reload_check = now + self.reload_interval
+        try:
+            return self.reload_if_changed()
+        except Exception as e:
+            # e.g. an artifact still being written; retried after the next interval
+            print(f"⚠️ Could not reload {self.model_type} model, keeping the loaded one: {e}")
+            return False
+
+    def to_matrix(self, rows) -> np.ndarray:
+        """Accept a 2D array/list in feature order or a list of {feature: value} dicts"""
+        if len(rows) and isinstance(rows[0], dict):
+            rows = [[row.get(column, np.nan) for column in self.feature_columns] for row in rows]
+        X = np.asarray(rows, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_columns):
+            raise ValueError(f"Expected {len(self.feature_columns)} features, got {X.shape[1]}")
+        return impute_missing(X)
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """Score a feature matrix in bounded-size slices"""
+        self.maybe_reload()
+        model = self.model
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.batch_size):
+            batch = X[start:start + self.batch_size]
+            if self.config['output'] == 'predict_proba':
+                predictions[start:start + len(batch)] = model.predict_proba(batch)[:, 1]
+            else:
+                predictions[start:start + len(batch)] = model.predict(batch)
+        return predictions
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into single model calls"""
+
+    def __init__(self, scorer: ModelScorer, max_batch_rows: int = 4096, max_wait_ms: float = 2.0):
+        self.scorer = scorer
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.requests: queue.Queue = queue.Queue()
+        self.batches_scored = 0
+        self.rows_scored = 0
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{scorer.model_type}", daemon=True)
+        self._worker.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        future: Future = Future()
+        self.requests.put((X, future))
+        return future
+
+    def score(self, X: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        return self.submit(X).result(timeout)
+
+    def stop(self):
+        self._stopped.set()
+        self._worker.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                pending = [self.requests.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            rows = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                rows += len(item[0])
+
+            try:
+                predictions = self.scorer.score(np.concatenate([X for X, _ in pending]))
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for X, future in pending:
+                future.set_result(predictions[offset:offset + len(X)])
+                offset += len(X)
+            self.batches_scored += 1
+            self.rows_scored += rows
+
+
+def create_app(batchers: Dict[str, MicroBatcher]):
+    """Flask app exposing /score/<model_type> and /health"""
+    from flask import Flask, jsonify, request
+
+    app = Flask(__name__)
+
+    @app.route('/health')
+    def health():
+        return jsonify({
+            model_type: {
+                'artifact': batcher.scorer.artifact_path,
+                'reloads': batcher.scorer.reloads,
+                'batches_scored': batcher.batches_scored,
+                'rows_scored': batcher.rows_scored
+            }
+            for model_type, batcher in batchers.items()
+        })
+
+    @app.route('/score/<model_type>', methods=['POST'])
+    def score(model_type):
+        batcher = batchers.get(model_type)
+        if batcher is None:
+            return jsonify({'error': f"Unknown model type: {model_type}"}), 404
+        payload = request.get_json(force=True)
+        try:
+            X = batcher.scorer.to_matrix(payload.get('rows') or payload.get('instances') or [])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        predictions = batcher.score(X, timeout=30)
+        return jsonify({'predictions': predictions.tolist()})
+
+    return app
+
+
+def benchmark(send, n_features: int, requests: int = 2000, rows_per_request: int = 1,
+              concurrency: int = 16) -> Dict:
+    """Drive `send(X)` from concurrent clients and report latency percentiles and rows/s"""
+    rng = np.random.default_rng(42)
+    payloads = [rng.random((rows_per_request, n_features), dtype=np.float32) for _ in range(64)]
+
+    def timed(i):
+        start = time.perf_counter()
+        send(payloads[i % len(payloads)])
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.fromiter(executor.map(timed, range(requests)), dtype=np.float64, count=requests)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': requests,
+        'rows_per_request': rows_per_request,
+        'concurrency': concurrency,
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'requests_per_sec': round(requests / elapsed, 1),
+        'rows_per_sec': round(requests * rows_per_request / elapsed, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Batch Scoring Service")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_TYPES), choices=list(MODEL_TYPES),
+                       help="Model types to load")
+    parser.add_argument("--artifact", action="append", default=[], metavar="MODEL_TYPE=PATH",
+                       help="Explicit artifact path for a model type")
+    parser.add_argument("--sklearn", action="store_true",
+                       help="Score with the memory-mapped sklearn model instead of the flat tree arrays")
+    parser.add_argument("--reload-interval", type=float, default=30.0,
+                       help="Seconds between checks for a retrained artifact (0 = before every batch)")
+    parser.add_argument("--score-file", help="Score a .npy feature matrix (requires a single --models entry)")
+    parser.add_argument("--output", help="Where to write --score-file predictions (.npy)")
+    parser.add_argument("--serve", action="store_true", help="Start the HTTP scoring endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--max-batch-rows", type=int, default=4096)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the micro-batched scorer")
+    parser.add_argument("--url", help="Benchmark a running HTTP endpoint instead of in-process")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows-per-request", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=16)
+
+    args = parser.parse_args()
+
+    artifacts = dict(item.split('=', 1) for item in args.artifact)
+    scorers = {model_type: ModelScorer(model_type, artifacts.get(model_type), prefer_flat=not args.sklearn,
+                                       reload_interval=args.reload_interval)
+               for model_type in args.models}
+
+    if args.score_file:
+        if len(scorers) != 1:
+            parser.error("--score-file needs exactly one model type")
+        scorer = next(iter(scorers.values()))
+        start = time.perf_counter()
+        predictions = scorer.score(scorer.to_matrix(np.load(args.score_file)))
+        elapsed = time.perf_counter() - start
+        print(f"Scored {len(predictions):,} rows in {elapsed:.3f}s ({len(predictions) / elapsed:,.0f} rows/s)")
+        if args.output:
+            np.save(args.output, predictions)
+        return
+
+    batchers = {model_type: MicroBatcher(scorer, args.max_batch_rows, args.max_wait_ms)
+                for model_type, scorer in scorers.items()}
+
+    if args.benchmark:
+        for model_type, batcher in batchers.items():
+            if args.url:
+                import requests as http
+                url = f"{args.url.rstrip('/')}/score/{model_type}"
+                send = lambda X, url=url: http.post(url, json={'rows': X.tolist()}, timeout=30).raise_for_status()
+            else:
+                send = batcher.score
+            result = benchmark(send, len(batcher.scorer.feature_columns), args.requests,
+                               args.rows_per_request, args.concurrency)
+            result['model_calls'] = batcher.batches_scored
+            print(f"{model_type}: {json.dumps(result)}")
+
+    if args.serve:
+        create_app(batchers).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
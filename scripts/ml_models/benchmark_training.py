@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Offline Training Benchmark
+Runs both trainers end to end (without deployment) on synthetic feature
+data at several sizes, with stage profiling enabled. The synthetic data is
+derived from the sample data generator's vehicle and route dimensions. The
+results can be compared with a previous benchmark to catch training-cost
+regressions before they reach production.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from train_predictive_maintenance_model import PredictiveMaintenanceModelTrainer
+from train_route_optimization_model import RouteOptimizationModelTrainer
+
+TRAFFIC_DELAY = {'Low': 1.0, 'Medium': 1.2, 'High': 1.5}
+WEATHER_IMPACT = {'Low': 0.1, 'Medium': 0.3, 'High': 0.6}
+
+SAMPLE_DATA_SCRIPT = Path(__file__).resolve().parent.parent.parent / 'data' / 'generate_sample_data.py'
+
+
+def load_sample_data_generator():
+    """LogisticsDataGenerator, imported by file path without adding data/ to sys.path"""
+    spec = importlib.util.spec_from_file_location(SAMPLE_DATA_SCRIPT.stem, SAMPLE_DATA_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.LogisticsDataGenerator
+
+
+class SyntheticTrainingData:
+    """Scales the sample generator's vehicle and route dimensions up to benchmark-sized feature sets"""
+
+    def __init__(self, seed: int = 42):
+        generator = load_sample_data_generator()()
+        self.routes = generator.generate_route_dimension()
+        self.vehicles = generator.generate_vehicle_dimension()
+        self.vehicle_types = generator.vehicle_types
+        # Relative to today, because the feature cache windows on the current date
+        self.as_of = pd.Timestamp.today().normalize()
+        self.rng = np.random.default_rng(seed)
+
+    def route_features(self, rows: int) -> pd.DataFrame:
+        """Feature store rows for the route optimization trainer"""
+        rng = self.rng
+        routes = self.routes.iloc[rng.integers(0, len(self.routes), rows)].reset_index(drop=True)
+        vehicles = self.vehicles.iloc[rng.integers(0, len(self.vehicles), rows)].reset_index(drop=True)
+
+        estimated = routes['estimated_duration_minutes'].to_numpy(dtype=float)
+        traffic = routes['traffic_density'].map(TRAFFIC_DELAY).to_numpy() * rng.uniform(0.9, 1.1, rows)
+        weather = routes['weather_risk'].map(WEATHER_IMPACT).to_numpy() + rng.uniform(0, 0.2, rows)
+        actual = estimated * rng.uniform(0.8, 1.5, rows) * (1 + (traffic - 1) * 0.5 + weather * 0.2)
+        distance = routes['total_distance_km'].to_numpy(dtype=float)
+        fuel_l_100km = vehicles['fuel_efficiency_l_100km'].to_numpy(dtype=float)
+        fuel_cost = distance * fuel_l_100km * 1.6 / 100
+
+        return pd.DataFrame({
+            'route_efficiency_score': np.clip(100 - (actual - estimated) / estimated * 100, 0, 100),
+            'traffic_delay_factor': traffic,
+            'weather_impact_score': weather,
+            'route_complexity_score': routes['complexity_score'].to_numpy(dtype=float),
+            'distance_km': distance,
+            'fuel_efficiency_mpg': 235.215 / fuel_l_100km,
+            'cost_per_km': (fuel_cost + rng.uniform(50, 300, rows)) / distance,
+            'on_time_delivery_rate': rng.uniform(0.7, 1.0, rows),
+            'customer_satisfaction_score': rng.uniform(3, 5, rows),
+            'estimated_duration_minutes': estimated,
+            'actual_duration_minutes': actual,
+            # Inside the trainer's training window
+            'feature_date': (self.as_of - pd.to_timedelta(rng.integers(0, 360, rows), unit='D')).date
+        })
+
+    def maintenance_tables(self, vehicles: int, telemetry_per_vehicle: int = 200,
+                           shipments_per_vehicle: int = 50) -> Dict[str, pd.DataFrame]:
+        """Source tables for the predictive maintenance feature cache"""
+        rng = self.rng
+        fleet = self.vehicles.iloc[rng.integers(0, len(self.vehicles), vehicles)].reset_index(drop=True)
+        vehicle_ids = np.array([f'VH{i + 1:06d}' for i in range(vehicles)])
+        type_codes = {vehicle_type: i + 1 for i, vehicle_type in enumerate(self.vehicle_types)}
+
+        dim_vehicle = pd.DataFrame({
+            'vehicle_id': vehicle_ids,
+            'vehicle_type': fleet['vehicle_type'],
+            'vehicle_type_numeric': fleet['vehicle_type'].map(type_codes),
+            'model_year': fleet['year'],
+            'current_mileage': fleet['odometer_km'] * 0.621371,
+            'fuel_efficiency_mpg': 235.215 / fleet['fuel_efficiency_l_100km'],
+            'vehicle_age_years': self.as_of.year - fleet['year'],
+            'vehicle_status': np.where(fleet['is_active'], 'ACTIVE', 'INACTIVE')
+        })
+
+        def days_ago(n, low, high):
+            return self.as_of - pd.to_timedelta(rng.integers(low, high, n), unit='D')
+
+        n = vehicles * telemetry_per_vehicle
+        telemetry = pd.DataFrame({
+            'vehicle_id': np.repeat(vehicle_ids, telemetry_per_vehicle),
+            'timestamp': days_ago(n, 0, 360) + pd.to_timedelta(rng.integers(0, 24, n), unit='h'),
+            'engine_temperature_f': rng.uniform(80, 110, n) * 9 / 5 + 32,
+            'engine_rpm': rng.integers(800, 4000, n),
+            'fuel_level_pct': rng.integers(10, 100, n),
+            'brake_pressure_psi': rng.uniform(20, 120, n)
+        })
+
+        per_vehicle = rng.integers(5, 20, vehicles)
+        n = int(per_vehicle.sum())
+        maintenance = pd.DataFrame({
+            'maintenance_id': np.arange(1, n + 1),
+            'vehicle_id': np.repeat(vehicle_ids, per_vehicle),
+            # Negative offsets are scheduled maintenance, which drives the 30-day target
+            'maintenance_date': days_ago(n, -60, 360),
+            'total_cost': rng.uniform(100, 5000, n).round(2)
+        })
+
+        n = vehicles * shipments_per_vehicle
+        shipments = pd.DataFrame({
+            'shipment_id': np.arange(1, n + 1),
+            'vehicle_id': np.repeat(vehicle_ids, shipments_per_vehicle),
+            'shipment_date': days_ago(n, 0, 360),
+            'route_efficiency_score': rng.uniform(40, 100, n),
+            'fuel_efficiency_mpg': rng.uniform(5, 30, n)
+        })
+
+        return {
+            'tbl_dim_vehicle': dim_vehicle,
+            'tbl_fact_vehicle_telemetry': telemetry,
+            'tbl_fact_vehicle_maintenance': maintenance,
+            'tbl_fact_shipments': shipments
+        }
+
+
+def _summarise(trainer_name: str, size: int, record: Dict) -> Dict:
+    return {
+        'trainer': trainer_name,
+        'size': size,
+        'rows': record['details'].get('rows'),
+        'best_candidate': record['details'].get('best_candidate'),
+        'total_wall_seconds': record['total_wall_seconds'],
+        'total_cpu_seconds': record['total_cpu_seconds'],
+        'peak_rss_mb': record['peak_rss_mb'],
+        'stage_wall_seconds': {name: stage['wall_seconds'] for name, stage in record['stages'].items()},
+        'stages': record['stages']
+    }
+
+
+def run_benchmark(route_sizes: List[int], maintenance_sizes: List[int], n_jobs: int = -1,
+                  time_budget: Optional[float] = None, seed: int = 42) -> List[Dict]:
+    data = SyntheticTrainingData(seed)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='training_benchmark_') as work_dir:
+        for rows in route_sizes:
+            print(f"\n🚚 Route optimization benchmark: {rows:,} rows")
+            source = os.path.join(work_dir, f'route_features_{rows}.parquet')
+            data.route_features(rows).to_parquet(source, index=False)
+            trainer = RouteOptimizationModelTrainer(source, n_jobs=n_jobs, time_budget=time_budget, profile=True)
+            trainer.profiler.output_dir = os.path.join(work_dir, 'runs')
+            result = trainer.train_and_deploy(deploy=False)
+            with open(result['run_record']) as f:
+                results.append(_summarise('route_optimization', rows, json.load(f)))
+
+        for vehicles in maintenance_sizes:
+            print(f"\n🔧 Predictive maintenance benchmark: {vehicles:,} vehicles")
+            source = os.path.join(work_dir, f'maintenance_{vehicles}')
+            os.makedirs(source)
+            for table, df in data.maintenance_tables(vehicles).items():
+                df.to_parquet(os.path.join(source, f'{table}.parquet'), index=False)
+            trainer = PredictiveMaintenanceModelTrainer(
+                n_jobs=n_jobs, time_budget=time_budget, data_source=source,
+                cache_dir=os.path.join(work_dir, f'cache_{vehicles}'), full_refresh=True, profile=True
+            )
+            trainer.profiler.output_dir = os.path.join(work_dir, 'runs')
+            result = trainer.train_and_deploy(deploy=False)
+            with open(result['run_record']) as f:
+                results.append(_summarise('predictive_maintenance', vehicles, json.load(f)))
+
+    return results
+
+
+def compare_to_baseline(results: List[Dict], baseline: List[Dict], max_regression: float) -> List[Dict]:
+    """Runs whose total wall time grew by more than max_regression (fraction) over the baseline"""
+    previous = {(r['trainer'], r['size']): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get((result['trainer'], result['size']))
+        if not base or not base['total_wall_seconds']:
+            continue
+        change = result['total_wall_seconds'] / base['total_wall_seconds'] - 1
+        result['change_vs_baseline'] = round(change, 3)
+        if change > max_regression:
+            regressions.append({
+                'trainer': result['trainer'],
+                'size': result['size'],
+                'baseline_seconds': base['total_wall_seconds'],
+                'current_seconds': result['total_wall_seconds'],
+                'change': round(change, 3)
+            })
+    return regressions
+
+
+def print_summary(results: List[Dict]):
+    print("\n📊 Training benchmark summary")
+    print(f"{'trainer':<24}{'size':>10}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'vs base':>10}  slowest stage")
+    for r in results:
+        slowest = max(r['stage_wall_seconds'].items(), key=lambda item: item[1])
+        change = f"{r['change_vs_baseline']:+.0%}" if 'change_vs_baseline' in r else '-'
+        print(f"{r['trainer']:<24}{r['size']:>10,}{r['total_wall_seconds']:>10.2f}{r['total_cpu_seconds']:>10.2f}"
+              f"{r['peak_rss_mb']:>10.0f}{change:>10}  {slowest[0]} ({slowest[1]:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Training Benchmark")
+    parser.add_argument("--route-sizes", default="10000,50000,200000",
+                       help="Comma-separated route feature row counts")
+    parser.add_argument("--maintenance-sizes", default="500,2000,5000",
+                       help="Comma-separated fleet sizes for the maintenance trainer")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes for model search")
+    parser.add_argument("--time-budget", type=float, help="Per-fit time budget for histogram GBM candidates")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Benchmark results JSON (default: reports/training_benchmark_<timestamp>.json)")
+    parser.add_argument("--baseline", help="Previous benchmark results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                       help="Allowed wall time increase over the baseline (fraction)")
+
+    args = parser.parse_args()
+
+    parse_sizes = lambda value: [int(v) for v in value.split(',') if v.strip()]
+    start = time.perf_counter()
+    results = run_benchmark(parse_sizes(args.route_sizes), parse_sizes(args.maintenance_sizes),
+                            args.n_jobs, args.time_budget, args.seed)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f)['results'], args.max_regression)
+
+    print_summary(results)
+
+    output = args.output or f"reports/training_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(),
+            'benchmark_seconds': round(time.perf_counter() - start, 1),
+            'n_jobs': args.n_jobs,
+            'time_budget': args.time_budget,
+            'results': results,
+            'regressions': regressions
+        }, f, indent=2, default=str)
+    print(f"\n📄 Benchmark results saved to {output}")
+
+    if regressions:
+        for r in regressions:
+            print(f"❌ {r['trainer']} @ {r['size']:,}: {r['baseline_seconds']:.2f}s -> "
+                  f"{r['current_seconds']:.2f}s ({r['change']:+.0%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
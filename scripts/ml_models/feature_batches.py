@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Out-of-core Feature Loading
+Streams training features as Arrow record batches from Snowflake, local
+Parquet or DuckDB and builds a float32 training matrix incrementally, so
+a year of feature store history never has to exist as a float64 DataFrame.
+"""
+
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+
+from feature_schema import impute_missing
+
+
+def _batch_column(batch, name: str) -> np.ndarray:
+    """Fetch a column by case-insensitive name as a float32 array (nulls -> NaN)"""
+    lookup = {field.lower(): i for i, field in enumerate(batch.schema.names)}
+    if name.lower() not in lookup:
+        raise KeyError(f"Column '{name}' not found in batch columns {batch.schema.names}")
+    column = batch.column(lookup[name.lower()])
+    return np.asarray(column.cast(pa.float32()).to_numpy(zero_copy_only=False), dtype=np.float32)
+
+
+def batch_features(batch, feature_columns: List[str]) -> np.ndarray:
+    """Feature columns of a record batch as a float32 (rows, features) matrix"""
+    if not batch.num_rows:
+        return np.empty((0, len(feature_columns)), dtype=np.float32)
+    return np.column_stack([_batch_column(batch, c) for c in feature_columns])
+
+
+def _has_column(batch, name: str) -> bool:
+    return name.lower() in (field.lower() for field in batch.schema.names)
+
+
+def iter_snowflake_batches(session, query: str) -> Iterator[pa.RecordBatch]:
+    """Stream a Snowflake query result as Arrow record batches"""
+    cursor = session.connection.cursor()
+    try:
+        cursor.execute(query)
+        for table in cursor.fetch_arrow_batches():
+            yield from table.to_batches()
+    finally:
+        cursor.close()
+
+
+def iter_parquet_batches(path: str, columns: Optional[List[str]] = None, batch_size: int = 100_000,
+                         since=None, date_column: str = 'feature_date',
+                         not_null: Optional[List[str]] = None) -> Iterator[pa.RecordBatch]:
+    """Stream a Parquet file or directory, reading only the requested columns
+
+    since: only rows with date_column >= since (pushed down to the Parquet scan)
+    not_null: only rows where all of these columns are present
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(path, format='parquet')
+    available = {name.lower(): name for name in dataset.schema.names}
+    if columns:
+        columns = [available[c.lower()] for c in columns if c.lower() in available]
+
+    row_filter = None
+    if since is not None:
+        if date_column.lower() not in available:
+            raise KeyError(f"Cannot filter on '{date_column}': column not in {path}")
+        field = dataset.schema.field(available[date_column.lower()])
+        row_filter = ds.field(field.name) >= pa.scalar(since).cast(field.type)
+    for name in not_null or []:
+        if name.lower() not in available:
+            raise KeyError(f"Cannot filter on '{name}': column not in {path}")
+        present = ds.field(available[name.lower()]).is_valid()
+        row_filter = present if row_filter is None else row_filter & present
+    yield from dataset.to_batches(columns=columns, filter=row_filter, batch_size=batch_size)
+
+
+def iter_duckdb_batches(database: str, query: str, batch_size: int = 100_000) -> Iterator[pa.RecordBatch]:
+    """Stream a DuckDB query result as Arrow record batches"""
+    import duckdb
+
+    connection = duckdb.connect(database, read_only=True)
+    try:
+        yield from connection.execute(query).fetch_record_batch(batch_size)
+    finally:
+        connection.close()
+
+
+class TrainingMatrixBuilder:
+    """Accumulates feature/target batches into preallocated float32 arrays
+
+    impute: replace missing feature values via feature_schema.impute_missing;
+            with impute=False they stay NaN for the caller to handle
+    """
+
+    def __init__(self, feature_columns: List[str], target_column: str, expected_rows: int = 0,
+                 impute: bool = True):
+        self.feature_columns = feature_columns
+        self.target_column = target_column
+        self.impute = impute
+        self.rows = 0
+        self.dropped_rows = 0
+        self.missing_counts = np.zeros(len(feature_columns), dtype=np.int64)
+        capacity = max(expected_rows, 1024)
+        self.X = np.empty((capacity, len(feature_columns)), dtype=np.float32)
+        self.y = np.empty(capacity, dtype=np.float32)
+
+    def _ensure_capacity(self, rows: int):
+        if self.rows + rows <= len(self.y):
+            return
+        capacity = max(self.rows + rows, int(len(self.y) * 1.5))
+        X = np.empty((capacity, self.X.shape[1]), dtype=np.float32)
+        y = np.empty(capacity, dtype=np.float32)
+        X[:self.rows] = self.X[:self.rows]
+        y[:self.rows] = self.y[:self.rows]
+        self.X, self.y = X, y
+
+    def append(self, features: np.ndarray, target: np.ndarray):
+        """Append one batch; rows without a target are dropped"""
+        keep = ~np.isnan(target)
+        self.dropped_rows += int((~keep).sum())
+        features, target = features[keep], target[keep]
+        self.missing_counts += np.isnan(features).sum(axis=0)
+
+        self._ensure_capacity(len(target))
+        end = self.rows + len(target)
+        self.X[self.rows:end] = impute_missing(features) if self.impute else features
+        self.y[self.rows:end] = target
+        self.rows = end
+
+    def append_batch(self, batch, target_fn=None):
+        """Append an Arrow record batch, optionally deriving the target with target_fn(batch)"""
+        features = batch_features(batch, self.feature_columns)
+        if _has_column(batch, self.target_column):
+            target = _batch_column(batch, self.target_column)
+        elif target_fn is not None:
+            target = target_fn(batch)
+        else:
+            raise KeyError(f"Target column '{self.target_column}' not found and no target_fn given")
+        self.append(features, target)
+
+    def build(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the trimmed (X, y) matrices"""
+        X, y = self.X[:self.rows], self.y[:self.rows]
+        if len(self.y) > self.rows * 1.25:
+            # Release the unused tail of the preallocated buffers
+            X, y = X.copy(), y.copy()
+        self.X, self.y = X, y
+        return X, y
+
+
+def build_training_matrix(batches: Iterable, feature_columns: List[str], target_column: str,
+                          expected_rows: int = 0, target_fn=None,
+                          impute: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Consume record batches into float32 (X, y) arrays (see TrainingMatrixBuilder for impute)"""
+    builder = TrainingMatrixBuilder(feature_columns, target_column, expected_rows, impute=impute)
+    for batch in batches:
+        builder.append_batch(batch, target_fn)
+    X, y = builder.build()
+    if builder.dropped_rows:
+        print(f"Dropped {builder.dropped_rows} rows without a target value")
+    missing = {name: int(n) for name, n in zip(feature_columns, builder.missing_counts) if n}
+    if missing:
+        action = 'imputed' if impute else 'left as NaN'
+        print(f"Missing feature values ({action}): {missing}")
+    return X, y
+
+
+def local_row_count(path: str) -> int:
+    """Row count from Parquet metadata (no data is read)"""
+    import pyarrow.dataset as ds
+
+    if not os.path.exists(path):
+        return 0
+    return ds.dataset(path, format='parquet').count_rows()
+
+
+def parquet_columns(path: str) -> List[str]:
+    """Lower-case column names of a Parquet file or directory (schema only)"""
+    import pyarrow.dataset as ds
+
+    return [name.lower() for name in ds.dataset(path, format='parquet').schema.names]
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Feature Drift Detection
+Compares the training distribution of each model feature with recent
+feature batches using binned histograms. The trainer saves quantile bin
+edges and reference counts next to the model artifact. Recent batches are
+streamed into the same bins with vectorized NumPy, so memory is bounded by
+the bin counts, not the row count. PSI, KS and Jensen-Shannon are computed
+from the binned distributions.
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_BINS = 20
+EPSILON = 1e-6
+
+# Common PSI reading: < 0.1 stable, 0.1-0.2 moderate shift, > 0.2 significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.2
+
+
+class FeatureReference:
+    """Training-time bin edges and counts for each feature
+
+    Each feature has len(edges) + 1 value bins from its training quantiles
+    plus one trailing bin for missing values.
+    """
+
+    def __init__(self, feature_columns: List[str], edges: List[np.ndarray], counts: np.ndarray,
+                 n_rows: int, created_at: Optional[str] = None):
+        self.feature_columns = list(feature_columns)
+        self.edges = [np.asarray(e, dtype=np.float64) for e in edges]
+        self.counts = [np.asarray(c, dtype=np.int64) for c in counts]
+        self.n_rows = n_rows
+        self.created_at = created_at or datetime.now().isoformat()
+
+    @classmethod
+    def from_matrix(cls, X, feature_columns: List[str], n_bins: int = DEFAULT_BINS) -> 'FeatureReference':
+        """Build the reference from the training feature matrix"""
+        X = np.asarray(X, dtype=np.float64)
+        quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+        edges, counts = [], []
+        for j in range(X.shape[1]):
+            column = X[:, j]
+            finite = column[~np.isnan(column)]
+            feature_edges = np.unique(np.quantile(finite, quantiles)) if len(finite) else np.empty(0)
+            edges.append(feature_edges)
+            counts.append(_bin_counts(column, feature_edges))
+        return cls(feature_columns, edges, counts, len(X))
+
+    def to_dict(self) -> Dict:
+        return {
+            'created_at': self.created_at,
+            'n_rows': self.n_rows,
+            'features': {
+                name: {'edges': edges.tolist(), 'counts': counts.tolist()}
+                for name, edges, counts in zip(self.feature_columns, self.edges, self.counts)
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FeatureReference':
+        names = list(data['features'])
+        return cls(
+            names,
+            [data['features'][n]['edges'] for n in names],
+            [data['features'][n]['counts'] for n in names],
+            data['n_rows'],
+            data.get('created_at')
+        )
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureReference':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _bin_counts(column: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Counts per value bin plus a trailing missing-value bin"""
+    bins = np.searchsorted(edges, column, side='right')
+    bins[np.isnan(column)] = len(edges) + 1
+    return np.bincount(bins, minlength=len(edges) + 2)
+
+
+def population_stability_index(p: np.ndarray, q: np.ndarray) -> float:
+    p = np.clip(p, EPSILON, None)
+    q = np.clip(q, EPSILON, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def jensen_shannon(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon divergence, base 2 (0 = identical, 1 = disjoint)"""
+    m = (p + q) / 2
+
+    def kl(a, b):
+        mask = a > 0
+        return np.sum(a[mask] * np.log2(a[mask] / b[mask]))
+
+    return float(0.5 * kl(p, m) + 0.5 * kl(q, m))
+
+
+def binned_ks(p: np.ndarray, q: np.ndarray) -> float:
+    """Kolmogorov-Smirnov statistic over the value bins (a lower bound on the exact KS)"""
+    p_values, q_values = p[:-1], q[:-1]
+    if p_values.sum() == 0 or q_values.sum() == 0:
+        return 0.0
+    return float(np.max(np.abs(np.cumsum(p_values) / p_values.sum() - np.cumsum(q_values) / q_values.sum())))
+
+
+class FeatureDriftDetector:
+    """Accumulates recent feature batches into the reference bins"""
+
+    def __init__(self, reference: FeatureReference):
+        self.reference = reference
+        self.counts = [np.zeros_like(c) for c in reference.counts]
+        self.n_rows = 0
+
+    def update(self, X) -> 'FeatureDriftDetector':
+        """Add a (rows, features) batch in reference feature order"""
+        X = np.asarray(X, dtype=np.float64)
+        for j, edges in enumerate(self.reference.edges):
+            self.counts[j] += _bin_counts(X[:, j], edges)
+        self.n_rows += len(X)
+        return self
+
+    def update_batches(self, batches: Iterable) -> 'FeatureDriftDetector':
+        """Consume Arrow record batches (columns matched by name)"""
+        from feature_batches import batch_features
+
+        for batch in batches:
+            self.update(batch_features(batch, self.reference.feature_columns))
+        return self
+
+    def report(self, psi_threshold: float = PSI_SIGNIFICANT, ks_threshold: float = 0.1,
+               js_threshold: float = 0.1) -> Dict:
+        """Per-feature PSI/KS/JS and the overall drift score (max feature PSI)"""
+        features = {}
+        for name, reference_counts, current_counts in zip(
+                self.reference.feature_columns, self.reference.counts, self.counts):
+            p = reference_counts / max(reference_counts.sum(), 1)
+            q = current_counts / max(current_counts.sum(), 1)
+            psi = population_stability_index(p, q)
+            ks = binned_ks(p, q)
+            js = jensen_shannon(p, q)
+            features[name] = {
+                'psi': round(psi, 4),
+                'ks': round(ks, 4),
+                'js': round(js, 4),
+                'missing_rate_reference': round(float(p[-1]), 4),
+                'missing_rate_current': round(float(q[-1]), 4),
+                'drifted': psi > psi_threshold or ks > ks_threshold or js > js_threshold
+            }
+
+        drift_score = max((f['psi'] for f in features.values()), default=0.0)
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'reference_rows': self.reference.n_rows,
+            'current_rows': self.n_rows,
+            'drift_score': drift_score if self.n_rows else None,
+            'drifted_features': sorted(
+                (name for name, f in features.items() if f['drifted']),
+                key=lambda name: -features[name]['psi']
+            ) if self.n_rows else [],
+            'features': features
+        }
+
+
+def reference_path(model_path: str) -> str:
+    """Reference histogram sidecar of a model artifact"""
+    from model_artifacts import artifact_paths
+
+    return artifact_paths(model_path)['reference']
+
+
+def main():
+    from feature_batches import iter_parquet_batches
+    from model_artifacts import find_latest_artifact
+
+    parser = argparse.ArgumentParser(description="Feature Drift Detection")
+    parser.add_argument("--model-type", default="route_optimization",
+                       choices=["route_optimization", "predictive_maintenance"])
+    parser.add_argument("--artifact", help="Model artifact (default: latest for the model type)")
+    parser.add_argument("--source", required=True, help="Parquet file/directory of recent feature rows")
+    parser.add_argument("--since", help="Only rows with feature_date >= this date (YYYY-MM-DD)")
+    parser.add_argument("--output", help="Write the drift report JSON here")
+
+    args = parser.parse_args()
+
+    artifact = args.artifact or find_latest_artifact(args.model_type)
+    reference = FeatureReference.load(reference_path(artifact))
+    since = datetime.strptime(args.since, '%Y-%m-%d').date() if args.since else None
+
+    detector = FeatureDriftDetector(reference)
+    detector.update_batches(iter_parquet_batches(args.source, reference.feature_columns, since=since))
+    report = detector.report()
+
+    print(f"Drift score (max PSI): {report['drift_score']} over {report['current_rows']:,} rows")
+    for name in report['drifted_features']:
+        f = report['features'][name]
+        print(f"  ⚠️ {name}: PSI={f['psi']:.3f} KS={f['ks']:.3f} JS={f['js']:.3f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+ML Feature Schema
+Feature column order shared by the trainers, the Snowflake prediction
+UDFs and local scoring. Kept free of Snowflake imports so offline tools
+can use it.
+"""
+
+import numpy as np
+
+# Missing feature values are replaced with this in training and in local
+# scoring, so a null feature reaches the model the same way in both
+MISSING_FEATURE_VALUE = 0.0
+
+ROUTE_FEATURE_COLUMNS = [
+    'route_efficiency_score',
+    'traffic_delay_factor',
+    'weather_impact_score',
+    'route_complexity_score',
+    'distance_km',
+    'fuel_efficiency_mpg',
+    'cost_per_km',
+    'on_time_delivery_rate',
+    'customer_satisfaction_score'
+]
+ROUTE_TARGET_COLUMN = 'optimized_delivery_time_minutes'
+
+# Training rows: the last ROUTE_TRAINING_WINDOW_MONTHS of feature_date with
+# these columns present (applied by the Snowflake, DuckDB and Parquet paths)
+ROUTE_TRAINING_WINDOW_MONTHS = 12
+ROUTE_REQUIRED_COLUMNS = ['route_efficiency_score', 'traffic_delay_factor', 'weather_impact_score']
+
+MAINTENANCE_FEATURE_COLUMNS = [
+    'vehicle_type_numeric',
+    'model_year',
+    'current_mileage',
+    'fuel_efficiency_mpg',
+    'vehicle_age_years',
+    'avg_engine_temperature',
+    'avg_engine_rpm',
+    'avg_fuel_level',
+    'avg_brake_pressure',
+    'engine_temp_volatility',
+    'engine_rpm_volatility',
+    'maintenance_count_12m',
+    'avg_maintenance_cost',
+    'days_since_maintenance',
+    'avg_route_efficiency',
+    'avg_fuel_efficiency',
+    'shipment_count_12m'
+]
+MAINTENANCE_TARGET_COLUMN = 'maintenance_needed_30d'
+
+
+def impute_missing(X):
+    """Replace missing feature values (NaN) with MISSING_FEATURE_VALUE
+
+    Accepts a DataFrame or an array; arrays are returned as a new array.
+    """
+    if hasattr(X, 'fillna'):
+        return X.fillna(MISSING_FEATURE_VALUE)
+    return np.nan_to_num(X, nan=MISSING_FEATURE_VALUE)
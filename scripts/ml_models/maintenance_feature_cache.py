@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Predictive Maintenance Feature Cache
+Materialises the maintenance training features as per-vehicle, per-day
+partial aggregates (counts, sums, sums of squares) for each source table,
+stored as local Parquet and combined with DuckDB.
+
+Each source is aggregated per vehicle on its own before the sources are
+joined, so telemetry averages are no longer weighted by the number of
+maintenance and shipment rows they fan out against. A refresh reloads only
+the days since the previous snapshot (plus a late-arrival lookback) and
+recomputes window features only for vehicles whose partials changed or aged
+out of the 12 month window; vehicle attributes are always taken from the
+current dimension table.
+"""
+
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+from feature_schema import MAINTENANCE_FEATURE_COLUMNS, MAINTENANCE_TARGET_COLUMN
+
+# Per-vehicle, per-day partial aggregates for each source table. {since} is
+# the first day reloaded; both Snowflake and DuckDB accept this SQL.
+PARTIAL_QUERIES = {
+    'telemetry': """
+        SELECT
+            vt.vehicle_id,
+            CAST(vt.timestamp AS DATE) AS day,
+            COUNT(vt.engine_temperature_f) AS temp_n,
+            SUM(vt.engine_temperature_f) AS temp_sum,
+            SUM(vt.engine_temperature_f * vt.engine_temperature_f) AS temp_sumsq,
+            COUNT(vt.engine_rpm) AS rpm_n,
+            SUM(vt.engine_rpm) AS rpm_sum,
+            SUM(vt.engine_rpm * vt.engine_rpm) AS rpm_sumsq,
+            COUNT(vt.fuel_level_pct) AS fuel_n,
+            SUM(vt.fuel_level_pct) AS fuel_sum,
+            COUNT(vt.brake_pressure_psi) AS brake_n,
+            SUM(vt.brake_pressure_psi) AS brake_sum
+        FROM tbl_fact_vehicle_telemetry vt
+        WHERE vt.timestamp >= '{since}'
+        GROUP BY 1, 2
+    """,
+    'maintenance': """
+        SELECT
+            m.vehicle_id,
+            CAST(m.maintenance_date AS DATE) AS day,
+            COUNT(m.maintenance_id) AS maintenance_n,
+            COUNT(m.total_cost) AS cost_n,
+            SUM(m.total_cost) AS cost_sum
+        FROM tbl_fact_vehicle_maintenance m
+        WHERE m.maintenance_date >= '{since}'
+        GROUP BY 1, 2
+    """,
+    'shipments': """
+        SELECT
+            fs.vehicle_id,
+            CAST(fs.shipment_date AS DATE) AS day,
+            COUNT(fs.shipment_id) AS shipment_n,
+            COUNT(fs.route_efficiency_score) AS route_eff_n,
+            SUM(fs.route_efficiency_score) AS route_eff_sum,
+            COUNT(fs.fuel_efficiency_mpg) AS fuel_eff_n,
+            SUM(fs.fuel_efficiency_mpg) AS fuel_eff_sum
+        FROM tbl_fact_shipments fs
+        WHERE fs.shipment_date >= '{since}'
+        GROUP BY 1, 2
+    """
+}
+
+VEHICLE_QUERY = """
+    SELECT vehicle_id, vehicle_type, model_year, current_mileage,
+           fuel_efficiency_mpg, vehicle_age_years, vehicle_type_numeric
+    FROM tbl_dim_vehicle
+    WHERE vehicle_status = 'ACTIVE'
+"""
+
+# Window features from the partials. History covers [window_start, as_of];
+# future-dated maintenance only feeds the target, not the features.
+FEATURE_QUERY = """
+    WITH telemetry AS (
+        SELECT vehicle_id,
+               SUM(temp_sum) / NULLIF(SUM(temp_n), 0) AS avg_engine_temperature,
+               SUM(rpm_sum) / NULLIF(SUM(rpm_n), 0) AS avg_engine_rpm,
+               SUM(fuel_sum) / NULLIF(SUM(fuel_n), 0) AS avg_fuel_level,
+               SUM(brake_sum) / NULLIF(SUM(brake_n), 0) AS avg_brake_pressure,
+               SQRT(GREATEST(SUM(temp_sumsq) - SUM(temp_sum) * SUM(temp_sum) / NULLIF(SUM(temp_n), 0), 0)
+                    / NULLIF(SUM(temp_n) - 1, 0)) AS engine_temp_volatility,
+               SQRT(GREATEST(SUM(rpm_sumsq) - SUM(rpm_sum) * SUM(rpm_sum) / NULLIF(SUM(rpm_n), 0), 0)
+                    / NULLIF(SUM(rpm_n) - 1, 0)) AS engine_rpm_volatility
+        FROM telemetry_partials
+        WHERE day BETWEEN DATE '{window_start}' AND DATE '{as_of}'
+        GROUP BY vehicle_id
+    ),
+    maintenance AS (
+        SELECT vehicle_id,
+               SUM(maintenance_n) AS maintenance_count_12m,
+               SUM(cost_sum) / NULLIF(SUM(cost_n), 0) AS avg_maintenance_cost,
+               MAX(day) AS last_maintenance_date
+        FROM maintenance_partials
+        WHERE day BETWEEN DATE '{window_start}' AND DATE '{as_of}'
+        GROUP BY vehicle_id
+    ),
+    shipments AS (
+        SELECT vehicle_id,
+               SUM(route_eff_sum) / NULLIF(SUM(route_eff_n), 0) AS avg_route_efficiency,
+               SUM(fuel_eff_sum) / NULLIF(SUM(fuel_eff_n), 0) AS avg_fuel_efficiency,
+               SUM(shipment_n) AS shipment_count_12m
+        FROM shipment_partials
+        WHERE day BETWEEN DATE '{window_start}' AND DATE '{as_of}'
+        GROUP BY vehicle_id
+    )
+    SELECT v.*,
+           t.avg_engine_temperature, t.avg_engine_rpm, t.avg_fuel_level, t.avg_brake_pressure,
+           t.engine_temp_volatility, t.engine_rpm_volatility,
+           COALESCE(m.maintenance_count_12m, 0) AS maintenance_count_12m,
+           m.avg_maintenance_cost, m.last_maintenance_date,
+           s.avg_route_efficiency, s.avg_fuel_efficiency,
+           COALESCE(s.shipment_count_12m, 0) AS shipment_count_12m
+    FROM vehicles v
+    JOIN recompute r ON r.vehicle_id = v.vehicle_id
+    LEFT JOIN telemetry t ON t.vehicle_id = v.vehicle_id
+    LEFT JOIN maintenance m ON m.vehicle_id = v.vehicle_id
+    LEFT JOIN shipments s ON s.vehicle_id = v.vehicle_id
+"""
+
+PARTIAL_TABLES = {
+    'telemetry': 'telemetry_partials',
+    'maintenance': 'maintenance_partials',
+    'shipments': 'shipment_partials'
+}
+
+
+class SnowflakeFeatureSource:
+    """Runs the partial aggregation queries in Snowflake"""
+
+    def __init__(self, session):
+        self.session = session
+
+    def query(self, sql: str) -> pd.DataFrame:
+        df = self.session.sql(sql).to_pandas()
+        df.columns = [c.lower() for c in df.columns]
+        return df
+
+
+class LocalFeatureSource:
+    """Runs the partial aggregation queries with DuckDB over a local export
+
+    data_source is either a .duckdb database containing the tbl_* tables or a
+    directory with one <table>.parquet / <table>.csv file or <table>/ Parquet
+    directory per table.
+    """
+
+    def __init__(self, data_source: str):
+        if data_source.endswith('.duckdb'):
+            self.connection = duckdb.connect(data_source, read_only=True)
+            return
+        self.connection = duckdb.connect()
+        for entry in sorted(Path(data_source).iterdir()):
+            if not entry.name.startswith('tbl_'):
+                continue
+            if entry.is_dir():
+                scan = f"read_parquet('{entry}/**/*.parquet', hive_partitioning = true)"
+            elif entry.suffix == '.parquet':
+                scan = f"read_parquet('{entry}')"
+            elif entry.suffix == '.csv':
+                scan = f"read_csv_auto('{entry}')"
+            else:
+                continue
+            self.connection.execute(f"CREATE VIEW {entry.stem} AS SELECT * FROM {scan}")
+
+    def query(self, sql: str) -> pd.DataFrame:
+        return self.connection.execute(sql).fetch_df()
+
+
+class MaintenanceFeatureCache:
+    """Incrementally refreshed per-vehicle maintenance training features"""
+
+    def __init__(self, cache_dir: str, source, window_months: int = 12, lookback_days: int = 3):
+        """
+        Args:
+            cache_dir: where partials, features and refresh state are stored
+            source: SnowflakeFeatureSource or LocalFeatureSource
+            window_months: feature history window
+            lookback_days: days before the previous snapshot that are reloaded
+                           to pick up late-arriving rows
+        """
+        self.cache_dir = Path(cache_dir)
+        self.source = source
+        self.window_months = window_months
+        self.lookback_days = lookback_days
+
+    def _path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}.parquet"
+
+    def load_state(self) -> Dict:
+        state_path = self.cache_dir / 'state.json'
+        if not state_path.exists():
+            return {}
+        with open(state_path) as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict):
+        with open(self.cache_dir / 'state.json', 'w') as f:
+            json.dump(state, f, indent=2, default=str)
+
+    def _read(self, name: str) -> Optional[pd.DataFrame]:
+        path = self._path(name)
+        if not path.exists():
+            return None
+        df = pd.read_parquet(path)
+        if 'day' in df.columns:
+            df['day'] = pd.to_datetime(df['day']).dt.date
+        return df
+
+    def _write(self, name: str, df: pd.DataFrame):
+        path = self._path(name)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _refresh_partials(self, source_name: str, since: date, window_start: date,
+                          full_refresh: bool) -> Set[str]:
+        """Replace partials from `since` onwards; return vehicles whose partials changed"""
+        delta = self.source.query(PARTIAL_QUERIES[source_name].format(since=since.isoformat()))
+        delta['day'] = pd.to_datetime(delta['day']).dt.date
+        existing = None if full_refresh else self._read(PARTIAL_TABLES[source_name])
+
+        if existing is None:
+            self._write(PARTIAL_TABLES[source_name], delta)
+            return set(delta['vehicle_id'])
+
+        replaced = existing['day'] >= since
+        aged_out = existing['day'] < window_start
+        kept = existing[~replaced & ~aged_out]
+        self._write(PARTIAL_TABLES[source_name], pd.concat([kept, delta], ignore_index=True))
+        return set(delta['vehicle_id']) | set(existing.loc[replaced | aged_out, 'vehicle_id'])
+
+    def refresh(self, as_of: Optional[date] = None, full_refresh: bool = False) -> pd.DataFrame:
+        """Bring the cache up to date and return one feature row per active vehicle"""
+        as_of = as_of or date.today()
+        window_start = (pd.Timestamp(as_of) - pd.DateOffset(months=self.window_months)).date()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        state = {} if full_refresh else self.load_state()
+        full_refresh = full_refresh or not state
+        if full_refresh:
+            since = window_start
+        else:
+            previous = date.fromisoformat(state['snapshot_date'])
+            since = max(window_start, previous - timedelta(days=self.lookback_days))
+
+        changed: Set[str] = set()
+        for source_name in PARTIAL_QUERIES:
+            changed |= self._refresh_partials(source_name, since, window_start, full_refresh)
+
+        vehicles = self.source.query(VEHICLE_QUERY)
+        previous_features = None if full_refresh else self._read('features')
+        if previous_features is not None:
+            # Vehicles new to the active fleet need a first computation too
+            changed |= set(vehicles['vehicle_id']) - set(previous_features['vehicle_id'])
+        recompute = vehicles['vehicle_id'] if full_refresh else \
+            vehicles.loc[vehicles['vehicle_id'].isin(changed), 'vehicle_id']
+
+        connection = duckdb.connect()
+        connection.register('vehicles', vehicles)
+        connection.register('recompute', recompute.to_frame())
+        for table in PARTIAL_TABLES.values():
+            connection.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{self._path(table)}')")
+        fresh = connection.execute(FEATURE_QUERY.format(window_start=window_start, as_of=as_of)).fetch_df()
+
+        if previous_features is not None:
+            reused = previous_features[
+                previous_features['vehicle_id'].isin(vehicles['vehicle_id'])
+                & ~previous_features['vehicle_id'].isin(recompute)
+            ]
+            # Only the window aggregates are reusable; vehicle attributes
+            # (mileage, age, ...) come from the current dimension rows
+            dimension_columns = [c for c in vehicles.columns if c != 'vehicle_id']
+            reused = reused.drop(columns=dimension_columns, errors='ignore').merge(vehicles, on='vehicle_id')
+            features = pd.concat([reused[fresh.columns], fresh], ignore_index=True)
+        else:
+            features = fresh
+
+        # Date-relative columns move with as_of for every vehicle, recomputed from the small partials
+        upcoming = connection.execute(f"""
+            SELECT DISTINCT vehicle_id FROM maintenance_partials
+            WHERE day BETWEEN DATE '{as_of}' AND DATE '{as_of + timedelta(days=30)}'
+        """).fetch_df()
+        connection.close()
+        last_maintenance = pd.to_datetime(features['last_maintenance_date'])
+        features['days_since_maintenance'] = (pd.Timestamp(as_of) - last_maintenance).dt.days
+        features[MAINTENANCE_TARGET_COLUMN] = features['vehicle_id'].isin(upcoming['vehicle_id']).astype(np.int64)
+
+        self._write('features', features)
+        self._save_state({
+            'snapshot_date': as_of.isoformat(),
+            'window_start': window_start.isoformat(),
+            'vehicles': len(features),
+            'recomputed_vehicles': len(fresh),
+            'reloaded_from': since.isoformat()
+        })
+        print(f"Feature cache refreshed: {len(features)} vehicles, {len(fresh)} recomputed "
+              f"(partials reloaded from {since})")
+        return features[['vehicle_id'] + MAINTENANCE_FEATURE_COLUMNS + [MAINTENANCE_TARGET_COLUMN]]
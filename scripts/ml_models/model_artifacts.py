@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Compact Model Artifacts
+Saves trained models uncompressed, so numpy arrays can be memory-mapped with
+joblib.load(mmap_mode='r'). Tree ensembles are also exported to flat NumPy
+arrays that a vectorized predictor traverses directly. Scoring workers map
+the same artifact from page cache instead of each unpickling the full model.
+Files are written under a temporary name and renamed into place, so a
+scorer that has the previous artifact mapped keeps a consistent copy.
+
+Artifact layout for /tmp/<name>_model.pkl:
+    <name>_model.pkl          sklearn model (joblib, compress=0)
+    <name>_model.flat.joblib  flat tree arrays (joblib, compress=0, mmap-able)
+    <name>_model.meta.json    feature columns, model type, training date
+    <name>_model.reference.json  training feature histograms for drift checks
+"""
+
+import glob
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+from sklearn.ensemble import (
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+
+FLAT_FORMAT_VERSION = 1
+
+# Where deploy_to_snowflake leaves each trainer's artifact: (glob, excluded suffix)
+ARTIFACT_PATTERNS = {
+    'route_optimization': ('/tmp/*_model.pkl', '_maintenance_model.pkl'),
+    'predictive_maintenance': ('/tmp/*_maintenance_model.pkl', None)
+}
+
+
+def artifact_paths(model_path: str) -> Dict[str, str]:
+    """Sidecar file paths for a model artifact"""
+    stem = model_path[:-len('.pkl')] if model_path.endswith('.pkl') else model_path
+    return {
+        'model': model_path,
+        'flat': f"{stem}.flat.joblib",
+        'meta': f"{stem}.meta.json",
+        'reference': f"{stem}.reference.json"
+    }
+
+
+def find_latest_artifact(model_type: str) -> str:
+    """Newest artifact written by the trainer for a model type"""
+    pattern, exclude = ARTIFACT_PATTERNS[model_type]
+    candidates = [path for path in glob.glob(pattern) if not exclude or not path.endswith(exclude)]
+    if not candidates:
+        raise FileNotFoundError(f"No {model_type} artifact matching {pattern}")
+    return max(candidates, key=os.path.getmtime)
+
+
+def _sklearn_trees(trees, scale: float = 1.0, class_probability: bool = False) -> List[Dict]:
+    """Node arrays of fitted sklearn decision trees"""
+    exported = []
+    for tree in trees:
+        t = tree.tree_
+        if class_probability:
+            if t.value.shape[2] != 2:
+                raise ValueError("Flat export supports binary classifiers only")
+            # Per-node class 1 fraction, as averaged by RandomForestClassifier.predict_proba
+            counts = t.value[:, 0, :]
+            value = counts[:, 1] / counts.sum(axis=1)
+        else:
+            value = t.value[:, 0, 0] * scale
+        exported.append({
+            'feature': np.where(t.children_left < 0, -1, t.feature),
+            'threshold': t.threshold,
+            'left': t.children_left,
+            'right': t.children_right,
+            'missing_left': getattr(t, 'missing_go_to_left', np.zeros(t.node_count, dtype=np.uint8)),
+            'value': value,
+            'depth': t.max_depth
+        })
+    return exported
+
+
+def _hist_gbm_trees(model) -> List[Dict]:
+    """Node arrays of a fitted histogram GBM (leaf values already include shrinkage)"""
+    exported = []
+    for iteration in model._predictors:
+        if len(iteration) != 1:
+            raise ValueError("Flat export supports regression and binary classification only")
+        nodes = iteration[0].nodes
+        if nodes['is_categorical'].any():
+            raise ValueError("Flat export does not support categorical splits")
+        leaf = nodes['is_leaf'].astype(bool)
+        exported.append({
+            'feature': np.where(leaf, -1, nodes['feature_idx']),
+            'threshold': nodes['num_threshold'],
+            'left': np.where(leaf, -1, nodes['left'].astype(np.int64)),
+            'right': np.where(leaf, -1, nodes['right'].astype(np.int64)),
+            'missing_left': nodes['missing_go_to_left'],
+            'value': nodes['value'],
+            'depth': int(nodes['depth'].max())
+        })
+    return exported
+
+
+def _raw_prediction(model, X: np.ndarray) -> np.ndarray:
+    """The model's own output on the scale the flat trees sum to"""
+    if isinstance(model, (GradientBoostingClassifier, HistGradientBoostingClassifier)):
+        return model.decision_function(X)
+    return model.predict(X)
+
+
+def export_flat_trees(model, n_features: int) -> Dict[str, np.ndarray]:
+    """Flatten a RandomForest/GradientBoosting/HistGradientBoosting ensemble to NumPy arrays"""
+    if isinstance(model, (RandomForestRegressor, RandomForestClassifier)):
+        classifier = isinstance(model, RandomForestClassifier)
+        trees = _sklearn_trees(model.estimators_, class_probability=classifier)
+        aggregation, link = 'mean', 'probability' if classifier else 'identity'
+    elif isinstance(model, (GradientBoostingRegressor, GradientBoostingClassifier)):
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("Flat export supports regression and binary classification only")
+        trees = _sklearn_trees(model.estimators_[:, 0], scale=model.learning_rate)
+        aggregation = 'sum'
+        link = 'logistic' if isinstance(model, GradientBoostingClassifier) else 'identity'
+    elif isinstance(model, (HistGradientBoostingRegressor, HistGradientBoostingClassifier)):
+        trees = _hist_gbm_trees(model)
+        aggregation = 'sum'
+        link = 'logistic' if isinstance(model, HistGradientBoostingClassifier) else 'identity'
+    else:
+        raise ValueError(f"Flat export not supported for {type(model).__name__}")
+    # sklearn decision trees split on float32 inputs, histogram GBMs on float64
+    input_dtype = 'float64' if isinstance(model, (HistGradientBoostingRegressor,
+                                                   HistGradientBoostingClassifier)) else 'float32'
+
+    sizes = np.array([len(tree['value']) for tree in trees], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    def concat(key, dtype):
+        return np.concatenate([tree[key] for tree in trees]).astype(dtype)
+
+    def concat_children(key):
+        # Child indices become global; leaves point at themselves so traversal
+        # can run a fixed number of levels without per-node leaf checks
+        return np.concatenate([
+            np.where(tree[key] < 0, np.arange(len(tree[key])), tree[key]) + offset
+            for tree, offset in zip(trees, offsets)
+        ]).astype(np.int64)
+
+    feature = concat('feature', np.int64)
+    leaf = feature < 0
+    flat = {
+        'format_version': np.array(FLAT_FORMAT_VERSION),
+        'aggregation': np.array(aggregation),
+        'link': np.array(link),
+        'input_dtype': np.array(input_dtype),
+        'n_features': np.array(n_features),
+        'max_depth': np.array(max(tree['depth'] for tree in trees)),
+        'roots': offsets,
+        'feature': np.where(leaf, 0, feature).astype(np.int32),
+        'threshold': np.where(leaf, np.inf, concat('threshold', np.float64)),
+        'left': concat_children('left'),
+        'right': concat_children('right'),
+        'missing_left': leaf | concat('missing_left', np.bool_),
+        'value': concat('value', np.float64),
+        'baseline': np.array(0.0)
+    }
+
+    if aggregation == 'sum':
+        # The init/baseline prediction is constant, so recover it at a single point
+        # rather than depending on private loss/init attributes
+        probe = np.zeros((1, n_features))
+        flat['baseline'] = np.array(float(_raw_prediction(model, probe)[0] - FlatTreeEnsemble(flat).raw_predict(probe)[0]))
+    return flat
+
+
+class FlatTreeEnsemble:
+    """Vectorized predictor over flat tree arrays, traversing all trees level by level"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], chunk_rows: int = 8192):
+        self.arrays = arrays
+        self.aggregation = str(arrays['aggregation'])
+        self.link = str(arrays['link'])
+        self.input_dtype = np.dtype(str(arrays['input_dtype']))
+        self.n_features_in_ = int(arrays['n_features'])
+        self.max_depth = int(arrays['max_depth'])
+        self.baseline = float(arrays['baseline'])
+        self.chunk_rows = chunk_rows
+
+    @classmethod
+    def load(cls, flat_path: str, mmap: bool = True) -> 'FlatTreeEnsemble':
+        return cls(joblib.load(flat_path, mmap_mode='r' if mmap else None))
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        a = self.arrays
+        feature, threshold, left, right = a['feature'], a['threshold'], a['left'], a['right']
+        n_features = X.shape[1]
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(len(X)) * n_features)[:, None]
+        has_missing = np.isnan(flat_X).any()
+        nodes = np.broadcast_to(np.asarray(a['roots']), (len(X), len(a['roots']))).copy()
+        for _ in range(self.max_depth):
+            x = flat_X[row_offsets + feature[nodes]]
+            go_left = x <= threshold[nodes]
+            if has_missing:
+                missing = np.isnan(x)
+                go_left[missing] = a['missing_left'][nodes[missing]]
+            nodes = np.where(go_left, left[nodes], right[nodes])
+        return a['value'][nodes]
+
+    def raw_predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=self.input_dtype)
+        output = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.chunk_rows):
+            values = self._leaf_values(X[start:start + self.chunk_rows])
+            reduced = values.mean(axis=1) if self.aggregation == 'mean' else values.sum(axis=1)
+            output[start:start + len(values)] = reduced + self.baseline
+        return output
+
+    def predict_proba(self, X) -> np.ndarray:
+        raw = self.raw_predict(X)
+        if self.link == 'identity':
+            raise AttributeError("predict_proba is not available for regression ensembles")
+        positive = 1.0 / (1.0 + np.exp(-raw)) if self.link == 'logistic' else raw
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        if self.link == 'identity':
+            return self.raw_predict(X)
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(np.int64)
+
+
+def _dump(value, path: str):
+    """joblib.dump to a temporary file, then atomically replace path"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(value, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+
+
+def save_model_artifact(model, model_path: str, feature_columns: List[str], model_type: str,
+                        metrics: Optional[Dict] = None, reference=None) -> Dict[str, str]:
+    """Write the model uncompressed plus the flat-tree and metadata sidecars
+
+    reference: feature_drift.FeatureReference of the training rows; when None
+               an existing reference sidecar is kept (incremental updates)
+    """
+    paths = artifact_paths(model_path)
+    _dump(model, paths['model'])
+    if reference is not None:
+        reference.save(paths['reference'])
+
+    metadata = {
+        'model_type': model_type,
+        'estimator': type(model).__name__,
+        'feature_columns': list(feature_columns),
+        'training_date': datetime.now().isoformat(),
+        'flat_format_version': None,
+        'metrics': metrics or {}
+    }
+    try:
+        _dump(export_flat_trees(model, len(feature_columns)), paths['flat'])
+        metadata['flat_format_version'] = FLAT_FORMAT_VERSION
+    except ValueError as e:
+        print(f"Flat tree export skipped: {e}")
+        if os.path.exists(paths['flat']):
+            os.remove(paths['flat'])
+
+    with open(paths['meta'], 'w') as f:
+        json.dump(metadata, f, indent=2, default=str)
+
+    size_mb = sum(os.path.getsize(p) for p in paths.values() if os.path.exists(p)) / 1024 / 1024
+    print(f"Model artifact written to {model_path} ({size_mb:.1f} MB)")
+    return paths
+
+
+def load_model_artifact(model_path: str, prefer_flat: bool = True, mmap: bool = True):
+    """Load the flat predictor when available, otherwise the sklearn model (memory-mapped)"""
+    paths = artifact_paths(model_path)
+    if prefer_flat and os.path.exists(paths['flat']) and \
+            os.path.getmtime(paths['flat']) >= os.path.getmtime(paths['model']):
+        return FlatTreeEnsemble.load(paths['flat'], mmap)
+    return joblib.load(paths['model'], mmap_mode='r' if mmap else None)
+
+
+def load_metadata(model_path: str) -> Optional[Dict]:
+    meta_path = artifact_paths(model_path)['meta']
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
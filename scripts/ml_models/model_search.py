@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Parallel Model Search
+Evaluates every candidate/fold pair concurrently in a process pool, so
+model selection wall time scales with cores instead of candidates x folds,
+then refits only the selected candidate on the full training set.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.ensemble import (
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import check_cv
+
+
+def _single_threaded(estimator):
+    """Pin estimator-level parallelism to one thread; the pool provides the parallelism"""
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    return estimator
+
+
+def fit_with_time_budget(estimator, X, y, time_budget: Optional[float] = None, step: int = 10):
+    """Fit an estimator, growing histogram GBMs in warm-started steps until
+    early stopping triggers, max_iter is reached or time_budget (seconds) runs out
+    """
+    hist_gbm = isinstance(estimator, (HistGradientBoostingRegressor, HistGradientBoostingClassifier))
+    if not time_budget or not hist_gbm:
+        return estimator.fit(X, y)
+
+    start = time.perf_counter()
+    max_iter = estimator.max_iter
+    estimator.set_params(warm_start=True, max_iter=min(step, max_iter))
+    while True:
+        estimator.fit(X, y)
+        elapsed = time.perf_counter() - start
+        stopped_early = estimator.n_iter_ < estimator.max_iter
+        per_iteration = elapsed / max(estimator.n_iter_, 1)
+        if stopped_early or estimator.max_iter >= max_iter or elapsed + per_iteration * step > time_budget:
+            break
+        estimator.set_params(max_iter=min(estimator.max_iter + step, max_iter))
+    # Restore the configured bound so clones of the fitted model are not capped at the last step
+    estimator.set_params(warm_start=False, max_iter=max_iter)
+    return estimator
+
+
+def extend_ensemble(estimator, X, y, fraction: float = 0.2) -> int:
+    """Warm-start a fitted tree ensemble on new data, adding `fraction` more trees/iterations
+
+    Existing trees are kept; the added ones are fitted on (X, y) only.
+    Returns the number of trees/iterations added.
+    """
+    if isinstance(estimator, (RandomForestRegressor, RandomForestClassifier,
+                              GradientBoostingRegressor, GradientBoostingClassifier)):
+        current = len(estimator.estimators_)
+        added = max(1, int(round(current * fraction)))
+        estimator.set_params(warm_start=True, n_estimators=current + added)
+    elif isinstance(estimator, (HistGradientBoostingRegressor, HistGradientBoostingClassifier)):
+        current = estimator.n_iter_
+        added = max(1, int(round(current * fraction)))
+        estimator.set_params(warm_start=True, max_iter=current + added)
+    else:
+        raise ValueError(f"{type(estimator).__name__} cannot be warm-started")
+
+    estimator.fit(X, y)
+    estimator.set_params(warm_start=False)
+    return (len(estimator.estimators_) if hasattr(estimator, 'estimators_') else estimator.n_iter_) - current
+
+
+def _rows(X, idx):
+    """Row subset of an array or DataFrame (DataFrames keep their feature names)"""
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+
+
+def _fit_and_score(estimator, X, y, train_idx, test_idx, scoring: str, time_budget: Optional[float] = None):
+    """Fit one candidate on one fold (test_idx=None means the full-data refit)
+
+    Only the full-data refit returns its estimator; fold estimators are
+    scored and discarded in the worker instead of being sent back.
+    """
+    start = time.perf_counter()
+    if train_idx is None:
+        fit_with_time_budget(estimator, X, y, time_budget)
+        return estimator, None, time.perf_counter() - start
+    fit_with_time_budget(estimator, _rows(X, train_idx), y[train_idx], time_budget)
+    fit_time = time.perf_counter() - start
+    score = get_scorer(scoring)(estimator, _rows(X, test_idx), y[test_idx])
+    return None, score, fit_time
+
+
+class SearchResult:
+    """Outcome of a model search"""
+
+    def __init__(self, best_name: str, best_model, best_score: float, cv_results: Dict, wall_time: float,
+                 n_rows: int = 0):
+        self.best_name = best_name
+        self.best_model = best_model
+        self.best_score = best_score
+        self.cv_results = cv_results
+        self.wall_time = wall_time
+        self.n_rows = n_rows
+
+    def training_metrics(self) -> Dict:
+        """Training time and throughput of the selected model, for the metrics payload"""
+        refit_time = self.cv_results[self.best_name]['refit_time']
+        metrics = {
+            'training_time_seconds': round(refit_time, 3),
+            'training_throughput_rows_per_sec': round(self.n_rows / refit_time, 1) if refit_time else None,
+            'model_search_time_seconds': round(self.wall_time, 3)
+        }
+        if hasattr(self.best_model, 'n_iter_'):
+            metrics['boosting_iterations'] = int(self.best_model.n_iter_)
+        return metrics
+
+
+class ModelSearch:
+    """Cross-validates candidates with all (candidate, fold) fits running concurrently"""
+
+    def __init__(self, candidates: Dict, scoring: str, cv: int = 5, n_jobs: int = -1,
+                 refit: str = 'winner', time_budget: Optional[float] = None, verbose: bool = True):
+        """
+        Args:
+            candidates: name -> unfitted estimator
+            scoring: sklearn scorer name, e.g. 'r2' or 'roc_auc'
+            cv: number of folds (stratified for classifiers, as in cross_val_score)
+            n_jobs: worker processes (-1 = all cores)
+            refit: 'winner' refits only the selected candidate after
+                   cross-validation; 'speculative' (opt-in) also fits every
+                   candidate on the full data alongside the folds, trading
+                   extra work for no serial refit at the end
+            time_budget: per-fit wall time limit in seconds for histogram GBM
+                         candidates (grown in warm-started steps)
+        """
+        if refit not in ('speculative', 'winner'):
+            raise ValueError(f"refit must be 'speculative' or 'winner', got {refit}")
+        self.candidates = candidates
+        self.scoring = scoring
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.time_budget = time_budget
+        self.verbose = verbose
+
+    def fit(self, X, y) -> SearchResult:
+        """X may be an array or a DataFrame; a DataFrame is passed through so
+        the fitted models keep its feature names for prediction"""
+        start = time.perf_counter()
+        if not hasattr(X, 'iloc'):
+            X = np.asarray(X)
+        y = np.asarray(y)
+        first = next(iter(self.candidates.values()))
+        splits = list(check_cv(self.cv, y, classifier=is_classifier(first)).split(X, y))
+
+        tasks: List = []
+        for name, estimator in self.candidates.items():
+            for fold, (train_idx, test_idx) in enumerate(splits):
+                tasks.append((name, fold, train_idx, test_idx))
+            if self.refit == 'speculative':
+                tasks.append((name, None, None, None))
+
+        outputs = Parallel(n_jobs=self.n_jobs, backend='loky')(
+            delayed(_fit_and_score)(
+                _single_threaded(clone(self.candidates[name])), X, y, train_idx, test_idx,
+                self.scoring, self.time_budget
+            )
+            for name, _, train_idx, test_idx in tasks
+        )
+
+        cv_results = {name: {'scores': [], 'fit_times': []} for name in self.candidates}
+        full_fits = {}
+        for (name, fold, _, _), (estimator, score, fit_time) in zip(tasks, outputs):
+            if fold is None:
+                full_fits[name] = (estimator, fit_time)
+                continue
+            cv_results[name]['scores'].append(score)
+            cv_results[name]['fit_times'].append(fit_time)
+
+        best_name, best_score = None, -np.inf
+        for name, result in cv_results.items():
+            scores = np.asarray(result['scores'])
+            result['mean'] = float(scores.mean())
+            result['std'] = float(scores.std())
+            if self.verbose:
+                print(f"{name} - CV {self.scoring} Score: {result['mean']:.4f} (+/- {result['std'] * 2:.4f})")
+            if result['mean'] > best_score:
+                best_name, best_score = name, result['mean']
+
+        if best_name in full_fits:
+            best_model, refit_time = full_fits[best_name]
+        else:
+            refit_start = time.perf_counter()
+            best_model = fit_with_time_budget(clone(self.candidates[best_name]), X, y, self.time_budget)
+            refit_time = time.perf_counter() - refit_start
+        cv_results[best_name]['refit_time'] = refit_time
+        if 'n_jobs' in best_model.get_params():
+            # Restore the candidate's own parallelism for prediction
+            best_model.set_params(n_jobs=self.candidates[best_name].get_params()['n_jobs'])
+
+        return SearchResult(best_name, best_model, best_score, cv_results, time.perf_counter() - start,
+                            n_rows=len(y))
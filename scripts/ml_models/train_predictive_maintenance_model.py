@@ -4,19 +4,28 @@ Predictive Maintenance ML Model Training
 Trains and deploys ML models for predictive maintenance using Snowflake ML
 """
 
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
-import joblib
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import classification_report, roc_auc_score
 import json
+import argparse
 from datetime import datetime
 from snowflake.snowpark import Session
 import os
 
+from feature_drift import FeatureReference
+from feature_schema import MAINTENANCE_FEATURE_COLUMNS, MAINTENANCE_TARGET_COLUMN, impute_missing
+from maintenance_feature_cache import LocalFeatureSource, MaintenanceFeatureCache, SnowflakeFeatureSource
+from model_artifacts import save_model_artifact
+from model_search import ModelSearch
+from training_profiler import TrainingProfiler, model_search_details
+
 class PredictiveMaintenanceModelTrainer:
-    def __init__(self):
+    def __init__(self, n_jobs=-1, time_budget=None, data_source=None,
+                 cache_dir='cache/maintenance_features', full_refresh=False, profile=False):
+        """data_source: optional local Parquet/CSV directory or .duckdb database for offline runs
+        profile: record per-stage wall time, CPU time and peak RSS to logs/training_runs
+        """
         self.connection_params = {
             'account': os.getenv('SNOWFLAKE_ACCOUNT'),
             'user': os.getenv('SNOWFLAKE_USER'),
@@ -25,92 +34,44 @@ class PredictiveMaintenanceModelTrainer:
             'database': 'LOGISTICS_DW_PROD',
             'schema': 'MARTS'
         }
-        self.session = Session.builder.configs(self.connection_params).create()
+        self.data_source = data_source
+        self.cache_dir = cache_dir
+        self.full_refresh = full_refresh
+        self.profiler = TrainingProfiler('predictive_maintenance', enabled=profile)
+        self.reference_profile = None  # training feature histograms saved with the model
+        self.session = None if data_source else Session.builder.configs(self.connection_params).create()
+        self.n_jobs = n_jobs
+        self.training_config = self.load_training_config(time_budget)
         
+    def load_training_config(self, time_budget=None):
+        """Histogram GBM early stopping and time budget settings"""
+        return {
+            'max_iter': 500,               # upper bound; early stopping usually ends sooner
+            'validation_fraction': 0.1,    # held out from each fit for early stopping
+            'n_iter_no_change': 10,
+            'time_budget_seconds': time_budget  # per-fit wall time limit (None = unlimited)
+        }
+    
     def load_training_data(self):
-        """Load features from the consolidated feature store and maintenance data"""
-        query = """
-        WITH maintenance_features AS (
-            SELECT 
-                v.vehicle_id,
-                v.vehicle_type,
-                v.model_year,
-                v.current_mileage,
-                v.fuel_efficiency_mpg,
-                v.vehicle_age_years,
-                v.vehicle_type_numeric,
-                
-                -- Telemetry features
-                AVG(vt.engine_temperature_f) as avg_engine_temperature,
-                AVG(vt.engine_rpm) as avg_engine_rpm,
-                AVG(vt.fuel_level_pct) as avg_fuel_level,
-                AVG(vt.brake_pressure_psi) as avg_brake_pressure,
-                STDDEV(vt.engine_temperature_f) as engine_temp_volatility,
-                STDDEV(vt.engine_rpm) as engine_rpm_volatility,
-                
-                -- Maintenance history
-                COUNT(m.maintenance_id) as maintenance_count_12m,
-                AVG(m.total_cost) as avg_maintenance_cost,
-                MAX(m.maintenance_date) as last_maintenance_date,
-                DATEDIFF('day', MAX(m.maintenance_date), CURRENT_DATE()) as days_since_maintenance,
-                
-                -- Performance metrics
-                AVG(fs.route_efficiency_score) as avg_route_efficiency,
-                AVG(fs.fuel_efficiency_mpg) as avg_fuel_efficiency,
-                COUNT(fs.shipment_id) as shipment_count_12m,
-                
-                -- Target variable: maintenance needed in next 30 days
-                CASE 
-                    WHEN EXISTS (
-                        SELECT 1 FROM tbl_fact_vehicle_maintenance vm 
-                        WHERE vm.vehicle_id = v.vehicle_id 
-                        AND vm.maintenance_date BETWEEN CURRENT_DATE() AND DATEADD('day', 30, CURRENT_DATE())
-                    ) THEN 1
-                    ELSE 0
-                END as maintenance_needed_30d
-                
-            FROM tbl_dim_vehicle v
-            LEFT JOIN tbl_fact_vehicle_telemetry vt ON v.vehicle_id = vt.vehicle_id
-                AND vt.timestamp >= DATEADD('month', -12, CURRENT_TIMESTAMP())
-            LEFT JOIN tbl_fact_vehicle_maintenance m ON v.vehicle_id = m.vehicle_id
-                AND m.maintenance_date >= DATEADD('month', -12, CURRENT_DATE())
-            LEFT JOIN tbl_fact_shipments fs ON v.vehicle_id = fs.vehicle_id
-                AND fs.shipment_date >= DATEADD('month', -12, CURRENT_DATE())
-            WHERE v.vehicle_status = 'ACTIVE'
-            GROUP BY v.vehicle_id, v.vehicle_type, v.model_year, v.current_mileage, 
-                     v.fuel_efficiency_mpg, v.vehicle_age_years, v.vehicle_type_numeric
-        )
-        SELECT * FROM maintenance_features
-        WHERE maintenance_needed_30d IS NOT NULL
-        """
+        """Load per-vehicle features from the incrementally refreshed feature cache
         
-        df = self.session.sql(query).to_pandas()
-        return df
+        Telemetry, maintenance and shipments are each pre-aggregated per vehicle
+        and day before they are joined, and only days since the previous
+        snapshot are re-read from the source tables.
+        """
+        source = LocalFeatureSource(self.data_source) if self.data_source else SnowflakeFeatureSource(self.session)
+        cache = MaintenanceFeatureCache(self.cache_dir, source)
+        df = cache.refresh(full_refresh=self.full_refresh)
+        return df[df[MAINTENANCE_TARGET_COLUMN].notna()]
     
-    def prepare_features(self, df):
-        """Prepare features for model training"""
-        feature_columns = [
-            'vehicle_type_numeric',
-            'model_year',
-            'current_mileage',
-            'fuel_efficiency_mpg',
-            'vehicle_age_years',
-            'avg_engine_temperature',
-            'avg_engine_rpm',
-            'avg_fuel_level',
-            'avg_brake_pressure',
-            'engine_temp_volatility',
-            'engine_rpm_volatility',
-            'maintenance_count_12m',
-            'avg_maintenance_cost',
-            'days_since_maintenance',
-            'avg_route_efficiency',
-            'avg_fuel_efficiency',
-            'shipment_count_12m'
-        ]
+    def prepare_features(self, df, impute=True):
+        """Prepare features for model training (impute=False keeps missing values as NaN)"""
+        feature_columns = list(MAINTENANCE_FEATURE_COLUMNS)
         
-        X = df[feature_columns].fillna(0)
-        y = df['maintenance_needed_30d']
+        X = df[feature_columns]
+        if impute:
+            X = impute_missing(X)
+        y = df[MAINTENANCE_TARGET_COLUMN]
         
         return X, y, feature_columns
     
@@ -129,29 +90,29 @@ class PredictiveMaintenanceModelTrainer:
                 max_depth=6,
                 learning_rate=0.1,
                 random_state=42
+            ),
+            'hist_gradient_boosting': HistGradientBoostingClassifier(
+                max_iter=self.training_config['max_iter'],
+                max_depth=6,
+                learning_rate=0.1,
+                max_bins=255,
+                early_stopping=True,
+                validation_fraction=self.training_config['validation_fraction'],
+                n_iter_no_change=self.training_config['n_iter_no_change'],
+                class_weight='balanced',
+                random_state=42
             )
         }
         
-        best_model = None
-        best_score = -np.inf
-        best_model_name = None
-        
-        for name, model in models.items():
-            # Cross-validation with ROC AUC
-            cv_scores = cross_val_score(model, X, y, cv=5, scoring='roc_auc')
-            mean_score = cv_scores.mean()
-            
-            print(f"{name} - CV ROC AUC Score: {mean_score:.4f} (+/- {cv_scores.std() * 2:.4f})")
-            
-            if mean_score > best_score:
-                best_score = mean_score
-                best_model = model
-                best_model_name = name
+        # All candidate/fold fits run concurrently; only the winner is refit on the full data
+        search = ModelSearch(
+            models, scoring='roc_auc', cv=5, n_jobs=self.n_jobs,
+            time_budget=self.training_config['time_budget_seconds']
+        ).fit(X, y)
+        print(f"Model search completed in {search.wall_time:.1f}s")
+        self.search_result = search
         
-        # Train the best model on full dataset
-        best_model.fit(X, y)
-        
-        return best_model, best_model_name, best_score
+        return search.best_model, search.best_name, search.best_score
     
     def evaluate_model(self, model, X_test, y_test):
         """Evaluate model performance"""
@@ -170,7 +131,12 @@ class PredictiveMaintenanceModelTrainer:
         """Deploy model to Snowflake ML"""
         # Save model locally
         model_path = f"/tmp/{model_name}_maintenance_model.pkl"
-        joblib.dump(model, model_path)
+        save_model_artifact(model, model_path, feature_columns, 'predictive_maintenance',
+                            reference=self.reference_profile)
+        
+        if self.session is None:
+            print(f"Offline run: model saved to {model_path}, Snowflake deployment skipped")
+            return
         
         # Create model in Snowflake
         create_model_sql = f"""
@@ -234,6 +200,9 @@ class PredictiveMaintenanceModelTrainer:
     
     def log_model_metadata(self, model_name, metrics, feature_columns):
         """Log model metadata to tracking table"""
+        if self.session is None:
+            return
+        
         metadata = {
             'model_name': model_name,
             'training_date': datetime.now().isoformat(),
@@ -261,44 +230,83 @@ class PredictiveMaintenanceModelTrainer:
         
         self.session.sql(insert_sql).collect()
     
-    def train_and_deploy(self):
+    def train_and_deploy(self, deploy=True):
         """Main training and deployment pipeline"""
+        profiler = self.profiler
+        
         print("Loading training data...")
-        df = self.load_training_data()
+        with profiler.stage('data_load'):
+            df = self.load_training_data()
         print(f"Loaded {len(df)} training samples")
         
         print("Preparing features...")
-        X, y, feature_columns = self.prepare_features(df)
+        with profiler.stage('feature_prep'):
+            X, y, feature_columns = self.prepare_features(df, impute=False)
         
         print("Splitting data...")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
+        with profiler.stage('split'):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42, stratify=y
+            )
+        
+        with profiler.stage('reference_profile'):
+            # Built before imputation so missing values land in the missing-value
+            # bin, as they do for the un-imputed rows the drift check streams
+            self.reference_profile = FeatureReference.from_matrix(X_train, feature_columns)
+        X_train, X_test = impute_missing(X_train), impute_missing(X_test)
         
         print("Training models...")
-        best_model, best_model_name, best_score = self.train_models(X_train, y_train)
+        with profiler.stage('model_search', uses_workers=True):
+            best_model, best_model_name, best_score = self.train_models(X_train, y_train)
         
         print("Evaluating model...")
-        metrics = self.evaluate_model(best_model, X_test, y_test)
+        with profiler.stage('evaluation'):
+            metrics = self.evaluate_model(best_model, X_test, y_test)
+        metrics.update(self.search_result.training_metrics())
         
         print(f"Best model: {best_model_name}")
         print(f"Performance metrics: {metrics}")
         
-        print("Deploying to Snowflake...")
-        self.deploy_to_snowflake(best_model, feature_columns, best_model_name)
+        if deploy:
+            print("Deploying to Snowflake...")
+            with profiler.stage('deployment'):
+                self.deploy_to_snowflake(best_model, feature_columns, best_model_name)
+            
+            print("Logging model metadata...")
+            with profiler.stage('metadata_logging'):
+                self.log_model_metadata(best_model_name, metrics, feature_columns)
         
-        print("Logging model metadata...")
-        self.log_model_metadata(best_model_name, metrics, feature_columns)
+        profiler.add_details(rows=len(y), features=len(feature_columns), metrics=metrics,
+                             **model_search_details(self.search_result))
+        run_record = profiler.write_run_record()
         
         print("Maintenance model training pipeline completed successfully!")
         
         return {
             'model_name': best_model_name,
             'metrics': metrics,
-            'feature_columns': feature_columns
+            'feature_columns': feature_columns,
+            'run_record': run_record
         }
 
 if __name__ == "__main__":
-    trainer = PredictiveMaintenanceModelTrainer()
+    parser = argparse.ArgumentParser(description="Predictive Maintenance Model Training")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes for model search (-1 = all cores)")
+    parser.add_argument("--time-budget", type=float, help="Per-fit time budget in seconds for histogram GBM candidates")
+    parser.add_argument("--source", help="Local Parquet/CSV directory or .duckdb database instead of Snowflake")
+    parser.add_argument("--cache-dir", default="cache/maintenance_features", help="Feature cache directory")
+    parser.add_argument("--full-refresh", action="store_true", help="Rebuild the feature cache from scratch")
+    parser.add_argument("--profile", action="store_true", help="Record per-stage wall/CPU/RSS to logs/training_runs")
+    
+    args = parser.parse_args()
+    
+    trainer = PredictiveMaintenanceModelTrainer(
+        n_jobs=args.n_jobs,
+        time_budget=args.time_budget,
+        data_source=args.source,
+        cache_dir=args.cache_dir,
+        full_refresh=args.full_refresh,
+        profile=args.profile
+    )
     result = trainer.train_and_deploy()
     print(f"Training completed: {result}")
@@ -6,18 +6,48 @@ Trains and deploys ML models for route optimization using Snowflake ML
 
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-import joblib
+import copy
 import json
+import argparse
 from datetime import datetime
-import snowflake.connector
 from snowflake.snowpark import Session
 import os
 
+from feature_batches import (
+    build_training_matrix,
+    iter_duckdb_batches,
+    iter_parquet_batches,
+    iter_snowflake_batches,
+    local_row_count,
+    parquet_columns,
+)
+from feature_drift import FeatureReference
+from feature_schema import (
+    ROUTE_FEATURE_COLUMNS as FEATURE_COLUMNS,
+    ROUTE_REQUIRED_COLUMNS,
+    ROUTE_TARGET_COLUMN as TARGET_COLUMN,
+    ROUTE_TRAINING_WINDOW_MONTHS,
+    impute_missing,
+)
+from model_artifacts import find_latest_artifact, load_metadata, load_model_artifact, save_model_artifact
+from model_search import ModelSearch, extend_ensemble
+from training_profiler import TrainingProfiler, model_search_details
+
+def optimized_delivery_time(estimated, actual):
+    """Target variable: actual duration clipped to +/-10% of the estimate"""
+    return np.where(
+        actual <= estimated * 0.9, estimated * 0.9,
+        np.where(actual <= estimated * 1.1, actual, estimated * 1.1)
+    ).astype(np.float32)
+
 class RouteOptimizationModelTrainer:
-    def __init__(self):
+    def __init__(self, data_source=None, n_jobs=-1, time_budget=None, profile=False):
+        """data_source: optional local .parquet file/directory or .duckdb database for offline runs
+        profile: record per-stage wall time, CPU time and peak RSS to logs/training_runs
+        """
         self.connection_params = {
             'account': os.getenv('SNOWFLAKE_ACCOUNT'),
             'user': os.getenv('SNOWFLAKE_USER'),
@@ -26,58 +56,98 @@ class RouteOptimizationModelTrainer:
             'database': 'LOGISTICS_DW_PROD',
             'schema': 'MARTS'
         }
-        self.session = Session.builder.configs(self.connection_params).create()
-        
-    def load_training_data(self):
-        """Load features from the consolidated feature store"""
-        query = """
-        SELECT 
-            route_id,
-            route_efficiency_score,
-            traffic_delay_factor,
-            weather_impact_score,
-            route_complexity_score,
-            distance_km,
-            estimated_duration_minutes,
-            actual_duration_minutes,
-            fuel_efficiency_mpg,
-            cost_per_km,
-            on_time_delivery_rate,
-            customer_satisfaction_score,
-            -- Target variable: optimized delivery time
-            CASE 
-                WHEN actual_duration_minutes <= estimated_duration_minutes * 0.9 THEN estimated_duration_minutes * 0.9
-                WHEN actual_duration_minutes <= estimated_duration_minutes * 1.1 THEN actual_duration_minutes
-                ELSE estimated_duration_minutes * 1.1
-            END as optimized_delivery_time_minutes
-        FROM tbl_ml_consolidated_feature_store
-        WHERE feature_date >= DATEADD('month', -12, CURRENT_DATE())
-        AND route_efficiency_score IS NOT NULL
-        AND traffic_delay_factor IS NOT NULL
-        AND weather_impact_score IS NOT NULL
-        """
+        self.data_source = data_source
+        self.n_jobs = n_jobs
+        self.training_config = self.load_training_config(time_budget)
+        self.profiler = TrainingProfiler('route_optimization', enabled=profile)
+        self.reference_profile = None  # training feature histograms saved with the model
+        self.session = None if data_source else Session.builder.configs(self.connection_params).create()
         
-        df = self.session.sql(query).to_pandas()
-        return df
+    def load_training_config(self, time_budget=None):
+        """Histogram GBM early stopping and time budget settings"""
+        return {
+            'max_iter': 500,               # upper bound; early stopping usually ends sooner
+            'validation_fraction': 0.1,    # held out from each fit for early stopping
+            'n_iter_no_change': 10,
+            'time_budget_seconds': time_budget,  # per-fit wall time limit (None = unlimited)
+            
+            # Incremental (warm-start) retraining
+            'incremental_tree_fraction': 0.2,  # trees/iterations added per increment, relative to current size
+            'incremental_max_estimators': 500, # beyond this size a full retrain is required
+            'incremental_min_rows': 1000,      # fewer new rows than this keeps the current model
+            'incremental_max_r2_drop': 0.01    # accept only if holdout R2 stays within this of the previous model
+        }
     
-    def prepare_features(self, df):
-        """Prepare features for model training"""
-        feature_columns = [
-            'route_efficiency_score',
-            'traffic_delay_factor', 
-            'weather_impact_score',
-            'route_complexity_score',
-            'distance_km',
-            'fuel_efficiency_mpg',
-            'cost_per_km',
-            'on_time_delivery_rate',
-            'customer_satisfaction_score'
-        ]
-        
-        X = df[feature_columns].fillna(0)
-        y = df['optimized_delivery_time_minutes']
-        
-        return X, y, feature_columns
+    def load_training_matrix(self, batch_size=100_000, since=None, impute=True):
+        """Stream only the feature and target columns into float32 arrays
+        
+        Reads Arrow record batches from Snowflake, or from the local
+        Parquet/DuckDB data_source, and fills the training matrix batch by
+        batch instead of materialising the full query result in pandas.
+        since: only load feature rows from this date on (incremental retraining)
+        impute: replace missing feature values (False keeps them as NaN)
+        
+        All sources keep only rows where ROUTE_REQUIRED_COLUMNS are present
+        and the last ROUTE_TRAINING_WINDOW_MONTHS of feature_date. A Parquet
+        export without feature_date is used whole (since still requires it).
+        """
+        columns = FEATURE_COLUMNS + [TARGET_COLUMN]
+        since_filter = f"AND feature_date >= '{since.isoformat()}'" if since else ""
+        required_filter = '\n            '.join(f"AND {c} IS NOT NULL" for c in ROUTE_REQUIRED_COLUMNS)
+        window_start = (pd.Timestamp.today().normalize()
+                        - pd.DateOffset(months=ROUTE_TRAINING_WINDOW_MONTHS)).date()
+        if since and since > window_start:
+            window_start = since
+        
+        if self.data_source is None:
+            query = f"""
+            SELECT 
+                {', '.join(FEATURE_COLUMNS)},
+                CASE 
+                    WHEN actual_duration_minutes <= estimated_duration_minutes * 0.9 THEN estimated_duration_minutes * 0.9
+                    WHEN actual_duration_minutes <= estimated_duration_minutes * 1.1 THEN actual_duration_minutes
+                    ELSE estimated_duration_minutes * 1.1
+                END as {TARGET_COLUMN}
+            FROM tbl_ml_consolidated_feature_store
+            WHERE feature_date >= DATEADD('month', -{ROUTE_TRAINING_WINDOW_MONTHS}, CURRENT_DATE())
+            {since_filter}
+            {required_filter}
+            """
+            batches = iter_snowflake_batches(self.session, query)
+            expected_rows = 0
+        elif self.data_source.endswith('.duckdb'):
+            query = f"""
+            SELECT {', '.join(FEATURE_COLUMNS)},
+                   estimated_duration_minutes, actual_duration_minutes
+            FROM tbl_ml_consolidated_feature_store
+            WHERE feature_date >= '{window_start.isoformat()}'
+            {required_filter}
+            """
+            batches = iter_duckdb_batches(self.data_source, query, batch_size)
+            expected_rows = 0
+        else:
+            if since is None and 'feature_date' not in parquet_columns(self.data_source):
+                print(f"{self.data_source} has no feature_date column; training on all of its rows")
+                window_start = None
+            batches = iter_parquet_batches(
+                self.data_source,
+                columns + ['estimated_duration_minutes', 'actual_duration_minutes'],
+                batch_size,
+                since=window_start,
+                not_null=ROUTE_REQUIRED_COLUMNS
+            )
+            expected_rows = 0 if since else local_row_count(self.data_source)
+        
+        def derive_target(batch):
+            # Local exports may carry raw durations instead of the derived target
+            names = {name.lower(): name for name in batch.schema.names}
+            estimated = batch.column(names['estimated_duration_minutes']).to_numpy(zero_copy_only=False)
+            actual = batch.column(names['actual_duration_minutes']).to_numpy(zero_copy_only=False)
+            return optimized_delivery_time(estimated.astype(np.float32), actual.astype(np.float32))
+        
+        X, y = build_training_matrix(batches, FEATURE_COLUMNS, TARGET_COLUMN,
+                                     expected_rows=expected_rows, target_fn=derive_target, impute=impute)
+        return X, y, list(FEATURE_COLUMNS)
     
     def train_models(self, X, y):
         """Train multiple models and select the best one"""
@@ -93,29 +163,28 @@ class RouteOptimizationModelTrainer:
                 max_depth=6,
                 learning_rate=0.1,
                 random_state=42
+            ),
+            'hist_gradient_boosting': HistGradientBoostingRegressor(
+                max_iter=self.training_config['max_iter'],
+                max_depth=6,
+                learning_rate=0.1,
+                max_bins=255,
+                early_stopping=True,
+                validation_fraction=self.training_config['validation_fraction'],
+                n_iter_no_change=self.training_config['n_iter_no_change'],
+                random_state=42
             )
         }
         
-        best_model = None
-        best_score = -np.inf
-        best_model_name = None
-        
-        for name, model in models.items():
-            # Cross-validation
-            cv_scores = cross_val_score(model, X, y, cv=5, scoring='r2')
-            mean_score = cv_scores.mean()
-            
-            print(f"{name} - CV R2 Score: {mean_score:.4f} (+/- {cv_scores.std() * 2:.4f})")
-            
-            if mean_score > best_score:
-                best_score = mean_score
-                best_model = model
-                best_model_name = name
-        
-        # Train the best model on full dataset
-        best_model.fit(X, y)
+        # All candidate/fold fits run concurrently; only the winner is refit on the full data
+        search = ModelSearch(
+            models, scoring='r2', cv=5, n_jobs=self.n_jobs,
+            time_budget=self.training_config['time_budget_seconds']
+        ).fit(X, y)
+        print(f"Model search completed in {search.wall_time:.1f}s")
+        self.search_result = search
         
-        return best_model, best_model_name, best_score
+        return search.best_model, search.best_name, search.best_score
     
     def evaluate_model(self, model, X_test, y_test):
         """Evaluate model performance"""
@@ -134,7 +203,12 @@ class RouteOptimizationModelTrainer:
         """Deploy model to Snowflake ML"""
         # Save model locally
         model_path = f"/tmp/{model_name}_model.pkl"
-        joblib.dump(model, model_path)
+        save_model_artifact(model, model_path, feature_columns, 'route_optimization',
+                            reference=self.reference_profile)
+        
+        if self.session is None:
+            print(f"Offline run: model saved to {model_path}, Snowflake deployment skipped")
+            return
         
         # Create model in Snowflake
         create_model_sql = f"""
@@ -182,6 +256,9 @@ class RouteOptimizationModelTrainer:
     
     def log_model_metadata(self, model_name, metrics, feature_columns):
         """Log model metadata to tracking table"""
+        if self.session is None:
+            return
+        
         metadata = {
             'model_name': model_name,
             'training_date': datetime.now().isoformat(),
@@ -209,44 +286,179 @@ class RouteOptimizationModelTrainer:
         
         self.session.sql(insert_sql).collect()
     
-    def train_and_deploy(self):
-        """Main training and deployment pipeline"""
-        print("Loading training data...")
-        df = self.load_training_data()
-        print(f"Loaded {len(df)} training samples")
+    def train_incremental(self, previous_path=None, deploy=True):
+        """Warm-start the deployed model on feature rows since its training date
+        
+        Adds trees (RandomForest/GradientBoosting) or boosting iterations
+        (HistGradientBoosting) fitted on the new rows only, and accepts the
+        result only if its holdout R2 on the new rows stays within
+        incremental_max_r2_drop of the previous model. Returns None when a
+        full retrain is needed instead.
+        """
+        config = self.training_config
+        profiler = self.profiler
+        
+        try:
+            previous_path = previous_path or find_latest_artifact('route_optimization')
+        except FileNotFoundError as e:
+            print(f"No previous model to warm-start from ({e})")
+            return None
+        
+        metadata = load_metadata(previous_path) or {}
+        trained_at = datetime.fromisoformat(metadata['training_date']) if metadata.get('training_date') \
+            else datetime.fromtimestamp(os.path.getmtime(previous_path))
+        previous = load_model_artifact(previous_path, prefer_flat=False, mmap=False)
+        model_name = os.path.basename(previous_path)[:-len('_model.pkl')]
         
-        print("Preparing features...")
-        X, y, feature_columns = self.prepare_features(df)
+        size = len(previous.estimators_) if hasattr(previous, 'estimators_') else getattr(previous, 'n_iter_', None)
+        if size is None:
+            print(f"{type(previous).__name__} cannot be warm-started")
+            return None
+        if size >= config['incremental_max_estimators']:
+            print(f"Previous model already has {size} estimators; full retrain required")
+            return None
+        
+        print(f"Loading feature rows since {trained_at.date()} for incremental training of {model_name}...")
+        with profiler.stage('data_load'):
+            X, y, feature_columns = self.load_training_matrix(since=trained_at.date())
+        print(f"Loaded {len(y)} new training samples")
+        
+        if len(y) < config['incremental_min_rows']:
+            print(f"Only {len(y)} new rows (< {config['incremental_min_rows']}); keeping the current model")
+            return {'model_name': model_name, 'status': 'SKIPPED', 'metrics': {}, 'feature_columns': feature_columns}
+        
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        
+        print("Warm-starting previous model...")
+        with profiler.stage('incremental_fit'):
+            candidate = copy.deepcopy(previous)
+            if 'n_jobs' in candidate.get_params():
+                candidate.set_params(n_jobs=self.n_jobs)
+            fit_start = datetime.now()
+            added = extend_ensemble(candidate, X_train, y_train, config['incremental_tree_fraction'])
+            fit_seconds = (datetime.now() - fit_start).total_seconds()
+        
+        with profiler.stage('evaluation'):
+            baseline = self.evaluate_model(previous, X_test, y_test)
+            metrics = self.evaluate_model(candidate, X_test, y_test)
+        metrics.update({
+            'training_mode': 'incremental',
+            'previous_r2': baseline['r2'],
+            'estimators_added': added,
+            'training_time_seconds': round(fit_seconds, 3),
+            'training_throughput_rows_per_sec': round(len(y_train) / fit_seconds, 1) if fit_seconds else None,
+            'incremental_since': trained_at.date().isoformat()
+        })
+        
+        accepted = metrics['r2'] >= baseline['r2'] - config['incremental_max_r2_drop']
+        print(f"Holdout R2 on new rows: previous {baseline['r2']:.4f}, warm-started {metrics['r2']:.4f} "
+              f"({added} estimators added) -> {'accepted' if accepted else 'rejected'}")
+        profiler.add_details(rows=len(y), features=len(feature_columns), metrics=metrics,
+                             incremental_accepted=accepted)
+        if not accepted:
+            profiler.write_run_record()
+            return None
+        
+        if deploy:
+            print("Deploying to Snowflake...")
+            with profiler.stage('deployment'):
+                self.deploy_to_snowflake(candidate, feature_columns, model_name)
+            
+            print("Logging model metadata...")
+            with profiler.stage('metadata_logging'):
+                self.log_model_metadata(model_name, metrics, feature_columns)
+        
+        run_record = profiler.write_run_record()
+        print("Incremental training completed successfully!")
+        
+        return {
+            'model_name': model_name,
+            'status': 'ACCEPTED',
+            'metrics': metrics,
+            'feature_columns': feature_columns,
+            'run_record': run_record
+        }
+    
+    def train_and_deploy(self, deploy=True, incremental=False):
+        """Main training and deployment pipeline
+        
+        incremental: first try warm-starting the previous model on new rows,
+                     falling back to a full retrain if that is not possible
+                     or the updated model does not hold its validation score
+        """
+        if incremental:
+            result = self.train_incremental(deploy=deploy)
+            if result is not None:
+                return result
+            print("Falling back to full retrain...")
+            self.profiler = TrainingProfiler('route_optimization', enabled=self.profiler.enabled,
+                                             output_dir=self.profiler.output_dir)
+        
+        profiler = self.profiler
+        
+        print("Loading training data...")
+        with profiler.stage('data_load'):
+            X, y, feature_columns = self.load_training_matrix(impute=False)
+        print(f"Loaded {len(y)} training samples ({X.nbytes / 1024**2:.1f} MB feature matrix)")
         
         print("Splitting data...")
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        with profiler.stage('split'):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42
+            )
+        
+        with profiler.stage('reference_profile'):
+            # Built before imputation so missing values land in the missing-value
+            # bin, as they do for the un-imputed rows the drift check streams
+            self.reference_profile = FeatureReference.from_matrix(X_train, feature_columns)
+        X_train, X_test = impute_missing(X_train), impute_missing(X_test)
         
         print("Training models...")
-        best_model, best_model_name, best_score = self.train_models(X_train, y_train)
+        with profiler.stage('model_search', uses_workers=True):
+            best_model, best_model_name, best_score = self.train_models(X_train, y_train)
         
         print("Evaluating model...")
-        metrics = self.evaluate_model(best_model, X_test, y_test)
+        with profiler.stage('evaluation'):
+            metrics = self.evaluate_model(best_model, X_test, y_test)
+        metrics.update(self.search_result.training_metrics())
         
         print(f"Best model: {best_model_name}")
         print(f"Performance metrics: {metrics}")
         
-        print("Deploying to Snowflake...")
-        self.deploy_to_snowflake(best_model, feature_columns, best_model_name)
+        if deploy:
+            print("Deploying to Snowflake...")
+            with profiler.stage('deployment'):
+                self.deploy_to_snowflake(best_model, feature_columns, best_model_name)
+            
+            print("Logging model metadata...")
+            with profiler.stage('metadata_logging'):
+                self.log_model_metadata(best_model_name, metrics, feature_columns)
         
-        print("Logging model metadata...")
-        self.log_model_metadata(best_model_name, metrics, feature_columns)
+        profiler.add_details(rows=len(y), features=len(feature_columns), metrics=metrics,
+                             **model_search_details(self.search_result))
+        run_record = profiler.write_run_record()
         
         print("Training pipeline completed successfully!")
         
         return {
             'model_name': best_model_name,
             'metrics': metrics,
-            'feature_columns': feature_columns
+            'feature_columns': feature_columns,
+            'run_record': run_record
         }
 
 if __name__ == "__main__":
-    trainer = RouteOptimizationModelTrainer()
-    result = trainer.train_and_deploy()
+    parser = argparse.ArgumentParser(description="Route Optimization Model Training")
+    parser.add_argument("--source", help="Local .parquet file/directory or .duckdb database (offline run)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes for model search (-1 = all cores)")
+    parser.add_argument("--time-budget", type=float, help="Per-fit time budget in seconds for histogram GBM candidates")
+    parser.add_argument("--profile", action="store_true", help="Record per-stage wall/CPU/RSS to logs/training_runs")
+    parser.add_argument("--incremental", action="store_true",
+                       help="Warm-start the previous model on data since its training date (falls back to full retrain)")
+    
+    args = parser.parse_args()
+    
+    trainer = RouteOptimizationModelTrainer(args.source, n_jobs=args.n_jobs, time_budget=args.time_budget,
+                                            profile=args.profile)
+    result = trainer.train_and_deploy(incremental=args.incremental)
     print(f"Training completed: {result}")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Training Stage Profiler
+Records wall time, CPU time and peak RSS for each stage of a training run
+and writes them as a JSON run record, so the cost of data load, feature
+prep, model search, evaluation and deployment can be tracked per run.
+"""
+
+import json
+import os
+import platform
+import resource
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process (Linux /proc; None elsewhere)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / 1024 / 1024
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _maxrss_mb(who) -> float:
+    # ru_maxrss is KB on Linux and bytes on macOS
+    maxrss = resource.getrusage(who).ru_maxrss
+    return maxrss / 1024 / 1024 if platform.system() == 'Darwin' else maxrss / 1024
+
+
+def _cpu_seconds() -> Dict[str, float]:
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'self': self_usage.ru_utime + self_usage.ru_stime,
+        'children': children.ru_utime + children.ru_stime
+    }
+
+
+def reap_worker_pool():
+    """Shut down joblib's reusable loky pool so worker CPU time is counted in RUSAGE_CHILDREN"""
+    try:
+        from joblib.externals.loky import get_reusable_executor
+        get_reusable_executor().shutdown(wait=True)
+    except Exception as e:
+        print(f"Could not shut down worker pool: {e}")
+
+
+class _RssSampler(threading.Thread):
+    """Samples this process's RSS to find the peak within a stage"""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_mb() or 0.0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self) -> float:
+        self._stopped.set()
+        self.join()
+        return max(self.peak, current_rss_mb() or 0.0)
+
+
+class TrainingProfiler:
+    """Per-stage wall/CPU/memory accounting for a training run"""
+
+    def __init__(self, run_name: str, enabled: bool = True, output_dir: str = 'logs/training_runs',
+                 reap_workers: bool = True):
+        """
+        Args:
+            run_name: trainer identifier used in the run record file name
+            enabled: when False, stage() is a no-op and no record is written
+            output_dir: directory for JSON run records
+            reap_workers: shut down the process pool after stages that use it
+                          so worker CPU time is attributed to that stage
+        """
+        self.run_name = run_name
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.reap_workers = reap_workers
+        self.stages = {}
+        self.details = {}
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+
+    def stage(self, name: str, uses_workers: bool = False):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return nullcontext()
+        return self._stage(name, uses_workers)
+
+    @contextmanager
+    def _stage(self, name: str, uses_workers: bool):
+        sampler = _RssSampler()
+        sampler.start()
+        cpu_before = _cpu_seconds()
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if uses_workers and self.reap_workers:
+                reap_worker_pool()
+            wall = time.perf_counter() - wall_start
+            cpu_after = _cpu_seconds()
+            cpu_self = cpu_after['self'] - cpu_before['self']
+            cpu_children = cpu_after['children'] - cpu_before['children']
+            self.stages[name] = {
+                'wall_seconds': round(wall, 3),
+                'cpu_seconds': round(cpu_self + cpu_children, 3),
+                'cpu_self_seconds': round(cpu_self, 3),
+                'cpu_workers_seconds': round(cpu_children, 3),
+                'cpu_utilisation': round((cpu_self + cpu_children) / wall, 2) if wall > 0 else None,
+                'peak_rss_mb': round(sampler.stop(), 1),
+                'process_max_rss_mb': round(_maxrss_mb(resource.RUSAGE_SELF), 1),
+                'worker_max_rss_mb': round(_maxrss_mb(resource.RUSAGE_CHILDREN), 1)
+            }
+            print(f"⏱️  {name}: {wall:.2f}s wall, {cpu_self + cpu_children:.2f}s CPU, "
+                  f"{self.stages[name]['peak_rss_mb']:.0f} MB peak RSS")
+
+    def add_details(self, **details):
+        """Attach extra run facts (row counts, model search breakdown, metrics)"""
+        self.details.update(details)
+
+    def run_record(self) -> Dict:
+        total_wall = time.perf_counter() - self._start
+        return {
+            'run_name': self.run_name,
+            'started_at': self.started_at.isoformat(),
+            'total_wall_seconds': round(total_wall, 3),
+            'total_cpu_seconds': round(sum(s['cpu_seconds'] for s in self.stages.values()), 3),
+            'peak_rss_mb': max((s['peak_rss_mb'] for s in self.stages.values()), default=None),
+            'stages': self.stages,
+            'details': self.details,
+            'host': {
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+                'cpu_count': os.cpu_count()
+            }
+        }
+
+    def write_run_record(self) -> Optional[str]:
+        """Write the run record JSON and return its path"""
+        if not self.enabled:
+            return None
+        Path(self.output_dir).mkdir(parents=True, exist_ok=True)
+        path = os.path.join(self.output_dir,
+                            f"{self.run_name}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json")
+        with open(path, 'w') as f:
+            json.dump(self.run_record(), f, indent=2, default=str)
+        print(f"📄 Training run record written to {path}")
+        return path
+
+
+def model_search_details(search_result) -> Dict:
+    """CV vs refit breakdown from a model_search.SearchResult"""
+    return {
+        'best_candidate': search_result.best_name,
+        'model_search_wall_seconds': round(search_result.wall_time, 3),
+        'cv_fit_seconds': {
+            name: round(sum(result['fit_times']), 3) for name, result in search_result.cv_results.items()
+        },
+        'refit_seconds': round(search_result.cv_results[search_result.best_name]['refit_time'], 3),
+        'training_rows': search_result.n_rows
+    }
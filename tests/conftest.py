@@ -0,0 +1,15 @@
+"""
+The handler directories and data/ are flat script collections whose
+modules import their siblings directly, so tests put those directories on
+sys.path the same way running a script from its own directory does.
+"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for handler_dir in ('data', 'scripts/03_monitoring/handlers', 'scripts/08_automation/handlers', 'scripts/ml_models'):
+    path = str(ROOT / handler_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+import data_quality_monitor
+from alert_pipeline import AlertPipeline, AlertStateStore, SQLiteAlertSink
+from data_quality_monitor import DataQualityMonitor
+
+CHECKS = ('check_data_freshness', 'check_data_completeness', 'check_referential_integrity',
+          'check_ml_model_performance', 'check_kpi_anomalies')
+
+
+def sink_rows(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT critical_count, warning_count, alert_data FROM data_quality_alerts").fetchall()
+
+
+@pytest.fixture
+def clock():
+    return [datetime(2024, 6, 3, 8, 0)]
+
+
+@pytest.fixture
+def pipeline(tmp_path, clock):
+    return AlertPipeline(AlertStateStore(str(tmp_path / 'state.sqlite')), SQLiteAlertSink(str(tmp_path / 'alerts.sqlite')),
+                         suppression_minutes={'CRITICAL': 60, 'WARNING': 240}, max_batch_size=2,
+                         flush_interval_seconds=900, clock=lambda: clock[0])
+
+
+def issue(status, table='FACT_SHIPMENTS'):
+    return {'table_name': table, 'metric': 'completeness', 'status': status}
+
+
+def reasons(alertable):
+    return [alert['alert_reason'] for alert in alertable]
+
+
+def test_repeats_are_suppressed_and_status_changes_alert_at_once(pipeline, clock):
+    assert reasons(pipeline.process([issue('WARNING')])) == ['new']
+    clock[0] += timedelta(minutes=15)
+    assert pipeline.process([issue('WARNING')]) == []
+    clock[0] += timedelta(minutes=15)
+    [escalated] = pipeline.process([issue('CRITICAL')])
+    assert escalated['alert_reason'] == 'escalated'
+    assert escalated['suppressed_since_last_alert'] == 1
+    clock[0] += timedelta(minutes=15)
+    assert reasons(pipeline.process([issue('WARNING')])) == ['de-escalated']
+
+
+def test_cleared_issue_expires_on_clean_cycles_and_alerts_as_new(pipeline, clock):
+    assert reasons(pipeline.process([issue('CRITICAL')])) == ['new']
+    for _ in range(5):  # clean cycles for 75 minutes, past the CRITICAL window
+        clock[0] += timedelta(minutes=15)
+        pipeline.process([])
+    assert pipeline.store.load_state() == {}
+    assert reasons(pipeline.process([issue('CRITICAL')])) == ['new']
+
+
+def test_recovery_resolves_the_issue_so_a_recurrence_alerts_at_once(pipeline, clock):
+    assert reasons(pipeline.process([issue('WARNING'), issue('GOOD', table='FACT_ROUTES')])) == ['new']
+    clock[0] += timedelta(minutes=15)
+    assert pipeline.process([issue('GOOD')]) == []
+    assert pipeline.store.load_state() == {}
+    clock[0] += timedelta(minutes=15)  # well inside the WARNING window
+    assert reasons(pipeline.process([issue('WARNING')])) == ['new']
+
+
+def test_good_result_does_not_resolve_a_failing_result_for_the_same_table(pipeline, clock):
+    pipeline.process([issue('CRITICAL')])
+    clock[0] += timedelta(minutes=15)
+    assert pipeline.process([issue('GOOD'), issue('CRITICAL')]) == []
+    assert list(pipeline.store.load_state().values())[0]['suppressed_count'] == 1
+
+
+def test_unseen_issues_are_kept_while_a_check_is_failing(pipeline, clock):
+    assert reasons(pipeline.process([issue('CRITICAL')])) == ['new']
+    for _ in range(5):
+        clock[0] += timedelta(minutes=15)
+        pipeline.process([], expire_unseen=False)
+    assert list(pipeline.store.load_state().values())[0]['status'] == 'CRITICAL'
+    assert reasons(pipeline.process([issue('CRITICAL')])) == ['reminder']
+
+
+def test_rows_are_batched_until_full_due_or_forced(pipeline, clock, tmp_path):
+    sink_path = str(tmp_path / 'alerts.sqlite')
+    pipeline.enqueue({'alert_timestamp': clock[0].isoformat(), 'environment': 'dev', 'critical_count': 1,
+                      'warning_count': 0, 'alert_data': '[]'})
+    assert sink_rows(sink_path) == []
+    clock[0] += timedelta(minutes=15)
+    assert pipeline.flush() == 1
+    for _ in range(2):
+        pipeline.enqueue({'alert_timestamp': clock[0].isoformat(), 'environment': 'dev', 'critical_count': 0,
+                          'warning_count': 1, 'alert_data': '[]'})
+    assert len(sink_rows(sink_path)) == 3
+    pipeline.enqueue({'alert_timestamp': clock[0].isoformat(), 'environment': 'dev', 'critical_count': 0,
+                      'warning_count': 1, 'alert_data': '[]'})
+    assert pipeline.flush(force=True) == 1
+    assert len(sink_rows(sink_path)) == 4
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch, clock):
+    monkeypatch.chdir(tmp_path)
+    monitor = DataQualityMonitor('dev')
+    monitor.alert_config['sink'] = 'sqlite'
+    monitor.execution_config['concurrent'] = False
+    monitor.get_alert_pipeline().clock = lambda: clock[0]
+    monkeypatch.setattr(monitor, 'load_integrity_checks', lambda: [])
+    for name in CHECKS:
+        monkeypatch.setattr(monitor, name, lambda session=None: [])
+    return monitor
+
+
+def test_monitor_expires_cleared_issues_on_clean_cycles(monitor, monkeypatch, clock):
+    monkeypatch.setattr(monitor, 'check_data_completeness', lambda session=None: [issue('CRITICAL')])
+    monitor.run_quality_checks()
+    monkeypatch.setattr(monitor, 'check_data_completeness', lambda session=None: [])
+    for _ in range(5):
+        clock[0] += timedelta(minutes=15)
+        assert monitor.run_quality_checks() == []
+    assert monitor.get_alert_pipeline().store.load_state() == {}
+
+
+def test_monitor_resolves_issues_from_good_results(monitor, monkeypatch, clock):
+    monkeypatch.setattr(monitor, 'check_data_completeness', lambda session=None: [issue('WARNING')])
+    monitor.run_quality_checks()
+    monkeypatch.setattr(monitor, 'check_data_completeness', lambda session=None: [issue('GOOD')])
+    clock[0] += timedelta(minutes=15)
+    assert monitor.run_quality_checks() == []
+    assert monitor.get_alert_pipeline().store.load_state() == {}
+
+
+def test_failed_check_does_not_look_like_a_clean_cycle(monitor, monkeypatch, clock):
+    monkeypatch.setattr(monitor, 'check_data_completeness', lambda session=None: [issue('CRITICAL')])
+    monitor.run_quality_checks()
+    monkeypatch.setattr(monitor, 'check_data_completeness', lambda session=None: None)
+    for _ in range(5):
+        clock[0] += timedelta(minutes=15)
+        assert monitor.run_quality_checks() == []
+        assert monitor.failed_checks == ['completeness']
+    assert len(monitor.get_alert_pipeline().store.load_state()) == 1
+
+
+def test_once_run_writes_queued_alerts_before_exiting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, 'argv', ['data_quality_monitor.py', '--environment', 'dev', '--once',
+                                      '--alert-sink', 'sqlite'])
+    monkeypatch.setattr(DataQualityMonitor, 'connect', lambda self: None)
+    monkeypatch.setattr(DataQualityMonitor, 'load_execution_config',
+                        lambda self: {'concurrent': False, 'check_timeout_seconds': 60})
+    monkeypatch.setattr(DataQualityMonitor, 'load_integrity_checks', lambda self: [])
+    for name in CHECKS:
+        monkeypatch.setattr(DataQualityMonitor, name, lambda self, session=None: [])
+    monkeypatch.setattr(DataQualityMonitor, 'check_data_completeness',
+                        lambda self, session=None: [issue('CRITICAL')])
+
+    with pytest.raises(SystemExit) as exit_info:
+        data_quality_monitor.main()
+    assert exit_info.value.code == 1
+    [(critical_count, warning_count, alert_data)] = sink_rows('logs/data_quality_alerts_dev.sqlite')
+    assert (critical_count, warning_count) == (1, 0)
+    assert json.loads(alert_data)[0]['alert_reason'] == 'new'
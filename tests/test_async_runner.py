@@ -0,0 +1,59 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from async_runner import AsyncJob, AsyncJobRunner
+
+
+def runner(executor=None):
+    return AsyncJobRunner(backoff_base=0.01, executor=executor, log=lambda message, level="INFO": None)
+
+
+def test_timed_out_blocking_callable_is_not_retried():
+    calls = []
+    release = threading.Event()
+
+    def blocking():
+        calls.append(time.time())
+        release.wait(5)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        job = AsyncJob(name='blocking', func=blocking, timeout=0.1, retries=2)
+        result = runner(executor).run_all([job])['blocking']
+        release.set()
+    assert result.status == 'timeout'
+    assert result.attempts == 1 and len(calls) == 1
+
+
+def test_timed_out_coroutine_and_command_are_retried():
+    async def slow():
+        await asyncio.sleep(5)
+
+    results = runner().run_all([
+        AsyncJob(name='coroutine', func=slow, timeout=0.05, retries=1),
+        AsyncJob(name='command', command=[sys.executable, '-c', 'import time; time.sleep(5)'],
+                 timeout=0.2, retries=1)
+    ])
+    assert results['coroutine'].attempt_statuses == ['timeout', 'timeout']
+    assert results['command'].attempt_statuses == ['timeout', 'timeout']
+
+
+def test_crashed_callable_is_retried_and_error_is_not():
+    attempts = {'crash': 0, 'error': 0}
+
+    def crash():
+        attempts['crash'] += 1
+        if attempts['crash'] == 1:
+            raise RuntimeError('connection reset')
+        return {'status': 'success'}
+
+    def error():
+        attempts['error'] += 1
+        return {'status': 'error'}
+
+    results = runner().run_all([AsyncJob(name='crash', func=crash, retries=1),
+                                AsyncJob(name='error', func=error, retries=1)])
+    assert results['crash'].attempt_statuses == ['exception', 'success']
+    assert results['error'].attempt_statuses == ['error']
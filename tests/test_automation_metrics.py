@@ -0,0 +1,112 @@
+import json
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+import pytest
+
+from automation_metrics import AutomationMetrics, ExecutionLogWriter, Tracer, start_metrics_server
+
+
+def sample_lines(text: str):
+    return [line for line in text.splitlines() if line and not line.startswith('#')]
+
+
+def test_job_runs_render_as_prometheus_counters_histograms_and_gauges():
+    metrics = AutomationMetrics('dev')
+    metrics.record_job('data_quality_monitor', 'success', 0.3, queue_delay_seconds=-2, rows_processed=12)
+    metrics.record_job('data_quality_monitor', 'error', 45, retries=2)
+    text = metrics.render()
+
+    assert '# TYPE automation_job_runs_total counter' in text
+    assert '# TYPE automation_job_duration_seconds histogram' in text
+    lines = sample_lines(text)
+    for status in ('success', 'error'):
+        assert f'automation_job_runs_total{{environment="dev",job="data_quality_monitor",status="{status}"}} 1.0' \
+            in lines
+    duration = 'automation_job_duration_seconds_bucket{environment="dev",job="data_quality_monitor",le="%s"} %s'
+    assert duration % ('0.5', '1.0') in lines     # buckets are cumulative
+    assert duration % ('30', '1.0') in lines
+    assert duration % ('60', '2.0') in lines
+    assert duration % ('+Inf', '2.0') in lines
+    assert 'automation_job_duration_seconds_sum{environment="dev",job="data_quality_monitor"} 45.3' in lines
+    # A job started before its slot counts as no delay
+    assert 'automation_job_queue_delay_seconds_sum{environment="dev",job="data_quality_monitor"} 0.0' in lines
+    assert 'automation_job_retries_total{environment="dev",job="data_quality_monitor"} 2.0' in lines
+    assert 'automation_job_rows_processed_total{environment="dev",job="data_quality_monitor"} 12.0' in lines
+    assert sum(line.startswith('automation_job_last_success_timestamp_seconds') for line in lines) == 1
+
+
+def test_label_values_are_escaped():
+    metrics = AutomationMetrics('dev')
+    metrics.record_job('job "a"\\b', 'success', 1)
+    assert 'job="job \\"a\\"\\\\b"' in metrics.render()
+
+
+def test_metrics_endpoint_serves_the_registry():
+    metrics = AutomationMetrics('dev')
+    metrics.record_job('performance_optimizer', 'success', 2)
+    server = start_metrics_server(metrics, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert response.read().decode() == metrics.render()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{url}/other")
+        assert error.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_nested_spans_share_a_trace_and_record_errors(tmp_path):
+    trace_file = tmp_path / 'traces' / 'spans.jsonl'
+    tracer = Tracer(str(trace_file))
+
+    with pytest.raises(RuntimeError):
+        with tracer.span('parallel_automation', automation_types=['data_quality']):
+            with tracer.span('automation:data_quality_monitor', job='data_quality_monitor'):
+                tracer.record_child_span('session_checkout', 1.0, 1.5, job='data_quality_monitor')
+            raise RuntimeError('scheduler stopped')
+
+    spans = {span['name']: span for span in map(json.loads, trace_file.read_text().splitlines())}
+    root, job, checkout = (spans['parallel_automation'], spans['automation:data_quality_monitor'],
+                           spans['session_checkout'])
+    assert root['trace_id'] == job['trace_id'] == checkout['trace_id']
+    assert root['parent_id'] is None
+    assert job['parent_id'] == root['span_id'] and checkout['parent_id'] == job['span_id']
+    assert checkout['duration_ms'] == 500.0
+    assert (root['status'], root['attributes']['error']) == ('error', 'scheduler stopped')
+    assert job['status'] == 'ok' and job['attributes'] == {'job': 'data_quality_monitor'}
+
+    # Outside any span, a child span starts its own trace
+    orphan = tracer.record_child_span('session_checkout', 2.0, 2.1)
+    assert orphan['parent_id'] is None and orphan['trace_id'] != root['trace_id']
+
+
+def test_execution_log_rows_are_inserted_in_batches():
+    statements = []
+
+    class Session:
+        def sql(self, query):
+            statements.append(query)
+            return self
+
+        def collect(self):
+            return []
+
+    @contextmanager
+    def session_factory():
+        yield Session()
+
+    writer = ExecutionLogWriter(session_factory, 'dev', batch_size=2)
+    writer.add("ml_lifecycle_manager", 'success', 12.5, queue_delay_seconds=0.4)
+    assert statements == []
+    writer.add("o'brien_job", 'error', 3, retries=1, rows_processed=7)
+    [insert] = statements
+    assert "'dev', 'ml_lifecycle_manager', 'SUCCESS', 12.5, 0.4, 0, NULL" in insert
+    assert "'dev', 'o''brien_job', 'ERROR', 3, NULL, 1, 7" in insert
+
+    writer.flush()
+    assert len(statements) == 1
@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from batch_scoring import MicroBatcher, ModelScorer
+from feature_schema import ROUTE_FEATURE_COLUMNS
+from model_artifacts import save_model_artifact
+
+
+def write_artifact(path, constant: float):
+    rng = np.random.default_rng(0)
+    X = rng.random((50, len(ROUTE_FEATURE_COLUMNS)))
+    model = RandomForestRegressor(n_estimators=3, random_state=0).fit(X, np.full(50, constant))
+    save_model_artifact(model, str(path), ROUTE_FEATURE_COLUMNS, 'route_optimization')
+    # Make the rewrite visible even on filesystems with coarse timestamps
+    stamp = os.path.getmtime(path) + constant
+    for sidecar in path.parent.glob(path.stem + '*'):
+        os.utime(sidecar, (stamp, stamp))
+
+
+def test_batcher_picks_up_a_retrained_artifact(tmp_path):
+    path = tmp_path / 'random_forest_model.pkl'
+    write_artifact(path, 1.0)
+    scorer = ModelScorer('route_optimization', str(path), reload_interval=0)
+    batcher = MicroBatcher(scorer, max_wait_ms=0.5)
+    try:
+        X = np.zeros((4, len(ROUTE_FEATURE_COLUMNS)), dtype=np.float32)
+        assert np.allclose(batcher.score(X, timeout=10), 1.0)
+
+        write_artifact(path, 2.0)
+        assert np.allclose(batcher.score(X, timeout=10), 2.0)
+        assert scorer.reloads == 1
+    finally:
+        batcher.stop()
+
+
+def test_reload_is_rate_limited_and_survives_a_broken_artifact(tmp_path):
+    path = tmp_path / 'random_forest_model.pkl'
+    write_artifact(path, 1.0)
+    scorer = ModelScorer('route_optimization', str(path), reload_interval=3600)
+    X = np.zeros((2, len(ROUTE_FEATURE_COLUMNS)), dtype=np.float32)
+    scorer.score(X)  # uses up the first check
+
+    write_artifact(path, 2.0)
+    assert np.allclose(scorer.score(X), 1.0)
+
+    scorer.reload_interval = 0
+    path.write_bytes(b'partially written')
+    os.utime(path, (os.path.getmtime(path) + 10, os.path.getmtime(path) + 10))
+    assert not scorer.maybe_reload()
+    assert np.allclose(scorer.score(X), 1.0)
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from benchmark_training import SyntheticTrainingData, compare_to_baseline, run_benchmark
+
+
+def test_route_features_fall_inside_the_training_window():
+    data = SyntheticTrainingData()
+    features = data.route_features(500)
+    assert features['feature_date'].min() >= (data.as_of - pd.DateOffset(months=12)).date()
+
+
+def test_benchmark_runs_both_trainers_at_a_tiny_size():
+    results = run_benchmark(route_sizes=[400], maintenance_sizes=[40], n_jobs=1)
+
+    assert [(r['trainer'], r['size']) for r in results] == [('route_optimization', 400),
+                                                           ('predictive_maintenance', 40)]
+    route, maintenance = results
+    assert route['rows'] == 400
+    assert maintenance['rows'] > 0
+    for result in results:
+        assert result['total_wall_seconds'] > 0
+        assert {'data_load', 'model_search'} <= set(result['stage_wall_seconds'])
+
+    baseline = [{**r, 'total_wall_seconds': r['total_wall_seconds'] / 2} for r in results]
+    assert len(compare_to_baseline(results, baseline, max_regression=0.25)) == 2
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from clustering_advisor import ClusteringAdvisor, ColumnStats, TableStats
+
+
+@pytest.fixture
+def advisor():
+    return ClusteringAdvisor({'fact_shipments': TableStats(
+        'fact_shipments', bytes=100 * 1024 ** 3, row_count=1e9, columns={
+            'shipment_date': ColumnStats('shipment_date', 1000, 'DATE'),
+            'customer_id': ColumnStats('customer_id', 1e6, 'NUMBER'),
+            'created_at': ColumnStats('created_at', 9e8, 'TIMESTAMP_NTZ')
+        })})
+
+
+def test_key_is_ranked_by_projected_scan_savings(advisor):
+    queries = pd.DataFrame({
+        'query_text': ["SELECT id FROM fact_shipments WHERE shipment_date = '2024-06-01'",
+                       "SELECT id FROM fact_shipments WHERE customer_id = 42",
+                       "SELECT id FROM fact_shipments WHERE created_at >= '2024-06-01'",
+                       "SELECT id FROM dim_customer WHERE customer_id = 42"],
+        'executions': [100, 1, 50, 1000]
+    })
+    [advice] = advisor.advise(queries)
+    assert advice['table_name'] == 'fact_shipments'
+    # Near-unique timestamps are proposed by day
+    assert advice['proposed_key'] == ['shipment_date', 'TO_DATE(created_at)']
+    candidates = {candidate['column']: candidate for candidate in advice['candidates']}
+    # 100 executions x 100 GB, an equality on 1 of 1000 dates reads 0.1% of it
+    assert candidates['shipment_date']['projected_gb_saved'] == pytest.approx(9990)
+    # A range predicate is assumed to select 10%
+    assert candidates['created_at']['projected_gb_saved'] == pytest.approx(4500)
+    assert candidates['created_at']['range_predicates'] == 1
+    assert advice['gb_scanned'] == pytest.approx(15100)
+
+
+def test_recorded_scan_ratio_limits_the_saving(advisor):
+    queries = pd.DataFrame({'query_text': ["SELECT id FROM fact_shipments WHERE shipment_date = '2024-06-01'"],
+                            'executions': [10], 'total_gb_scanned': [20.0], 'partition_scan_ratio': [0.2]})
+    [advice] = advisor.advise(queries)
+    # Already pruned to 20%; clustering takes it to 0.1%
+    assert advice['projected_gb_saved'] == pytest.approx(20 * (0.2 - 0.001) / 0.2)
+
+
+def test_unfiltered_queries_give_no_advice(advisor):
+    assert advisor.advise(pd.DataFrame({'query_text': ["SELECT COUNT(*) FROM fact_shipments"],
+                                        'executions': [500]})) == []
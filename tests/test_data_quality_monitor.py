@@ -0,0 +1,106 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import pytest
+
+import session_pool
+from data_quality_monitor import DataQualityMonitor
+
+
+class LimitedSessionPool:
+    """Hands out at most `size` placeholder sessions at a time"""
+
+    def __init__(self, size: int):
+        self.slots = threading.Semaphore(size)
+
+    @contextmanager
+    def session(self, connection_params):
+        with self.slots:
+            yield object()
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monitor = DataQualityMonitor('dev')
+    monkeypatch.setattr(monitor, 'load_integrity_checks', lambda: [{'name': f'orphans_{i}'} for i in range(7)])
+    monkeypatch.setattr(monitor, 'run_integrity_check', lambda check, session: time.sleep(0.2) or [
+        {'table_name': check['name'], 'metric': 'orphans', 'status': 'WARNING'}])
+    for name in ('check_data_completeness', 'check_ml_model_performance', 'check_kpi_anomalies'):
+        monkeypatch.setattr(monitor, name, lambda session: [])
+    return monitor
+
+
+def test_every_check_runs_and_slow_checks_time_out(monitor, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(monitor, 'check_data_freshness', lambda session: release.wait(30) and [])
+    monitor.execution_config['check_timeout_seconds'] = 0
+    monitor.session_pool = LimitedSessionPool(12)
+
+    issues, failed = monitor.run_checks_concurrently()
+    release.set()
+    assert [issue['table_name'] for issue in issues] == ['freshness'] + [f'orphans_{i}' for i in range(7)]
+    assert issues[0]['metric'] == 'check_timeout'
+    assert failed == ['freshness']
+
+
+def test_checks_waiting_for_a_session_are_not_timed_out(monitor, monkeypatch):
+    monkeypatch.setattr(monitor, 'check_data_freshness', lambda session: [])
+    monitor.execution_config['check_timeout_seconds'] = 0  # 5s margin per check once it has a session
+    monitor.session_pool = LimitedSessionPool(1)  # checks run one after another: ~1.4s in total
+
+    issues, failed = monitor.run_checks_concurrently()
+    assert [issue['metric'] for issue in issues] == ['orphans'] * 7
+    assert failed == []
+
+
+def test_failing_check_is_reported_without_aborting_the_cycle(monitor, monkeypatch):
+    def broken(session):
+        raise RuntimeError('warehouse suspended')
+
+    monkeypatch.setattr(monitor, 'check_data_freshness', broken)
+    monitor.session_pool = LimitedSessionPool(12)
+    issues, failed = monitor.run_checks_concurrently()
+    assert len(issues) == 7
+    assert failed == ['freshness']
+
+
+def test_check_that_returns_none_is_reported_as_failed(monitor, monkeypatch):
+    monkeypatch.setattr(monitor, 'check_data_freshness', lambda session: None)
+    monitor.session_pool = LimitedSessionPool(12)
+    issues, failed = monitor.run_checks_concurrently()
+    assert len(issues) == 7
+    assert failed == ['freshness']
+
+
+def test_standalone_checks_share_a_single_session(monitor, monkeypatch):
+    class FakeSession:
+        class builder:
+            @staticmethod
+            def configs(params):
+                return FakeSession.builder
+
+            @staticmethod
+            def create():
+                return object()
+
+    monkeypatch.setattr(session_pool, 'Session', FakeSession)
+    monkeypatch.setattr(monitor, 'check_data_freshness', lambda session: [])
+    monitor.execution_config['check_timeout_seconds'] = 0
+    issues, failed = monitor.run_checks_concurrently()
+    assert monitor.session_pool.stats['created'] == 1
+    assert len(issues) == 7 and failed == []
+
+
+def test_unknown_completeness_is_critical():
+    class Session:
+        def sql(self, query):
+            class Result:
+                def to_pandas(self, statement_params=None):
+                    return pd.DataFrame({'TABLE_NAME': ['a', 'b'], 'ROW_COUNT': [10, 10], 'NULL_KEYS': [0, None],
+                                         'COMPLETENESS_RATIO': [1.0, None]})
+            return Result()
+
+    results = DataQualityMonitor('dev').check_data_completeness(Session())
+    assert [(result['table_name'], result['status']) for result in results] == [('a', 'GOOD'), ('b', 'CRITICAL')]
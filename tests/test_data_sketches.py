@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_sketches import HyperLogLog, TableProfile, TDigest, iter_chunks, profile_chunks
+
+
+def unique_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'value': rng.normal(size=rows),
+        'category': rng.choice(['a', 'b', 'c'], size=rows)
+    })
+
+
+@pytest.mark.parametrize('rows', [20_000, 200_000])
+def test_unique_rows_report_no_duplicates(rows):
+    profile = profile_chunks(iter_chunks(unique_frame(rows), chunk_size=7_000))
+    assert profile.duplicate_rows == 0
+
+
+def test_duplicates_are_exact_across_chunks_and_merges():
+    df = unique_frame(50_000)
+    # Duplicates spread across chunk boundaries
+    df = pd.concat([df, df.iloc[::10], df.iloc[:3]], ignore_index=True)
+    expected = int(df.duplicated().sum())
+
+    left = profile_chunks(iter_chunks(df.iloc[:30_000], chunk_size=4_000))
+    right = profile_chunks(iter_chunks(df.iloc[30_000:], chunk_size=4_000))
+    merged = TableProfile.from_dict(left.to_dict()).merge(TableProfile.from_dict(right.to_dict()))
+    assert merged.duplicate_rows == expected
+    assert merged.summary()['row_count'] == len(df)
+
+
+def test_hyperloglog_is_exact_while_sparse_and_close_when_dense():
+    small = HyperLogLog(precision=12)
+    small.update(pd.Series(np.arange(1_000)))
+    assert small.count() == 1_000
+
+    large = HyperLogLog(precision=14)
+    large.update(pd.Series(np.arange(500_000)))
+    assert abs(large.count() - 500_000) / 500_000 < 0.03
+
+
+def test_tdigest_quantiles_and_merge():
+    values = np.random.default_rng(1).normal(size=200_000)
+    left, right = TDigest(), TDigest()
+    left.update(values[:100_000])
+    right.update(values[100_000:])
+    merged = left.merge(right)
+    expected = np.quantile(values, [0.25, 0.5, 0.75, 0.99])
+    assert np.allclose(merged.quantiles([0.25, 0.5, 0.75, 0.99]), expected, atol=0.02)
+
+
+def test_duplicate_count_stays_bounded_and_estimates_past_capacity():
+    df = unique_frame(200_000)
+    unique = profile_chunks(iter_chunks(df, chunk_size=20_000), max_row_hashes=10_000)
+    assert len(unique.rows.hashes) <= 10_000 and not unique.rows.exact
+    assert unique.duplicate_rows == 0
+
+    df = pd.concat([df, df.iloc[::4]], ignore_index=True)
+    left = profile_chunks(iter_chunks(df.iloc[:100_000], chunk_size=20_000), max_row_hashes=10_000)
+    right = profile_chunks(iter_chunks(df.iloc[100_000:], chunk_size=20_000), max_row_hashes=10_000)
+    merged = TableProfile.from_dict(left.to_dict()).merge(TableProfile.from_dict(right.to_dict()))
+    assert len(merged.rows.hashes) <= 10_000
+    assert abs(merged.duplicate_rows - 50_000) / 50_000 < 0.1
+
+
+def test_sample_data_report_uses_the_sketches(tmp_path):
+    from generate_sample_data import LogisticsDataGenerator
+
+    df = unique_frame(1_000)
+    df = pd.concat([df, df.iloc[:7]], ignore_index=True)
+    LogisticsDataGenerator()._generate_data_quality_report({'shipments': df}, str(tmp_path), chunk_size=300)
+    report = pd.read_csv(tmp_path / 'data_quality_report.csv')
+    assert report.to_dict('records')[0]['duplicate_rows'] == 7
@@ -0,0 +1,112 @@
+import textwrap
+
+import duckdb
+
+from dbt_relationships import Relationship, build_integrity_checks, load_dbt_relationships, orphan_alias
+
+MARTS_SCHEMA = """
+version: 2
+models:
+  - name: tbl_fact_shipments
+    columns:
+      - name: customer_id
+        tests:
+          - not_null
+          - relationships:
+              to: ref('tbl_dim_customer')
+              field: customer_id
+      - name: vehicle_id
+        data_tests:
+          - relationships:
+              arguments:
+                to: ref("tbl_dim_vehicle")
+                field: vehicle_id
+      - name: route_id
+        tests:
+          - relationships:
+              to: source('raw', 'routes')
+              field: route_id
+  - name: tbl_fact_deliveries
+    columns:
+      - name: shipment_id
+        tests:
+          - relationships:
+              to: ref('tbl_fact_shipments')
+              field: shipment_id
+              config:
+                where: "delivery_date >= '2024-01-01'"
+"""
+
+
+def write_schema(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(text))
+
+
+def test_relationships_are_read_from_mart_schemas(tmp_path):
+    write_schema(tmp_path / 'models' / 'marts' / 'facts' / 'schema.yml', MARTS_SCHEMA)
+    # Declared twice, kept once
+    write_schema(tmp_path / 'models' / 'marts' / 'facts' / 'extra.yml', MARTS_SCHEMA)
+    write_schema(tmp_path / 'models' / 'staging' / 'schema.yml', MARTS_SCHEMA.replace('tbl_', 'stg_'))
+
+    relationships = load_dbt_relationships(str(tmp_path))
+
+    assert relationships == [
+        Relationship('tbl_fact_shipments', 'customer_id', 'tbl_dim_customer', 'customer_id'),
+        Relationship('tbl_fact_shipments', 'vehicle_id', 'tbl_dim_vehicle', 'vehicle_id'),
+        Relationship('tbl_fact_deliveries', 'shipment_id', 'tbl_fact_shipments', 'shipment_id',
+                     where="delivery_date >= '2024-01-01'")
+    ]
+
+
+def test_repository_dbt_project_declares_mart_relationships():
+    relationships = load_dbt_relationships()
+    assert relationships
+    assert all(r.child_model and r.parent_model and r.parent_column for r in relationships)
+
+
+def test_each_child_table_is_checked_in_one_query():
+    relationships = [
+        Relationship('tbl_fact_shipments', 'customer_id', 'tbl_dim_customer', 'customer_id'),
+        Relationship('tbl_fact_shipments', 'vehicle_id', 'tbl_dim_vehicle', 'vehicle_id'),
+        Relationship('tbl_fact_deliveries', 'shipment_id', 'tbl_fact_shipments', 'shipment_id')
+    ]
+    checks = build_integrity_checks(relationships, threshold=5)
+
+    assert [check['name'] for check in checks] == ['tbl_fact_shipments_integrity', 'tbl_fact_deliveries_integrity']
+    shipments = checks[0]
+    assert shipments['relationships'] == relationships[:2] and shipments['threshold'] == 5
+    assert shipments['query'].count('FROM tbl_fact_shipments c') == 1
+    assert 'AS ORPHANS_CUSTOMER_ID_TBL_DIM_CUSTOMER' in shipments['query']
+    assert 'AS ORPHANS_VEHICLE_ID_TBL_DIM_VEHICLE' in shipments['query']
+
+
+def test_integrity_query_counts_orphans_per_foreign_key():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE tbl_dim_customer AS SELECT * FROM (VALUES (1), (2), (2)) t(customer_id)")
+    con.execute("CREATE TABLE tbl_dim_vehicle AS SELECT * FROM (VALUES (10)) t(vehicle_id)")
+    con.execute("""
+        CREATE TABLE tbl_fact_shipments AS SELECT * FROM (VALUES
+            (1, 10, DATE '2024-02-01'),
+            (2, 11, DATE '2024-02-01'),
+            (3, NULL, DATE '2024-02-01'),
+            (4, 12, DATE '2023-12-01')
+        ) t(customer_id, vehicle_id, shipment_date)
+    """)
+    customer = Relationship('tbl_fact_shipments', 'customer_id', 'tbl_dim_customer', 'customer_id')
+    vehicle = Relationship('tbl_fact_shipments', 'vehicle_id', 'tbl_dim_vehicle', 'vehicle_id')
+
+    [check] = build_integrity_checks([customer, vehicle])
+    cursor = con.execute(check['query'])
+    row = dict(zip([d[0].upper() for d in cursor.description], cursor.fetchone()))
+    # Duplicated parent keys do not multiply child rows; NULL foreign keys are not orphans
+    assert row['TOTAL_ROWS'] == 4
+    assert row[orphan_alias(customer)] == 2
+    assert row[orphan_alias(vehicle)] == 2
+
+    recent = [Relationship(r.child_model, r.column, r.parent_model, r.parent_column,
+                           where="shipment_date >= DATE '2024-01-01'") for r in (customer, vehicle)]
+    [check] = build_integrity_checks(recent)
+    cursor = con.execute(check['query'])
+    row = dict(zip([d[0].upper() for d in cursor.description], cursor.fetchone()))
+    assert (row['TOTAL_ROWS'], row[orphan_alias(recent[0])], row[orphan_alias(recent[1])]) == (3, 1, 1)
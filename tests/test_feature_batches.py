@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_batches import build_training_matrix, iter_parquet_batches
+from feature_schema import MISSING_FEATURE_VALUE, ROUTE_FEATURE_COLUMNS, ROUTE_REQUIRED_COLUMNS
+from train_route_optimization_model import RouteOptimizationModelTrainer
+
+
+def feature_store(rows: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({c: rng.uniform(1, 10, rows) for c in ROUTE_FEATURE_COLUMNS})
+    df['estimated_duration_minutes'] = rng.uniform(30, 60, rows)
+    df['actual_duration_minutes'] = df['estimated_duration_minutes'] * rng.uniform(0.8, 1.2, rows)
+    df['feature_date'] = [date.today() - timedelta(days=int(d)) for d in rng.integers(0, 700, rows)]
+    df.loc[::7, 'traffic_delay_factor'] = np.nan  # required column
+    df.loc[::5, 'distance_km'] = np.nan            # optional feature
+    return df
+
+
+def expected_rows(df: pd.DataFrame) -> pd.DataFrame:
+    window_start = (pd.Timestamp.today().normalize() - pd.DateOffset(months=12)).date()
+    keep = (df['feature_date'] >= window_start) & df[ROUTE_REQUIRED_COLUMNS].notna().all(axis=1)
+    return df[keep]
+
+
+def test_offline_sources_apply_the_snowflake_filters(tmp_path):
+    df = feature_store()
+    parquet_path = tmp_path / 'features.parquet'
+    df.to_parquet(parquet_path, index=False)
+    duckdb_path = tmp_path / 'features.duckdb'
+    with duckdb.connect(str(duckdb_path)) as connection:
+        connection.execute("CREATE TABLE tbl_ml_consolidated_feature_store AS SELECT * FROM df")
+
+    expected = expected_rows(df)
+    assert 0 < len(expected) < len(df)
+    for source in (parquet_path, duckdb_path):
+        X, y, _ = RouteOptimizationModelTrainer(str(source)).load_training_matrix()
+        assert len(y) == len(expected)
+        assert not np.isnan(X).any()
+
+
+def test_imputation_is_explicit(tmp_path):
+    df = feature_store()
+    df.to_parquet(tmp_path / 'features.parquet', index=False)
+    columns = ROUTE_FEATURE_COLUMNS + ['estimated_duration_minutes']
+
+    def batches():
+        return iter_parquet_batches(str(tmp_path / 'features.parquet'), columns)
+
+    raw, _ = build_training_matrix(batches(), ROUTE_FEATURE_COLUMNS, 'estimated_duration_minutes', impute=False)
+    imputed, _ = build_training_matrix(batches(), ROUTE_FEATURE_COLUMNS, 'estimated_duration_minutes')
+    missing = np.isnan(raw)
+    assert missing.sum() == df[ROUTE_FEATURE_COLUMNS].isna().sum().sum()
+    assert (imputed[missing] == MISSING_FEATURE_VALUE).all()
+    assert np.array_equal(imputed[~missing], raw[~missing])
+
+
+def test_parquet_not_null_filter_rejects_unknown_columns(tmp_path):
+    feature_store(10).to_parquet(tmp_path / 'features.parquet', index=False)
+    with pytest.raises(KeyError):
+        list(iter_parquet_batches(str(tmp_path / 'features.parquet'), not_null=['no_such_column']))
+
+
+def test_parquet_export_without_feature_date_is_used_whole(tmp_path):
+    df = feature_store().drop(columns=['feature_date'])
+    df.to_parquet(tmp_path / 'features.parquet', index=False)
+
+    X, y, _ = RouteOptimizationModelTrainer(str(tmp_path / 'features.parquet')).load_training_matrix()
+    assert len(y) == df[ROUTE_REQUIRED_COLUMNS].notna().all(axis=1).sum()
+    assert not np.isnan(X).any()
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_batches import iter_parquet_batches
+from feature_drift import FeatureDriftDetector, FeatureReference, population_stability_index
+from feature_schema import ROUTE_FEATURE_COLUMNS, impute_missing
+from ml_lifecycle_manager import MLLifecycleManager
+from train_route_optimization_model import RouteOptimizationModelTrainer
+
+
+def with_nulls(rows: int, seed: int, null_rate: float = 0.05) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 3))
+    X[rng.random(X.shape) < null_rate] = np.nan
+    return X
+
+
+def test_unchanged_distribution_with_nulls_does_not_drift():
+    reference = FeatureReference.from_matrix(with_nulls(20_000, seed=1), ['a', 'b', 'c'])
+    report = FeatureDriftDetector(reference).update(with_nulls(20_000, seed=2)).report()
+    assert report['drifted_features'] == []
+    assert report['drift_score'] < 0.01
+    assert report['features']['a']['missing_rate_reference'] == pytest.approx(0.05, abs=0.01)
+
+    # The old behaviour: a zero-filled reference against un-imputed current rows
+    imputed = FeatureReference.from_matrix(impute_missing(with_nulls(20_000, seed=1)), ['a', 'b', 'c'])
+    assert FeatureDriftDetector(imputed).update(with_nulls(20_000, seed=2)).report()['drift_score'] > 0.2
+
+
+def test_shifted_distribution_drifts():
+    reference = FeatureReference.from_matrix(with_nulls(20_000, seed=1), ['a', 'b', 'c'])
+    shifted = with_nulls(20_000, seed=2)
+    shifted[:, 1] += 1.0
+    report = FeatureDriftDetector(reference).update(shifted).report()
+    assert report['drifted_features'] == ['b']
+
+
+def test_psi_is_zero_for_identical_and_symmetric():
+    p = np.array([0.2, 0.3, 0.5])
+    q = np.array([0.3, 0.3, 0.4])
+    assert population_stability_index(p, p) == 0.0
+    assert population_stability_index(p, q) == pytest.approx(population_stability_index(q, p))
+
+
+def test_trainer_reference_matches_streamed_feature_rows(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = 5_000
+    df = pd.DataFrame({c: rng.uniform(1, 10, rows) for c in ROUTE_FEATURE_COLUMNS})
+    df.loc[rng.random(rows) < 0.05, 'distance_km'] = np.nan
+    df['estimated_duration_minutes'] = rng.uniform(30, 60, rows)
+    df['actual_duration_minutes'] = df['estimated_duration_minutes']
+    df['feature_date'] = pd.Timestamp.today().date()
+    df.to_parquet(tmp_path / 'features.parquet', index=False)
+
+    X, _, columns = RouteOptimizationModelTrainer(str(tmp_path / 'features.parquet')).load_training_matrix(impute=False)
+    reference = FeatureReference.from_matrix(X, columns)
+    detector = FeatureDriftDetector(reference).update_batches(
+        iter_parquet_batches(str(tmp_path / 'features.parquet'), columns))
+    report = detector.report()
+    assert report['drifted_features'] == []
+    assert report['features']['distance_km']['missing_rate_reference'] > 0
+
+
+class FakeResult:
+    def __init__(self, df):
+        self.df = df
+
+    def to_pandas(self):
+        return self.df
+
+
+class FakeSession:
+    """Answers the two model views with one healthy, recently trained model"""
+
+    def sql(self, query):
+        if 'vw_ml_model_performance' in query:
+            return FakeResult(pd.DataFrame({
+                'MODEL_NAME': ['route_optimization_model'], 'MODEL_TYPE': ['route_optimization'],
+                'VALIDATION_SCORE': [0.9], 'PRODUCTION_SCORE': [0.9], 'DRIFT_SCORE': [0.01],
+                'LAST_TRAINING_DATE': [pd.Timestamp.today()], 'PREDICTION_COUNT': [100],
+                'DAYS_SINCE_TRAINING': [1]
+            }))
+        return FakeResult(pd.DataFrame(columns=['MODEL_NAME', 'MODEL_TYPE', 'DRIFT_SCORE', 'VALIDATION_SCORE',
+                                                'PRODUCTION_SCORE', 'PREDICTION_COUNT', 'LAST_PREDICTION_DATE']))
+
+
+def test_lifecycle_run_computes_feature_drift_once_per_model_type(monkeypatch):
+    manager = MLLifecycleManager('dev')
+    manager.session = FakeSession()
+    calls = []
+    monkeypatch.setattr(manager, 'compute_feature_drift',
+                        lambda model_type: calls.append(model_type) or {'drift_score': 0.01, 'drifted_features': []})
+
+    assert manager.run_ml_lifecycle_management() == 0
+    assert sorted(calls) == sorted(manager.model_configs)
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from alert_pipeline import AlertPipeline, AlertStateStore, SQLiteAlertSink
+from freshness_tracker import FreshnessStateStore, FreshnessTracker, TrackedTable
+
+START = datetime(2024, 6, 3, 8, 0, tzinfo=timezone.utc)
+
+
+class MetadataSession:
+    """Answers the tracker's information_schema and MAX(_loaded_at) queries"""
+
+    def __init__(self):
+        self.loaded_at = START
+
+    def sql(self, query):
+        session = self
+
+        class Result:
+            def to_pandas(self, statement_params=None):
+                if 'information_schema' in query:
+                    return pd.DataFrame({'TABLE_SCHEMA': ['RAW'], 'TABLE_NAME': ['TBL_RAW_SHIPMENTS'],
+                                         'LAST_ALTERED': [session.loaded_at]})
+                return pd.DataFrame({'TABLE_KEY': ['RAW.TBL_RAW_SHIPMENTS'],
+                                     'HIGH_WATER_MARK': [session.loaded_at]})
+
+        return Result()
+
+
+def test_stale_table_is_reported_every_poll_and_transitions_are_flagged(tmp_path):
+    now = [START]
+    tracker = FreshnessTracker([TrackedTable('RAW', 'TBL_RAW_SHIPMENTS', '"_loaded_at"')],
+                               FreshnessStateStore(str(tmp_path / 'freshness.sqlite')),
+                               warning_minutes=60, critical_minutes=120, clock=lambda: now[0])
+    session = MetadataSession()
+
+    def poll(minutes):
+        now[0] = START + timedelta(minutes=minutes)
+        [table] = tracker.poll(session)
+        return table['status'], table['changed']
+
+    assert poll(10) == ('GOOD', False)
+    assert poll(90) == ('WARNING', True)
+    assert poll(150) == ('CRITICAL', True)
+    assert poll(165) == ('CRITICAL', False)
+    assert poll(180) == ('CRITICAL', False)
+
+    session.loaded_at = START + timedelta(minutes=185)
+    assert poll(190) == ('GOOD', True)
+
+
+def test_alert_pipeline_turns_persistent_staleness_into_reminders(tmp_path):
+    clock = [datetime(2024, 6, 3, 8, 0)]
+    pipeline = AlertPipeline(AlertStateStore(str(tmp_path / 'state.sqlite')),
+                             SQLiteAlertSink(str(tmp_path / 'alerts.sqlite')),
+                             suppression_minutes={'CRITICAL': 60, 'WARNING': 240}, clock=lambda: clock[0])
+    issue = {'table_name': 'RAW.TBL_RAW_SHIPMENTS', 'metric': 'freshness', 'status': 'CRITICAL'}
+
+    reasons = []
+    for _ in range(9):  # every 15 minutes for two hours
+        reasons.append([alert['alert_reason'] for alert in pipeline.process([issue])])
+        clock[0] += timedelta(minutes=15)
+    assert reasons == [['new'], [], [], [], ['reminder'], [], [], [], ['reminder']]
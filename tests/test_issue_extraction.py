@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from issue_extraction import col, extract_records, status_issues, threshold_status
+
+
+def test_threshold_status_breakpoints_are_exclusive_in_both_directions():
+    staleness = threshold_status([30, 60, 61, 120, 121, np.nan], 60, 120)
+    assert staleness.tolist() == ['GOOD', 'GOOD', 'WARNING', 'WARNING', 'CRITICAL', 'GOOD']
+    completeness = threshold_status([0.99, 0.95, 0.94, 0.9, 0.89], 0.95, 0.9, higher_is_worse=False)
+    assert completeness.tolist() == ['GOOD', 'GOOD', 'WARNING', 'WARNING', 'CRITICAL']
+
+
+def test_extract_records_evaluates_each_field_kind_on_masked_rows_only():
+    df = pd.DataFrame({'table_name': ['a', 'b', 'c'], 'ratio': [0.5, np.nan, 0.99]},
+                      index=[10, 20, 30])
+    seen = []
+    records = extract_records(df, [True, True, False], {
+        'table_name': col('table_name'),
+        'ratio': col('ratio'),
+        'rank': np.array([1, 2, 3]),
+        'metric': 'completeness',
+        'message': lambda rows: seen.append(len(rows)) or "rows: " + rows['table_name']
+    })
+    assert records == [
+        {'table_name': 'a', 'ratio': 0.5, 'rank': 1, 'metric': 'completeness', 'message': 'rows: a'},
+        {'table_name': 'b', 'ratio': None, 'rank': 2, 'metric': 'completeness', 'message': 'rows: b'}
+    ]
+    assert seen == [2]
+    assert type(records[0]['ratio']) is float and type(records[0]['rank']) is int
+    assert extract_records(df, [False] * 3, {'table_name': col('table_name')}) == []
+
+
+def test_status_issues_keeps_flagged_rows_with_their_status():
+    df = pd.DataFrame({'table_name': ['a', 'b', 'c'], 'minutes': [10, 90, 200]})
+    status = threshold_status(df['minutes'], 60, 120)
+    issues = status_issues(df, status, {'table_name': col('table_name'), 'value': col('minutes')})
+    assert issues == [{'table_name': 'b', 'value': 90, 'status': 'WARNING'},
+                      {'table_name': 'c', 'value': 200, 'status': 'CRITICAL'}]
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from job_scheduler import JobScheduler
+
+
+def blocked_scheduler(catch_up: str):
+    scheduler = JobScheduler(log=lambda message, level="INFO": None)
+    scheduler.add_job('load', lambda: None, daily_at='23:59')
+    job = scheduler.add_job('report', lambda: None, interval=timedelta(minutes=10),
+                            depends_on=['load'], catch_up=catch_up, run_on_start=True)
+    scheduler._queue_due_runs(job.next_run)
+    return scheduler, job
+
+
+def test_skip_slots_blocked_by_dependencies_expire():
+    scheduler, job = blocked_scheduler('skip')
+    slot = job.pending[0]
+
+    scheduler._dispatch(slot + timedelta(minutes=4))
+    assert job.pending == [slot]
+
+    scheduler._dispatch(slot + timedelta(minutes=6))
+    assert job.pending == [] and job.skipped_count == 1
+
+
+def test_latest_slots_keep_waiting_for_dependencies():
+    scheduler, job = blocked_scheduler('latest')
+    slot = job.pending[0]
+    scheduler._dispatch(slot + timedelta(hours=2))
+    assert job.pending == [slot] and job.skipped_count == 0
+
+
+def test_dependent_runs_after_dependency_finishes():
+    scheduler = JobScheduler(max_workers=2, log=lambda message, level="INFO": None, tick_seconds=0.05)
+    order = []
+    scheduler.add_job('load', lambda: order.append('load'), interval=timedelta(hours=1), run_on_start=True)
+
+    def report():
+        order.append('report')
+        scheduler.stop()
+
+    scheduler.add_job('report', report, interval=timedelta(hours=1), depends_on=['load'],
+                      catch_up='skip', run_on_start=True)
+    scheduler.run()
+    assert order == ['load', 'report']
+    assert scheduler.jobs['report'].last_status == 'success'
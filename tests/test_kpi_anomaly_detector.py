@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import data_quality_monitor
+from data_quality_monitor import DataQualityMonitor
+from freshness_tracker import TrackedTable
+from kpi_anomaly_detector import KPIAnomalyDetector, anomaly_issues
+
+START = datetime(2024, 6, 3, 0, 0)
+
+
+class CounterSession:
+    """No real_time_kpis points; information_schema reports the current row count"""
+
+    def __init__(self):
+        self.row_count = 0
+
+    def sql(self, query):
+        session = self
+
+        class Result:
+            def to_pandas(self, statement_params=None):
+                if 'real_time_kpis' in query:
+                    return pd.DataFrame({'METRIC_NAME': [], 'KPI_TIMESTAMP': [], 'METRIC_VALUE': []})
+                return pd.DataFrame({'TABLE_KEY': ['RAW.TBL_RAW_SHIPMENTS'], 'ROW_COUNT': [session.row_count]})
+
+        return Result()
+
+
+def test_daily_load_polled_every_cycle_is_not_anomalous(monkeypatch):
+    now = [START]
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now[0]
+
+    monkeypatch.setattr(data_quality_monitor, 'datetime', Clock)
+    monitor = DataQualityMonitor('dev')
+    monitor.freshness_config = {'incremental': False, 'tables': [TrackedTable('RAW', 'TBL_RAW_SHIPMENTS')]}
+    config = monitor.anomaly_config
+    detector = KPIAnomalyDetector(z_threshold=config['z_threshold'], warmup=config['warmup_points'],
+                                  min_scale=config['min_scale'])
+    session = CounterSession()
+    rng = np.random.default_rng(7)
+
+    def replay(days, daily_rows):
+        statuses = []
+        for _ in range(days * 96):  # a 15-minute cycle
+            if now[0].hour == 2 and now[0].minute == 0:
+                session.row_count += int(daily_rows())
+            points = monitor.collect_metric_series(session, detector)
+            if len(points):
+                scored = detector.update(points['series'], points['value'], points['timestamp'])
+                statuses += [issue['status'] for issue in anomaly_issues(scored, config['critical_z'])]
+            now[0] += timedelta(minutes=15)
+        return statuses
+
+    assert replay(35, lambda: rng.normal(100_000, 2_000)) == []
+    assert replay(1, lambda: 50_000) == ['CRITICAL']
+
+
+def test_absolute_scale_floor_keeps_near_zero_series_quiet():
+    timestamps = pd.date_range(START, periods=40, freq='15min')
+    values = np.zeros(40)
+    values[-1] = 0.5
+    quiet = KPIAnomalyDetector(min_scale=1.0).update(['lag'] * 40, values, timestamps)
+    assert not quiet['anomaly'].any()
+    noisy = KPIAnomalyDetector().update(['lag'] * 40, values, timestamps)
+    assert noisy['anomaly'].iloc[-1]
+
+
+def test_series_scored_without_an_anomaly_are_reported_good():
+    timestamps = pd.date_range(START, periods=40, freq='15min')
+    spike = np.zeros(40)
+    spike[-1] = 50.0
+    scored = KPIAnomalyDetector().update(['lag'] * 40 + ['rows'] * 40, np.concatenate([spike, np.zeros(40)]),
+                                         timestamps.append(timestamps))
+    assert anomaly_issues(scored, critical_z=6.0) == anomaly_issues(scored, critical_z=6.0, include_good=True)[1:]
+    [good, anomaly] = anomaly_issues(scored, critical_z=6.0, include_good=True)
+    assert (good['table_name'], good['status']) == ('rows', 'GOOD')
+    assert (anomaly['table_name'], anomaly['status']) == ('lag', 'CRITICAL')
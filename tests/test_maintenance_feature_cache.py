@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from maintenance_feature_cache import LocalFeatureSource, MaintenanceFeatureCache
+
+AS_OF = date(2024, 6, 1)
+
+
+def write_source(directory, mileage_v2: float):
+    directory.mkdir(exist_ok=True)
+    pd.DataFrame({
+        'vehicle_id': ['V1', 'V2'],
+        'vehicle_type': ['VAN', 'TRUCK'],
+        'model_year': [2019, 2020],
+        'current_mileage': [50_000.0, mileage_v2],
+        'fuel_efficiency_mpg': [20.0, 12.0],
+        'vehicle_age_years': [5.0, 4.0],
+        'vehicle_type_numeric': [1, 2],
+        'vehicle_status': ['ACTIVE', 'ACTIVE']
+    }).to_csv(directory / 'tbl_dim_vehicle.csv', index=False)
+    old = AS_OF - timedelta(days=20)
+    pd.DataFrame({
+        'vehicle_id': ['V1', 'V2'], 'timestamp': [old, old],
+        'engine_temperature_f': [190.0, 200.0], 'engine_rpm': [2000.0, 2100.0],
+        'fuel_level_pct': [50.0, 60.0], 'brake_pressure_psi': [30.0, 32.0]
+    }).to_csv(directory / 'tbl_fact_vehicle_telemetry.csv', index=False)
+    pd.DataFrame({
+        'vehicle_id': ['V1'], 'maintenance_date': [old], 'maintenance_id': ['M1'], 'total_cost': [300.0]
+    }).to_csv(directory / 'tbl_fact_vehicle_maintenance.csv', index=False)
+    pd.DataFrame({
+        'vehicle_id': ['V1', 'V2'], 'shipment_date': [old, old], 'shipment_id': ['S1', 'S2'],
+        'route_efficiency_score': [0.8, 0.7], 'fuel_efficiency_mpg': [19.0, 11.0]
+    }).to_csv(directory / 'tbl_fact_shipments.csv', index=False)
+
+
+def test_reused_rows_pick_up_current_vehicle_attributes(tmp_path):
+    source_dir = tmp_path / 'source'
+    write_source(source_dir, mileage_v2=80_000.0)
+    MaintenanceFeatureCache(str(tmp_path / 'cache'), LocalFeatureSource(str(source_dir))).refresh(AS_OF)
+
+    # Only the dimension row changes; no fact rows fall in the reload window
+    write_source(source_dir, mileage_v2=95_000.0)
+    cache = MaintenanceFeatureCache(str(tmp_path / 'cache'), LocalFeatureSource(str(source_dir)))
+    incremental = cache.refresh(AS_OF + timedelta(days=1)).set_index('vehicle_id').sort_index()
+    assert cache.load_state()['recomputed_vehicles'] == 0
+    assert incremental.loc['V2', 'current_mileage'] == 95_000.0
+
+    full = MaintenanceFeatureCache(str(tmp_path / 'full'), LocalFeatureSource(str(source_dir))) \
+        .refresh(AS_OF + timedelta(days=1)).set_index('vehicle_id').sort_index()
+    pd.testing.assert_frame_equal(incremental, full[incremental.columns], check_dtype=False, check_index_type=False)
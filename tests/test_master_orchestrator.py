@@ -0,0 +1,49 @@
+import threading
+import time
+
+import pytest
+
+from master_orchestrator import MasterOrchestrator
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    orchestrator = MasterOrchestrator('dev')
+    orchestrator.execution_log = None
+    yield orchestrator
+    orchestrator.shutdown()
+
+
+def test_in_process_runs_of_a_job_never_overlap(orchestrator, monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def slow_handler(script_name):
+        started.append(script_name)
+        release.wait(10)
+        return {"status": "success", "returncode": 0, "execution": "in_process"}
+
+    monkeypatch.setattr(orchestrator, '_run_handler_once', slow_handler)
+    orchestrator.automation_config['data_quality_monitor']['timeout'] = 0.2
+
+    assert orchestrator.run_in_process('data_quality_monitor')['status'] == 'timeout'
+    assert orchestrator.run_in_process('data_quality_monitor')['status'] == 'skipped'
+    assert started == ['data_quality_monitor']
+
+    release.set()
+    deadline = time.time() + 5
+    while orchestrator._active_in_process and time.time() < deadline:
+        time.sleep(0.05)  # the timed-out run finishes in the background
+    orchestrator.automation_config['data_quality_monitor']['timeout'] = 5
+    assert orchestrator.run_in_process('data_quality_monitor')['status'] == 'success'
+    assert len(started) == 2
+
+
+def test_monitoring_session_does_not_start_the_in_process_workers(orchestrator):
+    for name in ('data_quality_monitor', 'performance_optimizer', 'ml_lifecycle_manager'):
+        orchestrator.automation_config[name]['execution'] = 'subprocess'
+    orchestrator._monitoring_session()
+    assert orchestrator.session_pool is not None
+    assert orchestrator.in_process_executor is None
@@ -0,0 +1,79 @@
+import subprocess
+
+import pandas as pd
+import pytest
+
+from ml_lifecycle_manager import MLLifecycleManager
+
+
+class PerformanceSession:
+    """vw_ml_model_performance rows for check_model_performance"""
+
+    def __init__(self, rows):
+        self.rows = pd.DataFrame(rows)
+
+    def sql(self, query):
+        rows = self.rows
+
+        class Result:
+            def to_pandas(self):
+                return rows.rename(columns=str.upper)
+
+        return Result()
+
+
+def performance_row(model_name, model_type, production_score=0.95, drift_score=0.0, days_since_training=1):
+    return {'model_name': model_name, 'model_type': model_type, 'validation_score': 0.95,
+            'production_score': production_score, 'drift_score': drift_score,
+            'last_training_date': None, 'prediction_count': 1000, 'days_since_training': days_since_training}
+
+
+def drift_report(score, features=()):
+    return {'drift_score': score, 'drifted_features': list(features), 'current_rows': 500}
+
+
+@pytest.fixture
+def manager():
+    manager = MLLifecycleManager('dev')
+    manager.session = PerformanceSession([
+        performance_row('healthy', 'predictive_maintenance'),
+        performance_row('stale', 'route_optimization', days_since_training=9),
+    ])
+    return manager
+
+
+def test_feature_drift_triggers_a_full_retrain(manager):
+    candidates = manager.check_model_performance({
+        'route_optimization': drift_report(0.35, ['traffic_delay_factor']),
+        'predictive_maintenance': drift_report(0.05)
+    })
+
+    [candidate] = candidates
+    assert candidate['model_name'] == 'stale'
+    assert candidate['reasons'] == ["Feature drift above threshold: PSI 0.350 (traffic_delay_factor)",
+                                    "Model age: 9 days"]
+    assert candidate['drifted_features'] == ['traffic_delay_factor']
+    assert candidate['drift_score'] == 0.35
+    assert candidate['incremental'] is False
+
+
+def test_age_only_retrain_warm_starts_where_configured(manager):
+    manager.session.rows.loc[0, 'days_since_training'] = 10
+    candidates = manager.check_model_performance({
+        'route_optimization': drift_report(0.05),
+        'predictive_maintenance': drift_report(0.05)
+    })
+
+    assert {c['model_name']: c['incremental'] for c in candidates} == {'healthy': False, 'stale': True}
+
+
+def test_train_model_passes_incremental_only_to_models_that_support_it(manager, monkeypatch):
+    commands = []
+    monkeypatch.setattr(subprocess, 'run', lambda command, **kwargs: commands.append(command)
+                        or subprocess.CompletedProcess(command, 0, stdout='', stderr=''))
+    monkeypatch.setattr(manager, 'log_training_completion', lambda *args: None)
+
+    assert manager.train_model('route_optimization', incremental=True)
+    assert manager.train_model('predictive_maintenance', incremental=True)
+    assert manager.train_model('route_optimization')
+    assert [command[2:] for command in commands] == [['--incremental'], [], []]
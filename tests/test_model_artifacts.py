@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    GradientBoostingClassifier,
+    GradientBoostingRegressor,
+    HistGradientBoostingClassifier,
+    HistGradientBoostingRegressor,
+    RandomForestClassifier,
+    RandomForestRegressor,
+)
+
+from model_artifacts import FlatTreeEnsemble, export_flat_trees, load_model_artifact, save_model_artifact
+
+FEATURES = ['distance_km', 'traffic_delay_factor', 'weather_impact_score', 'vehicle_age_years']
+
+MODELS = {
+    'random_forest_regressor': lambda: RandomForestRegressor(n_estimators=25, max_depth=8, random_state=0),
+    'random_forest_classifier': lambda: RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0),
+    'gradient_boosting_regressor': lambda: GradientBoostingRegressor(n_estimators=40, max_depth=4, random_state=0),
+    'gradient_boosting_classifier': lambda: GradientBoostingClassifier(n_estimators=40, max_depth=4, random_state=0),
+    'hist_gradient_boosting_regressor': lambda: HistGradientBoostingRegressor(max_iter=40, random_state=0),
+    'hist_gradient_boosting_classifier': lambda: HistGradientBoostingClassifier(max_iter=40, random_state=0)
+}
+
+# GradientBoosting* reject NaN inputs; the other ensembles route them with missing_go_to_left
+ACCEPTS_NAN = {name for name in MODELS if not name.startswith('gradient_boosting')}
+
+
+def training_data(classifier: bool, with_nan: bool, rows: int = 2_000):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, len(FEATURES)))
+    y = X[:, 0] * 2 + np.sin(X[:, 1]) + rng.normal(scale=0.3, size=rows)
+    if with_nan:
+        X[rng.random(rows) < 0.15, 1] = np.nan
+        X[rng.random(rows) < 0.05, 3] = np.nan
+    return X, (y > 0).astype(int) if classifier else y
+
+
+def assert_matches_sklearn(model, predictor, X):
+    """Agreement to a few ulps: the flat trees sum the same leaf values in a different order"""
+    if hasattr(model, 'predict_proba'):
+        np.testing.assert_allclose(predictor.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-15)
+        np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+    else:
+        expected = model.predict(X)
+        np.testing.assert_allclose(predictor.predict(X), expected, rtol=0,
+                                   atol=1e-15 * max(1.0, np.abs(expected).max()))
+
+
+@pytest.mark.parametrize('name', MODELS)
+def test_flat_trees_match_sklearn(name):
+    with_nan = name in ACCEPTS_NAN
+    X, y = training_data(classifier=name.endswith('classifier'), with_nan=with_nan)
+    model = MODELS[name]().fit(X, y)
+
+    predictor = FlatTreeEnsemble(export_flat_trees(model, len(FEATURES)), chunk_rows=512)
+    assert_matches_sklearn(model, predictor, X)
+    if with_nan:
+        assert np.isnan(X).any()
+        all_missing = np.full((3, len(FEATURES)), np.nan)
+        assert_matches_sklearn(model, predictor, all_missing)
+
+
+@pytest.mark.parametrize('name', MODELS)
+def test_mmapped_artifact_round_trip(name, tmp_path):
+    X, y = training_data(classifier=name.endswith('classifier'), with_nan=name in ACCEPTS_NAN)
+    model = MODELS[name]().fit(X, y)
+    model_path = str(tmp_path / f'{name}_model.pkl')
+    save_model_artifact(model, model_path, FEATURES, 'route_optimization')
+
+    predictor = load_model_artifact(model_path)
+    assert isinstance(predictor, FlatTreeEnsemble)
+    assert isinstance(predictor.arrays['threshold'], np.memmap)
+    assert_matches_sklearn(model, predictor, X)
+
+    sklearn_model = load_model_artifact(model_path, prefer_flat=False)
+    assert type(sklearn_model) is type(model)
+    assert_matches_sklearn(model, sklearn_model, X)
@@ -0,0 +1,94 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+
+from feature_schema import ROUTE_FEATURE_COLUMNS
+from model_search import ModelSearch, fit_with_time_budget
+from train_route_optimization_model import RouteOptimizationModelTrainer
+
+
+def classification_frame(rows: int = 600):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(rows, 4)), columns=['mileage', 'age', 'temperature', 'rpm'])
+    y = pd.Series((X['mileage'] + 0.5 * X['temperature'] + rng.normal(scale=0.5, size=rows) > 0).astype(int))
+    return X, y
+
+
+def candidates():
+    return {
+        'random_forest': RandomForestClassifier(n_estimators=20, random_state=0, n_jobs=-1),
+        'hist_gradient_boosting': HistGradientBoostingClassifier(max_iter=30, random_state=0)
+    }
+
+
+def test_dataframe_fit_keeps_feature_names():
+    X, y = classification_frame()
+    result = ModelSearch(candidates(), scoring='roc_auc', cv=3, n_jobs=1, verbose=False).fit(X, y)
+
+    assert list(result.best_model.feature_names_in_) == list(X.columns)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result.best_model.predict_proba(X.head(10))
+
+
+def test_cv_results_do_not_keep_fold_estimators():
+    X, y = classification_frame()
+    result = ModelSearch(candidates(), scoring='roc_auc', cv=3, n_jobs=1, verbose=False).fit(X.to_numpy(), y)
+
+    for name, cv in result.cv_results.items():
+        assert set(cv) >= {'scores', 'fit_times', 'mean', 'std'}
+        assert 'fold_estimators' not in cv
+        assert len(cv['scores']) == 3
+    assert result.best_score > 0.8
+    assert not hasattr(result.best_model, 'feature_names_in_')
+
+
+def test_speculative_refit_selects_the_same_model_as_winner_refit():
+    X, y = classification_frame()
+    winner = ModelSearch(candidates(), scoring='roc_auc', cv=3, n_jobs=1, verbose=False).fit(X, y)
+    speculative = ModelSearch(candidates(), scoring='roc_auc', cv=3, n_jobs=1, refit='speculative',
+                              verbose=False).fit(X, y)
+
+    assert winner.best_name == speculative.best_name
+    assert np.allclose(winner.best_model.predict_proba(X), speculative.best_model.predict_proba(X))
+    assert 'refit_time' in winner.cv_results[winner.best_name]
+
+
+def test_hist_gbm_early_stops_within_the_time_budget():
+    X, y = classification_frame(2_000)
+    model = HistGradientBoostingClassifier(max_iter=500, early_stopping=True, n_iter_no_change=5,
+                                           validation_fraction=0.2, random_state=0)
+    fit_with_time_budget(model, X, y, time_budget=60)
+    assert model.n_iter_ < 500
+    # Clones of the fitted model keep the configured bound, not the last warm-start step
+    assert model.max_iter == 500 and not model.warm_start
+
+
+def test_hist_gbm_stops_growing_when_the_time_budget_runs_out():
+    X, y = classification_frame(2_000)
+    model = HistGradientBoostingClassifier(max_iter=500, early_stopping=False, random_state=0)
+    fit_with_time_budget(model, X, y, time_budget=1e-6, step=10)
+    assert model.n_iter_ == 10
+
+
+def test_route_trainer_fits_hist_gbm_on_the_parquet_matrix(tmp_path):
+    rng = np.random.default_rng(0)
+    rows = 1_000
+    df = pd.DataFrame({c: rng.uniform(1, 10, rows) for c in ROUTE_FEATURE_COLUMNS})
+    df['estimated_duration_minutes'] = 30 + 5 * df['distance_km']
+    df['actual_duration_minutes'] = df['estimated_duration_minutes'] * (0.9 + 0.02 * df['traffic_delay_factor'])
+    df.to_parquet(tmp_path / 'features.parquet', index=False)
+
+    trainer = RouteOptimizationModelTrainer(str(tmp_path / 'features.parquet'), n_jobs=1, time_budget=30)
+    X, y, _ = trainer.load_training_matrix(batch_size=256)
+    assert X.dtype == np.float32 and X.shape == (rows, len(ROUTE_FEATURE_COLUMNS))
+
+    model, name, _ = trainer.train_models(X, y)
+    metrics = trainer.search_result.training_metrics()
+    assert metrics['training_time_seconds'] > 0
+    assert metrics['training_throughput_rows_per_sec'] > 0
+    assert 'hist_gradient_boosting' in trainer.search_result.cv_results
+    if name == 'hist_gradient_boosting':
+        assert metrics['boosting_iterations'] == model.n_iter_ < 500
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_sketches import iter_chunks, profile_chunks
+from profile_state import IncrementalProfiler, discover_tables
+
+
+def write_partition(table_dir, day, start, rows):
+    path = table_dir / f'date_key={day}' / 'part-0.csv'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({'id': np.arange(start, start + rows), 'value': np.arange(start, start + rows) % 7}).to_csv(
+        path, index=False)
+    return path
+
+
+@pytest.fixture
+def shipments(tmp_path):
+    table_dir = tmp_path / 'data' / 'shipments'
+    for day, start in (('20250101', 0), ('20250102', 100)):
+        write_partition(table_dir, day, start, 100)
+    return tmp_path
+
+
+def run(root):
+    profiler = IncrementalProfiler(str(root / 'state'))
+    [(table, partitions)] = discover_tables(str(root / 'data')).items()
+    return profiler.profile_table(table, partitions)
+
+
+def expected_profile(root):
+    frames = [pd.read_csv(path) for path in sorted((root / 'data' / 'shipments').rglob('*.csv'))]
+    return profile_chunks(iter_chunks(pd.concat(frames, ignore_index=True)))
+
+
+def test_append_only_run_profiles_just_the_new_partition(shipments):
+    run(shipments)
+    write_partition(shipments / 'data' / 'shipments', '20250103', 150, 100)
+
+    merged, stats = run(shipments)
+    assert (stats['profiled'], stats['reused']) == (1, 2)
+    assert merged.summary() == expected_profile(shipments).summary()
+    # ids 150-199 appear in two partitions
+    assert merged.duplicate_rows == 50
+
+
+def test_unchanged_run_reuses_the_stored_merge_without_rewriting_it(shipments):
+    run(shipments)
+    merged_path = next((shipments / 'state').rglob('merged.json.gz'))
+    written = os.stat(merged_path).st_mtime_ns
+
+    merged, stats = run(shipments)
+    assert stats['profiled'] == 0 and merged.row_count == 200
+    assert os.stat(merged_path).st_mtime_ns == written
+
+
+def test_changed_partition_is_reprofiled_and_remerged(shipments):
+    run(shipments)
+    path = write_partition(shipments / 'data' / 'shipments', '20250102', 0, 40)
+    os.utime(path, ns=(1, 1))  # a different fingerprint even within the same mtime tick
+
+    merged, stats = run(shipments)
+    assert stats['profiled'] == 1
+    assert merged.row_count == 140 and merged.duplicate_rows == 40
+    assert merged.summary() == expected_profile(shipments).summary()
+
+
+def test_removed_partition_drops_out_of_the_merge(shipments):
+    run(shipments)
+    os.remove(shipments / 'data' / 'shipments' / 'date_key=20250101' / 'part-0.csv')
+
+    merged, stats = run(shipments)
+    assert (stats['profiled'], stats['removed']) == (0, 1)
+    assert merged.row_count == 100
+    assert merged.summary() == expected_profile(shipments).summary()
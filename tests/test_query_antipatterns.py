@@ -0,0 +1,46 @@
+from query_antipatterns import QueryAnalyzer
+
+
+def finding_types(analyzer, sql):
+    return sorted(finding['type'] for finding in analyzer.analyze(sql))
+
+
+def test_final_projection_and_unfiltered_fact_scan():
+    analyzer = QueryAnalyzer()
+    assert finding_types(analyzer, "SELECT * FROM fact_shipments ORDER BY shipment_date") == [
+        'COLUMN_SPECIFICATION', 'FILTER_OPTIMIZATION', 'RESULT_LIMITING']
+
+
+def test_ctes_and_window_order_by_are_not_mistaken_for_problems():
+    analyzer = QueryAnalyzer()
+    sql = """
+    WITH recent AS (SELECT * FROM fact_shipments WHERE shipment_date > '2024-01-01')
+    SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS rn FROM recent ORDER BY id LIMIT 10
+    """
+    assert finding_types(analyzer, sql) == []
+
+
+def test_wrapped_clustering_key_is_non_sargable():
+    analyzer = QueryAnalyzer(clustering_keys={'FACT_SHIPMENTS': ['SHIPMENT_DATE']})
+    assert finding_types(analyzer, "SELECT id FROM fact_shipments WHERE TO_DATE(shipment_date) = '2024-01-01'") == [
+        'NON_SARGABLE_PREDICATE']
+    assert finding_types(analyzer, "SELECT id FROM fact_shipments WHERE shipment_date >= '2024-01-01'") == []
+
+
+def test_join_fanout_repeated_scan_and_table_sizes():
+    analyzer = QueryAnalyzer()
+    assert finding_types(analyzer, """
+    SELECT s.id, COUNT(*) FROM fact_shipments s
+    JOIN fact_vehicle_telemetry t ON s.vehicle_id = t.vehicle_id
+    WHERE s.status = 'LATE' GROUP BY s.id
+    """) == ['JOIN_FANOUT']
+    repeated = "SELECT id FROM fact_shipments WHERE x = 1 UNION ALL SELECT id FROM fact_shipments WHERE x = 2"
+    assert finding_types(analyzer, repeated) == ['REPEATED_SCAN']
+
+    sized = QueryAnalyzer(table_sizes_gb={'fact_shipments': 1, 'dim_customer': 50})
+    assert finding_types(sized, "SELECT id FROM fact_shipments") == []
+    assert finding_types(sized, "SELECT id FROM dim_customer") == ['FILTER_OPTIMIZATION']
+
+
+def test_unparseable_sql_has_no_findings():
+    assert QueryAnalyzer().analyze_many(["SELEC nonsense (((", None]) == [[], []]
@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from query_history_store import QueryHistoryStore, normalize_queries
+
+
+def history(day, query_ids, **columns):
+    return pd.DataFrame({
+        'QUERY_ID': query_ids,
+        'QUERY_TEXT': [f"SELECT * FROM fact_shipments WHERE shipment_id = {i}" for i in range(len(query_ids))],
+        'WAREHOUSE_NAME': 'ANALYTICS_WH',
+        'START_TIME': pd.Timestamp(day, tz='UTC'),
+        'EXECUTION_TIME': 2000,
+        **columns
+    })
+
+
+def test_partitions_with_all_null_columns_aggregate_together(tmp_path):
+    store = QueryHistoryStore(str(tmp_path))
+    # Export without sizes or users: those columns are entirely None in the batch
+    store.ingest_batches([history('2024-06-01', ['a1', 'a2'])])
+    store.ingest_batches([history('2024-06-02', ['b1'], WAREHOUSE_SIZE='MEDIUM', USER_NAME='ETL',
+                                  QUERY_TYPE='SELECT', BYTES_SCANNED=10 ** 9, EXECUTION_STATUS='SUCCESS')])
+    # A partition written by an older version, with a null-typed column
+    legacy = store.load_queries(since_days=None).head(1).assign(query_id='c1', user_name=None)
+    os.makedirs(tmp_path / 'queries' / 'day=2024-06-03')
+    legacy.to_parquet(tmp_path / 'queries' / 'day=2024-06-03' / 'part-legacy.parquet', index=False)
+
+    [row] = store.aggregate_fingerprints(since_days=None).to_dict('records')
+    assert row['executions'] == 4
+    assert row['user_count'] == 1
+    assert row['total_cost_usd'] > 0
+    assert sorted(store.load_queries(since_days=None)['query_id']) == ['a1', 'a2', 'b1', 'c1']
+
+
+def test_normalize_queries_strips_literals_comments_and_lists():
+    normalized = normalize_queries(pd.Series([
+        "select * from t where id in (1, 2, 3) -- ad hoc\n and name = 'O''Brien'",
+        "SELECT *  FROM t /* dashboard */ WHERE id IN (7) AND name = 'x'",
+        "insert into t values (1, 'a'), (2, 'b')",
+        "select col_2024 from t2"
+    ]))
+    assert normalized[0] == normalized[1] == "SELECT * FROM T WHERE ID IN(?)AND NAME=?"
+    assert normalized[2] == "INSERT INTO T VALUES(?)"
+    assert normalized[3] == "SELECT COL_2024 FROM T2"
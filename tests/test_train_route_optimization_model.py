@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from feature_schema import ROUTE_FEATURE_COLUMNS
+from model_artifacts import load_metadata, load_model_artifact, save_model_artifact
+from train_route_optimization_model import RouteOptimizationModelTrainer, optimized_delivery_time
+
+
+def feature_rows(rows: int, days_ago: range, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: rng.uniform(1, 10, rows) for c in ROUTE_FEATURE_COLUMNS})
+    df['estimated_duration_minutes'] = 20 + 4 * df['distance_km']
+    df['actual_duration_minutes'] = df['estimated_duration_minutes'] * (0.85 + 0.03 * df['traffic_delay_factor'])
+    df['feature_date'] = [date.today() - timedelta(days=int(d)) for d in rng.choice(days_ago, rows)]
+    return df
+
+
+def previous_model(tmp_path, old: pd.DataFrame, n_estimators: int = 20) -> str:
+    X = old[ROUTE_FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    y = optimized_delivery_time(old['estimated_duration_minutes'].to_numpy(), old['actual_duration_minutes'].to_numpy())
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=8, random_state=0).fit(X, y)
+    model_path = str(tmp_path / 'route_model.pkl')
+    save_model_artifact(model, model_path, ROUTE_FEATURE_COLUMNS, 'route_optimization')
+    return model_path
+
+
+def test_incremental_training_adds_trees_fitted_on_new_rows_only(tmp_path):
+    old = feature_rows(2_000, range(30, 300), seed=0)
+    model_path = previous_model(tmp_path, old)
+    trained_on = date.fromisoformat(load_metadata(model_path)['training_date'][:10])
+    new = feature_rows(600, range(0, 1), seed=1)
+    pd.concat([old, new]).to_parquet(tmp_path / 'features.parquet', index=False)
+
+    trainer = RouteOptimizationModelTrainer(str(tmp_path / 'features.parquet'), n_jobs=1)
+    trainer.training_config['incremental_min_rows'] = 100
+    result = trainer.train_incremental(previous_path=model_path, deploy=False)
+
+    assert result['status'] == 'ACCEPTED'
+    metrics = result['metrics']
+    assert metrics['training_mode'] == 'incremental'
+    assert metrics['estimators_added'] == 4
+    assert metrics['incremental_since'] == trained_on.isoformat()
+    assert metrics['r2'] >= metrics['previous_r2'] - trainer.training_config['incremental_max_r2_drop']
+    # Not deployed: the previous artifact is untouched
+    assert len(load_model_artifact(model_path, prefer_flat=False).estimators_) == 20
+
+
+def test_incremental_training_defers_to_a_full_retrain(tmp_path):
+    old = feature_rows(500, range(30, 300), seed=0)
+    model_path = previous_model(tmp_path, old, n_estimators=10)
+    pd.concat([old, feature_rows(50, range(0, 1), seed=1)]).to_parquet(tmp_path / 'features.parquet', index=False)
+    trainer = RouteOptimizationModelTrainer(str(tmp_path / 'features.parquet'), n_jobs=1)
+
+    # Too few new rows keeps the current model
+    assert trainer.train_incremental(previous_path=model_path, deploy=False)['status'] == 'SKIPPED'
+    # A model already at the size limit needs a full retrain
+    trainer.training_config['incremental_max_estimators'] = 10
+    assert trainer.train_incremental(previous_path=model_path, deploy=False) is None
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from warehouse_simulator import WarehouseScenario, WarehouseSimulator, normalize_size, prepare_workload
+
+
+def workload(offsets, execution_seconds=30):
+    start = pd.Timestamp('2024-06-03 08:00', tz='UTC')
+    return prepare_workload(pd.DataFrame({
+        'WAREHOUSE_NAME': 'ANALYTICS_WH',
+        'WAREHOUSE_SIZE': 'X-Small',
+        'START_TIME': [start + pd.Timedelta(seconds=offset) for offset in offsets],
+        'EXECUTION_TIME': execution_seconds * 1000
+    }), 'analytics_wh')
+
+
+def test_queries_queue_fifo_for_a_busy_slot():
+    replayed = WarehouseSimulator().replay(workload([0, 10, 20]),
+                                           WarehouseScenario('X-SMALL', auto_suspend_seconds=60, max_concurrency=1))
+    # The first query waits for the resume; the others for the query ahead of them
+    assert replayed['waits'].tolist() == [1, 21, 41]
+    # Busy until 91, then idle for the 60 second auto-suspend
+    assert replayed['seconds'] == 151
+    assert replayed['resumes'] == 1
+
+
+def test_multi_cluster_warehouse_adds_a_cluster_for_the_backlog():
+    replayed = WarehouseSimulator().replay(workload([0, 10, 20]), WarehouseScenario(
+        'X-SMALL', auto_suspend_seconds=60, max_clusters=2, max_concurrency=1))
+    assert replayed['waits'].tolist() == [1, 1, 11]
+    assert replayed['peak_clusters'] == 2
+    assert replayed['seconds'] == 121 + 91
+
+
+def test_idle_warehouse_suspends_and_bills_a_minimum_per_resume():
+    simulator = WarehouseSimulator()
+    replayed = simulator.replay(workload([0, 1000]), WarehouseScenario('X-SMALL', auto_suspend_seconds=60))
+    assert replayed['resumes'] == 2
+    assert replayed['seconds'] == 91 + 91
+    short = simulator.replay(workload([0, 1000], execution_seconds=1),
+                             WarehouseScenario('X-SMALL', auto_suspend_seconds=1))
+    assert short['seconds'] == 60 + 60
+
+
+def test_larger_size_shortens_the_parallel_share_of_execution():
+    simulator = WarehouseSimulator(parallel_fraction=0.8)
+    result = simulator.simulate(workload([0]), WarehouseScenario('SMALL'))
+    assert result['avg_execution_seconds'] == pytest.approx(30 * (0.8 / 2 + 0.2))
+    assert normalize_size('xsmall') == 'X-SMALL' and normalize_size('huge') is None